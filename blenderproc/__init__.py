@@ -2,6 +2,7 @@
 
 import os
 import sys
+from typing import TYPE_CHECKING
 from .version import __version__
 from .python.utility.SetupUtility import SetupUtility, is_using_external_bpy_module
 
@@ -37,25 +38,51 @@
     
     if not is_using_external_bpy_module():
         SetupUtility.setup([])
-        
-    from .api import loader
-    from .api import utility
-    from .api import sampler
-    from .api import math
-    from .python.utility.Initializer import init, clean_up
-    from .api import postprocessing
-    from .api import writer
-    from .api import material
-    from .api import lighting
-    from .api import camera
-    from .api import renderer
-    from .api import world
-    from .api import constructor
-    from .api import types
-    # pylint: disable=redefined-builtin
-    from .api import object
-    from .api import filter
-    # pylint: enable=redefined-builtin
+
+    # The api namespaces are only imported on first access (e.g. bproc.writer), as together they pull in heavy
+    # dependencies like h5py, scipy or trimesh, which most scripts do not need all of
+    _LAZY_API_MODULES = ["loader", "utility", "sampler", "math", "postprocessing", "writer", "material", "lighting",
+                         "camera", "renderer", "world", "constructor", "types", "object", "filter"]
+    _LAZY_INITIALIZER_FUNCTIONS = ["init", "clean_up"]
+
+    def __getattr__(name: str):
+        """ Imports the requested api namespace or function on first access. """
+        # pylint: disable=import-outside-toplevel
+        import importlib
+        # pylint: enable=import-outside-toplevel
+        if name in _LAZY_API_MODULES:
+            value = importlib.import_module(f".api.{name}", __name__)
+        elif name in _LAZY_INITIALIZER_FUNCTIONS:
+            value = getattr(importlib.import_module(".python.utility.Initializer", __name__), name)
+        else:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        # Cache the value, so this function is not called again for the same name
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_API_MODULES) | set(_LAZY_INITIALIZER_FUNCTIONS))
+
+    if TYPE_CHECKING:
+        # Let IDEs and type checkers resolve the lazily imported namespaces
+        from .api import loader
+        from .api import utility
+        from .api import sampler
+        from .api import math
+        from .python.utility.Initializer import init, clean_up
+        from .api import postprocessing
+        from .api import writer
+        from .api import material
+        from .api import lighting
+        from .api import camera
+        from .api import renderer
+        from .api import world
+        from .api import constructor
+        from .api import types
+        # pylint: disable=redefined-builtin
+        from .api import object
+        from .api import filter
+        # pylint: enable=redefined-builtin
 else:
     # this checks if blenderproc the command line tool or the cli.py script are used. If not an exception is thrown
     import traceback
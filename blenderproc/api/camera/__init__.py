@@ -3,6 +3,7 @@
     get_view_fac_in_px, get_intrinsics_as_K_matrix, get_fov, add_depth_of_field, set_resolution, \
     get_camera_frustum, get_camera_frustum_as_object, is_point_inside_camera_frustum
 from blenderproc.python.camera.CameraValidation import perform_obstacle_in_view_check, visible_objects, \
-    scene_coverage_score, decrease_interest_score, check_novel_pose
+    scene_coverage_score, decrease_interest_score, check_novel_pose, perform_obstacle_in_view_check_batch, \
+    visible_objects_batch, scene_coverage_score_batch, PoseNoveltyTracker
 from blenderproc.python.camera.LensDistortionUtility import set_lens_distortion, set_camera_parameters_from_config_file
 from blenderproc.python.camera.CameraProjection import depth_via_raytracing, depth_at_points_via_raytracing, pointcloud_from_depth, project_points, unproject_points
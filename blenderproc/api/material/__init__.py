@@ -2,5 +2,6 @@
     add_alpha_texture_node, add_ambient_occlusion, add_base_color, add_bump, add_displacement, add_metal, \
     add_normal, add_roughness, add_specular, change_to_texture_less_render, collect_all, connect_uv_maps, \
     convert_to_materials, create_image_node, create, is_material_used, create_new_cc_material, \
-    create_procedural_texture, find_cc_material_by_name, create_material_from_texture
+    create_procedural_texture, find_cc_material_by_name, find_cc_materials_by_name, \
+    create_material_from_texture
 from blenderproc.python.material.Dust import add_dust
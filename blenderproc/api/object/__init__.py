@@ -4,7 +4,8 @@
 from blenderproc.python.object.ObjectReplacer import replace_objects
 from blenderproc.python.object.OnSurfaceSampler import sample_poses_on_surface
 from blenderproc.python.object.PhysicsSimulation import simulate_physics_and_fix_final_poses, simulate_physics, simulate_physics_and_persist_all_frames
+from blenderproc.python.object.PhysicsSimulationPool import PhysicsSimulationPool
 from blenderproc.python.types.MeshObjectUtility import get_all_mesh_objects, convert_to_meshes, \
     create_from_blender_mesh, create_with_empty_mesh, create_primitive, disable_all_rigid_bodies, \
-    create_bvh_tree_multi_objects, compute_poi, scene_ray_cast, create_from_point_cloud
+    create_bvh_tree_multi_objects, create_ray_caster_multi_objects, compute_poi, scene_ray_cast, create_from_point_cloud
 from blenderproc.python.types.EntityUtility import create_empty, delete_multiple, convert_to_entities
@@ -1,4 +1,36 @@
-from blenderproc.python.writer.GifWriterUtility import write_gif_animation
-from blenderproc.python.writer.BopWriterUtility import write_bop
-from blenderproc.python.writer.CocoWriterUtility import write_coco_annotations
-from blenderproc.python.writer.WriterUtility import write_hdf5
+from typing import TYPE_CHECKING
+
+# Every writer is only imported on first access, as they depend on different heavy libraries (e.g. matplotlib for
+# gifs, skimage for coco), while most scripts use just one of them
+_LAZY_WRITER_FUNCTIONS = {
+    "write_gif_animation": "blenderproc.python.writer.GifWriterUtility",
+    "write_bop": "blenderproc.python.writer.BopWriterUtility",
+    "write_coco_annotations": "blenderproc.python.writer.CocoWriterUtility",
+    "consolidate_coco_annotations": "blenderproc.python.writer.CocoWriterUtility",
+    "write_hdf5": "blenderproc.python.writer.WriterUtility",
+    "flush_hdf5_writes": "blenderproc.python.writer.WriterUtility",
+}
+__all__ = list(_LAZY_WRITER_FUNCTIONS)
+
+
+def __getattr__(name: str):
+    """ Imports the module of the requested writer function on first access. """
+    if name not in _LAZY_WRITER_FUNCTIONS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # pylint: disable=import-outside-toplevel
+    import importlib
+    # pylint: enable=import-outside-toplevel
+    value = getattr(importlib.import_module(_LAZY_WRITER_FUNCTIONS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_WRITER_FUNCTIONS))
+
+
+if TYPE_CHECKING:
+    from blenderproc.python.writer.GifWriterUtility import write_gif_animation
+    from blenderproc.python.writer.BopWriterUtility import write_bop
+    from blenderproc.python.writer.CocoWriterUtility import write_coco_annotations, consolidate_coco_annotations
+    from blenderproc.python.writer.WriterUtility import write_hdf5, flush_hdf5_writes
@@ -13,6 +13,9 @@
 # pylint: disable=wrong-import-position
 from blenderproc.python.utility.SetupUtility import SetupUtility, is_using_external_bpy_module
 from blenderproc.python.utility.InstallUtility import InstallUtility
+from blenderproc.python.utility.RunScheduler import RunScheduler
+from blenderproc.python.utility.ServeUtility import BlenderWorkerServer, submit_job, shutdown_server, \
+    DEFAULT_SERVE_PORT
 # pylint: enable=wrong-import-position
 
 
@@ -58,6 +61,11 @@ def cli():
     parser_debug = subparsers.add_parser('debug', help="Runs the BlenderProc pipeline in debug mode. This will open "
                                                        "the Blender UI, so the 3D scene created by the pipeline "
                                                        "can be visually inspected.")
+    parser_serve = subparsers.add_parser('serve', help="Keeps blender workers running, which execute the scripts "
+                                                       "sent via 'blenderproc submit'. This saves the startup time "
+                                                       "of blender and the loading of cached textures per script.")
+    parser_submit = subparsers.add_parser('submit', help="Runs a python file which uses BlenderProc via the API in "
+                                                         "one of the workers of a running 'blenderproc serve'.")
     parser_vis = subparsers.add_parser('vis', help=f"Visualize the content of BlenderProc output files. \n"
                                                    f"Options: {', '.join(options['vis'])}",
                                        formatter_class=argparse.RawTextHelpFormatter)
@@ -94,9 +102,41 @@ def cli():
                                  'folder, but into blenders python site-packages folder. This should only be used, '
                                  'if a specific pip package cannot be installed into a custom package path.')
 
+    parser_run.add_argument('--num-runs', dest='num_runs', type=int, default=1,
+                            help="The number of times the script is run. The placeholder {run} in the arguments of "
+                                 "the script is replaced with the index of the run, e.g. to use separate output "
+                                 "directories.")
+    parser_run.add_argument('--run-workers', dest='run_workers', type=int, default=1,
+                            help="The number of blender processes which run at the same time, the cpu cores are "
+                                 "split evenly between them. Like all options of blenderproc, this is also taken "
+                                 "from the arguments after the script, so the script itself should not use options "
+                                 "with the same names.")
+    parser_run.add_argument('--base-seed', dest='base_seed', type=int, default=None,
+                            help="The random seed of the first run, run i uses base-seed + i. Default: The env "
+                                 "variable BLENDER_PROC_RANDOM_SEED or 0, if multiple runs are scheduled.")
+    parser_run.add_argument('--max-retries', dest='max_retries', type=int, default=2,
+                            help="The number of times a failed run is started again, if multiple runs are "
+                                 "scheduled.")
+    parser_serve.add_argument('--workers', dest='workers', type=int, default=1,
+                              help="The number of blender processes, which run scripts at the same time.")
+    parser_submit.add_argument('file', nargs='?', default=None,
+                               help='The path to a python file which uses BlenderProc via the API.')
+    parser_submit.add_argument('--seed', dest='seed', type=int, default=None,
+                               help="The random seed, which is used by bproc.init() when running the script.")
+    parser_submit.add_argument('--shutdown', dest='shutdown', action='store_true',
+                               help="If set, the server is stopped after all queued jobs are done.")
+    for subparser in [parser_serve, parser_submit]:
+        subparser.add_argument('--port', dest='port', type=int, default=DEFAULT_SERVE_PORT,
+                               help="The local port used to submit jobs to the server.")
+        subparser.add_argument('--authkey', dest='authkey', default=os.environ.get("BLENDER_PROC_SERVE_AUTHKEY"),
+                               help="The key used to authenticate the submitted jobs. Default: The env variable "
+                                    "BLENDER_PROC_SERVE_AUTHKEY or a random key, which serve writes to "
+                                    "~/.config/blenderproc/serve_<port>.key, only readable by the current user, and "
+                                    "submit reads from there.")
+
     # Setup all common arguments of run and debug mode
-    for subparser in [parser_run, parser_debug, parser_quickstart]:
-        if subparser != parser_quickstart:
+    for subparser in [parser_run, parser_debug, parser_quickstart, parser_serve]:
+        if subparser not in [parser_quickstart, parser_serve]:
             subparser.add_argument('file', help='The path to a python file which uses BlenderProc via the API.')
 
         subparser.add_argument('--reinstall-blender', dest='reinstall_blender', action='store_true',
@@ -113,7 +153,7 @@ def cli():
                                     "based on pip freeze.")
 
     # Setup common arguments of run, debug and pip mode
-    for subparser in [parser_run, parser_debug, parser_pip, parser_quickstart]:
+    for subparser in [parser_run, parser_debug, parser_pip, parser_quickstart, parser_serve]:
         subparser.add_argument('--blender-install-path', dest='blender_install_path', default=None,
                                help="Set path where blender should be installed. If None is given, "
                                     "/home_local/<env:USER>/blender/ is used per default.")
@@ -173,6 +213,24 @@ def cli():
         if args.force_pip_update:
             SetupUtility.clean_installed_packages_cache(os.path.dirname(blender_run_path), major_version)
 
+        if args.mode == "run" and (args.num_runs > 1 or args.run_workers > 1):
+            base_seed = args.base_seed
+            if base_seed is None:
+                base_seed = int(os.environ.get("BLENDER_PROC_RANDOM_SEED", "0"))
+            scheduler = RunScheduler(blender_run_path, path_src_run, unknown_args, used_environment, temp_dir,
+                                     args.num_runs, args.run_workers, base_seed, args.max_retries)
+            signal.signal(signal.SIGTERM, lambda _signum, _frame: scheduler.stop())
+            try:
+                success = scheduler.run()
+            except KeyboardInterrupt:
+                success = False
+            if not args.keep_temp_dir and os.path.exists(temp_dir):
+                print("Cleaning temporary directory")
+                shutil.rmtree(temp_dir)
+            sys.exit(0 if success else 1)
+        if args.mode == "run" and args.base_seed is not None:
+            used_environment["BLENDER_PROC_RANDOM_SEED"] = str(args.base_seed)
+
         # Run either in debug or in normal mode
         if args.mode == "debug":
             # pylint: disable=consider-using-with
@@ -215,6 +273,38 @@ def handle_sigterm(_signum, _frame):
         clean_temp_dir()
 
         sys.exit(p.returncode)
+    elif args.mode == "serve":
+        if is_using_external_bpy_module():
+            print("USE_EXTERNAL_BPY_MODULE is set, serve mode is not supported.")
+            sys.exit(1)
+
+        temp_dir = SetupUtility.determine_temp_dir(args.temp_dir)
+        custom_blender_path, blender_install_path = InstallUtility.determine_blender_install_path(args)
+        blender_run_path, major_version = InstallUtility.make_sure_blender_is_installed(custom_blender_path,
+                                                                                        blender_install_path,
+                                                                                        args.reinstall_blender)
+        if args.force_pip_update:
+            SetupUtility.clean_installed_packages_cache(os.path.dirname(blender_run_path), major_version)
+
+        server = BlenderWorkerServer(blender_run_path, args.workers, temp_dir, args.port, args.authkey)
+        signal.signal(signal.SIGTERM, lambda _signum, _frame: server.shutdown())
+        try:
+            server.serve_forever()
+        finally:
+            if not args.keep_temp_dir and os.path.exists(temp_dir):
+                print("Cleaning temporary directory")
+                shutil.rmtree(temp_dir)
+    elif args.mode == "submit":
+        if args.file is not None:
+            SetupUtility.check_if_setup_utilities_are_at_the_top(args.file)
+            result = submit_job(args.file, unknown_args, args.seed, args.port, args.authkey)
+            print(f"Finished on worker {result.get('worker')} after {result.get('duration', 0):.2f}s")
+            if not result["success"]:
+                print(result["error"])
+        if args.shutdown:
+            shutdown_server(args.port, args.authkey)
+        if args.file is not None and not result["success"]:
+            sys.exit(1)
     # Import the required entry point
     elif args.mode in ["vis", "extract", "download"]:
         # pylint: disable=import-outside-toplevel
@@ -32,6 +32,8 @@
 from mathutils import Matrix
 import bmesh
 
+from blenderproc.python.utility.BlenderUtility import get_mesh_vertices_and_triangles
+
 
 def convex_decomposition(obj: "MeshObject", temp_dir: str, vhacd_path: str, resolution: int = 1000000,
                          name_template: str = "?_hull_#", remove_doubles: bool = True, apply_modifiers: bool = True,
@@ -112,12 +114,14 @@ def convex_decomposition(obj: "MeshObject", temp_dir: str, vhacd_path: str, reso
     bmesh.ops.triangulate(bm, faces=bm.faces)
     bm.to_mesh(mesh)
     bm.free()
+    vertices, triangles = get_mesh_vertices_and_triangles(mesh)
+    bpy.data.meshes.remove(mesh)
 
     # Build a hash for the given mesh
     mesh_hash = 0
-    for vert in mesh.vertices:
+    for vert in vertices.tolist():
         # Combine the hashes of the local coordinates of all vertices
-        mesh_hash = hash((mesh_hash, hash(vert.co[:])))
+        mesh_hash = hash((mesh_hash, hash(tuple(vert))))
     mesh_hash = abs(mesh_hash)
 
     if cache_dir is None or not os.path.exists(os.path.join(cache_dir, str(mesh_hash) + ".obj")):
@@ -127,8 +131,7 @@ def convex_decomposition(obj: "MeshObject", temp_dir: str, vhacd_path: str, reso
 
         # Run V-HACD
         print(f"\nExporting mesh for V-HACD: {off_filename}...")
-        obj_export(mesh, off_filename)
-        bpy.data.meshes.remove(mesh)
+        obj_export(vertices, triangles, off_filename)
         cmd_line = f'"{vhacd_binary}" {off_filename} -r {resolution} -v {max_num_vertices_per_ch} -d {depth}'
         if os.path.exists(os.path.basename(log_file_name)):
             cmd_line += f"2>&1 > {log_file_name}"
@@ -168,13 +171,8 @@ def convex_decomposition(obj: "MeshObject", temp_dir: str, vhacd_path: str, reso
     return imported
 
 
-def obj_export(mesh, fullpath):
+def obj_export(vertices: np.ndarray, triangles: np.ndarray, fullpath: str):
     """ Export triangulated mesh to Object File Format """
     with open(fullpath, "wb") as off:
-        # pylint: disable=consider-using-f-string
-        for vert in mesh.vertices:
-            off.write(str.encode("v {:g} {:g} {:g}\n".format(*vert.co)))
-        for face in mesh.polygons:
-            vertices = np.array(face.vertices) + 1
-            off.write(str.encode("f {} {} {}\n".format(*vertices)))
-        # pylint: enable=consider-using-f-string
+        np.savetxt(off, vertices, fmt="v %g %g %g")
+        np.savetxt(off, triangles + 1, fmt="f %d %d %d")
@@ -1,5 +1,5 @@
 """ Collection of camera projection helper functions."""
-from typing import Optional
+from typing import Optional, Union
 from blenderproc.python.postprocessing.PostProcessingUtility import dist2depth
 from blenderproc.python.types.MeshObjectUtility import create_primitive
 
@@ -8,15 +8,20 @@
 from mathutils.bvhtree import BVHTree
 
 from blenderproc.python.utility.Utility import KeyFrame
+from blenderproc.python.utility.RayCastUtility import TriangleRayCaster, cast_rays
 from blenderproc.python.camera.CameraUtility import get_camera_pose, get_intrinsics_as_K_matrix
+from blenderproc.python.renderer.RasterizerUtility import rasterize_triangles
 
 
-def depth_via_raytracing(bvh_tree: BVHTree, frame: Optional[int] = None, return_dist: bool = False) -> np.ndarray:
+def depth_via_raytracing(bvh_tree: Union[BVHTree, TriangleRayCaster], frame: Optional[int] = None,
+                         return_dist: bool = False) -> np.ndarray:
     """ Computes a depth images using raytracing.
 
     All pixel that correspond to rays which do not hit any object are set to inf.
 
-    :param bvh_tree: The BVH tree to use for raytracing.
+    :param bvh_tree: The BVH tree to use for raytracing. If a ray caster created via
+                     `bproc.object.create_ray_caster_multi_objects()` is given, the primary rays of all pixels are
+                     resolved at once by rasterizing its triangles, which is much faster.
     :param frame: The frame number whose assigned camera pose should be used. If None is given, the current frame
                   is used.
     :param return_dist: If True, a distance image instead of a depth image is returned.
@@ -25,6 +30,22 @@ def depth_via_raytracing(bvh_tree: BVHTree, frame: Optional[int] = None, return_
     resolution_x = bpy.context.scene.render.resolution_x
     resolution_y = bpy.context.scene.render.resolution_y
 
+    if isinstance(bvh_tree, TriangleRayCaster):
+        # The rays through all pixel centers hit the same triangles which are visible there after rasterization
+        with KeyFrame(frame):
+            cam2world = get_camera_pose()
+            K = get_intrinsics_as_K_matrix()
+        # Maps the blender camera frame (-z forward, y up) to the opencv camera frame (z forward, y down)
+        world2cam = np.diag([1.0, -1.0, -1.0]) @ np.linalg.inv(cam2world)[:3]
+        triangles = bvh_tree.get_triangles() @ world2cam[:, :3].T + world2cam[:, 3]
+        # Like the rays, the triangles are only clipped right in front of the camera position
+        depth = rasterize_triangles(triangles, K, resolution_x, resolution_y, clip_start=1e-6, clip_end=np.inf)[0]
+        if return_dist:
+            points = np.stack(np.meshgrid(np.arange(resolution_x), np.arange(resolution_y), indexing="xy"), -1)
+            rays = np.concatenate((points, np.ones_like(points[..., :1])), -1) @ np.linalg.inv(K).T
+            depth = depth * np.linalg.norm(rays, axis=-1)
+        return depth
+
     # Generate 2D coordinates of all pixels
     y = np.arange(resolution_y)   
     x = np.arange(resolution_x)
@@ -38,12 +59,14 @@ def depth_via_raytracing(bvh_tree: BVHTree, frame: Optional[int] = None, return_
     return depth
 
 
-def depth_at_points_via_raytracing(bvh_tree: BVHTree, points_2d: np.ndarray, frame: Optional[int] = None, return_dist: bool = False) -> np.ndarray:
+def depth_at_points_via_raytracing(bvh_tree: Union[BVHTree, TriangleRayCaster], points_2d: np.ndarray,
+                                   frame: Optional[int] = None, return_dist: bool = False) -> np.ndarray:
     """ Computes the depth values at the given 2D points.
 
     All points that correspond to rays which do not hit any object are set to inf.
 
-    :param bvh_tree: The BVH tree to use for raytracing.
+    :param bvh_tree: The BVH tree to use for raytracing. A ray caster created via
+                     `bproc.object.create_ray_caster_multi_objects()` casts all rays at once as numpy arrays.
     :param points_2d: An array of N 2D points with shape [N, 2].
     :param frame: The frame number whose assigned camera pose should be used. If None is given, the current frame
                   is used.
@@ -64,23 +87,18 @@ def depth_at_points_via_raytracing(bvh_tree: BVHTree, points_2d: np.ndarray, fra
         frame = [cam2world_matrix @ v for v in frame]
 
         # Compute vectors along both sides of the plane
+        frame = np.array([list(v) for v in frame])
         vec_x = frame[3] - frame[0]
         vec_y = frame[1] - frame[0]
 
-        dists = []
-        # Go in discrete grid-like steps over plane
-        position = cam2world_matrix.to_translation()
-        for p in points_2d:
-            # Compute current point on plane
-            end = frame[0] + vec_x * (resolution_x - (p[0] + 0.5)) / float(resolution_x) \
-                    + vec_y * (p[1] + 0.5) / float(resolution_y)
-            # Send ray from the camera position through the current point on the plane
-            _, _, _, dist = bvh_tree.ray_cast(position, end - position)
-            if dist is None:
-                dist = np.inf
-
-            dists.append(dist)
-        dists = np.array(dists)
+        # Compute the points on the plane corresponding to all 2D points at once
+        points_2d = np.asarray(points_2d)
+        ends = frame[0] + vec_x * ((resolution_x - (points_2d[:, :1] + 0.5)) / float(resolution_x)) \
+            + vec_y * ((points_2d[:, 1:2] + 0.5) / float(resolution_y))
+        # Send rays from the camera position through the points on the plane
+        position = np.array(cam2world_matrix.to_translation())
+        dists = cast_rays(bvh_tree, position, ends - position)[4]
+        dists[np.isnan(dists)] = np.inf
 
         if not return_dist:
             return dist2depth(dists, points_2d)
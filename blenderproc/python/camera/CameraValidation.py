@@ -2,7 +2,7 @@
 
 import numbers
 import sys
-from typing import Union, List, Set
+from typing import Union, List, Set, Tuple, Dict, Optional, Any
 from collections import defaultdict
 
 import bpy
@@ -10,11 +10,13 @@
 from mathutils import Matrix
 from mathutils.bvhtree import BVHTree
 
-from blenderproc.python.types.MeshObjectUtility import MeshObject
+from blenderproc.python.types.MeshObjectUtility import MeshObject, get_all_mesh_objects, \
+    create_bvh_tree_multi_objects
+from blenderproc.python.utility.RayCastUtility import TriangleRayCaster, cast_rays
 
 
 def perform_obstacle_in_view_check(cam2world_matrix: Union[Matrix, np.ndarray], proximity_checks: dict,
-                                   bvh_tree: BVHTree, sqrt_number_of_rays: int = 10) -> bool:
+                                   bvh_tree: Union[BVHTree, TriangleRayCaster], sqrt_number_of_rays: int = 10) -> bool:
     """ Check if there are obstacles in front of the camera which are too far or too close based on the given
         proximity_checks.
 
@@ -32,24 +34,33 @@ def perform_obstacle_in_view_check(cam2world_matrix: Union[Matrix, np.ndarray],
     if not proximity_checks:  # if no checks are in the settings all positions are accepted
         return True
 
-    cam2world_matrix = Matrix(cam2world_matrix)
+    valid, _ = perform_obstacle_in_view_check_batch(np.array(cam2world_matrix)[np.newaxis], proximity_checks,
+                                                    bvh_tree, sqrt_number_of_rays)
+    return bool(valid[0])
 
-    cam_ob = bpy.context.scene.camera
-    cam = cam_ob.data
-    # Get position of the corners of the near plane
-    frame = cam.view_frame(scene=bpy.context.scene)
-    # Bring to world space
-    frame = [cam2world_matrix @ v for v in frame]
 
-    # Compute vectors along both sides of the plane
-    vec_x = frame[1] - frame[0]
-    vec_y = frame[3] - frame[0]
+def perform_obstacle_in_view_check_batch(cam2world_matrices: np.ndarray, proximity_checks: dict,
+                                         bvh_tree: Union[BVHTree, TriangleRayCaster], sqrt_number_of_rays: int = 10) \
+        -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """ Checks many camera poses at once for obstacles in front of the camera which are too far or too close based
+        on the given proximity_checks.
 
-    sum_value = 0.0
-    sum_sq = 0.0
-
-    range_distance = sys.float_info.max
+    The rays of all poses are cast together, see perform_obstacle_in_view_check() for the details of the check.
 
+    :param cam2world_matrices: The camera poses to check with shape [N, 4, 4].
+    :param proximity_checks: A dictionary containing operators (e.g. avg, min) as keys and as values dictionaries
+                             containing thresholds in the form of {"min": 1.0, "max":4.0} or just the numerical
+                             threshold in case of max or min. The operators are combined in conjunction
+                             (i.e boolean AND). This can also be used to avoid the background in images, with the
+                             no_background: True option.
+    :param bvh_tree: A bvh tree containing all objects that should be considered here. A ray caster created via
+                     create_ray_caster_multi_objects() casts the rays of all poses at once.
+    :param sqrt_number_of_rays: The square root of the number of rays which will be used per camera pose.
+    :return: Whether each camera pose does not violate any of the specified proximity_checks, shape [N].
+             A dict with the statistics of the distances per pose, each with shape [N]: "min" and "max" of the hit
+             distances (inf and -inf if nothing was hit), "avg" and "var" over all rays, where rays without a hit
+             count as zero, and "num_hits".
+    """
     # Input validation
     for operator in proximity_checks:
         if operator in ["min", "max"] and not isinstance(proximity_checks[operator], numbers.Number):
@@ -62,65 +73,97 @@ def perform_obstacle_in_view_check(cam2world_matrix: Union[Matrix, np.ndarray],
                     not isinstance(proximity_checks[operator]["max"], numbers.Number):
                 raise ValueError("Threshold must be a number in perform_obstacle_in_view_check")
 
+    range_distance = sys.float_info.max
     # If there are no average or variance operators, we can decrease the ray range distance for efficiency
     if "avg" not in proximity_checks and "var" not in proximity_checks:
         if "max" in proximity_checks:
             # Cap distance values at a value slightly higher than the max threshold
             range_distance = proximity_checks["max"] + 1.0
-        else:
+        elif "min" in proximity_checks:
             range_distance = proximity_checks["min"]
 
-    no_range_distance = False
-    if "no_background" in proximity_checks and proximity_checks["no_background"]:
+    no_background = "no_background" in proximity_checks and proximity_checks["no_background"]
+    if no_background:
         # when no background is on, it can not be combined with a reduced range distance
-        no_range_distance = True
+        range_distance = sys.float_info.max
 
-    # Go in discrete grid-like steps over plane
-    position = cam2world_matrix.to_translation()
-    for x in range(0, sqrt_number_of_rays):
-        for y in range(0, sqrt_number_of_rays):
-            # Compute current point on plane
-            end = frame[0] + vec_x * x / float(sqrt_number_of_rays - 1) + vec_y * y / float(sqrt_number_of_rays - 1)
-            # Send ray from the camera position through the current point on the plane
-            if no_range_distance:
-                _, _, _, dist = bvh_tree.ray_cast(position, end - position)
-            else:
-                _, _, _, dist = bvh_tree.ray_cast(position, end - position, range_distance)
-
-            # Check if something was hit and how far it is away
-            if dist is not None:
-                if "min" in proximity_checks and dist <= proximity_checks["min"]:
-                    return False
-                if "max" in proximity_checks and dist >= proximity_checks["max"]:
-                    return False
-                if "avg" in proximity_checks:
-                    sum_value += dist
-                if "var" in proximity_checks:
-                    if not "avg" in proximity_checks:
-                        sum_value += dist
-                    sum_sq += dist * dist
-            elif "no_background" in proximity_checks and proximity_checks["no_background"]:
-                return False
-
-    if "avg" in proximity_checks:
-        avg = sum_value / (sqrt_number_of_rays * sqrt_number_of_rays)
-        # Check that the average distance is not within the accepted interval
-        if avg >= proximity_checks["avg"]["max"] or avg <= proximity_checks["avg"]["min"]:
-            return False
-
-    if "var" in proximity_checks:
-        if not "avg" in proximity_checks:
-            avg = sum_value / (sqrt_number_of_rays * sqrt_number_of_rays)
-        sq_avg = avg * avg
-
-        avg_sq = sum_sq / (sqrt_number_of_rays * sqrt_number_of_rays)
-
-        var = avg_sq - sq_avg
-        # Check that the variance value of the distance is not within the accepted interval
-        if var >= proximity_checks["var"]["max"] or var <= proximity_checks["var"]["min"]:
-            return False
-
-    return True
+    # Send rays from the camera positions through a grid of points on the near planes
+    origins, directions = _camera_rays(cam2world_matrices, sqrt_number_of_rays)
+    hits, _, _, _, dists = cast_rays(bvh_tree, origins.reshape(-1, 3), directions.reshape(-1, 3), range_distance)
+    hits, dists = hits.reshape(origins.shape[:2]), dists.reshape(origins.shape[:2])
+
+    num_of_rays = sqrt_number_of_rays * sqrt_number_of_rays
+    hit_dists = np.where(hits, dists, 0.0)
+    avg = np.sum(hit_dists, axis=1) / num_of_rays
+    stats = {
+        "min": np.min(np.where(hits, dists, np.inf), axis=1),
+        "max": np.max(np.where(hits, dists, -np.inf), axis=1),
+        "avg": avg,
+        "var": np.sum(hit_dists * hit_dists, axis=1) / num_of_rays - avg * avg,
+        "num_hits": np.count_nonzero(hits, axis=1)
+    }
+
+    valid = np.ones(len(hits), dtype=bool)
+    if proximity_checks:
+        # Check if something was hit and how far it is away
+        if "min" in proximity_checks:
+            valid &= stats["min"] > proximity_checks["min"]
+        if "max" in proximity_checks:
+            valid &= stats["max"] < proximity_checks["max"]
+        if no_background:
+            valid &= stats["num_hits"] == num_of_rays
+        # Check that the average distance and the variance are within the accepted interval
+        for operator in ["avg", "var"]:
+            if operator in proximity_checks:
+                valid &= (stats[operator] < proximity_checks[operator]["max"]) & \
+                         (stats[operator] > proximity_checks[operator]["min"])
+    return valid, stats
+
+
+def _camera_rays(cam2world_matrices: np.ndarray, sqrt_number_of_rays: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Computes the rays sent from the given camera poses through a grid of points on the near plane.
+
+    :param cam2world_matrices: The camera poses with shape [N, 4, 4].
+    :param sqrt_number_of_rays: The square root of the number of rays per camera pose.
+    :return: The origins and the directions of the rays, each with shape [N, sqrt_number_of_rays ** 2, 3].
+    """
+    cam2world_matrices = np.asarray(cam2world_matrices, dtype=np.float64).reshape(-1, 4, 4)
+    # Get position of the corners of the near plane in camera space
+    frame = np.array([list(v) for v in bpy.context.scene.camera.data.view_frame(scene=bpy.context.scene)])
+
+    # Go in discrete grid-like steps over plane, the same order as in the non-batched functions
+    steps_x, steps_y = np.meshgrid(np.linspace(0, 1, sqrt_number_of_rays), np.linspace(0, 1, sqrt_number_of_rays),
+                                   indexing="ij")
+    points = frame[0] + steps_x.reshape(-1, 1) * (frame[1] - frame[0]) + steps_y.reshape(-1, 1) * (frame[3] - frame[0])
+
+    # Bring to world space
+    ends = np.einsum("nij,rj->nri", cam2world_matrices[:, :3, :3], points) + cam2world_matrices[:, np.newaxis, :3, 3]
+    origins = np.broadcast_to(cam2world_matrices[:, np.newaxis, :3, 3], ends.shape)
+    return origins, ends - origins
+
+
+def _scene_ray_cast_batch(cam2world_matrices: np.ndarray, sqrt_number_of_rays: int,
+                          mesh_objects: Optional[List[MeshObject]]) -> Tuple[np.ndarray, List[MeshObject]]:
+    """ Casts the rays of all given camera poses onto the given objects and returns which object was hit.
+
+    Instead of the scene's ray_cast(), one bvh tree over all objects is used, so modifiers are not taken into account.
+
+    :param cam2world_matrices: The camera poses with shape [N, 4, 4].
+    :param sqrt_number_of_rays: The square root of the number of rays per camera pose.
+    :param mesh_objects: The objects to consider. If None, all visible mesh objects are used.
+    :return: The index of the hit object per ray with shape [N, sqrt_number_of_rays ** 2], -1 if nothing was hit,
+             and the list of objects the indices refer to.
+    """
+    if mesh_objects is None:
+        mesh_objects = [obj for obj in get_all_mesh_objects() if obj.blender_obj.visible_get()]
+    # The faces of all objects are stored one after another in the bvh tree
+    face_offsets = np.cumsum([0] + [len(obj.get_mesh().polygons) for obj in mesh_objects])
+    bvh_tree = create_bvh_tree_multi_objects(mesh_objects)
+
+    origins, directions = _camera_rays(cam2world_matrices, sqrt_number_of_rays)
+    hits, _, _, face_indices, _ = cast_rays(bvh_tree, origins.reshape(-1, 3), directions.reshape(-1, 3))
+    hit_objects = np.where(hits, np.searchsorted(face_offsets, face_indices, side="right") - 1, -1)
+    return hit_objects.reshape(origins.shape[:2]), mesh_objects
 
 
 def visible_objects(cam2world_matrix: Union[Matrix, np.ndarray], sqrt_number_of_rays: int = 10) -> Set[MeshObject]:
@@ -164,6 +207,22 @@ def visible_objects(cam2world_matrix: Union[Matrix, np.ndarray], sqrt_number_of_
     return visible_objects_set
 
 
+def visible_objects_batch(cam2world_matrices: np.ndarray, sqrt_number_of_rays: int = 10,
+                          mesh_objects: Optional[List[MeshObject]] = None) -> List[Set[MeshObject]]:
+    """ Returns the sets of objects visible from many camera poses at once.
+
+    The rays of all poses are cast together onto one bvh tree of the given objects, see visible_objects().
+
+    :param cam2world_matrices: The camera poses to check with shape [N, 4, 4].
+    :param sqrt_number_of_rays: The square root of the number of rays which will be used to determine the
+                                visible objects.
+    :param mesh_objects: The objects to consider. If None, all visible mesh objects are used.
+    :return: A set of objects hit by the sent rays for each camera pose.
+    """
+    hit_objects, mesh_objects = _scene_ray_cast_batch(cam2world_matrices, sqrt_number_of_rays, mesh_objects)
+    return [{mesh_objects[index] for index in np.unique(pose_hits[pose_hits >= 0])} for pose_hits in hit_objects]
+
+
 def scene_coverage_score(cam2world_matrix: Union[Matrix, np.ndarray], special_objects: list = None,
                          special_objects_weight: float = 2, sqrt_number_of_rays: int = 10) -> float:
     """ Evaluate the interestingness/coverage of the scene.
@@ -214,31 +273,91 @@ def scene_coverage_score(cam2world_matrix: Union[Matrix, np.ndarray], special_ob
                                                                      position, end - position)
 
             if hit:
-                is_of_special_dataset = "is_suncg" in hit_object or "is_3d_front" in hit_object
-                is_suncg_object = "suncg_type" in hit_object and hit_object["suncg_type"] == "Object"
-                is_front_3d_object = "3D_future_type" in hit_object and hit_object["3D_future_type"] == "Object"
-                if is_of_special_dataset and is_suncg_object or is_of_special_dataset and is_front_3d_object:
-                    # calculate the score based on the type of the object,
-                    # wall, floor and ceiling objects have 0 score
-                    if "coarse_grained_class" in hit_object:
-                        object_class = hit_object["coarse_grained_class"]
-                        objects_hit[object_class] += 1
-                        if object_class in special_objects:
-                            score += special_objects_weight
-                        else:
-                            score += 1
-                    else:
-                        score += 1
-                elif "category_id" in hit_object:
-                    object_class = hit_object["category_id"]
-                    if object_class in special_objects:
-                        score += special_objects_weight
-                    else:
-                        score += 1
+                object_class, object_score = _coverage_score_of_object(hit_object, special_objects,
+                                                                       special_objects_weight)
+                if object_class is not None:
                     objects_hit[object_class] += 1
-                else:
-                    objects_hit[hit_object] += 1
-                    score += 1
+                score += object_score
+    return _combine_coverage_score(score, objects_hit, num_of_rays)
+
+
+def scene_coverage_score_batch(cam2world_matrices: np.ndarray, special_objects: Optional[list] = None,
+                               special_objects_weight: float = 2, sqrt_number_of_rays: int = 10,
+                               mesh_objects: Optional[List[MeshObject]] = None) -> np.ndarray:
+    """ Evaluates the interestingness/coverage of the scene for many camera poses at once.
+
+    The rays of all poses are cast together onto one bvh tree of the given objects, see scene_coverage_score().
+
+    :param cam2world_matrices: The camera poses to check with shape [N, 4, 4].
+    :param special_objects: Objects that weights differently in calculating whether the scene is interesting or not,
+                            uses the coarse_grained_class or if not SUNCG, 3D Front, the category_id.
+    :param special_objects_weight: Weighting factor for more special objects, used to estimate how interesting the
+                                   scene is. Default: 2.0.
+    :param sqrt_number_of_rays: The square root of the number of rays which will be used to determine the
+                                visible objects.
+    :param mesh_objects: The objects to consider. If None, all visible mesh objects are used.
+    :return: The scoring of the scene for each camera pose, shape [N].
+    """
+    if special_objects is None:
+        special_objects = []
+    num_of_rays = sqrt_number_of_rays * sqrt_number_of_rays
+
+    hit_objects, mesh_objects = _scene_ray_cast_batch(cam2world_matrices, sqrt_number_of_rays, mesh_objects)
+    # The contribution of every object does not depend on the camera pose
+    contributions = [_coverage_score_of_object(obj.blender_obj, special_objects, special_objects_weight)
+                     for obj in mesh_objects]
+
+    scores = np.zeros(len(hit_objects))
+    for pose_index, pose_hits in enumerate(hit_objects):
+        objects_hit: defaultdict = defaultdict(int)
+        score = 0.0
+        object_indices, counts = np.unique(pose_hits[pose_hits >= 0], return_counts=True)
+        for object_index, count in zip(object_indices, counts):
+            object_class, object_score = contributions[object_index]
+            if object_class is not None:
+                objects_hit[object_class] += int(count)
+            score += object_score * int(count)
+        scores[pose_index] = _combine_coverage_score(score, objects_hit, num_of_rays)
+    return scores
+
+
+def _coverage_score_of_object(hit_object: bpy.types.Object, special_objects: list,
+                              special_objects_weight: float) -> Tuple[Optional[Any], float]:
+    """ Determines how a single ray hitting the given object contributes to the scene coverage score.
+
+    :param hit_object: The object hit by the ray.
+    :param special_objects: Objects that weights differently in calculating whether the scene is interesting or not.
+    :param special_objects_weight: Weighting factor for more special objects.
+    :return: The class the hit is counted for (None if it is not counted) and the score of the hit.
+    """
+    is_of_special_dataset = "is_suncg" in hit_object or "is_3d_front" in hit_object
+    is_suncg_object = "suncg_type" in hit_object and hit_object["suncg_type"] == "Object"
+    is_front_3d_object = "3D_future_type" in hit_object and hit_object["3D_future_type"] == "Object"
+    if is_of_special_dataset and is_suncg_object or is_of_special_dataset and is_front_3d_object:
+        # calculate the score based on the type of the object,
+        # wall, floor and ceiling objects have 0 score
+        if "coarse_grained_class" in hit_object:
+            object_class = hit_object["coarse_grained_class"]
+            if object_class in special_objects:
+                return object_class, special_objects_weight
+            return object_class, 1
+        return None, 1
+    if "category_id" in hit_object:
+        object_class = hit_object["category_id"]
+        if object_class in special_objects:
+            return object_class, special_objects_weight
+        return object_class, 1
+    return hit_object, 1
+
+
+def _combine_coverage_score(score: float, objects_hit: Dict[Any, int], num_of_rays: int) -> float:
+    """ Combines the summed up score of all rays and the number of hits per class into the scene coverage score.
+
+    :param score: The summed up score of all rays.
+    :param objects_hit: The number of rays which hit each class.
+    :param num_of_rays: The total number of rays.
+    :return: the scoring of the scene.
+    """
     # For a scene with three different objects, the starting variance is 1.0, increases/decreases by '1/3' for
     # each object more/less, excluding floor, ceiling and walls
     scene_variance = len(objects_hit) / 3.0
@@ -280,37 +399,147 @@ def check_novel_pose(cam2world_matrix: Union[Matrix, np.ndarray], existing_poses
                                      check that the variance is increased. Default: sys.float_info.min.
     :return: True, if the given pose is novel.
     """
-    def _variance_constraint(array, new_val, old_var, diff_threshold, mode):
-        array.append(new_val)
-        var = np.var(array)
-
-        if var < old_var:
-            array.pop()
-            return False
-
-        diff = ((var - old_var) / old_var) * 100.0
-        print(f"Variance difference {mode}: {diff}")
-        if diff < diff_threshold:  # Check if the variance increased sufficiently
-            array.pop()
-            return False
-
-        return True
-
-    if len(existing_poses) > 0:  # First pose is always novel
-        cam2world_matrix = Matrix(cam2world_matrix)
-        if check_pose_novelty_rot:
-            rotations = [Matrix(pose).to_euler() for pose in existing_poses]
-            var_rot = np.var(rotations)
-
-            if not _variance_constraint(rotations, cam2world_matrix.to_euler(), var_rot, min_var_diff_rot, "rotation"):
-                return False
-
-        if check_pose_novelty_translation:
-            translations = [Matrix(pose).to_translation() for pose in existing_poses]
-            var_translation = np.var(translations)
+    tracker = PoseNoveltyTracker(check_pose_novelty_rot, check_pose_novelty_translation, min_var_diff_rot,
+                                 min_var_diff_translation)
+    for pose in existing_poses:
+        tracker.add_pose(pose)
+    return tracker.is_novel(cam2world_matrix)
+
+
+class _RunningVariance:
+    """ Keeps track of the variance over all elements of the added vectors via Welford's algorithm. """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @staticmethod
+    def _combine(count_a: int, mean_a: Union[float, np.ndarray], m2_a: Union[float, np.ndarray], count_b: int,
+                 mean_b: Union[float, np.ndarray], m2_b: Union[float, np.ndarray]) \
+            -> Tuple[int, Union[float, np.ndarray], Union[float, np.ndarray]]:
+        """ Combines the statistics of two sets of values (Chan et al.). """
+        count = count_a + count_b
+        delta = mean_b - mean_a
+        mean = mean_a + delta * count_b / count
+        m2 = m2_a + m2_b + delta * delta * count_a * count_b / count
+        return count, mean, m2
+
+    def add(self, values: np.ndarray):
+        """ Adds the elements of the given vector.
+
+        :param values: The values to add.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        mean = np.mean(values)
+        self.count, self.mean, self.m2 = _RunningVariance._combine(self.count, self.mean, self.m2, len(values),
+                                                                   mean, np.sum((values - mean) ** 2))
+
+    def variance(self) -> float:
+        """ Returns the variance of all added values. """
+        return self.m2 / self.count if self.count > 0 else 0.0
+
+    def variance_with(self, values: np.ndarray) -> np.ndarray:
+        """ Returns the variances which would result from adding each of the given vectors individually.
+
+        :param values: The candidate vectors with shape [N, D].
+        :return: The resulting variance per candidate, shape [N].
+        """
+        values = np.asarray(values, dtype=np.float64)
+        means = np.mean(values, axis=1)
+        m2s = np.sum((values - means[:, np.newaxis]) ** 2, axis=1)
+        count, _, m2 = _RunningVariance._combine(self.count, self.mean, self.m2, values.shape[1], means, m2s)
+        return m2 / count
+
+
+class PoseNoveltyTracker:
+    """
+    Checks whether new camera poses are novel with respect to all poses added so far, see check_novel_pose().
 
-            if not _variance_constraint(translations, cam2world_matrix.to_translation(), var_translation,
-                                        min_var_diff_translation, "translation"):
-                return False
+    In contrast to check_novel_pose(), the variances of the rotations and translations are updated incrementally
+    when a pose is added, so checking a new pose takes constant time, no matter how many poses have been added.
+    """
 
-    return True
+    def __init__(self, check_pose_novelty_rot: bool = True, check_pose_novelty_translation: bool = True,
+                 min_var_diff_rot: float = -1, min_var_diff_translation: float = -1):
+        """
+        :param check_pose_novelty_rot: Checks that a sampled new pose is novel with respect to the rotation component.
+        :param check_pose_novelty_translation: Checks that a sampled new pose is novel with respect to the
+                                               translation component.
+        :param min_var_diff_rot: Considers a pose novel if it increases the variance of the rotation component of all
+                                 poses by this parameter's value in percentage. If set to -1, then it would only
+                                 check that the variance is increased.
+        :param min_var_diff_translation: Same as min_var_diff_rot but for translation. If set to -1, then it would
+                                         only check that the variance is increased.
+        """
+        self.check_pose_novelty_rot = check_pose_novelty_rot
+        self.check_pose_novelty_translation = check_pose_novelty_translation
+        self.min_var_diff_rot = min_var_diff_rot
+        self.min_var_diff_translation = min_var_diff_translation
+        self._rotation_stats = _RunningVariance()
+        self._translation_stats = _RunningVariance()
+
+    @staticmethod
+    def _split_poses(cam2world_matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns the euler angles and the translations of the given poses, each with shape [N, 3]. """
+        rotations = np.array([Matrix(pose).to_euler() for pose in cam2world_matrices])
+        translations = np.asarray(cam2world_matrices, dtype=np.float64)[:, :3, 3]
+        return rotations, translations
+
+    def __len__(self) -> int:
+        return self._translation_stats.count // 3
+
+    def add_pose(self, cam2world_matrix: Union[Matrix, np.ndarray]):
+        """ Adds the given pose to the set of existing poses.
+
+        :param cam2world_matrix: The world matrix which describes the camera pose to add.
+        """
+        rotations, translations = PoseNoveltyTracker._split_poses(np.array(cam2world_matrix)[np.newaxis])
+        self._rotation_stats.add(rotations[0])
+        self._translation_stats.add(translations[0])
+
+    def are_novel(self, cam2world_matrices: np.ndarray) -> np.ndarray:
+        """ Checks for each of the given poses, whether it is novel with respect to the existing poses.
+
+        Every candidate is checked on its own, the candidates are not added to the existing poses.
+
+        :param cam2world_matrices: The camera poses to check with shape [N, 4, 4].
+        :return: Whether each pose is novel, shape [N].
+        """
+        cam2world_matrices = np.asarray(cam2world_matrices, dtype=np.float64).reshape(-1, 4, 4)
+        novel = np.ones(len(cam2world_matrices), dtype=bool)
+        if len(self) == 0:  # First pose is always novel
+            return novel
+
+        rotations, translations = PoseNoveltyTracker._split_poses(cam2world_matrices)
+        for check, stats, values, diff_threshold in [
+                (self.check_pose_novelty_rot, self._rotation_stats, rotations, self.min_var_diff_rot),
+                (self.check_pose_novelty_translation, self._translation_stats, translations,
+                 self.min_var_diff_translation)]:
+            if check:
+                old_var = stats.variance()
+                var = stats.variance_with(values)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    diff = ((var - old_var) / old_var) * 100.0
+                # Check if the variance increased sufficiently
+                novel &= (var >= old_var) & ~(diff < diff_threshold)
+        return novel
+
+    def is_novel(self, cam2world_matrix: Union[Matrix, np.ndarray]) -> bool:
+        """ Checks whether the given pose is novel with respect to the existing poses.
+
+        :param cam2world_matrix: The world matrix which describes the camera pose to check.
+        :return: True, if the given pose is novel.
+        """
+        return bool(self.are_novel(np.array(cam2world_matrix))[0])
+
+    def add_pose_if_novel(self, cam2world_matrix: Union[Matrix, np.ndarray]) -> bool:
+        """ Adds the given pose to the existing poses, if it is novel.
+
+        :param cam2world_matrix: The world matrix which describes the camera pose to check.
+        :return: True, if the given pose is novel and has been added.
+        """
+        if self.is_novel(cam2world_matrix):
+            self.add_pose(cam2world_matrix)
+            return True
+        return False
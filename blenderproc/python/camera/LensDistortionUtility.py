@@ -8,13 +8,13 @@
 Note that, unlike in that wikipedia entry as of early 2021, we're here using the undistorted-to-distorted formulation.
 """
 
+import hashlib
 import os
 from typing import Union, List, Tuple, Optional
 
 import numpy as np
 import yaml
 import bpy
-from scipy.ndimage import map_coordinates
 
 from blenderproc.python.utility.GlobalStorage import GlobalStorage
 from blenderproc.python.camera import CameraUtility
@@ -22,7 +22,7 @@
 
 
 def set_lens_distortion(k1: float, k2: float, k3: float = 0.0, p1: float = 0.0, p2: float = 0.0,
-                        use_global_storage: bool = False) -> np.ndarray:
+                        use_global_storage: bool = False, cache_dir: Optional[str] = None) -> np.ndarray:
     """
     This function applies the lens distortion parameters to obtain an distorted-to-undistorted mapping for all
     natural pixels coordinates of the goal distorted image into the real pixel coordinates of the undistorted
@@ -64,6 +64,9 @@ def set_lens_distortion(k1: float, k2: float, k3: float = 0.0, p1: float = 0.0,
             cameras do not need them or their potential accuracy gain is negligible w.r.t. image processing.
     :use_global_storage: Whether to save the mapping coordinates and original image resolution in a global
                          storage (backward compat for configs)
+    :param cache_dir: If a directory is given, the computed mapping is stored there, named after a hash of the
+                      intrinsics, the distortion parameters and the resolution. If the same setup is used a second
+                      time, the mapping is loaded from the cache instead of solving the undistortion again.
     :return: mapping coordinates from distorted to undistorted image pixels
     """
     if all(v == 0.0 for v in [k1, k2, k3, p1, p2]):
@@ -77,109 +80,23 @@ def set_lens_distortion(k1: float, k2: float, k3: float = 0.0, p1: float = 0.0,
     fx, fy = camera_K_matrix[0][0], camera_K_matrix[1][1]
     cx, cy = camera_K_matrix[0][2], camera_K_matrix[1][2]
 
-    # Get row,column image coordinates for all pixels for row-wise image flattening
-    # The center of the upper-left pixel has coordinates [0,0] both in DLR CalDe and python/scipy
-    row = np.repeat(np.arange(0, original_image_resolution[0]), original_image_resolution[1])
-    column = np.tile(np.arange(0, original_image_resolution[1]), original_image_resolution[0])
-
-    # P_und is the undistorted pinhole projection at z==1 of all image pixels
-    P_und = np.linalg.inv(camera_K_matrix) @ np.vstack((column, row, np.ones(np.prod(original_image_resolution[:2]))))
-
-    # P_und are then distorted by the lens, i.e. P_dis = dis(P_und)
-    # => Find mapping I_dis(row,column) -> I_und(float,float)
-    #
-    # We aim at finding the brightness for every discrete pixel of the
-    # generated distorted image. In the original undistorted image these
-    # are located at real coordinates to be calculated. After that we can
-    # interpolate on the original undistorted image.
-    # Since dis() cannot be inverted, we iterate (up to ~10 times
-    # depending on the AOV and the distortion):
-    # 1) assume P_und~=P_dis
-    # 2) distort()
-    # 3) estimate distance between dist(P_und) and P_dis
-    # 4) subtract this distance from the estimated P_und,
-    #    perhaps with a factor (>1 for accel, <1 for stability at unstable distortion regions)
-    # 5) repeat until P_dis ~ dist(P_und)
-    # This works because translations in _dis and _und are approx. equivariant
-    # and the mapping is (hopefully) injective (1:1).
-    #
-    # An alternative, non-iterative approach is P_dis(float,float)=dis(P_und(row,column))
-    # and then interpolate on an irregular grid of distorted points. This is faster
-    # when generating the mapping matrix but much slower in inference.
-
-    # Init dist at undist
-    x = P_und[0, :].copy()
-    y = P_und[1, :].copy()
-    res = [1e3]
-    it = 0
-    while res[-1] > 0.15:
-        r2 = np.square(x) + np.square(y)
-        radial_part = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
-        x_ = x * radial_part + 2 * p2 * x * y + p1 * (r2 + 2 * np.square(x))
-        y_ = y * radial_part + 2 * p1 * x * y + p2 * (r2 + 2 * np.square(y))
-
-        error = np.max(np.hypot(fx * (x_ - P_und[0, :]), fy * (y_ - P_und[1, :])))
-        res.append(error)
-        it += 1
-
-        # Take action if the optimization stalls or gets unstable
-        # (distortion models are tricky if badly parameterized, especially in outer regions)
-        if (it > 1) and (res[-1] > res[-2] * .99999):
-            print("The residual for the worst distorted pixel got unstable/stalled.")
-            # factor *= .5
-            if it > 1e3:
-                raise Exception(
-                    "The iterative distortion algorithm is unstable/stalled after 1000 iterations.")
-            if error > 1e9:
-                print("Some (corner) pixels of the desired image are not defined by the used lens distortion model.")
-                print("We invite you to double-check your distortion model.")
-                print("The parameters k3,p1,p2 can easily overshoot for regions where the calibration "
-                      "software had no datapoints.")
-                print("You can either:")
-                print("- take more projections (ideally image-filling) at the image corners and repeat calibration,")
-                print("- reduce the # of released parameters to calibrate to k1,k2, or")
-                print("- reduce the target image size (subtract some lines and columns from the desired resolution")
-                print("  and subtract at most that number of lines and columns from the main point location).")
-                print("BlenderProc will not generate incomplete images with void regions since these are not "
-                      "useful for ML (data leakage).")
-                print("For that, you can use the Matlab code in robotic.de/callab, which robustifies against "
-                      "these unstable pixels.")
-                raise Exception("The iterative distortion algorithm is unstable.")
-
-        # update undistorted projection
-        x -= x_ - P_und[0, :]  # * factor
-        y -= y_ - P_und[1, :]  # * factor
-
-    # u and v are now the pixel coordinates on the undistorted image that
-    # will distort into the row,column coordinates of the distorted image
-    u = fx * x + cx
-    v = fy * y + cy
-
-    # Stacking this way for the interpolation in the undistorted image array
-    mapping_coords = np.vstack([v, u])
-
-    # Find out the image resolution needed from Blender to generate filled-in distorted images of the desired resolution
-    min_und_column_needed = np.floor(np.min(u))
-    max_und_column_needed = np.ceil(np.max(u))
-    min_und_row_needed = np.floor(np.min(v))
-    max_und_row_needed = np.ceil(np.max(v))
-    columns_needed = max_und_column_needed + 1 - min_und_column_needed
-    rows_needed = max_und_row_needed + 1 - min_und_row_needed
-    cx_new = cx - min_und_column_needed
-    cy_new = cy - min_und_row_needed
-    # To avoid spline boundary approximations at the border pixels ('mode' in map_coordinates() )
-    columns_needed += 2
-    rows_needed += 2
-    cx_new += 1
-    cy_new += 1
-    # suggested resolution for Blender image generation
-    new_image_resolution = np.array([columns_needed, rows_needed], dtype=int)
-
-    # Adapt/shift the mapping function coordinates to the new_image_resolution resolution
-    # (if we didn't, the mapping would only be valid for same resolution mapping)
-    # (same resolution mapping yields undesired void image areas)
-    mapping_coords[0, :] += cy_new - cy
-    mapping_coords[1, :] += cx_new - cx
+    cache_path = None
+    if cache_dir is not None:
+        setup = np.array([fx, fy, cx, cy, k1, k2, k3, p1, p2, *original_image_resolution], dtype=np.float64)
+        cache_path = os.path.join(cache_dir, hashlib.sha256(setup.tobytes()).hexdigest() + ".npz")
+
+    if cache_path is not None and os.path.exists(cache_path):
+        with np.load(cache_path) as cached_mapping:
+            mapping_coords = cached_mapping["mapping_coords"]
+            new_image_resolution = cached_mapping["new_image_resolution"]
+            cx_new, cy_new = cached_mapping["new_principal_point"]
+    else:
+        mapping_coords, new_image_resolution, cx_new, cy_new = _LensDistortionUtility.compute_mapping(
+            k1, k2, k3, p1, p2, camera_K_matrix, original_image_resolution)
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(cache_path, mapping_coords=mapping_coords, new_image_resolution=new_image_resolution,
+                     new_principal_point=np.array([cx_new, cy_new]))
 
     camera_changed_K_matrix = CameraUtility.get_intrinsics_as_K_matrix()
     # update cx and cy in the K matrix
@@ -199,11 +116,217 @@ def set_lens_distortion(k1: float, k2: float, k3: float = 0.0, p1: float = 0.0,
     return mapping_coords
 
 
+class _LensDistortionUtility:
+
+    # The remap tables of the last used mapping, see get_remap_tables()
+    remap_tables_cache: Optional[Tuple[np.ndarray, Tuple[np.ndarray, ...]]] = None
+    # The maximum number of channels cv2.remap() processes at once
+    max_remap_channels = 128
+
+    @staticmethod
+    def compute_mapping(k1: float, k2: float, k3: float, p1: float, p2: float, camera_K_matrix: np.ndarray,
+                        original_image_resolution: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, float, float]:
+        """ Solves the undistortion for every pixel of the distorted image, see set_lens_distortion().
+
+        :param k1: First radial distortion parameter.
+        :param k2: Second radial distortion parameter.
+        :param k3: Third radial distortion parameter.
+        :param p1: First decentering distortion parameter.
+        :param p2: Second decentering distortion parameter.
+        :param camera_K_matrix: The K matrix of the distorted camera.
+        :param original_image_resolution: The resolution of the distorted image as (rows, columns).
+        :return: The mapping coordinates, the resolution of the undistorted image as (columns, rows) and the new
+                 principal point (cx, cy) of the undistorted image.
+        """
+        fx, fy = camera_K_matrix[0][0], camera_K_matrix[1][1]
+        cx, cy = camera_K_matrix[0][2], camera_K_matrix[1][2]
+
+        # Get row,column image coordinates for all pixels for row-wise image flattening
+        # The center of the upper-left pixel has coordinates [0,0] both in DLR CalDe and python/scipy
+        row = np.repeat(np.arange(0, original_image_resolution[0]), original_image_resolution[1])
+        column = np.tile(np.arange(0, original_image_resolution[1]), original_image_resolution[0])
+
+        # P_und is the undistorted pinhole projection at z==1 of all image pixels
+        P_und = np.linalg.inv(camera_K_matrix) @ np.vstack((column, row,
+                                                            np.ones(np.prod(original_image_resolution[:2]))))
+
+        # P_und are then distorted by the lens, i.e. P_dis = dis(P_und)
+        # => Find mapping I_dis(row,column) -> I_und(float,float)
+        #
+        # We aim at finding the brightness for every discrete pixel of the
+        # generated distorted image. In the original undistorted image these
+        # are located at real coordinates to be calculated. After that we can
+        # interpolate on the original undistorted image.
+        # Since dis() cannot be inverted, we iterate (up to ~10 times
+        # depending on the AOV and the distortion):
+        # 1) assume P_und~=P_dis
+        # 2) distort()
+        # 3) estimate distance between dist(P_und) and P_dis
+        # 4) subtract this distance from the estimated P_und,
+        #    perhaps with a factor (>1 for accel, <1 for stability at unstable distortion regions)
+        # 5) repeat until P_dis ~ dist(P_und)
+        # This works because translations in _dis and _und are approx. equivariant
+        # and the mapping is (hopefully) injective (1:1).
+        #
+        # An alternative, non-iterative approach is P_dis(float,float)=dis(P_und(row,column))
+        # and then interpolate on an irregular grid of distorted points. This is faster
+        # when generating the mapping matrix but much slower in inference.
+
+        # Init dist at undist
+        x = P_und[0, :].copy()
+        y = P_und[1, :].copy()
+        res = [1e3]
+        it = 0
+        while res[-1] > 0.15:
+            r2 = np.square(x) + np.square(y)
+            radial_part = 1 + k1 * r2 + k2 * r2 * r2 + k3 * r2 * r2 * r2
+            x_ = x * radial_part + 2 * p2 * x * y + p1 * (r2 + 2 * np.square(x))
+            y_ = y * radial_part + 2 * p1 * x * y + p2 * (r2 + 2 * np.square(y))
+
+            error = np.max(np.hypot(fx * (x_ - P_und[0, :]), fy * (y_ - P_und[1, :])))
+            res.append(error)
+            it += 1
+
+            # Take action if the optimization stalls or gets unstable
+            # (distortion models are tricky if badly parameterized, especially in outer regions)
+            if (it > 1) and (res[-1] > res[-2] * .99999):
+                print("The residual for the worst distorted pixel got unstable/stalled.")
+                # factor *= .5
+                if it > 1e3:
+                    raise Exception(
+                        "The iterative distortion algorithm is unstable/stalled after 1000 iterations.")
+                if error > 1e9:
+                    print("Some (corner) pixels of the desired image are not defined by the used lens distortion "
+                          "model.")
+                    print("We invite you to double-check your distortion model.")
+                    print("The parameters k3,p1,p2 can easily overshoot for regions where the calibration "
+                          "software had no datapoints.")
+                    print("You can either:")
+                    print("- take more projections (ideally image-filling) at the image corners and repeat "
+                          "calibration,")
+                    print("- reduce the # of released parameters to calibrate to k1,k2, or")
+                    print("- reduce the target image size (subtract some lines and columns from the desired resolution")
+                    print("  and subtract at most that number of lines and columns from the main point location).")
+                    print("BlenderProc will not generate incomplete images with void regions since these are not "
+                          "useful for ML (data leakage).")
+                    print("For that, you can use the Matlab code in robotic.de/callab, which robustifies against "
+                          "these unstable pixels.")
+                    raise Exception("The iterative distortion algorithm is unstable.")
+
+            # update undistorted projection
+            x -= x_ - P_und[0, :]  # * factor
+            y -= y_ - P_und[1, :]  # * factor
+
+        # u and v are now the pixel coordinates on the undistorted image that
+        # will distort into the row,column coordinates of the distorted image
+        u = fx * x + cx
+        v = fy * y + cy
+
+        # Stacking this way for the interpolation in the undistorted image array
+        mapping_coords = np.vstack([v, u])
+
+        # Find out the image resolution needed from Blender to generate filled-in distorted images of the desired
+        # resolution
+        min_und_column_needed = np.floor(np.min(u))
+        max_und_column_needed = np.ceil(np.max(u))
+        min_und_row_needed = np.floor(np.min(v))
+        max_und_row_needed = np.ceil(np.max(v))
+        columns_needed = max_und_column_needed + 1 - min_und_column_needed
+        rows_needed = max_und_row_needed + 1 - min_und_row_needed
+        cx_new = cx - min_und_column_needed
+        cy_new = cy - min_und_row_needed
+        # To avoid spline boundary approximations at the border pixels ('mode' in map_coordinates() )
+        columns_needed += 2
+        rows_needed += 2
+        cx_new += 1
+        cy_new += 1
+        # suggested resolution for Blender image generation
+        new_image_resolution = np.array([columns_needed, rows_needed], dtype=int)
+
+        # Adapt/shift the mapping function coordinates to the new_image_resolution resolution
+        # (if we didn't, the mapping would only be valid for same resolution mapping)
+        # (same resolution mapping yields undesired void image areas)
+        mapping_coords[0, :] += cy_new - cy
+        mapping_coords[1, :] += cx_new - cx
+
+        return mapping_coords, new_image_resolution, cx_new, cy_new
+
+    @staticmethod
+    def get_remap_tables(mapping_coords: np.ndarray, orig_res_x: int,
+                         orig_res_y: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ Returns the remap tables of the given mapping, they are only computed again if the mapping changed.
+
+        :param mapping_coords: The mapping coordinates, as returned by set_lens_distortion().
+        :param orig_res_x: The width of the distorted image.
+        :param orig_res_y: The height of the distorted image.
+        :return: The two fixed-point tables for cv2.remap() and the rounded row and column indices for nearest
+                 neighbor lookups.
+        """
+        # pylint: disable=import-outside-toplevel
+        import cv2
+        # pylint: enable=import-outside-toplevel
+        cache = _LensDistortionUtility.remap_tables_cache
+        if cache is None or cache[0] is not mapping_coords or cache[1][0].shape[:2] != (orig_res_y, orig_res_x):
+            map_y = mapping_coords[0].reshape(orig_res_y, orig_res_x)
+            map_x = mapping_coords[1].reshape(orig_res_y, orig_res_x)
+            fixed_point_xy, fixed_point_fraction = cv2.convertMaps(map_x.astype(np.float32),
+                                                                   map_y.astype(np.float32), cv2.CV_16SC2)
+            # map_coordinates(order=0) rounds halfway coordinates up
+            nearest_rows = np.floor(map_y + 0.5).astype(np.int64)
+            nearest_columns = np.floor(map_x + 0.5).astype(np.int64)
+            cache = (mapping_coords, (fixed_point_xy, fixed_point_fraction, nearest_rows, nearest_columns))
+            _LensDistortionUtility.remap_tables_cache = cache
+        return cache[1]
+
+    @staticmethod
+    def remap_images(images: List[np.ndarray], mapping_coords: np.ndarray, orig_res_x: int, orig_res_y: int,
+                     use_interpolation: bool) -> List[np.ndarray]:
+        """ Distorts the given images via precomputed remap tables, see apply_lens_distortion().
+
+        :param images: The undistorted images.
+        :param mapping_coords: The mapping coordinates, as returned by set_lens_distortion().
+        :param orig_res_x: The width of the distorted images.
+        :param orig_res_y: The height of the distorted images.
+        :param use_interpolation: If True, bilinear interpolation is used, else the nearest pixel.
+        :return: The distorted images, with the same dtypes as the given ones.
+        """
+        # pylint: disable=import-outside-toplevel
+        import cv2
+        # pylint: enable=import-outside-toplevel
+        fixed_point_xy, fixed_point_fraction, nearest_rows, nearest_columns = \
+            _LensDistortionUtility.get_remap_tables(mapping_coords, orig_res_x, orig_res_y)
+
+        distorted_images = []
+        # The images are distorted one after another, so the temporary memory does not grow with their number
+        for image in images:
+            if not use_interpolation:
+                # Same as map_coordinates() with mode="nearest", works for all dtypes
+                rows = np.clip(nearest_rows, 0, image.shape[0] - 1)
+                columns = np.clip(nearest_columns, 0, image.shape[1] - 1)
+                distorted_images.append(image[rows, columns])
+                continue
+
+            # cv2.remap() only supports some dtypes, all others are interpolated in float32
+            work_dtype = image.dtype if image.dtype in (np.uint8, np.uint16, np.int16, np.float32) else np.float32
+            channels = image.astype(work_dtype, copy=False).reshape(image.shape[0], image.shape[1], -1)
+            distorted = np.empty((orig_res_y, orig_res_x, channels.shape[2]), dtype=work_dtype)
+            # cv2 limits the number of channels per image, so the channels are remapped in chunks
+            for start in range(0, channels.shape[2], _LensDistortionUtility.max_remap_channels):
+                end = min(start + _LensDistortionUtility.max_remap_channels, channels.shape[2])
+                remapped = cv2.remap(np.ascontiguousarray(channels[:, :, start:end]), fixed_point_xy,
+                                     fixed_point_fraction, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+                distorted[:, :, start:end] = remapped.reshape(orig_res_y, orig_res_x, end - start)
+            distorted = distorted.reshape((orig_res_y, orig_res_x) + image.shape[2:])
+            distorted_images.append(distorted.astype(image.dtype, copy=False))
+        return distorted_images
+
+
 def apply_lens_distortion(image: Union[List[np.ndarray], np.ndarray],
                           mapping_coords: Optional[np.ndarray] = None,
                           orig_res_x: Optional[int] = None,
                           orig_res_y: Optional[int] = None,
-                          use_interpolation: bool = True) -> Union[List[np.ndarray], np.ndarray]:
+                          use_interpolation: bool = True,
+                          use_fast_remap: bool = False) -> Union[List[np.ndarray], np.ndarray]:
     """
     This functions applies the lens distortion mapping that needs to be precalculated by
     `bproc.camera.set_lens_distortion()`.
@@ -217,6 +340,10 @@ def apply_lens_distortion(image: Union[List[np.ndarray], np.ndarray],
     :param orig_res_y: original and output height resolution of the image
     :param use_interpolation: if this is True, for each pixel an interpolation will be performed, if this is false
                               the nearest pixel will be used
+    :param use_fast_remap: If this is True, the mapping is converted once into fixed-point remap tables, which are
+                           then applied to each given image via cv2.remap(). This is much faster, especially for long
+                           image sequences, but uses bilinear instead of second order spline interpolation. Without
+                           interpolation, the result is the same.
     :return: a list of images or an image that have been distorted, now in the desired (original) resolution
     """
 
@@ -233,7 +360,20 @@ def apply_lens_distortion(image: Union[List[np.ndarray], np.ndarray],
                             "'orig_res_x' + 'orig_res_x' to bproc.postprocessing.apply_lens_distortion(...). "
                             "Previously this could also have been done via the CameraInterface module, "
                             "see the example on lens_distortion.")
+    if use_fast_remap:
+        if not isinstance(image, (list, np.ndarray)):
+            raise Exception(f"This type can not be worked with here: {type(image)}, only "
+                            f"np.ndarray or list of np.ndarray are supported")
+        images = image if isinstance(image, list) else [image]
+        distorted_images = _LensDistortionUtility.remap_images(images, mapping_coords, orig_res_x, orig_res_y,
+                                                               use_interpolation)
+        return distorted_images if isinstance(image, list) else distorted_images[0]
+
     interpolation_order = 2 if use_interpolation else 0
+    # scipy is only loaded when the slow path is used
+    # pylint: disable=import-outside-toplevel
+    from scipy.ndimage import map_coordinates
+    # pylint: enable=import-outside-toplevel
 
     def _internal_apply(input_image: np.ndarray) -> np.ndarray:
         """
@@ -5,7 +5,7 @@
 
 import warnings
 import math
-from typing import Tuple, List, Dict
+from typing import Tuple, List
 import random
 
 import bpy
@@ -14,7 +14,7 @@
 import numpy as np
 
 from blenderproc.python.types.MaterialUtility import Material
-from blenderproc.python.utility.CollisionUtility import CollisionUtility
+from blenderproc.python.utility.CollisionUtility import CollisionUtility, BVHCache
 from blenderproc.python.types.EntityUtility import delete_multiple
 from blenderproc.python.types.MeshObjectUtility import MeshObject, create_primitive
 from blenderproc.python.object.FaceSlicer import FaceSlicer
@@ -49,7 +49,7 @@ def construct_random_room(used_floor_area: float, interior_objects: List[MeshObj
     # internally the first basic rectangular is counted as one
     amount_of_extrusions += 1
 
-    bvh_cache_for_intersection: Dict[str, mathutils.bvhtree.BVHTree] = {}
+    bvh_cache_for_intersection = BVHCache()
     placed_objects = []
 
     # construct a random room
@@ -508,7 +508,7 @@ def _assign_materials_to_floor_wall_ceiling(floor_obj: MeshObject, wall_obj: Mes
                       "No materials have been assigned to the walls, floors and possible ceiling.")
 
 
-def _sample_new_object_poses_on_face(current_obj: MeshObject, face_bb, bvh_cache_for_intersection: dict,
+def _sample_new_object_poses_on_face(current_obj: MeshObject, face_bb, bvh_cache_for_intersection: BVHCache,
                                      placed_objects: List[MeshObject], wall_obj: MeshObject):
     """
     Sample new object poses on the current `floor_obj`.
@@ -524,10 +524,6 @@ def _sample_new_object_poses_on_face(current_obj: MeshObject, face_bb, bvh_cache
     current_obj.set_location(random_placed_value)
     current_obj.set_rotation_euler(random_placed_rotation)
 
-    # Remove bvh cache, as object has changed
-    if current_obj.get_name() in bvh_cache_for_intersection:
-        del bvh_cache_for_intersection[current_obj.get_name()]
-
     # perform check if object can be placed there
     no_collision = CollisionUtility.check_intersections(current_obj,
                                                         bvh_cache=bvh_cache_for_intersection,
@@ -1,7 +1,7 @@
 """Offering to load the materials provided at ambientCG.com."""
 
 import os
-from typing import List
+from typing import List, Optional, Dict
 
 import bpy
 
@@ -56,8 +56,14 @@ def load_ccmaterials(folder_path: str = "resources/cctextures", used_assets: lis
         raise Exception("Preload and fill used empty materials can not be done at the same time, check config!")
 
     if os.path.exists(folder_path) and os.path.isdir(folder_path):
+        # the texture maps of all assets are only searched once and then read from an index
+        asset_index = MaterialLoaderUtility.get_asset_index(folder_path, "cc_textures",
+                                                            _CCMaterialLoader.find_texture_maps)
+        if fill_used_empty_materials:
+            # the materials were already created, so they only have to be searched
+            preloaded_materials = MaterialLoaderUtility.find_cc_materials_by_name(add_custom_properties)
         materials = []
-        for asset in os.listdir(folder_path):
+        for asset, texture_maps in asset_index.items():
             if used_assets:
                 skip_this_one = True
                 for used_asset in used_assets:
@@ -67,63 +73,78 @@ def load_ccmaterials(folder_path: str = "resources/cctextures", used_assets: lis
                         break
                 if skip_this_one:
                     continue
-            current_path = os.path.join(folder_path, asset)
-            if os.path.isdir(current_path):
-                base_image_path = os.path.join(current_path, f"{asset}_2K_Color.jpg")
-                # Filenames have been changed  (https://docs.ambientcg.com/updates/2023/08/29/minor-changes-to-the-filename-structure-of-pbr-materials/)
-                if not os.path.exists(base_image_path):
-                    base_image_path = os.path.join(current_path, f"{asset}_2K-JPG_Color.jpg")
-
-                if not os.path.exists(base_image_path):
-                    continue
+            if texture_maps is None:
+                continue
 
-                # construct all image paths
-                ambient_occlusion_image_path = base_image_path.replace("Color", "AmbientOcclusion")
-                metallic_image_path = base_image_path.replace("Color", "Metalness")
-                roughness_image_path = base_image_path.replace("Color", "Roughness")
-                alpha_image_path = base_image_path.replace("Color", "Opacity")
-                normal_image_path = base_image_path.replace("Color", "Normal")
-                # Filenames have been changed (blender uses opengl normal maps)
-                if not os.path.exists(normal_image_path):
-                    normal_image_path = base_image_path.replace("Color", "NormalGL")
-                displacement_image_path = base_image_path.replace("Color", "Displacement")
-
-                # All transparent materials have an opacity image. Skip them, if desired.
-                if skip_transparent_materials and os.path.exists(alpha_image_path):
-                    continue
+            # All transparent materials have an opacity image. Skip them, if desired.
+            if skip_transparent_materials and "alpha" in texture_maps:
+                continue
 
-                # if the material was already created it only has to be searched
-                if fill_used_empty_materials:
-                    new_mat = MaterialLoaderUtility.find_cc_material_by_name(asset, add_custom_properties)
-                else:
-                    new_mat = MaterialLoaderUtility.create_new_cc_material(asset, add_custom_properties)
-
-                # if preload then the material is only created but not filled
-                if preload:
-                    # Set alpha to 0 if the material has an alpha texture, so it can be detected
-                    # e.q. in the material getter.
-                    nodes = new_mat.node_tree.nodes
-                    principled_bsdf = Utility.get_the_one_node_with_type(nodes, "BsdfPrincipled")
-                    principled_bsdf.inputs["Alpha"].default_value = 0 if os.path.exists(alpha_image_path) else 1
-                    # add it here for the preload case
-                    materials.append(Material(new_mat))
-                    continue
-                if fill_used_empty_materials and not MaterialLoaderUtility.is_material_used(new_mat):
+            if fill_used_empty_materials:
+                new_mat = preloaded_materials.get(asset)
+                if new_mat is None or not MaterialLoaderUtility.is_material_used(new_mat):
                     # now only the materials, which have been used should be filled
                     continue
-
-                # create material based on these image paths
-                _CCMaterialLoader.create_material(new_mat, base_image_path, ambient_occlusion_image_path,
-                                                  metallic_image_path, roughness_image_path, alpha_image_path,
-                                                  normal_image_path, displacement_image_path)
-
+            else:
+                new_mat = MaterialLoaderUtility.create_new_cc_material(asset, add_custom_properties)
+
+            # if preload then the material is only created but not filled
+            if preload:
+                # Set alpha to 0 if the material has an alpha texture, so it can be detected
+                # e.q. in the material getter.
+                nodes = new_mat.node_tree.nodes
+                principled_bsdf = Utility.get_the_one_node_with_type(nodes, "BsdfPrincipled")
+                principled_bsdf.inputs["Alpha"].default_value = 0 if "alpha" in texture_maps else 1
+                # add it here for the preload case
                 materials.append(Material(new_mat))
+                continue
+
+            # create material based on these image paths, missing texture maps are given as empty path
+            image_paths = {map_type: os.path.join(folder_path, asset, file_name)
+                           for map_type, file_name in texture_maps.items()}
+            _CCMaterialLoader.create_material(new_mat, image_paths["base color"],
+                                              image_paths.get("ambient occlusion", ""),
+                                              image_paths.get("metallic", ""), image_paths.get("roughness", ""),
+                                              image_paths.get("alpha", ""), image_paths.get("normal", ""),
+                                              image_paths.get("displacement", ""))
+
+            materials.append(Material(new_mat))
         return materials
     raise FileNotFoundError(f"The folder path does not exist: {folder_path}")
 
 
 class _CCMaterialLoader:
 
+    @staticmethod
+    def find_texture_maps(asset_path: str) -> Optional[Dict[str, str]]:
+        """
+        Finds the texture maps of a cc texture, the folder is only listed once.
+
+        :param asset_path: The path to the folder of the cc texture
+        :return: A dict mapping the types of all existing texture maps to their file names, None if there is no color
+                 image
+        """
+        asset = os.path.basename(asset_path)
+        file_names = set(os.listdir(asset_path))
+        base_image_name = f"{asset}_2K_Color.jpg"
+        # Filenames have been changed  (https://docs.ambientcg.com/updates/2023/08/29/minor-changes-to-the-filename-structure-of-pbr-materials/)
+        if base_image_name not in file_names:
+            base_image_name = f"{asset}_2K-JPG_Color.jpg"
+        if base_image_name not in file_names:
+            return None
+
+        # construct all image names, blender uses opengl normal maps, which are called NormalGL in newer versions
+        texture_maps = {"base color": base_image_name}
+        for map_type, identifiers in [("ambient occlusion", ["AmbientOcclusion"]), ("metallic", ["Metalness"]),
+                                      ("roughness", ["Roughness"]), ("alpha", ["Opacity"]),
+                                      ("normal", ["Normal", "NormalGL"]), ("displacement", ["Displacement"])]:
+            for identifier in identifiers:
+                image_name = base_image_name.replace("Color", identifier)
+                if image_name in file_names:
+                    texture_maps[map_type] = image_name
+                    break
+        return texture_maps
+
     @staticmethod
     def create_material(new_mat: bpy.types.Material, base_image_path: str, ambient_occlusion_image_path: str,
                         metallic_image_path: str, roughness_image_path: str, alpha_image_path: str,
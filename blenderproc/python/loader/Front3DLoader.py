@@ -12,6 +12,7 @@
 import numpy as np
 
 from blenderproc.python.material import MaterialLoaderUtility
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.LabelIdMapping import LabelIdMapping
 from blenderproc.python.types.MeshObjectUtility import MeshObject, create_with_empty_mesh
 from blenderproc.python.utility.Utility import resolve_path
@@ -378,7 +379,7 @@ def load_furniture_objs(data: dict, future_model_path: str, lamp_light_strength:
                         image_node = mat.new_node('ShaderNodeTexImage')
                         # and load the texture.png
                         base_image_path = os.path.join(folder_path, "texture.png")
-                        image_node.image = bpy.data.images.load(base_image_path, check_existing=True)
+                        image_node.image = ImageCache.load(base_image_path)
                         mat.link(image_node.outputs['Color'], principled_node.inputs['Base Color'])
                         # if the object is a lamp, do the same as for the ceiling and add an emission shader
                         if is_lamp:
@@ -137,8 +137,9 @@ def load_haven_mat(folder_path: Union[str, Path] = "resources/haven", used_asset
     if haven_folder.name != "textures" and (haven_folder / "textures").exists():
         haven_folder /= "textures"
 
-    texture_names: List[str] = os.listdir(haven_folder)
-    texture_names.sort()
+    # the texture maps of all textures are only searched once and then read from an index
+    asset_index = MaterialLoaderUtility.get_asset_index(str(haven_folder), "haven", _HavenMaterialLoader.index_asset)
+    texture_names: List[str] = sorted(asset_index.keys())
     if not texture_names:
         raise FileNotFoundError(f"No texture folders found in {haven_folder}.")
 
@@ -154,21 +155,22 @@ def load_haven_mat(folder_path: Union[str, Path] = "resources/haven", used_asset
     if return_random_element:
         texture_names = [random.choice(texture_names)]
 
+    if fill_used_empty_materials:
+        # the materials were already created, so they only have to be searched
+        preloaded_materials = MaterialLoaderUtility.find_cc_materials_by_name(add_cp)
+
     materials: List[Material] = []
     for texture_name in texture_names:
-        texture_folder_path = haven_folder / texture_name
-        if not texture_folder_path.is_dir():
-            print(f"Ignoring {texture_folder_path}, must be a folder.")
-            continue
-
-        texture_map_paths_by_type = identify_texture_maps(str(texture_folder_path))
-        if texture_map_paths_by_type is None:
+        if asset_index[texture_name] is None:
             print(f"Ignoring {texture_name}, could not identify texture maps.")
             continue
+        texture_map_paths_by_type = {map_type: str(haven_folder / texture_name / file_name) if file_name else ""
+                                     for map_type, file_name in asset_index[texture_name].items()}
 
-        # if the material was already created it only has to be searched
         if fill_used_empty_materials:
-            new_mat = MaterialLoaderUtility.find_cc_material_by_name(texture_name, add_cp)
+            new_mat = preloaded_materials.get(texture_name)
+            if new_mat is None:
+                continue
         else:
             new_mat = MaterialLoaderUtility.create_new_cc_material(texture_name, add_cp)
         # append newly created material
@@ -269,3 +271,19 @@ def create_material(new_mat: bpy.types.Material, base_image_path: str, ambient_o
         collection_of_texture_nodes = [node for node in collection_of_texture_nodes if node is not None]
 
         MaterialLoaderUtility.connect_uv_maps(nodes, links, collection_of_texture_nodes)
+
+
+class _HavenMaterialLoader:
+
+    @staticmethod
+    def index_asset(texture_folder_path: str) -> Optional[Dict[str, str]]:
+        """ Finds the texture maps of a haven texture for the asset index.
+
+        :param texture_folder_path: path to the texture folder
+        :return: dictionary that maps texture map types to their file names when found, else it maps to an empty
+                 string. None if the texture maps could not be identified.
+        """
+        texture_map_paths_by_type = identify_texture_maps(texture_folder_path)
+        if texture_map_paths_by_type is None:
+            return None
+        return {map_type: os.path.basename(path) for map_type, path in texture_map_paths_by_type.items()}
@@ -5,8 +5,7 @@
 import random
 from typing import List, Optional
 
-import bpy
-
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.LabelIdMapping import LabelIdMapping
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 from blenderproc.python.loader.ObjectLoader import load_obj
@@ -96,7 +95,7 @@ def random_sample_materials_for_each_obj(loaded_objects: List[MeshObject], textu
                     image_paths.sort()
                     image_path = random.choice(image_paths)
                     if os.path.exists(image_path):
-                        texture_node.image = bpy.data.images.load(image_path, check_existing=True)
+                        texture_node.image = ImageCache.load(image_path)
                     else:
                         raise FileNotFoundError(f"No image was found for this entity: {obj.get_name()}, "
                                                 f"material name: {mat_name}")
@@ -10,6 +10,7 @@
 import numpy as np
 from mathutils import Matrix, Vector
 
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.LabelIdMapping import LabelIdMapping
 from blenderproc.python.types.MaterialUtility import Material
 from blenderproc.python.utility.MathUtility import change_coordinate_frame_of_point
@@ -430,7 +431,7 @@ def adjust_material_nodes(mat: Material, adjustments: Dict[str, str]):
 
             image_node = mat.get_the_one_node_with_type("ShaderNodeTexImage")
             if os.path.exists(image_path):
-                image_node.image = bpy.data.images.load(image_path, check_existing=True)
+                image_node.image = ImageCache.load(image_path)
             else:
                 print(f"Warning: Cannot load texture, path does not exist: {image_path}, remove image node again")
                 mat.remove_node(image_node)
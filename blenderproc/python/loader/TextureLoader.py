@@ -7,6 +7,7 @@
 
 import bpy
 
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.Utility import resolve_path
 
 
@@ -19,8 +20,8 @@ def load_texture(path: str, colorspace: str = "sRGB") -> List[bpy.types.Texture]
     2. Load images and for each creates a texture, and assigns an image to this texture, if a path to a
     folder with images is provided.
 
-    NOTE: Same image file can be loaded once to avoid unnecessary overhead. If you really need the same image in
-    different colorspaces, then have a copy per desired colorspace and load them in different instances of this Loader.
+    NOTE: Same image file can be loaded once per colorspace to avoid unnecessary overhead, the images are shared with
+    all materials via the ImageCache.
 
     :param path: The path to the folder with assets/to the asset.
     :param colorspace: Colorspace type to assign to loaded assets. Available: ['Filmic Log', 'Linear', 'Linear ACES',
@@ -62,13 +63,10 @@ def load_and_create(image_paths: list, colorspace: str) -> List[bpy.types.Textur
         :param colorspace: Colorspace type of the assets. Type: string.
         :return: Created textures. Type: list.
         """
-        existing = [image.filepath for image in bpy.data.images]
         textures = []
         for image_path in image_paths:
-            if image_path not in existing:
-                loaded_image = bpy.data.images.load(filepath=image_path)
-                existing.append(image_path)
-                loaded_image.colorspace_settings.name = colorspace
+            if not ImageCache.contains(image_path, colorspace):
+                loaded_image = ImageCache.load(image_path, colorspace)
                 texture_name = f"ct_{loaded_image.name}"
                 tex = bpy.data.textures.new(name=texture_name, type="IMAGE")
                 tex.image = loaded_image
@@ -78,6 +76,6 @@ def load_and_create(image_paths: list, colorspace: str) -> List[bpy.types.Textur
             else:
                 warnings.warn(f"Image {image_path} has been already loaded and a corresponding texture was created. "
                               f"Following the save behaviour of reducing the overhead, it is skipped. So, if you "
-                              f"really need to load the same image again (for example, in a different or in the "
-                              f"same colorspace), use the copy of the file.")
+                              f"really need to load the same image again in the same colorspace, use the copy of the "
+                              f"file.")
         return textures
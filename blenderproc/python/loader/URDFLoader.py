@@ -10,6 +10,7 @@
 
 from blenderproc.python.utility.SetupUtility import SetupUtility
 from blenderproc.python.utility.BlenderUtility import get_all_materials
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.Utility import Utility
 from blenderproc.python.loader.ObjectLoader import load_obj
 from blenderproc.python.material import MaterialLoaderUtility
@@ -401,7 +402,7 @@ def load_visual_collision_obj(viscol_tree: Union["urchin.Visual", "urchin.Collis
             if not os.path.exists(viscol_tree.material.texture.filename):
                 raise Exception(f"Couldn't load texture image for {viscol_tree} from "
                                 f"{viscol_tree.material.texture.filename}")
-            color_image.image = bpy.data.images.load(viscol_tree.material.texture.filename, check_existing=True)
+            color_image.image = ImageCache.load(viscol_tree.material.texture.filename)
 
             principled = Utility.get_the_one_node_with_type(nodes, "BsdfPrincipled")
             links.new(color_image.outputs["Color"], principled.inputs["Base Color"])
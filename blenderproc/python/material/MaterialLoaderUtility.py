@@ -1,18 +1,23 @@
 """Provides a lot of functions to deal with materials."""
 
+import json
 import os
 import random
-from typing import Union, List, Optional, Dict, Any
+import tempfile
+from typing import Union, List, Optional, Dict, Any, Callable
 from pathlib import Path
 
 import bpy
 
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.MaterialGetter import MaterialGetter
 from blenderproc.python.types.MaterialUtility import Material
 from blenderproc.python.utility.Utility import Utility
 
 _x_texture_node = -1500
 _y_texture_node = 300
+# Increase this, whenever the content of the asset index files changes
+_asset_index_version = 2
 
 
 def collect_all() -> List[Optional[Material]]:
@@ -66,6 +71,76 @@ def find_cc_material_by_name(material_name: str, custom_properties: Dict[str, An
     return None
 
 
+def find_cc_materials_by_name(custom_properties: Dict[str, Any]) -> Dict[str, bpy.types.Material]:
+    """
+    Finds all loaded cc materials with the given custom_properties at once, see find_cc_material_by_name().
+
+    :param custom_properties: Custom properties, which have been assigned before
+    :return: A dict mapping the material names to the found materials
+    """
+    cond = {"cp_is_cc_texture": True}
+    for key, value in custom_properties.items():
+        cond[key] = value
+    materials = {}
+    for material in MaterialGetter.perform_and_condition_check(cond, []):
+        if material["asset_name"] in materials:
+            raise RuntimeError("There was more than one material found!")
+        materials[material["asset_name"]] = material
+    return materials
+
+
+def get_asset_index(folder_path: str, index_name: str,
+                    index_asset: Callable[[str], Optional[Dict[str, str]]]) -> Dict[str, Optional[Dict[str, str]]]:
+    """
+    Returns the texture maps of all assets in the given folder, which are stored in an index file inside the folder.
+
+    The index is rebuilt if an asset folder was added or removed or if the modification time of one of the asset
+    folders changed, which happens when files inside of it are added, removed or renamed. This way, a big texture
+    library is only scanned once instead of at every start.
+
+    :param folder_path: The folder containing one sub folder per asset.
+    :param index_name: The name of the index, it is part of the file name of the index.
+    :param index_asset: A function, which maps the path of an asset folder to a dict of its texture maps or to None
+                        if the asset can not be used. It is only called when the index is rebuilt.
+    :return: A dict mapping the asset names to the result of index_asset.
+    """
+    index_path = os.path.join(folder_path, f".blenderproc_{index_name}_index.json")
+    # The modification times of all asset folders, listing them is much cheaper than indexing their content
+    asset_mtimes = {}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                asset_mtimes[entry.name] = entry.stat().st_mtime_ns
+
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index.get("version") == _asset_index_version and index.get("asset_mtimes") == asset_mtimes:
+                return index["assets"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    assets = {asset: index_asset(os.path.join(folder_path, asset)) for asset in sorted(asset_mtimes)}
+
+    temp_path = None
+    try:
+        # Other runs might read the index at the same time, so it is written to a temporary file first, which then
+        # replaces the index at once
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=folder_path, prefix=f".blenderproc_{index_name}_",
+                                         suffix=".tmp", delete=False) as file:
+            temp_path = file.name
+            json.dump({"version": _asset_index_version, "asset_mtimes": asset_mtimes, "assets": assets}, file)
+        # Temporary files are only readable by their owner, while the index is shared like the assets
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        print(f"Could not write the asset index {index_path}, the folder will be scanned again next time: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+    return assets
+
+
 def is_material_used(material: bpy.types.Material):
     """
     Checks if the given material is used on any object.
@@ -106,7 +181,8 @@ def create_image_node(nodes: bpy.types.Nodes, image: Union[str, bpy.types.Image]
     Creates a texture image node inside a material.
 
     :param nodes: Nodes from the current material
-    :param image: Either the path to the image which should be loaded or the bpy.types.Image
+    :param image: Either the path to the image which should be loaded or the bpy.types.Image, images given by path
+                  are shared via the ImageCache
     :param non_color_mode: If this True, the color mode of the image will be "Non-Color"
     :param x_location: X Location in the node tree
     :param y_location: Y Location in the node tree
@@ -115,10 +191,10 @@ def create_image_node(nodes: bpy.types.Nodes, image: Union[str, bpy.types.Image]
     image_node = nodes.new('ShaderNodeTexImage')
     if isinstance(image, bpy.types.Image):
         image_node.image = image
+        if non_color_mode:
+            image_node.image.colorspace_settings.name = 'Non-Color'
     else:
-        image_node.image = bpy.data.images.load(image, check_existing=True)
-    if non_color_mode:
-        image_node.image.colorspace_settings.name = 'Non-Color'
+        image_node.image = ImageCache.load(image, 'Non-Color' if non_color_mode else None)
     image_node.location.x = x_location
     image_node.location.y = y_location
     return image_node
@@ -543,7 +619,7 @@ def create_material_from_texture(texture: Union[Path, str, bpy.types.Image], mat
     # if a texture path was set, load the image
     if texture_path:
         if texture_path.exists():
-            texture = bpy.data.images.load(str(texture_path), check_existing=True)
+            texture = ImageCache.load(str(texture_path))
         else:
             raise FileNotFoundError(f"The given texture path could not be found: \"{texture_path}\"")
 
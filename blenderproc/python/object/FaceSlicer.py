@@ -8,7 +8,6 @@
 import bpy
 import mathutils
 import numpy as np
-from sklearn.cluster import MeanShift
 
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 from blenderproc.python.utility.Utility import resolve_path
@@ -48,6 +47,10 @@ def slice_faces_with_normals(mesh_object: MeshObject, compare_angle_degrees: flo
 
     list_of_median_poses_only_z_value = [value for value, face in list_of_median_poses]
 
+    # sklearn is only loaded when it is needed, as it is slow to import
+    # pylint: disable=import-outside-toplevel
+    from sklearn.cluster import MeanShift
+    # pylint: enable=import-outside-toplevel
     bandwidth_in_meter = 0.005
     ms = MeanShift(bandwidth=bandwidth_in_meter, bin_seeding=True)
     ms.fit(np.array(list_of_median_poses_only_z_value).reshape((-1, 1)))
@@ -188,6 +191,10 @@ def clean_up_name(name: str):
                 # All faces are already correct
                 height_value = np.mean(list_of_median_poses)
             else:
+                # sklearn is only loaded when it is needed, as it is slow to import
+                # pylint: disable=import-outside-toplevel
+                from sklearn.cluster import MeanShift
+                # pylint: enable=import-outside-toplevel
                 ms = MeanShift(bandwidth=0.2, bin_seeding=True)
                 ms.fit(list_of_median_poses)
 
@@ -2,9 +2,7 @@
 
 from typing import Callable, List, Dict, Tuple
 
-import mathutils
-
-from blenderproc.python.utility.CollisionUtility import CollisionUtility
+from blenderproc.python.utility.CollisionUtility import CollisionUtility, AABBGrid, BVHCache
 from blenderproc.python.types.EntityUtility import Entity
 from blenderproc.python.types.MeshObjectUtility import MeshObject, get_all_mesh_objects
 
@@ -37,8 +35,11 @@ def sample_poses(objects_to_sample: List[MeshObject], sample_pose_func: Callable
     if objects_to_check_collisions is None:
         objects_to_check_collisions = get_all_mesh_objects()
 
-    # Among objects_to_sample only check collisions against already placed objects
-    cur_objects_to_check_collisions = list(set(objects_to_check_collisions) - set(objects_to_sample))
+    # Among objects_to_sample only check collisions against already placed objects, duplicates are removed while
+    # keeping the given order, so the broad phase is filled the same way in every run
+    objects_to_sample_set = set(objects_to_sample)
+    cur_objects_to_check_collisions = [obj for obj in dict.fromkeys(objects_to_check_collisions)
+                                       if obj not in objects_to_sample_set]
 
     if max_tries <= 0:
         raise ValueError(f"The value of max_tries must be greater than zero: {max_tries}")
@@ -46,8 +47,12 @@ def sample_poses(objects_to_sample: List[MeshObject], sample_pose_func: Callable
     if not objects_to_sample:
         raise RuntimeError("The list of objects_to_sample can not be empty!")
 
-    # cache to fasten collision detection
-    bvh_cache: Dict[str, mathutils.bvhtree.BVHTree] = {}
+    # cache to fasten collision detection, trees of moved objects are rebuilt automatically
+    bvh_cache = BVHCache()
+    # grid over the bounding boxes of all objects to check collisions against, placed objects are added to it
+    broad_phase = AABBGrid(AABBGrid.calc_cell_size(objects_to_sample))
+    for collision_obj in cur_objects_to_check_collisions:
+        broad_phase.insert(collision_obj)
 
     sample_results: Dict[Entity, Tuple[int, bool]] = {}
 
@@ -69,11 +74,8 @@ def sample_poses(objects_to_sample: List[MeshObject], sample_pose_func: Callable
             # Put the top object in queue at the sampled point in space
             sample_pose_func(obj)
 
-            # Remove bvh cache, as object has changed
-            if obj.get_name() in bvh_cache:
-                del bvh_cache[obj.get_name()]
-
-            no_collision = CollisionUtility.check_intersections(obj, bvh_cache, cur_objects_to_check_collisions, [])
+            no_collision = CollisionUtility.check_intersections(obj, bvh_cache, cur_objects_to_check_collisions, [],
+                                                                broad_phase=broad_phase)
 
             # If no collision then keep the position
             if no_collision:
@@ -93,6 +95,9 @@ def sample_poses(objects_to_sample: List[MeshObject], sample_pose_func: Callable
                 obj.set_location(initial_location)
                 obj.set_rotation_euler(initial_rotation)
 
+        # Add the object with its final pose
+        broad_phase.insert(obj)
+
         sample_results[obj] = (amount_of_tries_done, no_collision)
 
     return sample_results
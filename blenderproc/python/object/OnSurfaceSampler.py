@@ -1,11 +1,10 @@
 """Sampling objects on a surface."""
 
-from typing import Callable, List, Optional, Dict
+from typing import Callable, List, Optional
 
-import mathutils
 import numpy as np
 
-from blenderproc.python.utility.CollisionUtility import CollisionUtility
+from blenderproc.python.utility.CollisionUtility import CollisionUtility, AABBGrid, BVHCache
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 
 
@@ -46,8 +45,10 @@ def sample_poses_on_surface(objects_to_sample: List[MeshObject], surface: MeshOb
     surface_bounds = surface.get_bound_box()
     surface_height = max(up_direction.dot(corner) for corner in surface_bounds)
 
-    # cache to fasten collision detection
-    bvh_cache: Dict[str, mathutils.bvhtree.BVHTree] = {}
+    # cache to fasten collision detection, trees of moved objects are rebuilt automatically
+    bvh_cache = BVHCache()
+    # grid over the bounding boxes of all placed objects
+    broad_phase = AABBGrid(AABBGrid.calc_cell_size(objects_to_sample))
 
     placed_objects: List[MeshObject] = []
     for obj in objects_to_sample:
@@ -57,11 +58,8 @@ def sample_poses_on_surface(objects_to_sample: List[MeshObject], surface: MeshOb
 
         for i in range(max_tries):
             sample_pose_func(obj)
-            # Remove bvh cache, as object has changed
-            if obj.get_name() in bvh_cache:
-                del bvh_cache[obj.get_name()]
 
-            if not CollisionUtility.check_intersections(obj, bvh_cache, placed_objects, []):
+            if not CollisionUtility.check_intersections(obj, bvh_cache, placed_objects, [], broad_phase=broad_phase):
                 print("Collision detected, retrying!")
                 continue
 
@@ -70,9 +68,6 @@ def sample_poses_on_surface(objects_to_sample: List[MeshObject], surface: MeshOb
                 continue
 
             _OnSurfaceSampler.drop(obj, up_direction, surface_height)
-            # Remove bvh cache, as object has changed
-            if obj.get_name() in bvh_cache:
-                del bvh_cache[obj.get_name()]
 
             if not _OnSurfaceSampler.check_above_surface(obj, surface, up_direction, check_all_bb_corners_over_surface):
                 print("Not above surface after drop, retrying!")
@@ -82,12 +77,13 @@ def sample_poses_on_surface(objects_to_sample: List[MeshObject], surface: MeshOb
                 print("Bad spacing after drop, retrying!")
                 continue
 
-            if not CollisionUtility.check_intersections(obj, bvh_cache, placed_objects, []):
+            if not CollisionUtility.check_intersections(obj, bvh_cache, placed_objects, [], broad_phase=broad_phase):
                 print("Collision detected after drop, retrying!")
                 continue
 
             print(f"Placed object \"{obj.get_name()}\" successfully at {obj.get_location()} after {i + 1} iterations!")
             placed_objects.append(obj)
+            broad_phase.insert(obj)
 
             placed_successfully = True
             break
@@ -1,5 +1,7 @@
 """Run the physics simulation for the objects in the scene."""
 
+from typing import Dict, List, Optional, Tuple, Union
+
 import bpy
 import mathutils
 import numpy as np
@@ -152,7 +154,8 @@ def simulate_physics_and_persist_all_frames(min_simulation_time: float = 4.0, ma
 def simulate_physics(min_simulation_time: float = 4.0, max_simulation_time: float = 40.0,
                      check_object_interval: float = 2.0, object_stopped_location_threshold: float = 0.01,
                      object_stopped_rotation_threshold: float = 0.1, substeps_per_frame: int = 10,
-                     solver_iters: int = 10, verbose: bool = False, use_volume_com: bool = False) -> dict:
+                     solver_iters: int = 10, verbose: bool = False, use_volume_com: bool = False,
+                     return_settle_times: bool = False) -> Union[dict, Tuple[dict, Dict[str, Optional[float]]]]:
     """ Simulates the current scene.
 
     The simulation is run for at least `min_simulation_time` seconds and at a maximum `max_simulation_time` seconds.
@@ -178,6 +181,8 @@ def simulate_physics(min_simulation_time: float = 4.0, max_simulation_time: floa
     :param verbose: If True, more details during the physics simulation are printed.
     :param use_volume_com: If True, the center of mass will be calculated by using the object volume.
                            This is more accurate than using the surface area (default), but requires a watertight mesh.
+    :param return_settle_times: If True, also the time in seconds since which each active object has not moved
+                                anymore is returned, None for objects that were still moving at the end.
     :return: A dict containing for every active object the shift that was added to their origins.
     """
     # Shift the origin of all objects to their center of mass to make the simulation more realistic
@@ -196,10 +201,12 @@ def simulate_physics(min_simulation_time: float = 4.0, max_simulation_time: floa
     bpy.context.scene.rigidbody_world.solver_iterations = solver_iters
 
     # Perform simulation
-    _PhysicsSimulation.do_simulation(min_simulation_time, max_simulation_time, check_object_interval,
-                                     object_stopped_location_threshold, object_stopped_rotation_threshold,
-                                     verbose)
+    settle_times = _PhysicsSimulation.do_simulation(min_simulation_time, max_simulation_time, check_object_interval,
+                                                    object_stopped_location_threshold,
+                                                    object_stopped_rotation_threshold, verbose)
 
+    if return_settle_times:
+        return origin_shift, settle_times
     return origin_shift
 
 
@@ -226,11 +233,11 @@ def frames_to_seconds(frames: int) -> float:
     @staticmethod
     def do_simulation(min_simulation_time: float, max_simulation_time: float, check_object_interval: float,
                       object_stopped_location_threshold: float, object_stopped_rotation_threshold: float,
-                      verbose: bool = False):
+                      verbose: bool = False) -> Dict[str, Optional[float]]:
         """ Perform the simulation.
 
-        This method bakes the simulation for the configured number of iterations and returns all object positions
-        at the last frame.
+        The simulation is stepped forward frame by frame until all objects have stopped moving or the maximum time
+        is reached. In the end, the simulated frames are baked.
 
         :param min_simulation_time: The minimum number of seconds to simulate.
         :param max_simulation_time: The maximum number of seconds to simulate.
@@ -243,6 +250,8 @@ def do_simulation(min_simulation_time: float, max_simulation_time: float, check_
                                                   Euler vector that is allowed such that an object is still recognized
                                                   as 'stopped moving'.
         :param verbose: If True, more details during the physics simulation are printed.
+        :return: For every active object the time in seconds since which it has not moved anymore, or None if it was
+                 still moving at the end of the simulation.
         """
         # Make sure the RigidBody world is active
         bpy.context.scene.rigidbody_world.enabled = True
@@ -254,38 +263,67 @@ def do_simulation(min_simulation_time: float, max_simulation_time: float, check_
         if min_simulation_time >= max_simulation_time:
             raise Exception("max_simulation_iterations has to be bigger than min_simulation_iterations")
 
+        check_times = np.arange(min_simulation_time, max_simulation_time, check_object_interval)
+        check_frames = [_PhysicsSimulation.seconds_to_frames(current_time) for current_time in check_times]
+        one_second = _PhysicsSimulation.seconds_to_frames(1)
+        # The poses are only needed at the check frames and one second before them
+        frames_to_record = set(check_frames) | {max(frame - one_second, point_cache.frame_start)
+                                                for frame in check_frames}
+
+        # Remove any previous bake, so the simulation can be stepped forward frame by frame, every simulated frame is
+        # kept in the cache, so earlier frames never have to be simulated again
+        with bpy.context.temp_override(point_cache=point_cache):
+            bpy.ops.ptcache.free_bake()
+        point_cache.frame_end = check_frames[-1]
+        objects = [obj for obj in get_all_blender_mesh_objects()
+                   if obj.rigid_body is not None and obj.rigid_body.type == 'ACTIVE']
+
+        # Going to the start frame resets the simulation
+        frame = point_cache.frame_start
+        bpy.context.scene.frame_set(frame)
+        recorded_poses = {frame: _PhysicsSimulation.get_pose_array(objects)}
+        # The frame since which each object has stopped moving, -1 if it is still moving
+        settle_frames = np.full(len(objects), -1)
+
         # Run simulation starting from min to max in the configured steps
-        for current_time in np.arange(min_simulation_time, max_simulation_time, check_object_interval):
-            current_frame = _PhysicsSimulation.seconds_to_frames(current_time)
+        for current_time, current_frame in zip(check_times, check_frames):
             print("Running simulation up to " + str(current_time) + " seconds (" + str(current_frame) + " frames)")
 
-            # Simulate current interval
-            point_cache.frame_end = current_frame
+            # Simulate current interval, the rigid body world can only be stepped one frame at a time
             with stdout_redirected(enabled=not verbose):
-                with bpy.context.temp_override(point_cache=point_cache):
-                    bpy.ops.ptcache.bake(bake=True)
-
-            # Go to second last frame and get poses
-            bpy.context.scene.frame_set(current_frame - _PhysicsSimulation.seconds_to_frames(1))
-            old_poses = _PhysicsSimulation.get_pose()
-
-            # Go to last frame of simulation and get poses
-            bpy.context.scene.frame_set(current_frame)
-            new_poses = _PhysicsSimulation.get_pose()
+                while frame < current_frame:
+                    frame += 1
+                    bpy.context.scene.frame_set(frame)
+                    if frame in frames_to_record:
+                        recorded_poses[frame] = _PhysicsSimulation.get_pose_array(objects)
+
+            # Compare the poses one second before the last frame with the ones in the last frame
+            old_poses = recorded_poses[max(current_frame - one_second, point_cache.frame_start)]
+            new_poses = recorded_poses[current_frame]
+            stopped = _PhysicsSimulation.have_objects_stopped_moving(old_poses, new_poses,
+                                                                     object_stopped_location_threshold,
+                                                                     object_stopped_rotation_threshold)
+            settle_frames[stopped & (settle_frames < 0)] = current_frame
+            settle_frames[~stopped] = -1
+            if verbose:
+                print(f"{np.count_nonzero(stopped)} of {len(objects)} objects have stopped moving")
 
             # If objects have stopped moving between the last two frames, then stop here
-            if _PhysicsSimulation.have_objects_stopped_moving(old_poses, new_poses, object_stopped_location_threshold,
-                                                              object_stopped_rotation_threshold):
+            if np.all(stopped):
                 print("Objects have stopped moving after " + str(current_time) + "  seconds (" + str(
                     current_frame) + " frames)")
                 break
             if current_time + check_object_interval >= max_simulation_time:
                 print("Stopping simulation as configured max_simulation_time has been reached")
-            else:
-                # Free bake (this will not completely remove the simulation cache, so further simulations can
-                # reuse the already calculated frames)
-                with bpy.context.temp_override(point_cache=point_cache):
-                    bpy.ops.ptcache.free_bake()
+
+        # Only the frames up to where the simulation stopped have been simulated and cached
+        point_cache.frame_end = frame
+        # Turn the simulated frames into a bake without simulating them again
+        with bpy.context.temp_override(point_cache=point_cache):
+            bpy.ops.ptcache.bake_from_cache()
+
+        return {obj.name: _PhysicsSimulation.frames_to_seconds(settle_frame) if settle_frame >= 0 else None
+                for obj, settle_frame in zip(objects, settle_frames)}
 
     @staticmethod
     def get_pose() -> dict:
@@ -305,31 +343,47 @@ def get_pose() -> dict:
         return objects_poses
 
     @staticmethod
-    def have_objects_stopped_moving(last_poses: dict, new_poses: dict, object_stopped_location_threshold: float,
-                                    object_stopped_rotation_threshold: float) -> bool:
+    def get_pose_array(objects: List[bpy.types.Object]) -> np.ndarray:
+        """ Returns the current position and rotation of the given objects.
+
+        :param objects: The objects whose poses should be returned.
+        :return: An array of shape [N, 6] containing the location and the XYZ euler rotation of every object.
+        """
+        if not objects:
+            return np.zeros((0, 6))
+        matrices = np.array([obj.matrix_world for obj in objects])
+        # Remove the scale from the rotation part
+        rotations = matrices[:, :3, :3] / np.linalg.norm(matrices[:, :3, :3], axis=1, keepdims=True)
+        # Convert the rotation matrices into XYZ euler angles, the same convention as in Matrix.to_euler()
+        cos_y = np.hypot(rotations[:, 0, 0], rotations[:, 1, 0])
+        not_singular = cos_y > 1e-6
+        euler = np.stack([
+            np.where(not_singular, np.arctan2(rotations[:, 2, 1], rotations[:, 2, 2]),
+                     np.arctan2(-rotations[:, 1, 2], rotations[:, 1, 1])),
+            np.arctan2(-rotations[:, 2, 0], cos_y),
+            np.where(not_singular, np.arctan2(rotations[:, 1, 0], rotations[:, 0, 0]), 0)
+        ], axis=1)
+        return np.concatenate((matrices[:, :3, 3], euler), axis=1)
+
+    @staticmethod
+    def have_objects_stopped_moving(last_poses: np.ndarray, new_poses: np.ndarray,
+                                    object_stopped_location_threshold: float,
+                                    object_stopped_rotation_threshold: float) -> np.ndarray:
         """ Check if the difference between the two given poses per object is smaller than the configured threshold.
 
-        :param last_poses: Dict of form {obj_name:{'location':[x, y, z], 'rotation':[x_rot, y_rot, z_rot]}}.
-        :param new_poses: Dict of form {obj_name:{'location':[x, y, z], 'rotation':[x_rot, y_rot, z_rot]}}.
+        :param last_poses: An array of shape [N, 6] containing the location and the euler rotation of every object.
+        :param new_poses: An array of shape [N, 6] containing the location and the euler rotation of every object.
         :param object_stopped_location_threshold: The maximum difference per second and per coordinate in the rotation
                                                   Euler vector that is allowed such that an object is still recognized
                                                   as 'stopped moving'.
         :param object_stopped_rotation_threshold: The maximum difference per second and per coordinate in the rotation
                                                   Euler vector that is allowed such that an object is still recognized
                                                   as 'stopped moving'.
-        :return: True, if no objects are moving anymore.
+        :return: For every object, whether it is not moving anymore.
         """
-        stopped = True
-        for obj_name in last_poses:
-            # Check location difference
-            location_diff = last_poses[obj_name]['location'] - new_poses[obj_name]['location']
-            stopped = stopped and not any(location_diff[i] > object_stopped_location_threshold for i in range(3))
-
-            # Check rotation difference
-            rotation_diff = last_poses[obj_name]['rotation'] - new_poses[obj_name]['rotation']
-            stopped = stopped and not any(rotation_diff[i] > object_stopped_rotation_threshold for i in range(3))
-
-            if not stopped:
-                break
-
-        return stopped
+        # Check location difference
+        location_diff = np.abs(last_poses[:, :3] - new_poses[:, :3])
+        # Check rotation difference, angles close to -pi and pi describe almost the same rotation
+        rotation_diff = np.abs((last_poses[:, 3:] - new_poses[:, 3:] + np.pi) % (2 * np.pi) - np.pi)
+        return np.all(location_diff <= object_stopped_location_threshold, axis=1) & \
+            np.all(rotation_diff <= object_stopped_rotation_threshold, axis=1)
@@ -0,0 +1,183 @@
+"""Settle several object configurations concurrently in separate blender processes."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+import bpy
+import numpy as np
+
+from blenderproc.python.object.PhysicsSimulation import simulate_physics_and_fix_final_poses
+from blenderproc.python.types.MeshObjectUtility import get_all_mesh_objects, MeshObject
+from blenderproc.python.utility.SetupUtility import is_using_external_bpy_module
+from blenderproc.python.utility.Utility import Utility
+
+
+class PhysicsSimulationPool:
+    """
+    Runs the physics simulation of multiple independent object configurations in parallel worker processes.
+
+    Every call to submit() saves a copy of the current scene, which is then simulated via
+    simulate_physics_and_fix_final_poses() in a separate headless blender process. The main process can meanwhile
+    prepare the next configuration or render a scene whose simulation has already finished. As soon as a worker
+    is done, the next submitted configuration is started.
+
+    Usage:
+
+    .. code-block:: python
+
+        pool = bproc.object.PhysicsSimulationPool(num_workers=4, max_simulation_time=10)
+        futures = []
+        for i in range(num_scenes):
+            # Enable the rigid bodies and sample the initial poses of the objects for scene i
+            ...
+            futures.append(pool.submit())
+        for future in futures:
+            PhysicsSimulationPool.apply_poses(future.result())
+            # Render scene
+            ...
+    """
+
+    def __init__(self, num_workers: int = 2, min_simulation_time: float = 4.0, max_simulation_time: float = 40.0,
+                 check_object_interval: float = 2.0, object_stopped_location_threshold: float = 0.01,
+                 object_stopped_rotation_threshold: float = 0.1, substeps_per_frame: int = 10,
+                 solver_iters: int = 10, verbose: bool = False, use_volume_com: bool = False):
+        """
+        :param num_workers: The number of simulations which run at the same time.
+        :param min_simulation_time: The minimum number of seconds to simulate.
+        :param max_simulation_time: The maximum number of seconds to simulate.
+        :param check_object_interval: The interval in seconds at which all objects should be checked if they are still
+                                      moving. If all objects have stopped moving, then the simulation will be stopped.
+        :param object_stopped_location_threshold: The maximum difference per second and per coordinate in the
+                                                  location vector that is allowed such that an object is still
+                                                  recognized as 'stopped moving'.
+        :param object_stopped_rotation_threshold: The maximum difference per second and per coordinate in the rotation
+                                                  Euler vector that is allowed such that an object is still recognized
+                                                  as 'stopped moving'.
+        :param substeps_per_frame: Number of simulation steps taken per frame.
+        :param solver_iters: Number of constraint solver iterations made per simulation step.
+        :param verbose: If True, the output of the worker processes is printed.
+        :param use_volume_com: If True, the center of mass will be calculated by using the object volume.
+                               This is more accurate than using the surface area (default), but requires a watertight
+                               mesh.
+        """
+        self.simulation_params = {
+            "min_simulation_time": min_simulation_time,
+            "max_simulation_time": max_simulation_time,
+            "check_object_interval": check_object_interval,
+            "object_stopped_location_threshold": object_stopped_location_threshold,
+            "object_stopped_rotation_threshold": object_stopped_rotation_threshold,
+            "substeps_per_frame": substeps_per_frame,
+            "solver_iters": solver_iters,
+            "verbose": verbose,
+            "use_volume_com": use_volume_com
+        }
+        self.verbose = verbose
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._job_dir = os.path.join(Utility.get_temporary_directory(), "physics_simulation_pool")
+        self._next_job_id = 0
+
+    def submit(self) -> "Future[Dict[str, np.ndarray]]":
+        """ Schedules the simulation of the scene in its current state.
+
+        The scene can be changed right after this call, the simulation works on a copy of it.
+
+        :return: A future whose result maps the names of all active rigid body objects to their local2world matrix
+                 at the end of the simulation.
+        """
+        job_dir = os.path.join(self._job_dir, str(self._next_job_id))
+        self._next_job_id += 1
+        os.makedirs(job_dir, exist_ok=True)
+
+        # Store the current scene and the simulation settings for the worker
+        bpy.ops.wm.save_as_mainfile(filepath=os.path.join(job_dir, "scene.blend"), copy=True)
+        with open(os.path.join(job_dir, "job.json"), "w", encoding="utf-8") as f:
+            json.dump(self.simulation_params, f)
+
+        return self._executor.submit(self._run_job, job_dir)
+
+    def _run_job(self, job_dir: str) -> Dict[str, np.ndarray]:
+        """ Runs the worker process for the given job and collects its result.
+
+        This runs in a separate thread, so it must not use bpy.
+
+        :param job_dir: The directory containing the scene and the settings of the job.
+        :return: The final poses of all active rigid body objects.
+        """
+        # The worker needs to be able to import blenderproc the same way the main script does
+        repo_root_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        if is_using_external_bpy_module():
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join([repo_root_directory, os.environ.get("PYTHONPATH", "")]))
+            cmd = [sys.executable, os.path.abspath(__file__), job_dir]
+        else:
+            env = dict(os.environ, PYTHONPATH=repo_root_directory, PYTHONNOUSERSITE="1",
+                       INSIDE_OF_THE_INTERNAL_BLENDER_PYTHON_ENVIRONMENT="1")
+            cmd = [bpy.app.binary_path, "--background", "--python-use-system-env", "--python-exit-code", "2",
+                   "--python", os.path.abspath(__file__), "--", os.path.abspath(__file__),
+                   Utility.get_temporary_directory(), job_dir]
+
+        log_path = os.path.join(job_dir, "log.txt")
+        with open(log_path, "w", encoding="utf-8") as log_file:
+            output = None if self.verbose else log_file
+            return_code = subprocess.call(cmd, env=env, stdout=output, stderr=output)
+
+        result_path = os.path.join(job_dir, "poses.npz")
+        if return_code != 0 or not os.path.exists(result_path):
+            raise RuntimeError(f"The physics simulation worker failed with exit code {return_code}, see {log_path}")
+
+        with np.load(result_path) as result:
+            poses = dict(zip(result["names"].tolist(), result["poses"]))
+        shutil.rmtree(job_dir)
+        return poses
+
+    @staticmethod
+    def apply_poses(poses: Dict[str, np.ndarray]):
+        """ Sets the given final poses and deactivates the simulation, like simulate_physics_and_fix_final_poses().
+
+        :param poses: The result of a simulation, mapping object names to their local2world matrix.
+        """
+        for name, local2world in poses.items():
+            MeshObject(bpy.data.objects[name]).set_local2world_mat(local2world)
+
+        # Deactivate the simulation so it does not influence object positions
+        bpy.context.scene.rigidbody_world.enabled = False
+        bpy.context.view_layer.update()
+
+    def close(self, wait: bool = True):
+        """ Shuts down the pool.
+
+        :param wait: If True, waits until all submitted simulations are done.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class _PhysicsSimulationPool:
+
+    @staticmethod
+    def run_worker(job_dir: str):
+        """ Simulates the scene of the given job and writes the final poses into the job directory.
+
+        :param job_dir: The directory containing the scene and the settings of the job.
+        """
+        with open(os.path.join(job_dir, "job.json"), "r", encoding="utf-8") as f:
+            simulation_params = json.load(f)
+        bpy.ops.wm.open_mainfile(filepath=os.path.join(job_dir, "scene.blend"))
+
+        simulate_physics_and_fix_final_poses(**simulation_params)
+
+        names, poses = [], []
+        for obj in get_all_mesh_objects():
+            if obj.has_rigidbody_enabled() and obj.get_rigidbody().type == "ACTIVE":
+                names.append(obj.get_name())
+                poses.append(obj.get_local2world_mat())
+        np.savez(os.path.join(job_dir, "poses.npz"), names=np.array(names, dtype=str),
+                 poses=np.array(poses).reshape(-1, 4, 4))
+
+
+if __name__ == "__main__":
+    # This module is run as script by the worker processes, the job directory is the last argument
+    _PhysicsSimulationPool.run_worker(sys.argv[-1])
@@ -5,8 +5,6 @@
 import numpy as np
 import bpy
 import mathutils
-import cv2
-from scipy import stats
 
 from blenderproc.python.camera import CameraUtility
 from blenderproc.python.utility.BlenderUtility import get_all_blender_mesh_objects
@@ -83,40 +81,27 @@ def remove_segmap_noise(image: Union[list, np.ndarray]) -> Union[list, np.ndarra
 
     Assumes that noise pixel values won't occur more than 100 times.
 
+    A list or a stack of segmaps with the same shape is denoised in one batch.
+
     :param image: ndarray of the .exr segmap
     :return: The denoised segmap image
     """
 
     if isinstance(image, list) or hasattr(image, "shape") and len(image.shape) > 3:
-        return [remove_segmap_noise(img) for img in image]
-
-    noise_indices = _PostProcessingUtility.determine_noisy_pixels(image)
-
-    for index in noise_indices:
-        neighbors = _PostProcessingUtility.get_pixel_neighbors(image, index[0], index[
-            1])  # Extracting the indices surrounding 3x3 neighbors
-        curr_val = image[index[0]][index[1]][0]  # Current value of the noisy pixel
-
-        neighbor_vals = [image[neighbor[0]][neighbor[1]] for neighbor in
-                         neighbors]  # Getting the values of the neighbors
-        # Getting the unique values only
-        neighbor_vals = np.unique(np.array([np.array(index) for index in neighbor_vals]))
-
-        min_val = 10000000000
-        min_idx = 0
-
-        # Here we iterate through the unique values of the neighbor and find the one closest to the current noisy value
-        for idx, n in enumerate(neighbor_vals):
-            # Is this closer than the current closest value?
-            if n - curr_val <= min_val:
-                # If so, update
-                min_val = n - curr_val
-                min_idx = idx
-
-        # Now that we have found the closest value, assign it to the noisy value
-        new_val = neighbor_vals[min_idx]
-        image[index[0]][index[1]] = np.array([new_val, new_val, new_val])
-
+        frames = list(image)
+        if (frames and np.issubdtype(frames[0].dtype, np.unsignedinteger)) or \
+                any(frame.shape != frames[0].shape or frame.dtype != frames[0].dtype for frame in frames):
+            return [remove_segmap_noise(img) for img in image]
+        if frames:
+            denoised = _PostProcessingUtility.remove_segmap_noise_batch(np.stack(frames))
+            for frame, denoised_frame in zip(frames, denoised):
+                frame[...] = denoised_frame
+        return frames
+
+    if np.issubdtype(image.dtype, np.unsignedinteger):
+        # The closest value search below wraps around for unsigned values, which the batched version does not mimic
+        return _PostProcessingUtility.remove_segmap_noise_per_pixel(image)
+    image[...] = _PostProcessingUtility.remove_segmap_noise_batch(image[np.newaxis])[0]
     return image
 
 
@@ -133,6 +118,11 @@ def oil_paint_filter(image: Union[list, np.ndarray], filter_size: int = 5, edges
                     replicated).
         :return: filtered image
     """
+    # scipy and cv2 are only loaded when they are needed
+    # pylint: disable=import-outside-toplevel
+    from scipy import stats
+    import cv2
+    # pylint: enable=import-outside-toplevel
 
     if rgb:
         if isinstance(image, list) or hasattr(image, "shape") and len(image.shape) > 3:
@@ -199,6 +189,9 @@ def add_kinect_azure_noise(depth: Union[list, np.ndarray], color: Optional[Union
     :param missing_depth_darkness_thres: uint8 gray value threshold at which depth becomes invalid, i.e. 0
     :return: Noisy depth image(s)
     """
+    # pylint: disable=import-outside-toplevel
+    import cv2
+    # pylint: enable=import-outside-toplevel
 
     if isinstance(depth, list) or hasattr(depth, "shape") and len(depth.shape) > 2:
         if color is None:
@@ -239,6 +232,9 @@ def add_gaussian_shifts(image: Union[list, np.ndarray], std: float = 0.5) -> Uni
     :param std: Standard deviation of pixel shifts, defaults to 0.5
     :return: Augmented images
     """
+    # pylint: disable=import-outside-toplevel
+    import cv2
+    # pylint: enable=import-outside-toplevel
 
     if isinstance(image, list) or hasattr(image, "shape") and len(image.shape) > 2:
         return [add_gaussian_shifts(img, std=std) for img in image]
@@ -503,12 +499,93 @@ def is_in(element, test_elements, assume_unique=False, invert=False):
         return np.in1d(element, test_elements, assume_unique=assume_unique, invert=invert).reshape(element.shape)
 
     @staticmethod
-    def determine_noisy_pixels(image: np.ndarray) -> np.ndarray:
+    def remove_segmap_noise_per_pixel(image: np.ndarray) -> np.ndarray:
+        """ Replaces the noisy pixels one after another, see remove_segmap_noise().
+
+        :param image: ndarray of the .exr segmap
+        :return: The denoised segmap image
+        """
+        noise_indices = _PostProcessingUtility.determine_noisy_pixels(image)
+
+        for index in noise_indices:
+            neighbors = _PostProcessingUtility.get_pixel_neighbors(image, index[0], index[
+                1])  # Extracting the indices surrounding 3x3 neighbors
+            curr_val = image[index[0]][index[1]][0]  # Current value of the noisy pixel
+
+            neighbor_vals = [image[neighbor[0]][neighbor[1]] for neighbor in
+                             neighbors]  # Getting the values of the neighbors
+            # Getting the unique values only
+            neighbor_vals = np.unique(np.array([np.array(index) for index in neighbor_vals]))
+
+            min_val = 10000000000
+            min_idx = 0
+
+            # Here we iterate through the unique values of the neighbor and find the one closest to the current noisy
+            # value
+            for idx, n in enumerate(neighbor_vals):
+                # Is this closer than the current closest value?
+                if n - curr_val <= min_val:
+                    # If so, update
+                    min_val = n - curr_val
+                    min_idx = idx
+
+            # Now that we have found the closest value, assign it to the noisy value
+            new_val = neighbor_vals[min_idx]
+            image[index[0]][index[1]] = np.array([new_val, new_val, new_val])
+
+        return image
+
+    @staticmethod
+    def remove_segmap_noise_batch(images: np.ndarray) -> np.ndarray:
+        """ Replaces the noisy pixels of a stack of segmaps, see remove_segmap_noise().
+
+        Processing the noisy pixels one after another in row-major order replaces each of them by the smallest value
+        of its 3x3 neighborhood (over all channels), where noisy neighbors before it have already been replaced.
+        This dependency only runs along the rows and from one row to the next, so one row of all frames is done at a
+        time: The neighbors above, right and below are known, the left neighbors are resolved via a cumulative minimum
+        over each run of consecutive noisy pixels.
+
+        :param images: The segmaps with shape [frames, height, width, channels].
+        :return: The denoised segmaps.
+        """
+        noisy = np.stack([np.any(_PostProcessingUtility.determine_noisy_pixel_mask(image), axis=2)
+                          for image in images])
+        if not np.any(noisy):
+            return images
+
+        border_value = np.inf if np.issubdtype(images.dtype, np.floating) else np.iinfo(images.dtype).max
+        # The smallest channel value of every pixel, padded such that the border never is the minimum
+        values = np.pad(images.min(axis=3), ((0, 0), (1, 1), (1, 1)), constant_values=border_value)
+
+        for row in np.nonzero(np.any(noisy, axis=(0, 2)))[0]:
+            noisy_row = noisy[:, row]
+            above, current, below = values[:, row], values[:, row + 1], values[:, row + 2]
+            neighbor_min = np.minimum.reduce([above[:, :-2], above[:, 1:-1], above[:, 2:], current[:, 2:],
+                                              below[:, :-2], below[:, 1:-1], below[:, 2:]])
+            left_is_noisy = np.zeros_like(noisy_row)
+            left_is_noisy[:, 1:] = noisy_row[:, :-1]
+            # A left neighbor which is not noisy keeps its value, a noisy one is covered by the cumulative minimum
+            neighbor_min = np.where(left_is_noisy, neighbor_min, np.minimum(neighbor_min, current[:, :-2]))
+
+            # Cumulative minimum which restarts at every run of noisy pixels: Every run gets its own offset on the
+            # ranks of the values, such that later runs always lie below all earlier ones
+            unique_values, ranks = np.unique(neighbor_min, return_inverse=True)
+            run_ids = np.cumsum(~(noisy_row & left_is_noisy)).reshape(noisy_row.shape)
+            offset = run_ids * len(unique_values)
+            ranks = np.minimum.accumulate((ranks.reshape(noisy_row.shape) - offset).ravel()).reshape(offset.shape)
+            current[:, 1:-1] = np.where(noisy_row, unique_values[ranks + offset], current[:, 1:-1])
+
+        denoised = images.copy()
+        denoised[noisy] = values[:, 1:-1, 1:-1][noisy][:, np.newaxis]
+        return denoised
+
+    @staticmethod
+    def determine_noisy_pixel_mask(image: np.ndarray) -> np.ndarray:
         """
         :param image: The image data.
-        :return: a list of 2D indices that correspond to the noisy pixels. One criterion of finding \
-                              these pixels is to use a histogram and find the pixels with frequencies lower than \
-                              a threshold, e.g. 100.
+        :return: a mask with the shape of the image, which is True for the noisy values. One criterion of finding \
+                 these pixels is to use a histogram and find the pixels with frequencies lower than a threshold, \
+                 e.g. 100.
         """
         # The map was scaled to be ranging along the entire 16-bit color depth, and this is the scaling down operation
         # that should remove some noise or deviations
@@ -519,9 +596,16 @@ def determine_noisy_pixels(image: np.ndarray) -> np.ndarray:
         # Removing further noise where there are some stray pixel values with very small counts, by assigning them to
         # their closest (numerically, since this deviation is a
         # result of some numerical operation) neighbor.
-        hist = sorted((np.asarray((b, counts)).T), key=lambda x: x[1])
         # Assuming the stray pixels wouldn't have a count of more than 100
-        noise_vals = [h[0] for h in hist if h[1] <= 100]
-        noise_indices = np.argwhere(_PostProcessingUtility.is_in(image, noise_vals))
+        noise_vals = b[counts <= 100]
+        return _PostProcessingUtility.is_in(image, noise_vals)
 
-        return noise_indices
+    @staticmethod
+    def determine_noisy_pixels(image: np.ndarray) -> np.ndarray:
+        """
+        :param image: The image data.
+        :return: a list of 2D indices that correspond to the noisy pixels. One criterion of finding \
+                              these pixels is to use a histogram and find the pixels with frequencies lower than \
+                              a threshold, e.g. 100.
+        """
+        return np.argwhere(_PostProcessingUtility.determine_noisy_pixel_mask(image))
@@ -0,0 +1,204 @@
+"""Provides functionality to render segmentation, optical flow and NOCS images in a single render pass."""
+
+from typing import Dict, List, Optional, Set, Union
+
+import bpy
+import numpy as np
+
+from blenderproc.python.material import MaterialLoaderUtility
+from blenderproc.python.renderer import RendererUtility
+from blenderproc.python.renderer.FlowRendererUtility import _FlowRendererUtility
+from blenderproc.python.renderer.NOCSRendererUtility import _NOCSRendererUtility
+from blenderproc.python.renderer.SegMapRendererUtility import _colorize_objects_for_instance_segmentation, \
+    _save_segmaps
+from blenderproc.python.utility.BlenderUtility import get_all_blender_mesh_objects
+from blenderproc.python.utility.Utility import Utility, UndoAfterExecution
+from blenderproc.python.writer.WriterUtility import _WriterUtility
+
+
+def render_annotations(output_dir: Optional[str] = None, temp_dir: Optional[str] = None,
+                       render_segmentation: bool = True, render_flow: bool = True, render_nocs: bool = True,
+                       map_by: Union[str, List[str]] = "class", default_values: Optional[Dict[str, int]] = None,
+                       segmap_file_prefix: str = "segmap_", segmap_output_key: str = "segmap",
+                       segcolormap_output_file_prefix: str = "instance_attribute_map_",
+                       segcolormap_output_key: str = "segcolormap", use_alpha_channel: bool = False,
+                       render_colorspace_size_per_dimension: int = 2048, num_threads: int = 1,
+                       get_forward_flow: bool = True, get_backward_flow: bool = True,
+                       blender_image_coordinate_style: bool = False,
+                       forward_flow_output_file_prefix: str = "forward_flow_",
+                       forward_flow_output_key: str = "forward_flow",
+                       backward_flow_output_file_prefix: str = "backward_flow_",
+                       backward_flow_output_key: str = "backward_flow", nocs_file_prefix: str = "nocs_",
+                       nocs_output_key: str = "nocs", return_data: bool = True,
+                       verbose: bool = False) -> Dict[str, Union[np.ndarray, List[np.ndarray]]]:
+    """ Renders segmentation maps, optical flow and NOCS images of all frames in one single render pass.
+
+    This gives the same results as calling render_segmap(), render_optical_flow() and render_nocs() one after another,
+    but the scene is only set up and rendered once with one sample per pixel: The instance colors are rendered as the
+    image itself, while the speed vectors and the object coordinates are written into their own render passes.
+
+    :param output_dir: The directory to write the outputs to. If None is given, the temp dir is used.
+    :param temp_dir: The directory to write intermediate data to. If None is given, the temp dir is used.
+    :param render_segmentation: Whether to render segmentation maps, see render_segmap().
+    :param render_flow: Whether to render optical flow, see render_optical_flow().
+    :param render_nocs: Whether to render the Normalized Object Coordinate Space, see render_nocs().
+    :param map_by: The attributes to be used for the color mapping of the segmentation maps.
+    :param default_values: The default values used for the keys used in attributes, if None is {"class": 0}.
+    :param segmap_file_prefix: The prefix to use for writing the segmaps.
+    :param segmap_output_key: The key to use for registering the segmap output.
+    :param segcolormap_output_file_prefix: The prefix to use for writing the segmentation-color map csv.
+    :param segcolormap_output_key: The key to use for registering the segmentation-color map output.
+    :param use_alpha_channel: If true, the alpha channel stored in .png textures is used.
+    :param render_colorspace_size_per_dimension: The size of the color space used per dimension to encode the
+                                                 instances, see render_segmap().
+    :param num_threads: The number of threads used to load and map the rendered segmaps. If 0 is given, one thread
+                        per cpu core is used.
+    :param get_forward_flow: Whether to render forward optical flow.
+    :param get_backward_flow: Whether to render backward optical flow.
+    :param blender_image_coordinate_style: Whether to specify the image coordinate system at the bottom left
+                                           (blender default; True) or top left (standard convention; False).
+    :param forward_flow_output_file_prefix: The file prefix that should be used when writing forward flow to a file.
+    :param forward_flow_output_key: The key which should be used for storing forward optical flow values.
+    :param backward_flow_output_file_prefix: The file prefix that should be used when writing backward flow to a file.
+    :param backward_flow_output_key: The key which should be used for storing backward optical flow values.
+    :param nocs_file_prefix: The prefix to use for writing the NOCS images.
+    :param nocs_output_key: The key to use for registering the NOCS output.
+    :param return_data: Whether to load and return generated data.
+    :param verbose: If True, more details about the rendering process are printed.
+    :return: dict of lists of all rendered annotations, the keys are the same as the ones of render_segmap(),
+             render_optical_flow() and render_nocs().
+    """
+    render_flow = render_flow and (get_forward_flow or get_backward_flow)
+    if not render_segmentation and not render_flow and not render_nocs:
+        raise RuntimeError("At least one of segmentation, optical flow or NOCS has to be rendered.")
+
+    if output_dir is None:
+        output_dir = Utility.get_temporary_directory()
+    if temp_dir is None:
+        temp_dir = Utility.get_temporary_directory()
+    if default_values is None:
+        default_values = {"class": 0}
+
+    return_dict: Dict[str, Union[np.ndarray, List[np.ndarray]]] = {}
+    save_in_csv_attributes = {}
+    with UndoAfterExecution():
+        RendererUtility.render_init()
+        # the amount of samples must be one and there can not be any noise threshold
+        RendererUtility.set_max_amount_of_samples(1)
+        RendererUtility.set_noise_threshold(0)
+        RendererUtility.set_denoiser(None)
+        RendererUtility.set_light_bounces(1, 0, 0, 1, 0, 8, 0)
+        bpy.context.scene.cycles.filter_width = 0.0
+
+        # The instance colors are always rendered, as their materials also carry the NOCS output
+        objs_with_mats = get_all_blender_mesh_objects()
+        colors, num_splits_per_dimension, objects = _colorize_objects_for_instance_segmentation(
+            objs_with_mats, use_alpha_channel, render_colorspace_size_per_dimension)
+
+        if render_nocs:
+            _AnnotationRendererUtility.add_nocs_aovs(objs_with_mats)
+            _AnnotationRendererUtility.output_nocs(output_dir, nocs_file_prefix)
+
+        if use_alpha_channel:
+            MaterialLoaderUtility.add_alpha_channel_to_textures(blurry_edges=False)
+
+        if render_flow:
+            _FlowRendererUtility.output_vector_field(get_forward_flow, get_backward_flow, temp_dir)
+
+        print(f"Rendering {bpy.context.scene.frame_end - bpy.context.scene.frame_start} frames of annotations...")
+        RendererUtility.set_output_format("OPEN_EXR", 16)
+        RendererUtility.render(temp_dir, "seg_", None, return_data=False, verbose=verbose)
+
+        if render_segmentation:
+            return_dict, save_in_csv_attributes = _save_segmaps(temp_dir, "seg_", output_dir, segmap_file_prefix,
+                                                                segcolormap_output_file_prefix, map_by,
+                                                                default_values, colors, num_splits_per_dimension,
+                                                                objects, render_colorspace_size_per_dimension,
+                                                                num_threads)
+        if render_flow:
+            _FlowRendererUtility.save_flow_fields(temp_dir, output_dir, get_forward_flow, get_backward_flow,
+                                                  blender_image_coordinate_style, forward_flow_output_file_prefix,
+                                                  backward_flow_output_file_prefix)
+
+    # register desired outputs
+    load_keys: Set[str] = set()
+    if render_segmentation:
+        Utility.register_output(output_dir, segmap_file_prefix, segmap_output_key, ".npy", "2.0.0")
+        if save_in_csv_attributes:
+            Utility.register_output(output_dir, segcolormap_output_file_prefix, segcolormap_output_key, ".csv",
+                                    "2.0.0")
+    if render_flow and get_forward_flow:
+        Utility.register_output(output_dir, forward_flow_output_file_prefix, forward_flow_output_key, ".npy", "2.0.0")
+        load_keys.add(forward_flow_output_key)
+    if render_flow and get_backward_flow:
+        Utility.register_output(output_dir, backward_flow_output_file_prefix, backward_flow_output_key, ".npy",
+                                "2.0.0")
+        load_keys.add(backward_flow_output_key)
+    if render_nocs:
+        Utility.register_output(output_dir, nocs_file_prefix, nocs_output_key, ".exr", "2.0.0")
+        load_keys.add(nocs_output_key)
+
+    if not return_data:
+        return {}
+    return_dict.update(_WriterUtility.load_registered_outputs(load_keys, keys_with_alpha_channel={nocs_output_key}))
+    return return_dict
+
+
+class _AnnotationRendererUtility:
+
+    @staticmethod
+    def add_nocs_aovs(objects: List[bpy.types.Object]):
+        """ Writes the NOCS color and a mask of all objects into AOVs of the current view layer.
+
+        The materials of the objects keep their surface shader, so the NOCS are rendered in the same pass as the
+        image itself.
+
+        :param objects: The objects whose materials should output their NOCS.
+        """
+        for name, aov_type in [("nocs", "COLOR"), ("nocs_alpha", "VALUE")]:
+            if name not in bpy.context.view_layer.aovs:
+                aov = bpy.context.view_layer.aovs.add()
+                aov.name = name
+                aov.type = aov_type
+
+        materials = {material_slot.material for obj in objects for material_slot in obj.material_slots
+                     if material_slot.material is not None}
+        for material in materials:
+            nodes, links = material.node_tree.nodes, material.node_tree.links
+            nocs_color = _NOCSRendererUtility.add_nocs_color_nodes(nodes, links)
+
+            color_output = nodes.new("ShaderNodeOutputAOV")
+            color_output.aov_name = "nocs"
+            links.new(nocs_color, color_output.inputs["Color"])
+
+            # The background does not write to the AOV, so it stays transparent
+            alpha_output = nodes.new("ShaderNodeOutputAOV")
+            alpha_output.aov_name = "nocs_alpha"
+            alpha_output.inputs["Value"].default_value = 1.0
+
+    @staticmethod
+    def output_nocs(output_dir: str, file_prefix: str):
+        """ Configures the compositor to write the NOCS AOVs as RGBA .exr images.
+
+        :param output_dir: The directory to write the images to.
+        :param file_prefix: The prefix to use for writing the images.
+        """
+        bpy.context.scene.render.use_compositing = True
+        bpy.context.scene.use_nodes = True
+
+        tree = bpy.context.scene.node_tree
+        links = tree.links
+        render_layer_node = tree.nodes.get('Render Layers')
+
+        set_alpha = tree.nodes.new("CompositorNodeSetAlpha")
+        links.new(render_layer_node.outputs["nocs"], set_alpha.inputs["Image"])
+        links.new(render_layer_node.outputs["nocs_alpha"], set_alpha.inputs["Alpha"])
+
+        # Use exr as output format, as it uses a linear colorspace and uses float16
+        output_file = tree.nodes.new("CompositorNodeOutputFile")
+        output_file.base_path = output_dir
+        output_file.format.file_format = "OPEN_EXR"
+        output_file.format.color_mode = "RGBA"
+        output_file.format.color_depth = "16"
+        output_file.file_slots.values()[0].path = file_prefix
+        links.new(set_alpha.outputs["Image"], output_file.inputs["Image"])
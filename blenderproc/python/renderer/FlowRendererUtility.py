@@ -56,34 +56,13 @@ def render_optical_flow(output_dir: str = None, temp_dir: str = None, get_forwar
         _FlowRendererUtility.output_vector_field(get_forward_flow, get_backward_flow, output_dir)
 
         # only need to render once; both fwd and bwd flow will be saved
-        temporary_fwd_flow_file_path = os.path.join(temp_dir, 'fwd_flow_')
-        temporary_bwd_flow_file_path = os.path.join(temp_dir, 'bwd_flow_')
         print(f"Rendering {bpy.context.scene.frame_end - bpy.context.scene.frame_start} frames of optical flow...")
         RendererUtility.render(temp_dir, "img_flow_temp_ignore_me_", None, load_keys=set(), verbose=verbose)
 
         # After rendering: convert to optical flow or calculate hsv visualization, if desired
-        for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
-            # temporarily save respective vector fields
-            if get_forward_flow:
-                file_path = temporary_fwd_flow_file_path + f"{frame:04d}" + ".exr"
-                fwd_flow_field = load_image(file_path, num_channels=4).astype(np.float32)
-
-                if not blender_image_coordinate_style:
-                    fwd_flow_field[:, :, 1] = fwd_flow_field[:, :, 1] * -1
-
-                file_name = os.path.join(output_dir, forward_flow_output_file_prefix) + f"{frame:04d}"
-                forward_flow = fwd_flow_field * -1  # invert forward flow to point at next frame
-                np.save(file_name + '.npy', forward_flow[:, :, :2])
-
-            if get_backward_flow:
-                file_path = temporary_bwd_flow_file_path + f"{frame:04d}" + ".exr"
-                bwd_flow_field = load_image(file_path, num_channels=4).astype(np.float32)
-
-                if not blender_image_coordinate_style:
-                    bwd_flow_field[:, :, 1] = bwd_flow_field[:, :, 1] * -1
-
-                file_name = os.path.join(output_dir, backward_flow_output_file_prefix) + f"{frame:04d}"
-                np.save(file_name + '.npy', bwd_flow_field[:, :, :2])
+        _FlowRendererUtility.save_flow_fields(temp_dir, output_dir, get_forward_flow, get_backward_flow,
+                                              blender_image_coordinate_style, forward_flow_output_file_prefix,
+                                              backward_flow_output_file_prefix)
 
     load_keys = set()
     # register desired outputs
@@ -143,3 +122,43 @@ def output_vector_field(forward_flow: bool, backward_flow: bool, output_dir: str
             bwd_flow_output_file.format.file_format = "OPEN_EXR"
             bwd_flow_output_file.file_slots.values()[0].path = "bwd_flow_"
             links.new(combine_bwd_flow.outputs['Image'], bwd_flow_output_file.inputs['Image'])
+
+    @staticmethod
+    def save_flow_fields(temp_dir: str, output_dir: str, get_forward_flow: bool, get_backward_flow: bool,
+                         blender_image_coordinate_style: bool, forward_flow_output_file_prefix: str,
+                         backward_flow_output_file_prefix: str):
+        """ Converts the rendered vector fields of all frames to optical flow and saves them as .npy files.
+
+        :param temp_dir: The directory the vector fields have been rendered to.
+        :param output_dir: The directory to write the optical flow to.
+        :param get_forward_flow: Whether forward optical flow has been rendered.
+        :param get_backward_flow: Whether backward optical flow has been rendered.
+        :param blender_image_coordinate_style: Whether to specify the image coordinate system at the bottom left
+                                               (blender default; True) or top left (standard convention; False).
+        :param forward_flow_output_file_prefix: The file prefix that should be used when writing forward flow.
+        :param backward_flow_output_file_prefix: The file prefix that should be used when writing backward flow.
+        """
+        temporary_fwd_flow_file_path = os.path.join(temp_dir, 'fwd_flow_')
+        temporary_bwd_flow_file_path = os.path.join(temp_dir, 'bwd_flow_')
+        for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
+            # temporarily save respective vector fields
+            if get_forward_flow:
+                file_path = temporary_fwd_flow_file_path + f"{frame:04d}" + ".exr"
+                fwd_flow_field = load_image(file_path, num_channels=4).astype(np.float32)
+
+                if not blender_image_coordinate_style:
+                    fwd_flow_field[:, :, 1] = fwd_flow_field[:, :, 1] * -1
+
+                file_name = os.path.join(output_dir, forward_flow_output_file_prefix) + f"{frame:04d}"
+                forward_flow = fwd_flow_field * -1  # invert forward flow to point at next frame
+                np.save(file_name + '.npy', forward_flow[:, :, :2])
+
+            if get_backward_flow:
+                file_path = temporary_bwd_flow_file_path + f"{frame:04d}" + ".exr"
+                bwd_flow_field = load_image(file_path, num_channels=4).astype(np.float32)
+
+                if not blender_image_coordinate_style:
+                    bwd_flow_field[:, :, 1] = bwd_flow_field[:, :, 1] * -1
+
+                file_name = os.path.join(output_dir, backward_flow_output_file_prefix) + f"{frame:04d}"
+                np.save(file_name + '.npy', bwd_flow_field[:, :, :2])
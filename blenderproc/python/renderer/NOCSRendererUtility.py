@@ -71,23 +71,34 @@ def create_nocs_material() -> Material:
         :return: The created material.
         """
         nocs_material: Material = MaterialLoaderUtility.create("nocs")
-        tex_coords_node = nocs_material.new_node("ShaderNodeTexCoord")
+        nocs_color = _NOCSRendererUtility.add_nocs_color_nodes(nocs_material.nodes, nocs_material.links)
+
+        # Link to output node
+        output_node = nocs_material.get_the_one_node_with_type('OutputMaterial')
+        nocs_material.link(nocs_color, output_node.inputs['Surface'])
+        return nocs_material
+
+    @staticmethod
+    def add_nocs_color_nodes(nodes: bpy.types.Nodes, links: bpy.types.NodeLinks) -> bpy.types.NodeSocket:
+        """ Adds the nodes which map the object coordinates to their NOCS color to the given node tree.
+
+        :param nodes: The nodes of the node tree.
+        :param links: The links of the node tree.
+        :return: The socket which outputs the NOCS color.
+        """
+        tex_coords_node = nodes.new("ShaderNodeTexCoord")
 
         # Scale [-1, 1] to [-0.5, 0.5]
-        scale_node = nocs_material.new_node("ShaderNodeVectorMath")
+        scale_node = nodes.new("ShaderNodeVectorMath")
         scale_node.operation = "SCALE"
         scale_node.inputs[3].default_value = 0.5
 
         # Move [-0.5, 0.5] to [0, 1]
-        add_node = nocs_material.new_node("ShaderNodeVectorMath")
+        add_node = nodes.new("ShaderNodeVectorMath")
         add_node.operation = "ADD"
         add_node.inputs[1].default_value = [0.5, 0.5, 0.5]
 
         # Link the three nodes
-        nocs_material.link(tex_coords_node.outputs["Object"], scale_node.inputs[0])
-        nocs_material.link(scale_node.outputs["Vector"], add_node.inputs[0])
-
-        # Link to output node
-        output_node = nocs_material.get_the_one_node_with_type('OutputMaterial')
-        nocs_material.link(add_node.outputs["Vector"], output_node.inputs['Surface'])
-        return nocs_material
+        links.new(tex_coords_node.outputs["Object"], scale_node.inputs[0])
+        links.new(scale_node.outputs["Vector"], add_node.inputs[0])
+        return add_node.outputs["Vector"]
@@ -0,0 +1,263 @@
+"""Provides a numpy based CPU rasterizer to render depth, instance and normal images without cycles or OpenGL."""
+
+from typing import Dict, List, Optional, Tuple
+
+import bpy
+import numpy as np
+
+from blenderproc.python.camera import CameraUtility
+from blenderproc.python.types.MeshObjectUtility import MeshObject, get_all_mesh_objects
+from blenderproc.python.utility.BlenderUtility import get_all_blender_mesh_objects, get_mesh_vertices_and_triangles
+from blenderproc.python.utility.Utility import KeyFrame
+
+
+def render_rasterized_labels(objects: Optional[List[MeshObject]] = None, render_depth: bool = True,
+                             render_instances: bool = True, render_normals: bool = True,
+                             depth_output_key: str = "depth", segmap_output_key: str = "instance_segmaps",
+                             normals_output_key: str = "normals",
+                             background_depth: float = 1e10) -> Dict[str, List[np.ndarray]]:
+    """ Renders depth, instance segmentation and normal images of all frames by rasterizing the meshes on the CPU.
+
+    The outputs follow the conventions of the cycles label passes, so they can be used in their place, e.g. for
+    `bproc.writer.write_bop()`:
+
+    - The depth is the distance along the optical axis in meters.
+    - The instance ids are the pass indices as assigned by `bproc.renderer.enable_segmentation_output()`,
+      0 is the background.
+    - The normals are given in the camera frame and mapped from [-1, 1] to [0, 1], like the ones of
+      `bproc.renderer.enable_normals_output()`.
+
+    As there is no path tracing involved, transparency, displacement and modifiers which are only applied during
+    rendering are ignored and every pixel is only sampled at its center.
+
+    :param objects: The objects to render. If None, all visible mesh objects are rendered.
+    :param render_depth: Whether to render depth images.
+    :param render_instances: Whether to render instance segmentation images.
+    :param render_normals: Whether to render normal images.
+    :param depth_output_key: The key to use for the depth images.
+    :param segmap_output_key: The key to use for the instance segmentation images.
+    :param normals_output_key: The key to use for the normal images.
+    :param background_depth: The depth assigned to pixels which do not show any object.
+    :return: A dict containing a list of images per requested output.
+    """
+    if objects is None:
+        objects = [obj for obj in get_all_mesh_objects() if not obj.is_hidden()]
+
+    # Assign the same pass indices as enable_segmentation_output(), background is always zero
+    for index, obj in enumerate(get_all_blender_mesh_objects()):
+        obj.pass_index = index + 1
+
+    # The mesh data is extracted only once, only the object transformations are updated per frame
+    meshes = []
+    for obj in objects:
+        vertices, faces = get_mesh_vertices_and_triangles(obj.get_mesh())
+        corner_normals = np.empty(len(faces) * 9, dtype=np.float32)
+        obj.get_mesh().loop_triangles.foreach_get("split_normals", corner_normals)
+        meshes.append((obj, vertices[faces], corner_normals.reshape(-1, 3, 3)))
+
+    width, height = bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_y
+    # Find the optimal dtype of the segmaps based on the max pass index
+    for segmap_dtype in [np.uint8, np.uint16, np.uint32]:
+        if np.iinfo(segmap_dtype).max >= len(get_all_blender_mesh_objects()):
+            break
+    # Maps the blender camera frame (-z forward, y up) to the opencv camera frame (z forward, y down)
+    blender_to_opencv = np.diag([1.0, -1.0, -1.0])
+
+    results: Dict[str, List[np.ndarray]] = {}
+    for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
+        with KeyFrame(frame):
+            cam2world = CameraUtility.get_camera_pose()
+            K = CameraUtility.get_intrinsics_as_K_matrix()
+            clip_start = bpy.context.scene.camera.data.clip_start
+            clip_end = bpy.context.scene.camera.data.clip_end
+            world2cam = np.linalg.inv(cam2world)
+
+            triangles, corner_normals, instance_ids = [], [], []
+            for obj, obj_triangles, obj_corner_normals in meshes:
+                local2cam = world2cam @ obj.get_local2world_mat()
+                triangles.append(obj_triangles @ (blender_to_opencv @ local2cam[:3, :3]).T +
+                                 blender_to_opencv @ local2cam[:3, 3])
+                # Normals are transformed via the inverse transpose, the result is in the blender camera frame
+                corner_normals.append(obj_corner_normals @ np.linalg.inv(local2cam[:3, :3]))
+                instance_ids.append(np.full(len(obj_triangles), obj.blender_obj.pass_index, dtype=np.int64))
+
+        triangles = np.concatenate(triangles) if triangles else np.zeros((0, 3, 3))
+        depth, triangle_ids, barycentrics = rasterize_triangles(triangles, K, width, height, clip_start, clip_end)
+        is_foreground = triangle_ids >= 0
+
+        if render_depth:
+            results.setdefault(depth_output_key, []).append(np.where(is_foreground, depth, background_depth))
+        if render_instances:
+            instance_ids = np.concatenate(instance_ids) if instance_ids else np.zeros(0, dtype=np.int64)
+            segmap = np.zeros((height, width), dtype=segmap_dtype)
+            segmap[is_foreground] = instance_ids[triangle_ids[is_foreground]]
+            results.setdefault(segmap_output_key, []).append(segmap)
+        if render_normals:
+            corner_normals = np.concatenate(corner_normals) if corner_normals else np.zeros((0, 3, 3))
+            normals = np.zeros((height, width, 3), dtype=np.float32)
+            normals[is_foreground] = np.einsum("nk,nkc->nc", barycentrics[is_foreground],
+                                               corner_normals[triangle_ids[is_foreground]])
+            normals /= np.maximum(np.linalg.norm(normals, axis=-1, keepdims=True), 1e-12)
+            results.setdefault(normals_output_key, []).append(normals * 0.5 + 0.5)
+
+    return results
+
+
+def rasterize_triangles(triangles: np.ndarray, K: np.ndarray, width: int, height: int, clip_start: float = 0.1,
+                        clip_end: float = 1000.0,
+                        max_fragments_per_batch: int = 2 ** 22) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Rasterizes the given triangles into a z-buffer, evaluated at the pixel centers.
+
+    All triangles are processed in vectorized batches: For every triangle all pixels within its bounding box are
+    tested at once and the closest fragment per pixel is kept. Triangles are neither culled by their orientation nor
+    antialiased.
+
+    :param triangles: The corners of the triangles in the opencv camera frame (z forward, y down), shape [M, 3, 3].
+    :param K: The 3x3 intrinsics, the center of pixel (x, y) is projected to (x, y).
+    :param width: The width of the image in pixels.
+    :param height: The height of the image in pixels.
+    :param clip_start: Triangles are clipped at this depth.
+    :param clip_end: Fragments further away than this depth are discarded.
+    :param max_fragments_per_batch: The maximum number of tested triangle/pixel pairs per batch, this limits the
+                                    memory usage.
+    :return: The depth image with shape [H, W], the index of the visible triangle per pixel with shape [H, W] (-1 for
+             the background) and the perspective-correct barycentric coordinates of the pixel w.r.t. the corners of
+             its triangle with shape [H, W, 3].
+    """
+    depth = np.full(height * width, np.inf)
+    triangle_ids = np.full(height * width, -1, dtype=np.int64)
+    barycentrics = np.zeros((height * width, 3))
+
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    triangles, source_ids, corner_barycentrics = _RasterizerUtility.clip_triangles_to_near_plane(triangles, clip_start)
+
+    # Project the corners into the image
+    z = triangles[:, :, 2]
+    u = K[0, 0] * triangles[:, :, 0] / z + K[0, 1] * triangles[:, :, 1] / z + K[0, 2]
+    v = K[1, 1] * triangles[:, :, 1] / z + K[1, 2]
+
+    # Determine the pixels whose centers can be covered by each triangle
+    min_x = np.maximum(np.ceil(u.min(axis=1)), 0).astype(np.int64)
+    max_x = np.minimum(np.floor(u.max(axis=1)), width - 1).astype(np.int64)
+    min_y = np.maximum(np.ceil(v.min(axis=1)), 0).astype(np.int64)
+    max_y = np.minimum(np.floor(v.max(axis=1)), height - 1).astype(np.int64)
+    box_widths, box_heights = max_x - min_x + 1, max_y - min_y + 1
+    area = (u[:, 1] - u[:, 0]) * (v[:, 2] - v[:, 0]) - (u[:, 2] - u[:, 0]) * (v[:, 1] - v[:, 0])
+    valid = (box_widths > 0) & (box_heights > 0) & (np.abs(area) > 1e-12) & (z.min(axis=1) <= clip_end)
+    valid_ids = np.flatnonzero(valid)
+
+    # Large bounding boxes are split into bands of rows, s.t. every band fits into one batch
+    rows_per_band = np.maximum(1, max_fragments_per_batch // box_widths[valid_ids])
+    num_bands = -(-box_heights[valid_ids] // rows_per_band)
+    band_triangles = np.repeat(valid_ids, num_bands)
+    band_index = np.arange(num_bands.sum()) - np.repeat(np.cumsum(num_bands) - num_bands, num_bands)
+    band_rows = np.repeat(rows_per_band, num_bands)
+    band_min_y = min_y[band_triangles] + band_index * band_rows
+    band_heights = np.minimum(band_rows, max_y[band_triangles] - band_min_y + 1)
+    band_widths = box_widths[band_triangles]
+    cumulative_fragments = np.cumsum(band_widths * band_heights)
+
+    start = 0
+    while start < len(band_triangles):
+        previous_fragments = cumulative_fragments[start - 1] if start > 0 else 0
+        end = max(start + 1, int(np.searchsorted(cumulative_fragments, previous_fragments + max_fragments_per_batch,
+                                                 side="right")))
+        bands = np.arange(start, end)
+        start = end
+
+        # All pixels inside the bands of this batch
+        counts = band_widths[bands] * band_heights[bands]
+        fragment_bands = np.repeat(bands, counts)
+        local_ids = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        fragment_triangles = band_triangles[fragment_bands]
+        xs = min_x[fragment_triangles] + local_ids % band_widths[fragment_bands]
+        ys = band_min_y[fragment_bands] + local_ids // band_widths[fragment_bands]
+
+        # Screen space barycentric coordinates via the edge functions
+        fu, fv = u[fragment_triangles], v[fragment_triangles]
+        inv_area = 1.0 / area[fragment_triangles]
+        l0 = ((fu[:, 1] - xs) * (fv[:, 2] - ys) - (fu[:, 2] - xs) * (fv[:, 1] - ys)) * inv_area
+        l1 = ((fu[:, 2] - xs) * (fv[:, 0] - ys) - (fu[:, 0] - xs) * (fv[:, 2] - ys)) * inv_area
+        l2 = 1.0 - l0 - l1
+        inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+
+        # 1/z is linear in screen space, which also gives the perspective-correct barycentric coordinates
+        screen_barycentrics = np.stack([l0, l1, l2], axis=1)[inside]
+        fragment_triangles, xs, ys = fragment_triangles[inside], xs[inside], ys[inside]
+        weighted = screen_barycentrics / z[fragment_triangles]
+        inv_depth = weighted.sum(axis=1)
+        fragment_depth = 1.0 / inv_depth
+        # The triangles have already been clipped at clip_start, so only the far plane is left
+        in_range = fragment_depth <= clip_end
+        fragment_depth, fragment_triangles = fragment_depth[in_range], fragment_triangles[in_range]
+        weighted, inv_depth = weighted[in_range], inv_depth[in_range]
+        pixels = ys[in_range] * width + xs[in_range]
+
+        # Keep the closest fragment per pixel and merge it into the z-buffer
+        order = np.lexsort((fragment_depth, pixels))
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = pixels[order[1:]] != pixels[order[:-1]]
+        closest = order[is_first]
+        closest = closest[fragment_depth[closest] < depth[pixels[closest]]]
+        pixels, fragment_triangles = pixels[closest], fragment_triangles[closest]
+        depth[pixels] = fragment_depth[closest]
+        triangle_ids[pixels] = source_ids[fragment_triangles]
+        # Express the barycentric coordinates w.r.t. the corners of the original (unclipped) triangle
+        barycentrics[pixels] = np.einsum("nk,nkc->nc", weighted[closest] / inv_depth[closest, None],
+                                         corner_barycentrics[fragment_triangles])
+
+    return depth.reshape(height, width), triangle_ids.reshape(height, width), barycentrics.reshape(height, width, 3)
+
+
+class _RasterizerUtility:
+
+    @staticmethod
+    def clip_triangles_to_near_plane(triangles: np.ndarray,
+                                     clip_start: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Clips the given triangles at the plane z = clip_start, only the parts in front of it are kept.
+
+        :param triangles: The corners of the triangles in the opencv camera frame, shape [M, 3, 3].
+        :param clip_start: The depth of the clipping plane.
+        :return: The clipped triangles, the index of the original triangle of every clipped triangle and the
+                 barycentric coordinates of the new corners w.r.t. the corners of their original triangle,
+                 shape [K, 3, 3].
+        """
+        behind = triangles[:, :, 2] < clip_start
+        num_behind = behind.sum(axis=1)
+        identity = np.broadcast_to(np.eye(3), triangles.shape)
+
+        result_triangles = [triangles[num_behind == 0]]
+        result_ids = [np.flatnonzero(num_behind == 0)]
+        result_barycentrics = [identity[num_behind == 0]]
+
+        for count in [1, 2]:
+            ids = np.flatnonzero(num_behind == count)
+            # Rotate the corners, s.t. the single corner on its own side of the plane comes first, this keeps the
+            # orientation of the triangle
+            single_corner = np.argmax(behind[ids] if count == 1 else ~behind[ids], axis=1)
+            order = (single_corner[:, None] + np.arange(3)) % 3
+            corners = triangles[ids[:, None], order]
+            corner_barycentrics = identity[ids[:, None], order]
+
+            # Intersections of the edges starting at the single corner with the plane
+            t_b = (clip_start - corners[:, 0, 2]) / (corners[:, 1, 2] - corners[:, 0, 2])
+            t_c = (clip_start - corners[:, 0, 2]) / (corners[:, 2, 2] - corners[:, 0, 2])
+            p = corners[:, 0] + t_b[:, None] * (corners[:, 1] - corners[:, 0])
+            q = corners[:, 0] + t_c[:, None] * (corners[:, 2] - corners[:, 0])
+            p_bary = corner_barycentrics[:, 0] + t_b[:, None] * (corner_barycentrics[:, 1] - corner_barycentrics[:, 0])
+            q_bary = corner_barycentrics[:, 0] + t_c[:, None] * (corner_barycentrics[:, 2] - corner_barycentrics[:, 0])
+
+            if count == 1:
+                # The remaining quad (p, b, c, q) is split into two triangles
+                result_triangles += [np.stack([p, corners[:, 1], corners[:, 2]], axis=1),
+                                     np.stack([p, corners[:, 2], q], axis=1)]
+                result_barycentrics += [np.stack([p_bary, corner_barycentrics[:, 1], corner_barycentrics[:, 2]],
+                                                 axis=1),
+                                        np.stack([p_bary, corner_barycentrics[:, 2], q_bary], axis=1)]
+                result_ids += [ids, ids]
+            else:
+                result_triangles.append(np.stack([corners[:, 0], p, q], axis=1))
+                result_barycentrics.append(np.stack([corner_barycentrics[:, 0], p_bary, q_bary], axis=1))
+                result_ids.append(ids)
+
+        return np.concatenate(result_triangles), np.concatenate(result_ids), np.concatenate(result_barycentrics)
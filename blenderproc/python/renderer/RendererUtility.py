@@ -3,7 +3,7 @@
 from contextlib import contextmanager
 import os
 import threading
-from typing import IO, Union, Dict, List, Set, Optional, Any
+from typing import IO, Union, Dict, List, Set, Optional, Any, Tuple, Iterator
 import math
 import sys
 import platform
@@ -12,8 +12,6 @@
 import mathutils
 import bpy
 import numpy as np
-from rich.console import Console
-from rich.progress import Progress, TextColumn, BarColumn, TimeRemainingColumn
 
 from blenderproc.python.camera import CameraUtility
 from blenderproc.python.utility.GlobalStorage import GlobalStorage
@@ -566,6 +564,11 @@ def _progress_bar_thread(pipe_out: int, stdout: IO, total_frames: int, num_sampl
     :param total_frames: The number of frames that should be rendered.
     :param num_samples: The number of samples used to render each frame.
     """
+    # pylint: disable=import-outside-toplevel
+    from rich.console import Console
+    from rich.progress import Progress, TextColumn, BarColumn, TimeRemainingColumn
+    # pylint: enable=import-outside-toplevel
+
     # Define columns for progress bar
     columns = [
         TextColumn("[progress.description]{task.description}"),
@@ -651,23 +654,17 @@ def _render_progress_bar(pipe_out: int, pipe_in: int, stdout: IO, total_frames:
         yield
 
 
-def render(output_dir: Optional[str] = None, file_prefix: str = "rgb_", output_key: Optional[str] = "colors",
-           load_keys: Optional[Set[str]] = None, return_data: bool = True,
-           keys_with_alpha_channel: Optional[Set[str]] = None,
-           verbose: bool = False) -> Dict[str, Union[np.ndarray, List[np.ndarray]]]:
-    """ Render all frames.
-
-    This will go through all frames from scene.frame_start to scene.frame_end and render each of them.
+def _prepare_render(output_dir: Optional[str], file_prefix: str, output_key: Optional[str],
+                    load_keys: Optional[Set[str]], keys_with_alpha_channel: Optional[Set[str]]) \
+        -> Tuple[Set[str], Optional[Set[str]]]:
+    """ Registers the color output and checks that there is something to render.
 
-    :param output_dir: The directory to write files to, if this is None the temporary directory is used. \
-                       The temporary directory is usually in the shared memory (only true for linux).
+    :param output_dir: The directory to write files to, if this is None the temporary directory is used.
     :param file_prefix: The prefix to use for writing the images.
     :param output_key: The key to use for registering the output.
     :param load_keys: Set of output keys to load when available
-    :param return_data: Whether to load and return generated data.
     :param keys_with_alpha_channel: A set containing all keys whose alpha channels should be loaded.
-    :param verbose: If True, more details about the rendering process are printed.
-    :return: dict of lists of raw renderer output. Keys can be 'distance', 'colors', 'normals'
+    :return: The keys to load and the keys whose alpha channel should be loaded.
     """
     if output_dir is None:
         output_dir = Utility.get_temporary_directory()
@@ -687,28 +684,39 @@ def render(output_dir: Optional[str] = None, file_prefix: str = "rgb_", output_k
     bpy.context.scene.render.filepath = os.path.join(output_dir, file_prefix)
 
     # Skip if there is nothing to render
-    if bpy.context.scene.frame_end != bpy.context.scene.frame_start:
-        if len(get_all_blender_mesh_objects()) == 0:
-            raise Exception("There are no mesh-objects to render, "
-                            "please load an object before invoking the renderer.")
-        # Print what is rendered
-        total_frames = bpy.context.scene.frame_end - bpy.context.scene.frame_start
-        if load_keys:
-            registered_output_keys = [output["key"] for output in Utility.get_registered_outputs()]
-            keys_to_render = sorted([key for key in load_keys if key in registered_output_keys])
-            print(f"Rendering {total_frames} frames of {', '.join(keys_to_render)}...")
-
-        # As frame_end is pointing to the next free frame, decrease it by one, as
-        # blender will render all frames in [frame_start, frame_ned]
-        bpy.context.scene.frame_end -= 1
-
-        # Define pipe to communicate blenders debug messages to progress bar
-        pipe_out, pipe_in = os.pipe()
-        begin = time.time()
+    if bpy.context.scene.frame_end == bpy.context.scene.frame_start:
+        raise RuntimeError("No camera poses have been registered, therefore nothing can be rendered. A camera "
+                           "pose can be registered via bproc.camera.add_camera_pose().")
+    if len(get_all_blender_mesh_objects()) == 0:
+        raise Exception("There are no mesh-objects to render, "
+                        "please load an object before invoking the renderer.")
+    # Print what is rendered
+    total_frames = bpy.context.scene.frame_end - bpy.context.scene.frame_start
+    if load_keys:
+        registered_output_keys = [output["key"] for output in Utility.get_registered_outputs()]
+        keys_to_render = sorted([key for key in load_keys if key in registered_output_keys])
+        print(f"Rendering {total_frames} frames of {', '.join(keys_to_render)}...")
+
+    return load_keys, keys_with_alpha_channel
+
+
+def _render_frame_range(verbose: bool):
+    """ Renders all frames in [scene.frame_start, scene.frame_end) and writes them to the registered outputs.
+
+    :param verbose: If True, more details about the rendering process are printed.
+    """
+    total_frames = bpy.context.scene.frame_end - bpy.context.scene.frame_start
+    # As frame_end is pointing to the next free frame, decrease it by one, as
+    # blender will render all frames in [frame_start, frame_ned]
+    bpy.context.scene.frame_end -= 1
+
+    # Define pipe to communicate blenders debug messages to progress bar
+    pipe_out, pipe_in = os.pipe()
+    try:
         with stdout_redirected(pipe_in, enabled=not verbose) as stdout:
             with _render_progress_bar(pipe_out, pipe_in, stdout, total_frames, enabled=not verbose):
                 bpy.ops.render.render(animation=True, write_still=True)
-
+    finally:
         # Close Pipes to prevent having unclosed file handles
         try:
             os.close(pipe_out)
@@ -718,17 +726,80 @@ def render(output_dir: Optional[str] = None, file_prefix: str = "rgb_", output_k
             os.close(pipe_in)
         except OSError:
             pass
-
-        print(f"Finished rendering after {time.time() - begin:.3f} seconds")
         # Revert changes
         bpy.context.scene.frame_end += 1
-    else:
-        raise RuntimeError("No camera poses have been registered, therefore nothing can be rendered. A camera "
-                           "pose can be registered via bproc.camera.add_camera_pose().")
+
+
+def render(output_dir: Optional[str] = None, file_prefix: str = "rgb_", output_key: Optional[str] = "colors",
+           load_keys: Optional[Set[str]] = None, return_data: bool = True,
+           keys_with_alpha_channel: Optional[Set[str]] = None,
+           verbose: bool = False) -> Dict[str, Union[np.ndarray, List[np.ndarray]]]:
+    """ Render all frames.
+
+    This will go through all frames from scene.frame_start to scene.frame_end and render each of them.
+
+    :param output_dir: The directory to write files to, if this is None the temporary directory is used. \
+                       The temporary directory is usually in the shared memory (only true for linux).
+    :param file_prefix: The prefix to use for writing the images.
+    :param output_key: The key to use for registering the output.
+    :param load_keys: Set of output keys to load when available
+    :param return_data: Whether to load and return generated data.
+    :param keys_with_alpha_channel: A set containing all keys whose alpha channels should be loaded.
+    :param verbose: If True, more details about the rendering process are printed.
+    :return: dict of lists of raw renderer output. Keys can be 'distance', 'colors', 'normals'
+    """
+    load_keys, keys_with_alpha_channel = _prepare_render(output_dir, file_prefix, output_key, load_keys,
+                                                         keys_with_alpha_channel)
+
+    begin = time.time()
+    _render_frame_range(verbose)
+    print(f"Finished rendering after {time.time() - begin:.3f} seconds")
 
     return _WriterUtility.load_registered_outputs(load_keys, keys_with_alpha_channel) if return_data else {}
 
 
+def render_iter(output_dir: Optional[str] = None, file_prefix: str = "rgb_", output_key: Optional[str] = "colors",
+                load_keys: Optional[Set[str]] = None, keys_with_alpha_channel: Optional[Set[str]] = None,
+                verbose: bool = False) -> Iterator[Dict[str, Union[np.ndarray, List[np.ndarray]]]]:
+    """ Render all frames one after another and yield the outputs of each frame as soon as it is rendered.
+
+    In contrast to render(), only the data of a single frame is kept in memory at any time. While the data of a frame
+    is yielded, scene.frame_start and scene.frame_end are narrowed to this frame, so the writers (write_hdf5,
+    write_bop, write_coco_annotations, ...) can be called on the yielded data as usual. Make sure to set
+    append_to_existing_output=True when doing so, otherwise every frame overwrites the previous one.
+
+    .. code-block:: python
+
+        for data in bproc.renderer.render_iter():
+            bproc.writer.write_hdf5("output/", data, append_to_existing_output=True)
+
+    :param output_dir: The directory to write files to, if this is None the temporary directory is used. \
+                       The temporary directory is usually in the shared memory (only true for linux).
+    :param file_prefix: The prefix to use for writing the images.
+    :param output_key: The key to use for registering the output.
+    :param load_keys: Set of output keys to load when available
+    :param keys_with_alpha_channel: A set containing all keys whose alpha channels should be loaded.
+    :param verbose: If True, more details about the rendering process are printed.
+    :return: A generator yielding one dict of lists of raw renderer output per frame, each list has length one.
+    """
+    load_keys, keys_with_alpha_channel = _prepare_render(output_dir, file_prefix, output_key, load_keys,
+                                                         keys_with_alpha_channel)
+
+    frame_start, frame_end = bpy.context.scene.frame_start, bpy.context.scene.frame_end
+    begin = time.time()
+    try:
+        for frame in range(frame_start, frame_end):
+            bpy.context.scene.frame_start = frame
+            bpy.context.scene.frame_end = frame + 1
+            _render_frame_range(verbose)
+            yield _WriterUtility.load_registered_outputs(load_keys, keys_with_alpha_channel)
+    finally:
+        # Revert changes, also if the generator is closed early
+        bpy.context.scene.frame_start = frame_start
+        bpy.context.scene.frame_end = frame_end
+    print(f"Finished rendering after {time.time() - begin:.3f} seconds")
+
+
 def set_output_format(file_format: Optional[str] = None, color_depth: Optional[int] = None,
                       enable_transparency: Optional[bool] = None, jpg_quality: Optional[int] = None,
                       view_transform: Optional[str] = None, look: Optional[str] = None,
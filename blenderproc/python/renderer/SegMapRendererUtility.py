@@ -3,6 +3,7 @@
 import csv
 import os
 from typing import List, Tuple, Union, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
 
 import bpy
 import mathutils
@@ -19,7 +20,8 @@ def render_segmap(output_dir: Optional[str] = None, temp_dir: Optional[str] = No
                   default_values: Optional[Dict[str, int]] = None, file_prefix: str = "segmap_",
                   output_key: str = "segmap", segcolormap_output_file_prefix: str = "instance_attribute_map_",
                   segcolormap_output_key: str = "segcolormap", use_alpha_channel: bool = False,
-                  render_colorspace_size_per_dimension: int = 2048) -> Dict[str, Union[np.ndarray, List[np.ndarray]]]:
+                  render_colorspace_size_per_dimension: int = 2048,
+                  num_threads: int = 1) -> Dict[str, Union[np.ndarray, List[np.ndarray]]]:
     """ Renders segmentation maps for all frames
 
     :param output_dir: The directory to write images to.
@@ -36,6 +38,8 @@ def render_segmap(output_dir: Optional[str] = None, temp_dir: Optional[str] = No
                                                  blender does not allow negative values for colors, we use \
                                                  [0, 2048] ** 3 as our color space which allows ~8 billion \
                                                  different colors/objects. This should be enough.
+    :param num_threads: The number of threads used to load and map the rendered segmaps. If 0 is given, one thread
+                        per cpu core is used.
     :return: dict of lists of segmaps and (for instance segmentation) segcolormaps
     """
 
@@ -54,10 +58,6 @@ def render_segmap(output_dir: Optional[str] = None, temp_dir: Optional[str] = No
         RendererUtility.set_denoiser(None)
         RendererUtility.set_light_bounces(1, 0, 0, 1, 0, 8, 0)
 
-        attributes = map_by
-        if 'class' in default_values:
-            default_values['cp_category_id'] = default_values['class']
-
         # Get objects with meshes (i.e. not lights or cameras)
         objs_with_mats = get_all_blender_mesh_objects()
 
@@ -70,144 +70,115 @@ def render_segmap(output_dir: Optional[str] = None, temp_dir: Optional[str] = No
         if use_alpha_channel:
             MaterialLoaderUtility.add_alpha_channel_to_textures(blurry_edges=False)
 
-        # Determine path for temporary and for final output
-        temporary_segmentation_file_path = os.path.join(temp_dir, "seg_")
-        final_segmentation_file_path = os.path.join(output_dir, file_prefix)
-
         RendererUtility.set_output_format("OPEN_EXR", 16)
         RendererUtility.render(temp_dir, "seg_", None, return_data=False)
 
-        # Find optimal dtype of output based on max index
-        for dtype in [np.uint8, np.uint16, np.uint32]:
-            optimal_dtype = dtype
-            if np.iinfo(optimal_dtype).max >= len(colors) - 1:
-                break
-
-        if isinstance(attributes, str):
-            # only one result is requested
-            result_channels = 1
-            attributes = [attributes]
-        elif isinstance(attributes, list):
-            result_channels = len(attributes)
-        else:
-            raise RuntimeError(f"The type of this is not supported here: {attributes}")
+        return_dict, save_in_csv_attributes = _save_segmaps(temp_dir, "seg_", output_dir, file_prefix,
+                                                            segcolormap_output_file_prefix, map_by,
+                                                            default_values, colors, num_splits_per_dimension,
+                                                            objects, render_colorspace_size_per_dimension,
+                                                            num_threads)
 
-        # define them for the avoid rendering case
-        there_was_an_instance_rendering = False
-        list_of_attributes: List[str] = []
+    Utility.register_output(output_dir, file_prefix, output_key, ".npy", "2.0.0")
 
-        # Check if stereo is enabled
-        if bpy.context.scene.render.use_multiview:
-            suffixes = ["_L", "_R"]
-        else:
-            suffixes = [""]
+    if save_in_csv_attributes:
+        Utility.register_output(output_dir,
+                                segcolormap_output_file_prefix,
+                                segcolormap_output_key,
+                                ".csv",
+                                "2.0.0")
+    return return_dict
 
-        return_dict: Dict[str, Union[np.ndarray, List[np.ndarray]]] = {}
+
+def _save_segmaps(temp_dir: str, temp_file_prefix: str, output_dir: str, file_prefix: str,
+                  segcolormap_output_file_prefix: str, attributes: Union[str, List[str]],
+                  default_values: Dict[str, int], colors: List[List[int]], num_splits_per_dimension: int,
+                  objects: List[bpy.types.Object], render_colorspace_size_per_dimension: int,
+                  num_threads: int) -> Tuple[Dict[str, Union[np.ndarray, List[np.ndarray]]],
+                                             Dict[int, Dict[str, Any]]]:
+    """ Maps the rendered instance color images of all frames to the requested attributes and writes the results.
+
+    :param temp_dir: The directory the instance color images have been rendered to.
+    :param temp_file_prefix: The prefix of the rendered instance color images.
+    :param output_dir: The directory to write the segmaps and the segmentation-color maps to.
+    :param file_prefix: The prefix to use for writing the segmaps.
+    :param segcolormap_output_file_prefix: The prefix to use for writing the segmentation-color map csv.
+    :param attributes: The attributes to be used for color mapping.
+    :param default_values: The default values used for the keys used in attributes.
+    :param colors: The colors used for the objects, as returned by _colorize_objects_for_instance_segmentation().
+    :param num_splits_per_dimension: The number of splits per dimension of the used color space.
+    :param objects: The objects in the order of their ids in the segmap.
+    :param render_colorspace_size_per_dimension: The size of the used color space per dimension.
+    :param num_threads: The number of threads used to load and map the rendered segmaps, 0 uses all cpu cores.
+    :return: The dict of lists of segmaps and instance attribute maps and the attributes written to the last csv.
+    """
+    if 'class' in default_values:
+        default_values['cp_category_id'] = default_values['class']
+
+    # Determine path for temporary and for final output
+    temporary_segmentation_file_path = os.path.join(temp_dir, temp_file_prefix)
+    final_segmentation_file_path = os.path.join(output_dir, file_prefix)
+
+    # Find optimal dtype of output based on max index
+    for dtype in [np.uint8, np.uint16, np.uint32]:
+        optimal_dtype = dtype
+        if np.iinfo(optimal_dtype).max >= len(colors) - 1:
+            break
+
+    if isinstance(attributes, str):
+        # only one result is requested
+        attributes = [attributes]
+    elif not isinstance(attributes, list):
+        raise RuntimeError(f"The type of this is not supported here: {attributes}")
+
+    # Look up the values of all requested attributes for all objects once, s.t. every segmap can be mapped
+    # with a single indexing operation per attribute
+    attribute_tables = [_build_attribute_table(objects, attribute, default_values, optimal_dtype)
+                        for attribute in attributes]
+    there_was_an_instance_rendering = any(table["is_instance"] for table in attribute_tables)
+    list_of_attributes = [table["current_attribute"] for table in attribute_tables
+                          if not table["is_instance"] and table["current_attribute"] != "cp_category_id"]
+    if not there_was_an_instance_rendering and len(list_of_attributes) > 0:
+        raise RuntimeError(f"There were attributes specified in the may_by, which could not be saved as "
+                           f"there was no \"instance\" may_by key used. This is true for this/these "
+                           f"keys: {', '.join(list_of_attributes)}")
+
+    # Check if stereo is enabled
+    if bpy.context.scene.render.use_multiview:
+        suffixes = ["_L", "_R"]
+    else:
+        suffixes = [""]
+
+    return_dict: Dict[str, Union[np.ndarray, List[np.ndarray]]] = {}
+    save_in_csv_attributes: Dict[int, Dict[str, Any]] = {}
+
+    # Load, decode and map the segmaps, the heavy lifting is done by opencv and numpy which release the GIL
+    frame_jobs = [(temporary_segmentation_file_path + f"{frame:04d}" + suffix + ".exr",
+                   final_segmentation_file_path + f"{frame:04d}" + suffix)
+                  for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end)
+                  for suffix in suffixes]
+    with ThreadPoolExecutor(max_workers=num_threads if num_threads > 0 else os.cpu_count()) as executor:
+        frame_results = executor.map(lambda job: _map_segmap(job[0], job[1], attribute_tables, objects,
+                                                             num_splits_per_dimension,
+                                                             render_colorspace_size_per_dimension,
+                                                             optimal_dtype), frame_jobs)
 
         # After rendering
         for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):  # for each rendered frame
-            save_in_csv_attributes: Dict[int, Dict[str, Any]] = {}
-
-            there_was_an_instance_rendering = False
+            save_in_csv_attributes = {}
             for suffix in suffixes:
-                file_path = temporary_segmentation_file_path + f"{frame:04d}" + suffix + ".exr"
-                segmentation = load_image(file_path)
-                print(file_path, segmentation.shape)
-
-                segmap = Utility.map_back_from_equally_spaced_equidistant_values(segmentation,
-                                                                                 num_splits_per_dimension,
-                                                                                 render_colorspace_size_per_dimension)
-                segmap = segmap.astype(optimal_dtype)
-
-                object_ids = np.unique(segmap)
-                max_id = np.max(object_ids)
-                if max_id >= len(objects):
-                    raise Exception("There are more object colors than there are objects")
-                combined_result_map = []
-                list_of_attributes = []
-                channels = []
-                for channel_id in range(result_channels):
-                    num_default_values = 0
-                    resulting_map = np.zeros((segmap.shape[0], segmap.shape[1]), dtype=optimal_dtype)
-                    was_used = False
-                    current_attribute = attributes[channel_id]
-                    org_attribute = current_attribute
-
-                    # if the class is used the category_id attribute is evaluated
-                    if current_attribute == "class":
-                        current_attribute = "cp_category_id"
-                    # in the instance case the resulting ids are directly used
-                    if current_attribute == "instance":
-                        there_was_an_instance_rendering = True
-                        resulting_map = segmap
-                        was_used = True
-                    else:
-                        if current_attribute != "cp_category_id":
-                            list_of_attributes.append(current_attribute)
-                        # for the current attribute remove cp_ and _csv, if present
-                        attribute = current_attribute
-                        if attribute.startswith("cp_"):
-                            attribute = attribute[len("cp_"):]
-                        # check if a default value was specified
-                        default_value_set = False
-                        if current_attribute in default_values or attribute in default_values:
-                            default_value_set = True
-                            if current_attribute in default_values:
-                                default_value = default_values[current_attribute]
-                            elif attribute in default_values:
-                                default_value = default_values[attribute]
-                        # iterate over all object ids
+                channels, resulting_maps, object_ids = next(frame_results)
+                for channel_name, resulting_map in zip(channels, resulting_maps):
+                    return_dict.setdefault(f"{channel_name}_segmaps{suffix}", []).append(resulting_map)
+
+                # save everything which is not instance also in the .csv
+                for table in attribute_tables:
+                    if not table["is_instance"]:
                         for object_id in object_ids:
-                            # Convert np.uint8 to int, such that the save_in_csv_attributes dict can later be serialized
+                            # Convert to int, such that the save_in_csv_attributes dict can later be serialized
                             object_id = int(object_id)
-                            # get the corresponding object via the id
-                            current_obj = objects[object_id]
-                            # if the current obj has a attribute with that name -> get it
-                            if hasattr(current_obj, attribute):
-                                value = getattr(current_obj, attribute)
-                            # if the current object has a custom property with that name -> get it
-                            elif current_attribute.startswith("cp_") and attribute in current_obj:
-                                value = current_obj[attribute]
-                            elif current_attribute.startswith("cf_"):
-                                if current_attribute == "cf_basename":
-                                    value = current_obj.name
-                                    if "." in value:
-                                        value = value[:value.rfind(".")]
-                            elif default_value_set:
-                                # if none of the above applies use the default value
-                                value = default_value
-                                num_default_values += 1
-                            else:
-                                # if the requested current_attribute is not a custom property or an attribute
-                                # or there is a default value stored
-                                # it throws an exception
-                                raise RuntimeError(f"The obj: {current_obj.name} does not have the "
-                                                   f"attribute: {current_attribute}, striped: {attribute}. "
-                                                   f"Maybe try a default value.")
-
-                            # save everything which is not instance also in the .csv
-                            if isinstance(value, (int, float, np.integer, np.floating)):
-                                was_used = True
-                                resulting_map[segmap == object_id] = value
-
-                            if object_id in save_in_csv_attributes:
-                                save_in_csv_attributes[object_id][attribute] = value
-                            else:
-                                save_in_csv_attributes[object_id] = {attribute: value}
-
-                    if was_used and num_default_values < len(object_ids):
-                        channels.append(org_attribute)
-                        combined_result_map.append(resulting_map)
-                        return_dict.setdefault(f"{org_attribute}_segmaps{suffix}", []).append(resulting_map)
-
-                fname = final_segmentation_file_path + f"{frame:04d}" + suffix
-                # combine all resulting images to one image
-                resulting_map = np.stack(combined_result_map, axis=2)
-                # remove the unneeded third dimension
-                if resulting_map.shape[2] == 1:
-                    resulting_map = resulting_map[:, :, 0]
-                # TODO: Remove unnecessary save when we give up backwards compatibility
-                np.save(fname, resulting_map)
+                            save_in_csv_attributes.setdefault(object_id, {})[table["attribute"]] = \
+                                table["values"][object_id]
 
             if there_was_an_instance_rendering:
                 mappings = []
@@ -236,23 +207,142 @@ def render_segmap(output_dir: Optional[str] = None, temp_dir: Optional[str] = No
                             object_element[f"channel_{channel_name}"] = i
                         writer.writerow(object_element)
             else:
-                if len(list_of_attributes) > 0:
-                    raise RuntimeError(f"There were attributes specified in the may_by, which could not be saved as "
-                                       f"there was no \"instance\" may_by key used. This is true for this/these "
-                                       f"keys: {', '.join(list_of_attributes)}")
                 # if there was no instance rendering no .csv file is generated!
                 # delete all saved info about .csv
                 save_in_csv_attributes = {}
 
-    Utility.register_output(output_dir, file_prefix, output_key, ".npy", "2.0.0")
+    return return_dict, save_in_csv_attributes
 
-    if save_in_csv_attributes:
-        Utility.register_output(output_dir,
-                                segcolormap_output_file_prefix,
-                                segcolormap_output_key,
-                                ".csv",
-                                "2.0.0")
-    return return_dict
+
+def _build_attribute_table(objects: List[bpy.types.Object], attribute: str, default_values: Dict[str, int],
+                           dtype: type) -> Dict[str, Any]:
+    """ Looks up the value of the given attribute for all objects.
+
+    :param objects: The objects in the order of their ids in the segmap.
+    :param attribute: The attribute, as it is given in map_by.
+    :param default_values: The default values used for objects which do not have the attribute.
+    :param dtype: The dtype of the resulting segmaps.
+    :return: A dict containing the values per object and the lookup table mapping object ids to segmap values.
+    """
+    table: Dict[str, Any] = {"org_attribute": attribute, "is_instance": False}
+    current_attribute = attribute
+    # if the class is used the category_id attribute is evaluated
+    if current_attribute == "class":
+        current_attribute = "cp_category_id"
+    table["current_attribute"] = current_attribute
+    # in the instance case the resulting ids are directly used
+    if current_attribute == "instance":
+        table["is_instance"] = True
+        return table
+
+    # for the current attribute remove cp_ and _csv, if present
+    attribute = current_attribute
+    if attribute.startswith("cp_"):
+        attribute = attribute[len("cp_"):]
+    table["attribute"] = attribute
+    # check if a default value was specified
+    default_value_set = False
+    if current_attribute in default_values or attribute in default_values:
+        default_value_set = True
+        if current_attribute in default_values:
+            default_value = default_values[current_attribute]
+        elif attribute in default_values:
+            default_value = default_values[attribute]
+
+    values = []
+    lookup_table = np.zeros(len(objects), dtype=dtype)
+    is_numeric = np.zeros(len(objects), dtype=bool)
+    is_default = np.zeros(len(objects), dtype=bool)
+    is_missing = np.zeros(len(objects), dtype=bool)
+    for object_id, current_obj in enumerate(objects):
+        value = None
+        # if the current obj has a attribute with that name -> get it
+        if hasattr(current_obj, attribute):
+            value = getattr(current_obj, attribute)
+        # if the current object has a custom property with that name -> get it
+        elif current_attribute.startswith("cp_") and attribute in current_obj:
+            value = current_obj[attribute]
+        elif current_attribute == "cf_basename":
+            value = current_obj.name
+            if "." in value:
+                value = value[:value.rfind(".")]
+        elif default_value_set:
+            # if none of the above applies use the default value
+            value = default_value
+            is_default[object_id] = True
+        else:
+            # the error is only raised, if the object is visible in one of the segmaps
+            is_missing[object_id] = True
+
+        # only numbers can be stored in the segmap
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            lookup_table[object_id] = value
+            is_numeric[object_id] = True
+        values.append(value)
+
+    table.update({"values": values, "lookup_table": lookup_table, "is_numeric": is_numeric,
+                  "is_default": is_default, "is_missing": is_missing})
+    return table
+
+
+def _map_segmap(file_path: str, output_path: str, attribute_tables: List[Dict[str, Any]],
+                objects: List[bpy.types.Object], num_splits_per_dimension: int,
+                render_colorspace_size_per_dimension: int, dtype: type) -> Tuple[List[str], List[np.ndarray],
+                                                                                  np.ndarray]:
+    """ Loads a rendered segmentation image and maps it to the requested attributes.
+
+    :param file_path: The path to the rendered .exr file.
+    :param output_path: The path to write the combined segmaps to.
+    :param attribute_tables: The attribute tables as returned by _build_attribute_table().
+    :param objects: The objects in the order of their ids in the segmap.
+    :param num_splits_per_dimension: The number of splits per dimension of the used color space.
+    :param render_colorspace_size_per_dimension: The size of the used color space per dimension.
+    :param dtype: The dtype of the resulting segmaps.
+    :return: The names of the used channels, the segmap per channel and the ids of all visible objects.
+    """
+    segmentation = load_image(file_path)
+    print(file_path, segmentation.shape)
+
+    segmap = Utility.map_back_from_equally_spaced_equidistant_values(segmentation, num_splits_per_dimension,
+                                                                     render_colorspace_size_per_dimension)
+    segmap = segmap.astype(dtype)
+
+    if np.max(segmap) >= len(objects):
+        raise Exception("There are more object colors than there are objects")
+    object_ids = np.flatnonzero(np.bincount(segmap.ravel(), minlength=len(objects)))
+
+    channels = []
+    resulting_maps = []
+    for table in attribute_tables:
+        if table["is_instance"]:
+            resulting_maps.append(segmap)
+            channels.append(table["org_attribute"])
+            continue
+
+        is_missing = table["is_missing"][object_ids]
+        if np.any(is_missing):
+            current_obj = objects[object_ids[np.argmax(is_missing)]]
+            # if the requested current_attribute is not a custom property or an attribute
+            # or there is a default value stored
+            # it throws an exception
+            raise RuntimeError(f"The obj: {current_obj.name} does not have the "
+                               f"attribute: {table['current_attribute']}, striped: {table['attribute']}. "
+                               f"Maybe try a default value.")
+
+        was_used = np.any(table["is_numeric"][object_ids])
+        num_default_values = np.count_nonzero(table["is_default"][object_ids])
+        if was_used and num_default_values < len(object_ids):
+            resulting_maps.append(table["lookup_table"][segmap])
+            channels.append(table["org_attribute"])
+
+    # combine all resulting images to one image
+    resulting_map = np.stack(resulting_maps, axis=2)
+    # remove the unneeded third dimension
+    if resulting_map.shape[2] == 1:
+        resulting_map = resulting_map[:, :, 0]
+    # TODO: Remove unnecessary save when we give up backwards compatibility
+    np.save(output_path, resulting_map)
+    return channels, resulting_maps, object_ids
 
 
 def _colorize_object(obj: bpy.types.Object, color: mathutils.Vector, use_alpha_channel: bool):
@@ -1,10 +1,10 @@
 """Allows the sampling 3D Front scenes"""
 
-import random
 from typing import List
 
 import numpy as np
 
+from blenderproc.python.sampler.TriangleAreaSampler import TriangleAreaSampler
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 
 
@@ -24,50 +24,36 @@ def __init__(self, front3d_objects: List[MeshObject], amount_of_objects_needed_p
 
         floor_objs = [obj for obj in front3d_objects if obj.get_name().lower().startswith("floor")]
 
-        # count objects per floor -> room
-        floor_obj_counters = {obj.get_name(): 0 for obj in floor_objs}
-        counter = 0
-        for obj in front3d_objects:
-            name = obj.get_name().lower()
-            if "wall" in name or "ceiling" in name:
-                continue
-            counter += 1
-
-            for floor_obj in floor_objs:
-                is_above = floor_obj.position_is_above_object(obj.get_location())
-                if is_above:
-                    floor_obj_counters[floor_obj.get_name()] += 1
-        self.used_floors = [obj for obj in floor_objs if
-                            floor_obj_counters[obj.get_name()] > amount_of_objects_needed_per_room]
-
-    def sample(self, height: float, max_tries: int = 1000) -> np.ndarray:
+        # count objects per floor -> room, by looking up which floor lies straight below each object
+        counted_objs = [obj for obj in front3d_objects
+                        if "wall" not in obj.get_name().lower() and "ceiling" not in obj.get_name().lower()]
+        floor_ids = TriangleAreaSampler.from_mesh_objects(floor_objs, [0, 0, 1]).find_groups_below(
+            np.array([obj.get_location() for obj in counted_objs]).reshape(-1, 3))
+        floor_obj_counters = np.bincount(floor_ids[floor_ids >= 0], minlength=len(floor_objs))
+        self.used_floors = [obj for obj, counter in zip(floor_objs, floor_obj_counters)
+                            if counter > amount_of_objects_needed_per_room]
+        # The floor triangles of all used rooms, to sample directly on them
+        self._floor_sampler = TriangleAreaSampler.from_mesh_objects(self.used_floors, [0, 0, 1])
+
+    def sample(self, height: float, max_tries: int = 1000, check_no_objects_in_between: bool = True) -> np.ndarray:
         """ Samples a point inside one of the loaded Front3d rooms.
 
-        The points are uniformly sampled along x/y over all rooms.
-        The z-coordinate is set based on the given height value.
+        The points are uniformly sampled along x/y over all rooms, by drawing the floor triangles according to their
+        area. The z-coordinate is set based on the given height value.
 
         :param height: The height above the floor to use for the z-component of the point.
-        :param max_tries: The maximum number of times sampling above the floor should be tried.
+        :param max_tries: The maximum number of points to try, only relevant if check_no_objects_in_between is True.
+        :param check_no_objects_in_between: If True, points are rejected if there is another object between them and
+                                            the floor, which requires a ray cast per point. Disabling this is faster,
+                                            but points might be sampled under or inside furniture.
         :return: The sampled point.
         """
         for _ in range(max_tries):
-            # Sample room via floor objects
-            floor_obj = random.choice(self.used_floors)
-
-            # Get min/max along x/y-axis from bounding box of room
-            bounding_box = floor_obj.get_bound_box()
-            min_corner = np.min(bounding_box, axis=0)
-            max_corner = np.max(bounding_box, axis=0)
-
-            # Sample uniformly inside bounding box
-            point = np.array([
-                random.uniform(min_corner[0], max_corner[0]),
-                random.uniform(min_corner[1], max_corner[1]),
-                floor_obj.get_location()[2] + height
-            ])
+            point, floor_id = self._floor_sampler.sample()
+            floor_obj = self.used_floors[floor_id]
+            point[2] = floor_obj.get_location()[2] + height
 
-            # Check if sampled pose is above the floor to make sure its really inside the room
-            if floor_obj.position_is_above_object(point):
+            if not check_no_objects_in_between or floor_obj.position_is_above_object(point):
                 return point
 
         raise RuntimeError("Cannot sample any point inside the loaded front3d rooms.")
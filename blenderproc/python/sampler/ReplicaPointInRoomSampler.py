@@ -5,6 +5,7 @@
 import random
 import numpy as np
 
+from blenderproc.python.sampler.TriangleAreaSampler import TriangleAreaSampler
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 
 
@@ -30,33 +31,31 @@ def __init__(self, room_bounding_box: Dict[str, np.ndarray], replica_floor: Unio
         with open(height_list_file_path, "r", encoding="utf-8") as file:
             self.floor_height_values = [float(val) for val in ast.literal_eval(file.read())]
 
-    def sample(self, height: float, max_tries: int = 1000) -> np.ndarray:
+        # The floor triangles inside the room bounding box, to sample directly on them
+        self._floor_objects = self.floor_object if isinstance(self.floor_object, list) else [self.floor_object]
+        self._floor_sampler = TriangleAreaSampler.from_mesh_objects(self._floor_objects, [0, 0, 1])
+        self._floor_sampler = self._floor_sampler.clip_to_xy_rectangle(self.bounding_box["min"],
+                                                                       self.bounding_box["max"])
+
+    def sample(self, height: float, max_tries: int = 1000, check_no_objects_in_between: bool = True) -> np.ndarray:
         """ Samples a point inside one of the loaded replica rooms.
 
-        The points are uniformly sampled along x/y over all rooms.
-        The z-coordinate is set based on the given height value.
+        The points are uniformly sampled along x/y over the floor inside the room bounding box, by drawing the floor
+        triangles according to their area. The z-coordinate is set based on the given height value.
 
         :param height: The height above the floor to use for the z-component of the point.
-        :param max_tries: The maximum number of times sampling above the floor should be tried.
+        :param max_tries: The maximum number of points to try, only relevant if check_no_objects_in_between is True.
+        :param check_no_objects_in_between: If True, points are rejected if there is another object between them and
+                                            the floor, which requires a ray cast per point. Disabling this is faster,
+                                            but points might be sampled under or inside furniture.
         :return: The sampled point.
         """
         for _ in range(max_tries):
+            point, floor_id = self._floor_sampler.sample()
+            point[2] = self.floor_height_values[random.randrange(0, len(self.floor_height_values))] + height
 
-            # Sample uniformly inside bounding box
-            point = np.array([
-                random.uniform(self.bounding_box["min"][0], self.bounding_box["max"][0]),
-                random.uniform(self.bounding_box["min"][1], self.bounding_box["max"][1]),
-                self.floor_height_values[random.randrange(0, len(self.floor_height_values))] + height
-            ])
-
-            if isinstance(self.floor_object, list):
-                for floor_object in self.floor_object:
-                    # Check if sampled pose is above the floor to make sure it is really inside the room
-                    if floor_object.position_is_above_object(point):
-                        return point
-            else:
-                # Check if sampled pose is above the floor to make sure it is really inside the room
-                if self.floor_object.position_is_above_object(point):
-                    return point
+            # Check if there is nothing between the sampled pose and the floor
+            if not check_no_objects_in_between or self._floor_objects[floor_id].position_is_above_object(point):
+                return point
 
         raise Exception("Cannot sample any point inside the loaded replica rooms.")
@@ -1,9 +1,9 @@
 """ Allows the sampling in the SUNCG scenes """
-import random
 from typing import Tuple, List, Optional
 
 import numpy as np
 
+from blenderproc.python.sampler.TriangleAreaSampler import TriangleAreaSampler
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 
 
@@ -25,30 +25,30 @@ def __init__(self, suncg_objects: List[MeshObject]):
                 floor_obj = self._find_floor(suncg_objects, room_obj)
                 if floor_obj is not None:
                     self.rooms.append((room_obj, floor_obj))
+        # The floor triangles of all rooms, to sample directly on them
+        self._floor_sampler = TriangleAreaSampler.from_mesh_objects([floor_obj for _, floor_obj in self.rooms],
+                                                                    [0, 0, 1])
 
-    def sample(self, height: float, max_tries: int = 1000) -> Tuple[np.ndarray, int]:
+    def sample(self, height: float, max_tries: int = 1000,
+               check_no_objects_in_between: bool = True) -> Tuple[np.ndarray, int]:
         """ Samples a point inside one of the loaded suncg rooms.
 
-        The points are uniformly sampled along x/y over all rooms.
-        The z-coordinate is set based on the given height value.
+        The points are uniformly sampled along x/y over all rooms, by drawing the floor triangles according to their
+        area. The z-coordinate is set based on the given height value.
 
         :param height: The height above the floor to use for the z-component of the point.
-        :param max_tries: The maximum number of times sampling above the floor should be tried.
+        :param max_tries: The maximum number of points to try, only relevant if check_no_objects_in_between is True.
+        :param check_no_objects_in_between: If True, points are rejected if there is another object between them and
+                                            the floor, which requires a ray cast per point. Disabling this is faster,
+                                            but points might be sampled under or inside furniture.
         :return: The sampled point and the id of the room it was sampled in.
         """
         for _ in range(max_tries):
-            # Sample room
-            room_id = random.randrange(len(self.rooms))
+            point, room_id = self._floor_sampler.sample()
             room_obj, floor_obj = self.rooms[room_id]
+            point[2] = room_obj.get_cp("bbox")["min"][2] + height
 
-            point = np.array([
-                random.uniform(room_obj.get_cp("bbox")["min"][0], room_obj.get_cp("bbox")["max"][0]),
-                random.uniform(room_obj.get_cp("bbox")["min"][1], room_obj.get_cp("bbox")["max"][1]),
-                room_obj.get_cp("bbox")["min"][2] + height
-            ])
-
-            # Check if sampled pose is valid
-            if floor_obj.position_is_above_object(point):
+            if not check_no_objects_in_between or floor_obj.position_is_above_object(point):
                 return point, room_id
 
         raise Exception("Cannot sample any point inside the loaded suncg rooms.")
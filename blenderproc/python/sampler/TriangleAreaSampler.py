@@ -0,0 +1,245 @@
+""" Uniformly samples points on a set of triangles, e.g. on the floors of rooms """
+
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from blenderproc.python.types.MeshObjectUtility import MeshObject
+from blenderproc.python.utility.BlenderUtility import get_mesh_vertices_and_triangles
+
+
+class TriangleAreaSampler:
+    """
+    Samples points uniformly on a fixed set of triangles.
+
+    The triangles are drawn proportional to their area, so every point is valid and no rejection sampling is
+    necessary. Every triangle belongs to a group (e.g. the object it has been taken from), which is returned together
+    with the sampled points.
+    """
+
+    def __init__(self, triangles: np.ndarray, group_ids: Optional[np.ndarray] = None,
+                 projection_axis: Optional[Union[np.ndarray, List[float]]] = None):
+        """
+        :param triangles: The corners of all triangles in world coordinates, with shape [M, 3, 3].
+        :param group_ids: The group of every triangle, with shape [M]. Default: All triangles belong to group 0.
+        :param projection_axis: If given, the area of each triangle is measured after projecting it along this axis,
+                                e.g. [0, 0, 1] samples uniformly along x/y. Triangles parallel to the axis are never
+                                sampled then.
+        """
+        self.triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        self.group_ids = np.zeros(len(self.triangles), dtype=np.int64) if group_ids is None \
+            else np.asarray(group_ids, dtype=np.int64)
+        if len(self.group_ids) != len(self.triangles):
+            raise ValueError(f"Got {len(self.group_ids)} group ids for {len(self.triangles)} triangles.")
+
+        cross = np.cross(self.triangles[:, 1] - self.triangles[:, 0], self.triangles[:, 2] - self.triangles[:, 0])
+        if projection_axis is None:
+            areas = np.linalg.norm(cross, axis=-1) * 0.5
+        else:
+            projection_axis = np.asarray(projection_axis, dtype=np.float64)
+            areas = np.abs(cross @ (projection_axis / np.linalg.norm(projection_axis))) * 0.5
+
+        # Drop degenerated triangles, so they can never be drawn
+        valid = areas > 0
+        self.triangles, self.group_ids, self.areas = self.triangles[valid], self.group_ids[valid], areas[valid]
+        self._cumulative_areas = np.cumsum(self.areas)
+        self._xy_index: Optional[Tuple[np.ndarray, ...]] = None
+
+    @staticmethod
+    def from_mesh_objects(objects: List[MeshObject],
+                          projection_axis: Optional[Union[np.ndarray, List[float]]] = None) -> "TriangleAreaSampler":
+        """ Collects the triangles of the given objects in world coordinates.
+
+        :param objects: The objects whose surfaces should be sampled, the group of a triangle is the index of its
+                        object in this list.
+        :param projection_axis: See __init__().
+        :return: The new sampler.
+        """
+        triangles, group_ids = [], []
+        for i, obj in enumerate(objects):
+            vertices, faces = get_mesh_vertices_and_triangles(obj.get_mesh())
+            local2world = obj.get_local2world_mat()
+            vertices = vertices @ local2world[:3, :3].T + local2world[:3, 3]
+            triangles.append(vertices[faces])
+            group_ids.append(np.full(len(faces), i, dtype=np.int64))
+        if not triangles:
+            return TriangleAreaSampler(np.zeros((0, 3, 3)), np.zeros(0), projection_axis)
+        return TriangleAreaSampler(np.concatenate(triangles), np.concatenate(group_ids), projection_axis)
+
+    def total_area(self) -> float:
+        """ Returns the summed area of all triangles, measured as configured via the projection axis.
+
+        :return: The total area.
+        """
+        return float(self._cumulative_areas[-1]) if len(self._cumulative_areas) > 0 else 0.0
+
+    def sample(self, num_samples: Optional[int] = None) -> Tuple[np.ndarray, Union[int, np.ndarray]]:
+        """ Samples points uniformly over all triangles.
+
+        :param num_samples: The number of points to sample. If None, a single point is sampled.
+        :return: The sampled point(s) with shape [3] or [num_samples, 3] and the group id(s) of the triangles they lie
+                 on.
+        """
+        if self.total_area() <= 0:
+            raise RuntimeError("Cannot sample a point, there are no triangles with a positive area.")
+
+        size = 1 if num_samples is None else num_samples
+        triangle_indices = np.searchsorted(self._cumulative_areas, np.random.uniform(0, self.total_area(), size),
+                                           side="right")
+        triangle_indices = np.minimum(triangle_indices, len(self.triangles) - 1)
+
+        # Uniform barycentric coordinates, points of the opposite half of the parallelogram are mirrored back
+        coords = np.random.uniform(0, 1, (size, 2))
+        outside = coords.sum(axis=1) > 1
+        coords[outside] = 1 - coords[outside]
+        corners = self.triangles[triangle_indices]
+        points = corners[:, 0] + coords[:, :1] * (corners[:, 1] - corners[:, 0]) + \
+            coords[:, 1:] * (corners[:, 2] - corners[:, 0])
+
+        if num_samples is None:
+            return points[0], int(self.group_ids[triangle_indices[0]])
+        return points, self.group_ids[triangle_indices]
+
+    def clip_to_xy_rectangle(self, min_corner: Union[np.ndarray, List[float]],
+                             max_corner: Union[np.ndarray, List[float]]) -> "TriangleAreaSampler":
+        """ Returns a sampler on the parts of the triangles which lie inside the given rectangle along x/y.
+
+        :param min_corner: The minimum x/y coordinates of the rectangle, further coordinates are ignored.
+        :param max_corner: The maximum x/y coordinates of the rectangle, further coordinates are ignored.
+        :return: The new sampler, the areas of all new triangles are measured along the z-axis.
+        """
+        min_corner, max_corner = np.asarray(min_corner, dtype=np.float64)[:2], np.asarray(max_corner)[:2]
+        tri_min, tri_max = self.triangles[:, :, :2].min(axis=1), self.triangles[:, :, :2].max(axis=1)
+        inside = np.all(tri_min >= min_corner, axis=1) & np.all(tri_max <= max_corner, axis=1)
+        overlapping = ~inside & np.all(tri_max >= min_corner, axis=1) & np.all(tri_min <= max_corner, axis=1)
+
+        triangles, group_ids = [self.triangles[inside]], [self.group_ids[inside]]
+        for triangle, group_id in zip(self.triangles[overlapping], self.group_ids[overlapping]):
+            polygon = _TriangleAreaSampler.clip_polygon_to_xy_rectangle(list(triangle), min_corner, max_corner)
+            # Fan triangulation of the convex clipped polygon
+            for i in range(1, len(polygon) - 1):
+                triangles.append(np.array([[polygon[0], polygon[i], polygon[i + 1]]]))
+                group_ids.append(np.array([group_id]))
+        return TriangleAreaSampler(np.concatenate(triangles), np.concatenate(group_ids), [0, 0, 1])
+
+    def find_groups_below(self, points: np.ndarray, tolerance: float = 1e-4) -> np.ndarray:
+        """ Finds for every point the group of the closest triangle straight below it.
+
+        The triangles are binned once into a regular 2D grid along x/y, so every point is only tested against the
+        few triangles of its grid cell.
+
+        :param points: The query points with shape [N, 3].
+        :param tolerance: Triangles up to this distance above a point still count as below it.
+        :return: The group id per point with shape [N], -1 if there is no triangle below a point.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        groups = np.full(len(points), -1, dtype=np.int64)
+        if len(self.triangles) == 0 or len(points) == 0:
+            return groups
+
+        if self._xy_index is None:
+            self._xy_index = _TriangleAreaSampler.build_xy_index(self.triangles)
+        origin, cell_size, grid_shape, cell_ids, cell_triangles = self._xy_index
+
+        # Collect all pairs of points and triangles sharing a grid cell
+        point_cells = np.clip(np.floor((points[:, :2] - origin) / cell_size).astype(np.int64), 0,
+                              np.array(grid_shape) - 1)
+        point_cell_ids = point_cells[:, 0] * grid_shape[1] + point_cells[:, 1]
+        starts = np.searchsorted(cell_ids, point_cell_ids, side="left")
+        counts = np.searchsorted(cell_ids, point_cell_ids, side="right") - starts
+        point_indices = np.repeat(np.arange(len(points)), counts)
+        triangle_indices = cell_triangles[np.repeat(starts - np.cumsum(counts) + counts, counts) +
+                                          np.arange(counts.sum())]
+
+        # Barycentric coordinates of the points w.r.t. their candidate triangles along x/y
+        corners = self.triangles[triangle_indices]
+        a, b, c = corners[:, 0, :2], corners[:, 1, :2], corners[:, 2, :2]
+        p = points[point_indices, :2]
+        det = _TriangleAreaSampler.cross_2d(b - a, c - a)
+        valid_det = np.abs(det) > 1e-12
+        det[~valid_det] = 1
+        l0 = _TriangleAreaSampler.cross_2d(b - p, c - p) / det
+        l1 = _TriangleAreaSampler.cross_2d(c - p, a - p) / det
+        l2 = 1 - l0 - l1
+        floor_z = l0 * corners[:, 0, 2] + l1 * corners[:, 1, 2] + l2 * corners[:, 2, 2]
+        hit = valid_det & (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9) & \
+            (floor_z <= points[point_indices, 2] + tolerance)
+
+        # Per point, keep the hit with the highest triangle, as that is the one a ray straight down would hit first
+        point_indices, triangle_indices, floor_z = point_indices[hit], triangle_indices[hit], floor_z[hit]
+        order = np.lexsort((floor_z, point_indices))
+        point_indices, triangle_indices = point_indices[order], triangle_indices[order]
+        is_last = np.append(point_indices[1:] != point_indices[:-1], True)
+        groups[point_indices[is_last]] = self.group_ids[triangle_indices[is_last]]
+        return groups
+
+
+class _TriangleAreaSampler:
+
+    @staticmethod
+    def cross_2d(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """ Returns the z-component of the cross product of the given 2D vectors.
+
+        :param first: The first vectors with shape [N, 2].
+        :param second: The second vectors with shape [N, 2].
+        :return: The z-components with shape [N].
+        """
+        return first[:, 0] * second[:, 1] - first[:, 1] * second[:, 0]
+
+    @staticmethod
+    def build_xy_index(triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Tuple[int, int], np.ndarray,
+                                                       np.ndarray]:
+        """ Bins the given triangles into a regular grid along x/y.
+
+        :param triangles: The triangles with shape [M, 3, 3].
+        :return: The origin and the size of the grid cells, the number of cells along x/y and the sorted cell ids
+                 together with the triangle index of every entry.
+        """
+        tri_min, tri_max = triangles[:, :, :2].min(axis=1), triangles[:, :, :2].max(axis=1)
+        origin = tri_min.min(axis=0)
+        extent = np.maximum(tri_max.max(axis=0) - origin, 1e-6)
+        # Roughly one triangle per cell, but cells should not be smaller than the average triangle, else large
+        # triangles would be binned into too many cells
+        cell_size = max(np.sqrt(extent[0] * extent[1] / len(triangles)), np.mean(np.max(tri_max - tri_min, axis=1)),
+                        1e-6)
+        grid_shape = tuple(int(v) for v in np.floor(extent / cell_size).astype(np.int64) + 1)
+
+        min_cells = np.floor((tri_min - origin) / cell_size).astype(np.int64)
+        max_cells = np.minimum(np.floor((tri_max - origin) / cell_size).astype(np.int64), np.array(grid_shape) - 1)
+        cells_per_axis = max_cells - min_cells + 1
+        counts = cells_per_axis[:, 0] * cells_per_axis[:, 1]
+        triangle_indices = np.repeat(np.arange(len(triangles)), counts)
+        local_ids = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells_x = min_cells[triangle_indices, 0] + local_ids // cells_per_axis[triangle_indices, 1]
+        cells_y = min_cells[triangle_indices, 1] + local_ids % cells_per_axis[triangle_indices, 1]
+        cell_ids = cells_x * grid_shape[1] + cells_y
+
+        order = np.argsort(cell_ids, kind="stable")
+        return origin, cell_size, grid_shape, cell_ids[order], triangle_indices[order]
+
+    @staticmethod
+    def clip_polygon_to_xy_rectangle(polygon: List[np.ndarray], min_corner: np.ndarray,
+                                     max_corner: np.ndarray) -> List[np.ndarray]:
+        """ Clips the given convex polygon against the given rectangle along x/y (Sutherland-Hodgman).
+
+        :param polygon: The 3D corners of the polygon.
+        :param min_corner: The minimum x/y coordinates of the rectangle.
+        :param max_corner: The maximum x/y coordinates of the rectangle.
+        :return: The 3D corners of the clipped polygon, the z-coordinate is interpolated along the edges.
+        """
+        for axis, bound, sign in [(0, min_corner[0], 1), (0, max_corner[0], -1),
+                                  (1, min_corner[1], 1), (1, max_corner[1], -1)]:
+            clipped = []
+            for i, current in enumerate(polygon):
+                previous = polygon[i - 1]
+                current_inside = sign * (current[axis] - bound) >= 0
+                previous_inside = sign * (previous[axis] - bound) >= 0
+                if current_inside != previous_inside:
+                    t = (bound - previous[axis]) / (current[axis] - previous[axis])
+                    clipped.append(previous + t * (current - previous))
+                if current_inside:
+                    clipped.append(current)
+            polygon = clipped
+            if not polygon:
+                break
+        return polygon
@@ -1,12 +1,13 @@
 """ Uniformly samples 3-dimensional value over the bounding box of the specified objects """
 
-import math
 import random
 from typing import List, Union, Optional, Tuple
 
 import numpy as np
 from mathutils import Vector
+from mathutils.bvhtree import BVHTree
 
+from blenderproc.python.sampler.TriangleAreaSampler import TriangleAreaSampler
 from blenderproc.python.types.MeshObjectUtility import MeshObject
 
 
@@ -45,83 +46,187 @@ def upper_region(objects_to_sample_on: Union[MeshObject, List[MeshObject]],
                           below the sampled position is the position accepted).
     :return: Sampled value.
     """
-    if face_sample_range is None:
-        face_sample_range = [0.0, 1.0]
-    if upper_dir is None:
-        upper_dir = [0.0, 0.0, 1.0]
-
-    face_sample_range = np.array(face_sample_range)
-    upper_dir = np.array(upper_dir)
-    upper_dir /= np.linalg.norm(upper_dir)
-    if not isinstance(objects_to_sample_on, list):
-        objects_to_sample_on = [objects_to_sample_on]
-
-    if max_height < min_height:
-        raise RuntimeError(f"The minimum height ({min_height}) must be smaller than the maximum height ({max_height})!")
-
-    regions = []
-
-    def calc_vec_and_normals(face: List[np.ndarray]) -> Tuple[Tuple[np.ndarray, np.ndarray], np.ndarray]:
-        """ Calculates the two vectors, which lie in the plane of the face and the normal of the face.
-
-        :param face: Four corner coordinates of a face. Type: [4x[3xfloat]].
-        :return: (two vectors in the plane), and the normal.
-        """
-        vec1 = face[1] - face[0]
-        vec2 = face[3] - face[0]
-        normal = np.cross(vec1, vec2)
-        normal /= np.linalg.norm(normal)
-        return (vec1, vec2), normal
-
-    # determine for each object in objects the region, where to sample on
-    for obj in objects_to_sample_on:
-        bb = obj.get_bound_box()
-        faces = []
-        faces.append([bb[0], bb[1], bb[2], bb[3]])
-        faces.append([bb[0], bb[4], bb[5], bb[1]])
-        faces.append([bb[1], bb[5], bb[6], bb[2]])
-        faces.append([bb[6], bb[7], bb[3], bb[2]])
-        faces.append([bb[3], bb[7], bb[4], bb[0]])
-        faces.append([bb[7], bb[6], bb[5], bb[4]])
-        # select the face, which has the smallest angle to the upper direction
-        min_diff_angle = 2 * math.pi
-        selected_face = None
-        for face in faces:
-            # calc the normal of all faces
-            _, normal = calc_vec_and_normals(face)
-            diff_angle = math.acos(normal.dot(upper_dir))
-            if diff_angle < min_diff_angle:
-                min_diff_angle = diff_angle
-                selected_face = face
-        # save the selected face values
-        if selected_face is not None:
-            vectors, normal = calc_vec_and_normals(selected_face)
-            base_point = selected_face[0]
-            regions.append(Region2D(vectors, normal, base_point))
-        else:
-            raise RuntimeError(f"Couldn't find a face, for this obj: {obj.get_name()}")
-
-    if regions and len(regions) == len(objects_to_sample_on):
-        selected_region_id = random.randint(0, len(regions) - 1)
-        selected_region, obj = regions[selected_region_id], objects_to_sample_on[selected_region_id]
+    # When sampling many points on the same objects, reuse an UpperRegionSampler instead
+    return UpperRegionSampler(objects_to_sample_on, face_sample_range, min_height, max_height, use_ray_trace_check,
+                              upper_dir, use_upper_dir).sample()
+
+
+class UpperRegionSampler:
+    """
+    Reusable version of upper_region(), which determines the regions to sample on only once.
+
+    With use_ray_trace_check=True, the points are drawn directly on the faces of the objects which face into the
+    sampling direction, weighted by their area, instead of testing random points via ray casts. Points on faces which
+    are covered by other faces of the same object (e.g. lower shelves) are rejected, so every point of the visible
+    upper surface has the same probability.
+    The sampler has to be created again if the objects are moved afterwards.
+
+    Example: Sample 100 locations 1.5 to 1.8 above the given floors in one go.
+
+    .. code-block:: python
+
+        sampler = bproc.sampler.UpperRegionSampler(floors, min_height=1.5, max_height=1.8)
+        locations = sampler.sample(100)
+    """
+
+    def __init__(self, objects_to_sample_on: Union[MeshObject, List[MeshObject]],
+                 face_sample_range: Optional[Union[Vector, np.ndarray, List[float]]] = None, min_height: float = 0.0,
+                 max_height: float = 1.0, use_ray_trace_check: bool = False,
+                 upper_dir: Optional[Union[Vector, np.ndarray, List[float]]] = None, use_upper_dir: bool = True):
+        """
+        :param objects_to_sample_on: Objects, on which to sample on.
+        :param face_sample_range: Restricts the area on the face where objects are sampled. Specifically describes
+                                  relative lengths of both face vectors between which points are sampled.
+                                  Default: [0.0, 1.0]
+        :param min_height: Minimum distance to the bounding box that a point is sampled on.
+        :param max_height: Maximum distance to the bounding box that a point is sampled on.
+        :param use_ray_trace_check: If True, only points directly above the object itself are sampled, not just above
+                                    its bounding box.
+        :param upper_dir: The 'up' direction of the sampling box. Default: [0.0, 0.0, 1.0].
+        :param use_upper_dir: If True, the points are offset along "upper_dir", else along the normal of the face
+                              closest to "upper_dir".
+        """
+        if face_sample_range is None:
+            face_sample_range = [0.0, 1.0]
+        if upper_dir is None:
+            upper_dir = [0.0, 0.0, 1.0]
+
+        self.face_sample_range = np.array(face_sample_range, dtype=np.float64)
+        upper_dir = np.array(upper_dir, dtype=np.float64)
+        upper_dir /= np.linalg.norm(upper_dir)
+        if not isinstance(objects_to_sample_on, list):
+            objects_to_sample_on = [objects_to_sample_on]
+        if not objects_to_sample_on:
+            raise RuntimeError("The amount of regions is either zero or does not match the amount of objects!")
+
+        if max_height < min_height:
+            raise RuntimeError(f"The minimum height ({min_height}) must be smaller than the maximum height "
+                               f"({max_height})!")
+        self.min_height, self.max_height = min_height, max_height
+        self.objects_to_sample_on = objects_to_sample_on
+
+        # determine for each object in objects the region, where to sample on
+        self.regions = [Region2D.from_bound_box(obj.get_bound_box(), upper_dir) for obj in objects_to_sample_on]
+        self._directions = [upper_dir if use_upper_dir else region.normal() for region in self.regions]
+
+        self._surface_samplers: Optional[List[Tuple[TriangleAreaSampler, BVHTree]]] = None
         if use_ray_trace_check:
-            inv_world_matrix = np.linalg.inv(obj.get_local2world_mat())
-        while True:
-            ret = selected_region.sample_point(face_sample_range)
-            dir_val = upper_dir if use_upper_dir else selected_region.normal()
-            ret += dir_val * random.uniform(min_height, max_height)
-            if use_ray_trace_check:
-                # transform the coords into the reference frame of the object
-                c_ret = inv_world_matrix @ np.concatenate((ret, [1]), 0)
-                c_dir = inv_world_matrix @ np.concatenate((dir_val * -1.0, [0]), 0)
-                # check if the object was hit
-                hit, _, _, _ = obj.ray_cast(c_ret[:3], c_dir[:3])
-                if hit:  # if the object was hit return
-                    break
+            self._surface_samplers = [_UpperRegionSampler.build_surface_sampler(obj, direction)
+                                      for obj, direction in zip(objects_to_sample_on, self._directions)]
+
+    def sample(self, num_samples: Optional[int] = None) -> np.ndarray:
+        """ Samples points above the regions, every object is chosen with the same probability.
+
+        :param num_samples: The number of points to sample. If None, a single point is sampled.
+        :return: The sampled point(s) with shape [3] or [num_samples, 3].
+        """
+        size = 1 if num_samples is None else num_samples
+        object_ids = np.random.randint(0, len(self.regions), size)
+        points = np.empty((size, 3))
+        for object_id in np.unique(object_ids):
+            mask = object_ids == object_id
+            region, direction = self.regions[object_id], self._directions[object_id]
+            if self._surface_samplers is None:
+                face_points = region.sample_points(self.face_sample_range, int(mask.sum()))
             else:
-                break
-        return np.array(ret)
-    raise RuntimeError("The amount of regions is either zero or does not match the amount of objects!")
+                surface_sampler, surface_bvh_tree = self._surface_samplers[object_id]
+                face_points = _UpperRegionSampler.sample_face_points_above_surface(
+                    surface_sampler, surface_bvh_tree, region, direction, self.face_sample_range, int(mask.sum()),
+                    self.objects_to_sample_on[object_id].get_name())
+            points[mask] = face_points + direction * np.random.uniform(self.min_height, self.max_height,
+                                                                       (len(face_points), 1))
+        return points[0] if num_samples is None else points
+
+
+class _UpperRegionSampler:
+
+    @staticmethod
+    def build_surface_sampler(obj: MeshObject, direction: np.ndarray) -> Tuple[TriangleAreaSampler, BVHTree]:
+        """ Collects the triangles of the object which face into the given direction.
+
+        If the object has no such triangles, e.g. a plane whose normal points downwards, the triangles facing into the
+        opposite direction are used instead.
+
+        :param obj: The object to sample on.
+        :param direction: The sampling direction.
+        :return: A sampler whose triangle areas are measured along the sampling direction and whose group ids are the
+                 triangle indices, and a bvh tree over all triangles of the object, whose face indices are the same
+                 triangle indices.
+        """
+        triangles = TriangleAreaSampler.from_mesh_objects([obj], direction).triangles
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        facing_up = normals @ direction > 0
+        if not np.any(facing_up):
+            facing_up = ~facing_up
+        surface_sampler = TriangleAreaSampler(triangles[facing_up], np.flatnonzero(facing_up),
+                                              projection_axis=direction)
+        if surface_sampler.total_area() <= 0:
+            raise RuntimeError(f"The object {obj.get_name()} has no faces which could be sampled from above.")
+        # All triangles can cover the sampled ones, not only the ones facing into the sampling direction
+        bvh_tree = BVHTree.FromPolygons(triangles.reshape(-1, 3).tolist(),
+                                        np.arange(len(triangles) * 3).reshape(-1, 3).tolist())
+        return surface_sampler, bvh_tree
+
+    @staticmethod
+    def is_first_hit_from_above(bvh_tree: BVHTree, points: np.ndarray, triangle_indices: np.ndarray,
+                                direction: np.ndarray) -> np.ndarray:
+        """ Checks for every point, whether its triangle is the first one hit by a ray cast against the sampling
+        direction from above the object.
+
+        :param bvh_tree: The bvh tree over all triangles of the object.
+        :param points: The points on the triangles with shape [N, 3].
+        :param triangle_indices: The index of the triangle of every point with shape [N].
+        :param direction: The sampling direction.
+        :return: Whether each point is visible from above, shape [N].
+        """
+        if len(points) == 0:
+            return np.zeros(0, dtype=bool)
+        # Start all rays on a plane above every point of the object
+        offsets = np.max(points @ direction) - points @ direction + 1.0
+        origins = points + offsets[:, np.newaxis] * direction
+        ray_direction = (-direction).tolist()
+        hit_indices = [bvh_tree.ray_cast(origin, ray_direction)[2] for origin in origins.tolist()]
+        return np.array([hit_index == triangle_index for hit_index, triangle_index in
+                         zip(hit_indices, triangle_indices.tolist())], dtype=bool)
+
+    @staticmethod
+    def sample_face_points_above_surface(surface_sampler: TriangleAreaSampler, bvh_tree: BVHTree,
+                                         region: "Region2D", direction: np.ndarray, face_sample_range: np.ndarray,
+                                         num_samples: int, obj_name: str, max_rounds: int = 100) -> np.ndarray:
+        """ Samples points on the region, which lie straight above the surface of the object.
+
+        The points are drawn on the object surface and then moved along the sampling direction onto the plane of the
+        region. Only points which are covered by other parts of the object or lie outside the face sample range have
+        to be drawn again.
+
+        :param surface_sampler: The sampler over the faces of the object facing into the sampling direction.
+        :param bvh_tree: The bvh tree over all triangles of the object, as returned by build_surface_sampler().
+        :param region: The selected bounding box face of the object.
+        :param direction: The sampling direction.
+        :param face_sample_range: Relative lengths of both face vectors between which points are sampled.
+        :param num_samples: The number of points to sample.
+        :param obj_name: The name of the object, used for error messages.
+        :param max_rounds: The maximum number of batches to draw until enough points inside the range are found.
+        :return: The points on the region with shape [num_samples, 3].
+        """
+        face_points = []
+        num_missing = num_samples
+        for _ in range(max_rounds):
+            points, triangle_indices = surface_sampler.sample(num_missing)
+            # Faces covered by other faces are sampled too often, only keep the points on the topmost face
+            visible = _UpperRegionSampler.is_first_hit_from_above(bvh_tree, points, triangle_indices, direction)
+            points = points[visible]
+            # move the points along the sampling direction onto the plane of the region
+            points += direction * (((region.base_point() - points) @ region.normal()) /
+                                   direction.dot(region.normal()))[:, np.newaxis]
+            coords = region.face_coordinates(points)
+            inside = np.all((coords >= face_sample_range[0]) & (coords <= face_sample_range[1]), axis=1)
+            face_points.append(points[inside])
+            num_missing -= int(inside.sum())
+            if num_missing <= 0:
+                return np.concatenate(face_points)[:num_samples]
+        raise RuntimeError(f"Could not sample points above the object {obj_name} inside the face sample range "
+                           f"{face_sample_range}.")
 
 
 class Region2D:
@@ -132,6 +237,31 @@ def __init__(self, vectors: Tuple[np.ndarray, np.ndarray], normal: np.ndarray, b
         self._vectors = vectors  # the two vectors which lie in the selected face
         self._normal = normal  # the normal of the selected face
         self._base_point = base_point  # the base point of the selected face
+        # maps points in the plane of the face onto their coefficients w.r.t. the two face vectors
+        self._face_coordinates_mat = np.linalg.pinv(np.stack(vectors, axis=1))
+
+    @staticmethod
+    def from_bound_box(bb: np.ndarray, upper_dir: np.ndarray) -> "Region2D":
+        """ Creates the region of the bounding box face whose normal has the smallest angle to the upper direction.
+
+        :param bb: The eight corners of the bounding box, as returned by MeshObject.get_bound_box().
+        :param upper_dir: The normalized upper direction.
+        :return: The region of the selected face.
+        """
+        faces = np.array([[bb[0], bb[1], bb[2], bb[3]],
+                          [bb[0], bb[4], bb[5], bb[1]],
+                          [bb[1], bb[5], bb[6], bb[2]],
+                          [bb[6], bb[7], bb[3], bb[2]],
+                          [bb[3], bb[7], bb[4], bb[0]],
+                          [bb[7], bb[6], bb[5], bb[4]]], dtype=np.float64)
+        # calc the two vectors in the plane and the normal of all faces
+        vec1 = faces[:, 1] - faces[:, 0]
+        vec2 = faces[:, 3] - faces[:, 0]
+        normals = np.cross(vec1, vec2)
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        # select the face, which has the smallest angle to the upper direction
+        selected_face = int(np.argmax(normals @ upper_dir))
+        return Region2D((vec1[selected_face], vec2[selected_face]), normals[selected_face], faces[selected_face, 0])
 
     def sample_point(self, face_sample_range: np.ndarray) -> np.ndarray:
         """
@@ -146,8 +276,34 @@ def sample_point(self, face_sample_range: np.ndarray) -> np.ndarray:
             ret += vec * random.uniform(face_sample_range[0], face_sample_range[1])
         return ret
 
+    def sample_points(self, face_sample_range: np.ndarray, num_samples: int) -> np.ndarray:
+        """
+        Samples multiple points in the 2D Region at once
+
+        :param face_sample_range: relative lengths of both face vectors between which points are sampled
+        :param num_samples: the number of points to sample
+        :return: the sampled points with shape [num_samples, 3]
+        """
+        coords = np.random.uniform(face_sample_range[0], face_sample_range[1], (num_samples, 2))
+        return self._base_point + coords @ np.stack(self._vectors)
+
+    def face_coordinates(self, points: np.ndarray) -> np.ndarray:
+        """
+        Calculates the relative lengths along both face vectors of points lying in the plane of the region
+
+        :param points: points in the plane of the region with shape [N, 3]
+        :return: the relative lengths with shape [N, 2]
+        """
+        return (points - self._base_point) @ self._face_coordinates_mat.T
+
     def normal(self):
         """
         :return: the normal of the region
         """
         return self._normal
+
+    def base_point(self):
+        """
+        :return: the base point of the region
+        """
+        return self._base_point
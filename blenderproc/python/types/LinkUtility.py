@@ -1,11 +1,10 @@
 """ All link objects are captured in this class. """
 
-from typing import Union, List, Optional, Tuple
+from typing import Union, List, Optional, Tuple, TYPE_CHECKING
 
 import bpy
 import numpy as np
 from mathutils import Vector, Euler, Matrix
-from trimesh import Trimesh
 
 from blenderproc.python.utility.Utility import KeyFrame
 from blenderproc.python.types.EntityUtility import Entity
@@ -14,6 +13,9 @@
     set_ik_limits_from_rotation_constraint
 from blenderproc.python.types.InertialUtility import Inertial
 
+if TYPE_CHECKING:
+    from trimesh import Trimesh
+
 
 # as all attributes are accessed via the __getattr__ and __setattr__ in this module, we need to remove the member
 # init check
@@ -618,7 +620,7 @@ def get_joint_rotation(self, frame: int = None) -> float:
 
         return visual_matrix.to_quaternion().angle
 
-    def mesh_as_trimesh(self) -> Optional[Trimesh]:
+    def mesh_as_trimesh(self) -> Optional["Trimesh"]:
         """ Returns a trimesh.Trimesh instance of the link's first visual object, if it exists.
 
         :return: The link's first visual object as trimesh.Trimesh if the link has one or more visuals, else None.
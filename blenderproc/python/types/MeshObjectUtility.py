@@ -1,6 +1,6 @@
 """ All mesh objects are captured in this class. """
 
-from typing import List, Union, Tuple, Optional, Literal, Dict
+from typing import List, Union, Tuple, Optional, Literal, Dict, TYPE_CHECKING
 from sys import platform
 from pathlib import Path
 
@@ -10,15 +10,19 @@
 import bmesh
 import mathutils
 from mathutils import Vector, Matrix
-from trimesh import Trimesh
 
 from blenderproc.python.types.EntityUtility import Entity
 from blenderproc.python.utility.Utility import Utility, resolve_path
-from blenderproc.python.utility.BlenderUtility import get_all_blender_mesh_objects
+from blenderproc.python.utility.BlenderUtility import get_all_blender_mesh_objects, get_mesh_vertices_and_triangles
+from blenderproc.python.utility.RayCastUtility import TriangleRayCaster
 from blenderproc.python.types.MaterialUtility import Material
 from blenderproc.python.material import MaterialLoaderUtility
 from blenderproc.python.utility.SetupUtility import SetupUtility
 
+if TYPE_CHECKING:
+    # trimesh is only imported when it is used, as it takes a while to load
+    from trimesh import Trimesh
+
 if platform != "win32":
     # this is only supported under linux and macOS, the import itself already doesn't work under windows
     from blenderproc.external.vhacd.decompose import convex_decomposition
@@ -580,33 +584,21 @@ def add_auto_smooth_modifier(self, angle: float = 30.0) -> bpy.types.Modifier:
         modifier["Input_1"] = np.deg2rad(float(angle))
         return modifier
 
-    def mesh_as_trimesh(self) -> Trimesh:
-         """ Returns a trimesh.Trimesh instance of the MeshObject.
-    
-         :return: The object as trimesh.Trimesh.
-         """
-    
-         # get mesh data
-         mesh = self.get_mesh()
-         
-         # check if faces are pure tris or quads and triangulate quads if this is not the case
-         if not all(len(f.vertices[:]) == len(mesh.polygons[0].vertices[:]) for f in mesh.polygons):
-             # Triangulate quads
-             self.select()
-             bpy.ops.object.mode_set(mode='EDIT')
-             bpy.ops.mesh.select_all(action='SELECT')
-             bpy.ops.mesh.quads_convert_to_tris(quad_method='FIXED', ngon_method='BEAUTY') 
-             bpy.ops.object.mode_set(mode='OBJECT')
-             self.deselect()
-         
-         # get vertices 
-         verts = np.array([[v.co[0], v.co[1], v.co[2]] for v in mesh.vertices])
-         # re-scale the vertices since scale operations doesn't apply to the mesh data
-         verts *= self.blender_obj.scale
-         # get faces   
-         faces = np.array([f.vertices[:] for f in mesh.polygons if len(f.vertices[:]) in [3, 4]])
-    
-         return Trimesh(vertices=verts, faces=faces)
+    def mesh_as_trimesh(self) -> "Trimesh":
+        """ Returns a trimesh.Trimesh instance of the MeshObject.
+
+        Faces with more than three vertices are triangulated, the mesh of the object itself stays unchanged.
+
+        :return: The object as trimesh.Trimesh.
+        """
+        # pylint: disable=import-outside-toplevel
+        from trimesh import Trimesh
+        # pylint: enable=import-outside-toplevel
+
+        verts, faces = get_mesh_vertices_and_triangles(self.get_mesh())
+        # re-scale the vertices since scale operations doesn't apply to the mesh data
+        verts = verts.astype(np.float64) * self.blender_obj.scale
+        return Trimesh(vertices=verts, faces=faces)
 
     def clear_custom_splitnormals(self):
         """ Removes custom split normals which might exist after importing the object from file. """
@@ -770,6 +762,36 @@ def create_bvh_tree_multi_objects(mesh_objects: List[MeshObject]) -> mathutils.b
     return bvh_tree
 
 
+
+def create_ray_caster_multi_objects(mesh_objects: List[MeshObject], num_threads: int = 1) -> TriangleRayCaster:
+    """ Creates a batched ray caster which contains multiple mesh objects.
+
+    In contrast to the tree of create_bvh_tree_multi_objects(), the ray caster casts whole arrays of rays at once.
+    The face indices of its hits are the same as the ones of a bvh tree built from the same objects.
+
+    :param mesh_objects: The list of mesh objects that should be put into the ray caster.
+    :param num_threads: The number of threads used to cast the rays.
+    :return: The built ray caster.
+    """
+    triangles, face_indices = [], []
+    # The faces of all objects are numbered one after another, like in the bmesh of the bvh tree
+    face_offset = 0
+    for obj in mesh_objects:
+        mesh = obj.get_mesh()
+        vertices, faces = get_mesh_vertices_and_triangles(mesh)
+        polygon_indices = np.empty(len(faces), dtype=np.int32)
+        mesh.loop_triangles.foreach_get("polygon_index", polygon_indices)
+        # Apply world matrix
+        local2world = obj.get_local2world_mat()
+        vertices = vertices.astype(np.float64) @ local2world[:3, :3].T + local2world[:3, 3]
+        triangles.append(vertices[faces])
+        face_indices.append(polygon_indices + face_offset)
+        face_offset += len(mesh.polygons)
+
+    if not triangles:
+        return TriangleRayCaster(np.empty((0, 3, 3)), num_threads=num_threads)
+    return TriangleRayCaster(np.concatenate(triangles), np.concatenate(face_indices), num_threads=num_threads)
+
 def compute_poi(objects: List[MeshObject]) -> np.ndarray:
     """ Computes a point of interest in the scene. Point is defined as a location of the one of the selected objects
     that is the closest one to the mean location of the bboxes of the selected objects.
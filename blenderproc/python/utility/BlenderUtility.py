@@ -8,8 +8,6 @@
 import bmesh
 from mathutils import Vector
 import numpy as np
-import imageio
-import cv2
 
 from blenderproc.python.utility.Utility import Utility
 
@@ -109,6 +107,25 @@ def add_cube_based_on_bb(bouding_box: List[Vector], name: str = 'NewCube') -> bp
     return obj
 
 
+def get_mesh_vertices_and_triangles(mesh: bpy.types.Mesh) -> Tuple[np.ndarray, np.ndarray]:
+    """ Returns the vertices and the triangulated faces of the given mesh as numpy arrays.
+
+    The data is copied in bulk via foreach_get, which is much faster than iterating over the vertices and polygons.
+    Faces with more than three vertices are split via the loop triangles of the mesh, so the mesh is not modified
+    and no switch into edit mode is necessary.
+
+    :param mesh: The mesh to export.
+    :return: The vertex coordinates in local space with shape [N, 3] and the vertex indices of every triangle with
+             shape [M, 3].
+    """
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    return vertices.reshape(-1, 3), triangles.reshape(-1, 3)
+
+
 def get_all_blender_mesh_objects() -> List[bpy.types.Object]:
     """
     Returns a list of all mesh objects in the scene
@@ -150,6 +167,12 @@ def load_image(file_path: str, num_channels: int = 3) -> np.ndarray:
     :param num_channels: Number of channels to return.
     :return: The numpy array
     """
+    # Imported here, so they are only loaded when the first image is loaded
+    # pylint: disable=import-outside-toplevel
+    import imageio
+    import cv2
+    # pylint: enable=import-outside-toplevel
+
     file_ending = file_path[file_path.rfind(".") + 1:].lower()
     if file_ending in ["exr", "png"]:
         try:
@@ -7,6 +7,7 @@
 from mathutils import Vector, Euler, Matrix
 
 from blenderproc.python.types.MeshObjectUtility import MeshObject
+from blenderproc.python.utility.BlenderUtility import get_mesh_vertices_and_triangles
 
 
 class CollisionUtility:
@@ -17,7 +18,8 @@ class CollisionUtility:
     @staticmethod
     def check_intersections(obj: MeshObject, bvh_cache: Optional[Dict[str, mathutils.bvhtree.BVHTree]],
                             objects_to_check_against: List[MeshObject],
-                            list_of_objects_with_no_inside_check: List[MeshObject]):
+                            list_of_objects_with_no_inside_check: List[MeshObject],
+                            broad_phase: Optional["AABBGrid"] = None):
         """ Checks if an object intersects with any object given in the list.
 
         The bvh_cache adds all current objects to the bvh tree, which increases the speed.
@@ -32,17 +34,24 @@ def check_intersections(obj: MeshObject, bvh_cache: Optional[Dict[str, mathutils
         :param list_of_objects_with_no_inside_check: List of objects on which no inside check is performed. \
                                                      This check is only done for the objects in \
                                                      `objects_to_check_against`. Type: :class:`list`
+        :param broad_phase: If given, the objects to check against are taken from this grid instead of
+                            `objects_to_check_against`. Only objects whose bounding box overlaps with the one of `obj`
+                            are returned by the grid, so the bounding box check is skipped for them.
         :return: Type: :class:`bool`, True if no collision was found, false if at least one collision was found
         """
 
+        if broad_phase is not None:
+            min_b1, max_b1 = AABBGrid.calc_aabb(obj)
+            objects_to_check_against = broad_phase.query(min_b1, max_b1)
+
         no_collision = True
         # Now check for collisions
         for collision_obj in objects_to_check_against:
             # Do not check collisions with yourself
             if collision_obj == obj:
                 continue
-            # First check if bounding boxes collides
-            intersection = CollisionUtility.check_bb_intersection(obj, collision_obj)
+            # First check if bounding boxes collides, the broad phase already did this
+            intersection = broad_phase is not None or CollisionUtility.check_bb_intersection(obj, collision_obj)
             # if they do
             if intersection:
                 skip_inside_check = collision_obj in list_of_objects_with_no_inside_check
@@ -129,7 +138,8 @@ def check_mesh_intersection(obj1: MeshObject, obj2: MeshObject, skip_inside_chec
         :param obj1: object 1 to check for intersection, must be a mesh
         :param obj2: object 2 to check for intersection, must be a mesh
         :param skip_inside_check: Disables checking whether one object is completely inside the other.
-        :param bvh_cache: Dict of all the bvh trees, removes the `obj` from the cache before adding it again.
+        :param bvh_cache: Dict of all the bvh trees, removes the `obj` from the cache before adding it again. If a
+                          :class:`BVHCache` is given, trees of moved objects are updated automatically.
         :return: True, if they are intersecting
         """
 
@@ -140,19 +150,24 @@ def check_mesh_intersection(obj1: MeshObject, obj2: MeshObject, skip_inside_chec
         if len(obj1.get_mesh().vertices) == 0 or len(obj2.get_mesh().vertices) == 0:
             return False, bvh_cache
 
-        # create bvhtree for obj1
-        if obj1.get_name() not in bvh_cache:
-            obj1_BVHtree = obj1.create_bvh_tree()
-            bvh_cache[obj1.get_name()] = obj1_BVHtree
-        else:
-            obj1_BVHtree = bvh_cache[obj1.get_name()]
-
-        # create bvhtree for obj2
-        if obj2.get_name() not in bvh_cache:
-            obj2_BVHtree = obj2.create_bvh_tree()
-            bvh_cache[obj2.get_name()] = obj2_BVHtree
+        if isinstance(bvh_cache, BVHCache):
+            # the cache itself takes care of pose changes
+            obj1_BVHtree = bvh_cache.get_bvh_tree(obj1)
+            obj2_BVHtree = bvh_cache.get_bvh_tree(obj2)
         else:
-            obj2_BVHtree = bvh_cache[obj2.get_name()]
+            # create bvhtree for obj1
+            if obj1.get_name() not in bvh_cache:
+                obj1_BVHtree = obj1.create_bvh_tree()
+                bvh_cache[obj1.get_name()] = obj1_BVHtree
+            else:
+                obj1_BVHtree = bvh_cache[obj1.get_name()]
+
+            # create bvhtree for obj2
+            if obj2.get_name() not in bvh_cache:
+                obj2_BVHtree = obj2.create_bvh_tree()
+                bvh_cache[obj2.get_name()] = obj2_BVHtree
+            else:
+                obj2_BVHtree = bvh_cache[obj2.get_name()]
 
         # Check whether both meshes intersect
         inter = len(obj1_BVHtree.overlap(obj2_BVHtree)) > 0
@@ -200,3 +215,176 @@ def is_point_inside_object(obj: MeshObject, obj_bvh_tree: mathutils.bvhtree.BVHT
         # Compute dot product between direction and normal vector
         a = p2.normalized().dot((Euler(obj.get_rotation_euler()).to_matrix() @ normal).normalized())
         return a >= 0.0
+
+
+class AABBGrid:
+    """
+    A uniform grid over the axis-aligned bounding boxes of static objects, used as broad phase for collision checks.
+
+    Every object is sorted into all grid cells its bounding box overlaps, so a query only needs to look at the objects
+    in the cells overlapped by the query box. The bounding boxes are computed once on insertion, so the objects must
+    not be moved while they are stored in the grid.
+    """
+
+    def __init__(self, cell_size: Optional[float] = None, max_cells_per_object: int = 512):
+        """
+        :param cell_size: The edge length of each grid cell, see AABBGrid.calc_cell_size(). If None, the largest
+                          bounding box edge of the first inserted object is used.
+        :param max_cells_per_object: Objects overlapping more cells (e.g. a large floor) are not sorted into the grid,
+                                     but are returned by every query, which is cheaper than filling all those cells.
+        """
+        self.cell_size = cell_size
+        self.max_cells_per_object = max_cells_per_object
+        self._cells: Dict[Tuple[int, int, int], List[int]] = {}
+        self._oversized: List[int] = []
+        self._objects: List[Optional[MeshObject]] = []
+        self._aabbs: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._ids: Dict[MeshObject, int] = {}
+
+    @staticmethod
+    def calc_aabb(obj: MeshObject) -> Tuple[np.ndarray, np.ndarray]:
+        """ Calculates the axis-aligned bounding box of the given object in world coordinates.
+
+        :param obj: The object.
+        :return: The minimum and maximum point of the bounding box.
+        """
+        bound_box = obj.get_bound_box()
+        return np.min(bound_box, axis=0), np.max(bound_box, axis=0)
+
+    @staticmethod
+    def calc_cell_size(objects: List[MeshObject]) -> float:
+        """ Calculates a cell size which fits the given objects, independent of their order.
+
+        The median of the largest bounding box edge of all objects is used, so a few large objects (e.g. a floor)
+        or tiny objects do not determine the cell size.
+
+        :param objects: The objects the grid is used for, usually the objects whose poses are sampled.
+        :return: The edge length of each grid cell.
+        """
+        extents = [np.max(max_point - min_point) for min_point, max_point in map(AABBGrid.calc_aabb, objects)]
+        if not extents:
+            return 1.0
+        return max(float(np.median(extents)), 1e-3)
+
+    def _cell_range(self, min_point: np.ndarray, max_point: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns the first and last index of the cells overlapped by the given box in every dimension. """
+        return np.floor(min_point / self.cell_size).astype(int), np.floor(max_point / self.cell_size).astype(int)
+
+    def insert(self, obj: MeshObject):
+        """ Adds the given object with its current pose to the grid.
+
+        :param obj: The object to add.
+        """
+        if obj in self._ids:
+            self.remove(obj)
+        min_point, max_point = AABBGrid.calc_aabb(obj)
+        if self.cell_size is None:
+            self.cell_size = max(float(np.max(max_point - min_point)), 1e-3)
+
+        obj_id = len(self._objects)
+        self._objects.append(obj)
+        self._aabbs.append((min_point, max_point))
+        self._ids[obj] = obj_id
+
+        first_cell, last_cell = self._cell_range(min_point, max_point)
+        if np.prod(last_cell - first_cell + 1) > self.max_cells_per_object:
+            self._oversized.append(obj_id)
+        else:
+            for x in range(first_cell[0], last_cell[0] + 1):
+                for y in range(first_cell[1], last_cell[1] + 1):
+                    for z in range(first_cell[2], last_cell[2] + 1):
+                        self._cells.setdefault((x, y, z), []).append(obj_id)
+
+    def remove(self, obj: MeshObject):
+        """ Removes the given object from the grid.
+
+        :param obj: The object to remove.
+        """
+        # The id stays reserved and is skipped by all following queries
+        obj_id = self._ids.pop(obj)
+        self._objects[obj_id] = None
+
+    def query(self, min_point: np.ndarray, max_point: np.ndarray) -> List[MeshObject]:
+        """ Returns all stored objects whose bounding box overlaps with the given one.
+
+        Touching bounding boxes count as overlapping, the same as in CollisionUtility.check_bb_intersection().
+
+        :param min_point: The minimum point of the query box.
+        :param max_point: The maximum point of the query box.
+        :return: The overlapping objects in the order they were inserted.
+        """
+        if not self._objects:
+            return []
+        candidates = set(self._oversized)
+        first_cell, last_cell = self._cell_range(min_point, max_point)
+        if np.prod(last_cell - first_cell + 1) > len(self._cells):
+            # The query box is larger than the occupied part of the grid, just go over all occupied cells
+            for cell, obj_ids in self._cells.items():
+                if np.all(first_cell <= cell) and np.all(np.array(cell) <= last_cell):
+                    candidates.update(obj_ids)
+        else:
+            for x in range(first_cell[0], last_cell[0] + 1):
+                for y in range(first_cell[1], last_cell[1] + 1):
+                    for z in range(first_cell[2], last_cell[2] + 1):
+                        candidates.update(self._cells.get((x, y, z), []))
+
+        overlapping = []
+        for obj_id in sorted(candidates):
+            if self._objects[obj_id] is None:
+                continue
+            min_b2, max_b2 = self._aabbs[obj_id]
+            if CollisionUtility.check_bb_intersection_on_values(min_point, max_point, min_b2, max_b2):
+                overlapping.append(self._objects[obj_id])
+        return overlapping
+
+
+class BVHCache(dict):
+    """
+    A cache of world space bvh trees, which keeps track of the poses the trees were built for.
+
+    The triangulated mesh in local space is extracted only once per mesh datablock and shared by all objects using
+    that mesh. If an object has been moved since its tree was built, the tree is rebuilt from the cached local
+    geometry, which avoids copying and transforming the whole mesh via bmesh. Otherwise, the cached tree is reused,
+    so objects do not have to be removed from the cache after their pose has changed.
+
+    The meshes must not be edited while the cache is in use.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poses: Dict[str, np.ndarray] = {}
+        self._local_geometry: Dict[str, Tuple[np.ndarray, List[List[int]]]] = {}
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self._poses.pop(key, None)
+
+    def _get_local_geometry(self, obj: MeshObject) -> Tuple[np.ndarray, List[List[int]]]:
+        """ Returns the vertices and triangles of the object's mesh in local coordinates.
+
+        :param obj: The object whose mesh should be returned.
+        :return: The vertices as (N, 3) array and the triangles as list of vertex indices.
+        """
+        mesh = obj.get_mesh()
+        if mesh.name not in self._local_geometry:
+            vertices, triangles = get_mesh_vertices_and_triangles(mesh)
+            self._local_geometry[mesh.name] = (vertices.astype(np.float64), triangles.tolist())
+        return self._local_geometry[mesh.name]
+
+    def get_bvh_tree(self, obj: MeshObject) -> mathutils.bvhtree.BVHTree:
+        """ Returns the bvh tree of the given object in its current pose.
+
+        :param obj: The object whose bvh tree should be returned.
+        :return: The bvh tree in world coordinates.
+        """
+        name = obj.get_name()
+        local2world = obj.get_local2world_mat()
+        if name in self and np.array_equal(self._poses.get(name), local2world):
+            return self[name]
+
+        vertices, triangles = self._get_local_geometry(obj)
+        vertices = vertices @ local2world[:3, :3].T + local2world[:3, 3]
+        bvh_tree = mathutils.bvhtree.BVHTree.FromPolygons(vertices.tolist(), triangles, all_triangles=True)
+        self[name] = bvh_tree
+        self._poses[name] = local2world
+        return bvh_tree
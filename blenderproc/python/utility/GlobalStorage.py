@@ -142,6 +142,16 @@ def is_in_storage(key: str) -> bool:
         """
         return key in GlobalStorage._storage_dict
 
+    @staticmethod
+    def clear():
+        """
+        Removes all keys from the GlobalStorage, the global config is kept.
+
+        This brings the storage back into the state it has at startup, e.g. before running the next script in a
+        worker of `blenderproc serve`.
+        """
+        GlobalStorage._storage_dict.clear()
+
     @staticmethod
     def has_param(key: str) -> bool:
         """
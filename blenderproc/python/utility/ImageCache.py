@@ -0,0 +1,205 @@
+"""A process-wide cache of the loaded images, so every texture file is only loaded once per colorspace."""
+
+import hashlib
+import os
+from typing import Dict, Optional, Set, Tuple
+
+import bpy
+
+from blenderproc.python.utility.Utility import Utility
+
+
+class ImageCache:
+    """
+    Loads every image file only once per colorspace and hands out the same datablock to all materials using it.
+
+    Other than bpy.data.images.load(check_existing=True), an image which is needed in different colorspaces, e.g. as
+    color and as "Non-Color" data, gets one datablock per colorspace, so setting the colorspace for one material does
+    not change the look of another one.
+
+    Optionally, all newly loaded textures can be downscaled to a maximum resolution, which reduces the memory used by
+    Cycles for big material libraries.
+
+    .. code-block:: python
+
+        bproc.utility.ImageCache.set_max_resolution(1024)
+        materials = bproc.loader.load_ccmaterials("resources/cctextures")
+        print(bproc.utility.ImageCache.get_memory_usage())
+    """
+
+    # maps the resolved image path and the colorspace to the loaded image
+    _images: Dict[Tuple[str, str], bpy.types.Image] = {}
+    # maps the same keys to the estimated size of the pixels in bytes, so it can be queried without loading the pixels
+    _num_bytes: Dict[Tuple[str, str], int] = {}
+    # maps the resolved image path to the colorspace blender detected for it, so loading an image with colorspace
+    # None and with the detected colorspace returns the same image
+    _default_colorspaces: Dict[str, str] = {}
+    _max_resolution: Optional[int] = None
+    # the directory the downscaled images are written to, if None the temporary directory is used
+    _scaled_image_dir: Optional[str] = None
+    _keep_on_clean_up: bool = False
+
+    @staticmethod
+    def set_max_resolution(max_resolution: Optional[int]):
+        """ Sets the maximum width and height of images, which are loaded afterwards.
+
+        :param max_resolution: Images which are bigger along any side are downscaled on load, keeping their aspect
+                               ratio. None disables the downscaling.
+        """
+        if max_resolution is not None and max_resolution <= 0:
+            raise ValueError(f"The maximum resolution has to be positive, not {max_resolution}.")
+        ImageCache._max_resolution = max_resolution
+
+    @staticmethod
+    def load(path: str, colorspace: Optional[str] = None, allow_downscale: bool = True) -> bpy.types.Image:
+        """ Returns the image of the given file, it is only loaded if it is not already in the cache.
+
+        :param path: The path to the image file.
+        :param colorspace: The colorspace of the image, e.g. "Non-Color". If None, the colorspace detected by blender
+                           is kept.
+        :param allow_downscale: If False, the image keeps its resolution, even if a maximum resolution is set.
+        :return: The loaded image.
+        """
+        real_path = os.path.realpath(path)
+        if colorspace is None:
+            colorspace = ImageCache._default_colorspaces.get(real_path)
+        if colorspace is not None:
+            image = ImageCache._get_cached_image((real_path, colorspace))
+            if image is not None:
+                return image
+
+        image = bpy.data.images.load(path, check_existing=False)
+        if colorspace is None:
+            colorspace = image.colorspace_settings.name
+            ImageCache._default_colorspaces[real_path] = colorspace
+            # the image might have been loaded with its detected colorspace set explicitly before
+            cached_image = ImageCache._get_cached_image((real_path, colorspace))
+            if cached_image is not None:
+                bpy.data.images.remove(image)
+                return cached_image
+        else:
+            image.colorspace_settings.name = colorspace
+
+        width, height = image.size
+        if allow_downscale and ImageCache._max_resolution is not None and \
+                max(width, height) > ImageCache._max_resolution:
+            scale = ImageCache._max_resolution / max(width, height)
+            width, height = max(1, round(width * scale)), max(1, round(height * scale))
+            image.scale(width, height)
+            ImageCache._save_scaled_image(image, real_path, colorspace)
+        key = (real_path, colorspace)
+        ImageCache._images[key] = image
+        ImageCache._num_bytes[key] = width * height * image.channels * (4 if image.is_float else 1)
+        return image
+
+    @staticmethod
+    def _get_cached_image(key: Tuple[str, str]) -> Optional[bpy.types.Image]:
+        """ Returns the cached image of the given key, if it exists and has not been removed from blender.
+
+        :param key: The resolved image path and the colorspace.
+        :return: The cached image or None.
+        """
+        image = ImageCache._images.get(key)
+        if image is None:
+            return None
+        try:
+            # the image might have been removed in the meantime, e.g. by bproc.clean_up()
+            _ = image.name
+            return image
+        except ReferenceError:
+            del ImageCache._images[key]
+            del ImageCache._num_bytes[key]
+            return None
+
+    @staticmethod
+    def _save_scaled_image(image: bpy.types.Image, real_path: str, colorspace: str):
+        """ Writes a downscaled image into the temporary directory and points the image to it.
+
+        image.scale() only changes the pixels in memory, so blender would reload the full resolution from the original
+        file, e.g. when image.reload() is called.
+
+        :param image: The downscaled image.
+        :param real_path: The resolved path of the original image file.
+        :param colorspace: The colorspace the image is used in.
+        """
+        scaled_dir = ImageCache._scaled_image_dir
+        if scaled_dir is None:
+            scaled_dir = os.path.join(Utility.get_temporary_directory(), "scaled_images")
+        os.makedirs(scaled_dir, exist_ok=True)
+        file_hash = hashlib.md5(f"{real_path}:{colorspace}".encode("utf-8")).hexdigest()
+        image.filepath_raw = os.path.join(scaled_dir, f"{file_hash}_{os.path.basename(real_path)}")
+        image.save()
+
+    @staticmethod
+    def contains(path: str, colorspace: Optional[str] = None) -> bool:
+        """ Checks whether the given file has already been loaded in the given colorspace.
+
+        :param path: The path to the image file.
+        :param colorspace: The colorspace of the image, see load().
+        :return: True, if the image is in the cache.
+        """
+        real_path = os.path.realpath(path)
+        if colorspace is None:
+            colorspace = ImageCache._default_colorspaces.get(real_path)
+            if colorspace is None:
+                return False
+        return ImageCache._get_cached_image((real_path, colorspace)) is not None
+
+    @staticmethod
+    def get_memory_usage() -> Dict[str, int]:
+        """ Estimates the memory needed by the pixels of all cached images.
+
+        :return: A dict containing the number of cached images ("num_images") and their estimated size in bytes
+                 ("bytes"), based on resolution, number of channels and whether they use float buffers.
+        """
+        num_images, num_bytes = 0, 0
+        for key in list(ImageCache._images.keys()):
+            if ImageCache._get_cached_image(key) is not None:
+                num_bytes += ImageCache._num_bytes[key]
+                num_images += 1
+        return {"num_images": num_images, "bytes": num_bytes}
+
+    @staticmethod
+    def set_keep_on_clean_up(keep: bool):
+        """ Sets whether the cached images should survive bproc.init() and bproc.clean_up().
+
+        This way a long running process, e.g. a worker of `blenderproc serve`, only loads every texture once, even if
+        the scene is cleaned up between scripts.
+
+        :param keep: If True, cached images are no longer removed when cleaning up the scene.
+        """
+        ImageCache._keep_on_clean_up = keep
+
+    @staticmethod
+    def set_scaled_image_dir(scaled_image_dir: Optional[str]):
+        """ Sets the directory into which downscaled images are written.
+
+        The downscaled images have to outlive the scripts using them, if set_keep_on_clean_up() is enabled and every
+        script uses its own temporary directory.
+
+        :param scaled_image_dir: The directory for the downscaled images. None uses the temporary directory.
+        """
+        ImageCache._scaled_image_dir = scaled_image_dir
+
+    @staticmethod
+    def get_names_of_images_to_keep() -> Set[str]:
+        """ Returns the names of the images, which should not be removed when cleaning up the scene.
+
+        :return: The names of all cached images, if set_keep_on_clean_up() is enabled, otherwise an empty set.
+        """
+        if not ImageCache._keep_on_clean_up:
+            return set()
+        names = set()
+        for image in list(ImageCache._images.values()):
+            try:
+                names.add(image.name)
+            except ReferenceError:
+                continue
+        return names
+
+    @staticmethod
+    def clear():
+        """ Empties the cache, the images themselves are not removed from blender. """
+        ImageCache._images.clear()
+        ImageCache._num_bytes.clear()
+        ImageCache._default_colorspaces.clear()
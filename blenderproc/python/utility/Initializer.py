@@ -11,6 +11,7 @@
 import bpy
 
 from blenderproc.python.utility.GlobalStorage import GlobalStorage
+from blenderproc.python.utility.ImageCache import ImageCache
 from blenderproc.python.utility.Utility import reset_keyframes
 from blenderproc.python.utility.SetupUtility import SetupUtility, is_using_external_bpy_module
 from blenderproc.python.camera import CameraUtility
@@ -148,8 +149,9 @@ def set_default_parameters():
         RendererUtility.set_noise_threshold(DefaultConfig.sampling_noise_threshold)
 
         # Set number of cpu cores used for rendering (1 thread is always used for coordination => 1
-        # cpu thread means GPU-only rendering)
-        RendererUtility.set_cpu_threads(0)
+        # cpu thread means GPU-only rendering). Concurrent runs started via `blenderproc run --run-workers N` share the
+        # cores via BLENDER_PROC_CPU_THREADS, otherwise all cores are used.
+        RendererUtility.set_cpu_threads(int(os.getenv("BLENDER_PROC_CPU_THREADS", "0")))
         RendererUtility.set_denoiser(DefaultConfig.denoiser)
         # For now disable the light tree per default, as it seems to increase render time for most of our tests
         RendererUtility.toggle_light_tree(False)
@@ -179,6 +181,8 @@ def remove_all_data(remove_camera: bool = True):
 
         :param remove_camera: If True, also the default camera is removed.
         """
+        # Images which are cached across scenes are kept, see ImageCache.set_keep_on_clean_up()
+        images_to_keep = ImageCache.get_names_of_images_to_keep()
         # Go through all attributes of bpy.data
         for collection in dir(bpy.data):
             data_structure = getattr(bpy.data, collection)
@@ -194,6 +198,8 @@ def remove_all_data(remove_camera: bool = True):
                     if not remove_camera and isinstance(block, (bpy.types.Object, bpy.types.Camera)) \
                             and block.name == "Camera":
                         continue
+                    if isinstance(block, bpy.types.Image) and block.name in images_to_keep:
+                        continue
                     data_structure.remove(block)
 
     @staticmethod
@@ -0,0 +1,331 @@
+"""Provides a numpy based ray caster, which casts whole batches of rays onto a static set of triangles."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from mathutils.bvhtree import BVHTree
+
+
+class TriangleRayCaster:
+    """ Casts batches of rays onto a static set of triangles given in world space.
+
+    In contrast to `mathutils.bvhtree.BVHTree.ray_cast()`, which has to be called once per ray, all rays are given as
+    numpy arrays and processed together. The triangles are sorted along a morton curve and split into small
+    clusters, on top of which a tree of bounding boxes is built. The tree is traversed level by level for all rays
+    at once, so every ray is only tested against the triangles of the clusters whose boxes it hits.
+
+    The rays are processed in tiles, which bounds the memory usage and allows to spread the work over multiple
+    threads, as numpy releases the GIL during its array operations.
+    """
+
+    # The number of children of every inner node of the tree
+    _branching_factor = 8
+    # The max number of box or triangle tests done within one array operation
+    _max_tests_per_step = 2 ** 20
+
+    def __init__(self, triangles: np.ndarray, face_indices: Optional[np.ndarray] = None,
+                 triangles_per_cluster: int = 4, rays_per_tile: int = 4096, num_threads: int = 1):
+        """
+        :param triangles: The corners of all triangles in world space with shape [M, 3, 3].
+        :param face_indices: The index returned for every triangle when it is hit, shape [M]. If None, the index of
+                             the triangle itself is returned.
+        :param triangles_per_cluster: The number of triangles which are put into one leaf of the tree.
+        :param rays_per_tile: The max number of rays which are processed together.
+        :param num_threads: The number of threads used to process the tiles.
+        """
+        triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        if face_indices is None:
+            face_indices = np.arange(len(triangles))
+        face_indices = np.asarray(face_indices, dtype=np.int64).reshape(-1)
+        if len(face_indices) != len(triangles):
+            raise ValueError(f"The number of face indices ({len(face_indices)}) does not match the number of "
+                             f"triangles ({len(triangles)}).")
+        if triangles_per_cluster < 1 or rays_per_tile < 1 or num_threads < 1:
+            raise ValueError("The number of triangles per cluster, rays per tile and threads has to be positive.")
+        self.rays_per_tile = rays_per_tile
+        self.num_threads = num_threads
+        self._triangles = triangles
+        self._num_triangles = len(triangles)
+        if self._num_triangles == 0:
+            return
+
+        # Sort the triangles along a morton curve, so neighboring triangles end up in the same clusters
+        order = np.argsort(TriangleRayCaster._morton_codes(triangles.mean(axis=1)), kind="stable")
+        num_clusters = -(-len(order) // triangles_per_cluster)
+        # Fill the last cluster with copies of the last triangle, which are never reported as hit
+        order = np.concatenate((order, np.full(num_clusters * triangles_per_cluster - len(order), order[-1])))
+        self._valid = (np.arange(len(order)) < self._num_triangles).reshape(num_clusters, triangles_per_cluster)
+
+        sorted_triangles = triangles[order].reshape(num_clusters, triangles_per_cluster, 3, 3)
+        self._face_indices = face_indices[order].reshape(num_clusters, triangles_per_cluster)
+        self._v0 = sorted_triangles[:, :, 0]
+        self._e1 = sorted_triangles[:, :, 1] - self._v0
+        self._e2 = sorted_triangles[:, :, 2] - self._v0
+        normals = np.cross(self._e1, self._e2)
+        lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+        self._normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+        # Slightly enlarge the boxes, so rays hitting flat or axis aligned geometry are not lost due to rounding
+        eps = 1e-7 * max(float(np.ptp(triangles.reshape(-1, 3), axis=0).max()), 1.0)
+        cluster_corners = sorted_triangles.reshape(num_clusters, -1, 3)
+        box_min, box_max = cluster_corners.min(axis=1) - eps, cluster_corners.max(axis=1) + eps
+        # Build the tree bottom up, the children of node i are the nodes [i * b, (i + 1) * b) of the level below
+        levels = [(box_min, box_max)]
+        while len(box_min) > self._branching_factor:
+            num_nodes = -(-len(box_min) // self._branching_factor)
+            # Missing children are filled with copies of the last node, which does not change the boxes
+            children = np.minimum(np.arange(num_nodes * self._branching_factor), len(box_min) - 1)
+            box_min = box_min[children].reshape(num_nodes, self._branching_factor, 3).min(axis=1)
+            box_max = box_max[children].reshape(num_nodes, self._branching_factor, 3).max(axis=1)
+            levels.append((box_min, box_max))
+        # The levels are traversed top down. Below the top level, the boxes of the children of every node are stored
+        # together with shape [num_nodes, 2, 3, b] and their number per node, so they can be gathered at once
+        self._top_boxes = np.stack(levels[-1]).transpose(0, 2, 1)[np.newaxis].copy()
+        self._child_boxes = []
+        for (box_min, box_max), (parent_min, _) in zip(reversed(levels[:-1]), reversed(levels[1:])):
+            children = np.minimum(np.arange(len(parent_min) * self._branching_factor), len(box_min) - 1)
+            boxes = np.stack((box_min[children], box_max[children])).reshape(2, len(parent_min), -1, 3)
+            num_children = np.clip(len(box_min) - np.arange(len(parent_min)) * self._branching_factor, 0,
+                                   self._branching_factor)
+            self._child_boxes.append((boxes.transpose(1, 0, 3, 2).copy(), num_children))
+
+    def get_triangles(self) -> np.ndarray:
+        """ Returns the triangles the rays are cast onto.
+
+        :return: The corners of all triangles in world space with shape [M, 3, 3].
+        """
+        return self._triangles
+
+    def ray_cast(self, origins: np.ndarray, directions: np.ndarray, max_distance: float = sys.float_info.max) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ Casts the given rays and returns their closest hits.
+
+        The outputs match the ones of `mathutils.bvhtree.BVHTree.ray_cast()`, just for all rays at once. Triangles
+        are hit from both sides.
+
+        :param origins: The origins of the rays with shape [N, 3] or a single origin for all rays with shape [3].
+        :param directions: The directions of the rays with shape [N, 3], they do not have to be normalized.
+        :param max_distance: Only hits up to this distance from the origin are considered.
+        :return: Whether each ray hit something with shape [N], the hit locations with shape [N, 3], the normals of
+                 the hit triangles with shape [N, 3], the face indices of the hit triangles with shape [N] and the
+                 distances to the hits with shape [N]. For rays without a hit the location, normal and distance are
+                 NaN and the face index is -1.
+        """
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        origins = np.broadcast_to(np.asarray(origins, dtype=np.float64), directions.shape)
+        # Like the bvh tree, the distances are measured along the normalized directions
+        lengths = np.linalg.norm(directions, axis=-1, keepdims=True)
+        directions = np.divide(directions, lengths, out=np.zeros_like(directions), where=lengths > 0)
+
+        num_rays = len(directions)
+        distances = np.full(num_rays, np.nan)
+        face_indices = np.full(num_rays, -1, dtype=np.int64)
+        normals = np.full((num_rays, 3), np.nan)
+        if self._num_triangles > 0:
+            tiles = [slice(start, start + self.rays_per_tile) for start in range(0, num_rays, self.rays_per_tile)]
+
+            def cast_tile(tile: slice):
+                # Every tile writes into its own part of the outputs
+                distances[tile], face_indices[tile], normals[tile] = self._cast_tile(origins[tile], directions[tile],
+                                                                                     max_distance)
+
+            if self.num_threads > 1 and len(tiles) > 1:
+                with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+                    list(executor.map(cast_tile, tiles))
+            else:
+                for tile in tiles:
+                    cast_tile(tile)
+
+        hits = face_indices >= 0
+        locations = origins + directions * distances[:, np.newaxis]
+        return hits, locations, normals, face_indices, distances
+
+    def _cast_tile(self, origins: np.ndarray, directions: np.ndarray,
+                   max_distance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Casts one tile of rays.
+
+        :param origins: The origins of the rays with shape [R, 3].
+        :param directions: The normalized directions of the rays with shape [R, 3].
+        :param max_distance: Only hits up to this distance from the origin are considered.
+        :return: The distances, face indices and normals of the closest hits. Rays without a hit get NaN and -1.
+        """
+        # Avoid 0 * inf in the slab tests for rays which are parallel to an axis
+        inv_directions = 1.0 / np.where(directions == 0, 1e-30, directions)
+
+        # Find all pairs of rays and leaf clusters whose boxes intersect, starting with the nodes of the top level
+        ray_ids, node_ids = np.nonzero(self._hit_boxes(origins, inv_directions, self._top_boxes, max_distance))
+        for child_boxes, num_children in self._child_boxes:
+            ray_ids, node_ids = self._descend(ray_ids, node_ids, child_boxes, num_children, origins, inv_directions,
+                                              max_distance)
+
+        # Test the rays against all triangles of their clusters and only keep the closest hit per ray
+        best_distances = np.full(len(origins), np.inf)
+        best_clusters = np.full(len(origins), -1, dtype=np.int64)
+        best_slots = np.zeros(len(origins), dtype=np.int64)
+        step = max(1, self._max_tests_per_step // self._v0.shape[1])
+        for start in range(0, len(ray_ids), step):
+            rays, clusters = ray_ids[start:start + step], node_ids[start:start + step]
+            distances = self._intersect_triangles(origins[rays], directions[rays], clusters, max_distance)
+            pair_ids, slot_ids = np.nonzero(np.isfinite(distances))
+            if len(pair_ids) == 0:
+                continue
+            rays, distances = rays[pair_ids], distances[pair_ids, slot_ids]
+            # Sorting by ray and then distance puts the closest hit of every ray first
+            order = np.lexsort((distances, rays))
+            closest = order[np.unique(rays[order], return_index=True)[1]]
+            closer = closest[distances[closest] < best_distances[rays[closest]]]
+            best_distances[rays[closer]] = distances[closer]
+            best_clusters[rays[closer]] = clusters[pair_ids[closer]]
+            best_slots[rays[closer]] = slot_ids[closer]
+
+        hit = best_clusters >= 0
+        face_indices = np.full(len(origins), -1, dtype=np.int64)
+        face_indices[hit] = self._face_indices[best_clusters[hit], best_slots[hit]]
+        normals = np.full((len(origins), 3), np.nan)
+        normals[hit] = self._normals[best_clusters[hit], best_slots[hit]]
+        return np.where(hit, best_distances, np.nan), face_indices, normals
+
+    def _descend(self, ray_ids: np.ndarray, node_ids: np.ndarray, child_boxes: np.ndarray, num_children: np.ndarray,
+                 origins: np.ndarray, inv_directions: np.ndarray,
+                 max_distance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """ Turns the pairs of rays and hit nodes into pairs of rays and hit children of these nodes.
+
+        :param ray_ids: The ray of every pair with shape [P].
+        :param node_ids: The hit node of every pair with shape [P].
+        :param child_boxes: The boxes of the children of every node with shape [num_nodes, 2, 3, b].
+        :param num_children: The number of children of every node with shape [num_nodes].
+        :param origins: The origins of all rays of the tile with shape [R, 3].
+        :param inv_directions: The inverse directions of all rays of the tile with shape [R, 3].
+        :param max_distance: Only hits up to this distance from the origin are considered.
+        :return: The ray and the hit child of every new pair.
+        """
+        new_ray_ids, new_node_ids = [ray_ids[:0]], [node_ids[:0]]
+        step = max(1, self._max_tests_per_step // self._branching_factor)
+        for start in range(0, len(ray_ids), step):
+            rays, nodes = ray_ids[start:start + step], node_ids[start:start + step]
+            hit = self._hit_boxes(origins[rays], inv_directions[rays], child_boxes[nodes], max_distance)
+            hit &= np.arange(self._branching_factor) < num_children[nodes, np.newaxis]
+            pair_ids, slot_ids = np.nonzero(hit)
+            new_ray_ids.append(rays[pair_ids])
+            new_node_ids.append(nodes[pair_ids] * self._branching_factor + slot_ids)
+        return np.concatenate(new_ray_ids), np.concatenate(new_node_ids)
+
+    @staticmethod
+    def _hit_boxes(origins: np.ndarray, inv_directions: np.ndarray, boxes: np.ndarray,
+                   max_distance: float) -> np.ndarray:
+        """ Checks which rays intersect which axis aligned boxes via the slab test.
+
+        :param origins: The origins of the rays with shape [P, 3].
+        :param inv_directions: The element-wise inverse of the ray directions with shape [P, 3].
+        :param boxes: The min and max corners of the boxes to test per ray with shape [P, 2, 3, K], or [1, 2, 3, K]
+                      to test all rays against the same boxes.
+        :param max_distance: Boxes further away than this are not considered as hit.
+        :return: A boolean mask with shape [P, K].
+        """
+        t_near, t_far = 0.0, max_distance
+        # Go through the axes one by one, so all operations run on contiguous arrays
+        for axis in range(3):
+            origin, inv_direction = origins[:, axis, np.newaxis], inv_directions[:, axis, np.newaxis]
+            t_0 = (boxes[:, 0, axis] - origin) * inv_direction
+            t_1 = (boxes[:, 1, axis] - origin) * inv_direction
+            t_near = np.maximum(t_near, np.minimum(t_0, t_1))
+            t_far = np.minimum(t_far, np.maximum(t_0, t_1))
+        return t_near <= t_far
+
+    def _intersect_triangles(self, origins: np.ndarray, directions: np.ndarray, clusters: np.ndarray,
+                             max_distance: float) -> np.ndarray:
+        """ Intersects every ray with all triangles of its cluster via the Möller–Trumbore algorithm.
+
+        :param origins: The origins of the rays with shape [P, 3].
+        :param directions: The normalized directions of the rays with shape [P, 3].
+        :param clusters: The cluster to test per ray with shape [P].
+        :param max_distance: Only hits up to this distance from the origin are considered.
+        :return: The distance to every triangle of the clusters with shape [P, triangles_per_cluster], inf if the
+                 triangle is not hit.
+        """
+        v0, e1, e2 = self._v0[clusters], self._e1[clusters], self._e2[clusters]
+        directions = directions[:, np.newaxis]
+        p_vec = TriangleRayCaster._cross(directions, e2)
+        det = TriangleRayCaster._dot(e1, p_vec)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_det = 1.0 / det
+            t_vec = origins[:, np.newaxis] - v0
+            u = TriangleRayCaster._dot(t_vec, p_vec) * inv_det
+            q_vec = TriangleRayCaster._cross(t_vec, e1)
+            v = TriangleRayCaster._dot(directions, q_vec) * inv_det
+            distances = TriangleRayCaster._dot(e2, q_vec) * inv_det
+        hit = (det != 0) & (u >= 0) & (v >= 0) & (u + v <= 1) & (distances >= 0) & (distances <= max_distance)
+        hit &= self._valid[clusters]
+        return np.where(hit, distances, np.inf)
+
+    @staticmethod
+    def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """ Computes the dot products along the last axis, which is faster than np.sum() for vectors of length 3.
+
+        :param a: The first vectors with shape [..., 3].
+        :param b: The second vectors with shape [..., 3].
+        :return: The dot products with the broadcast shape of the inputs without the last axis.
+        """
+        return a[..., 0] * b[..., 0] + a[..., 1] * b[..., 1] + a[..., 2] * b[..., 2]
+
+    @staticmethod
+    def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """ Computes the cross products along the last axis, which is faster than np.cross() for small batches.
+
+        :param a: The first vectors with shape [..., 3].
+        :param b: The second vectors with shape [..., 3].
+        :return: The cross products with the broadcast shape of the inputs.
+        """
+        return np.stack((a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+                         a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+                         a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]), axis=-1)
+
+    @staticmethod
+    def _morton_codes(points: np.ndarray) -> np.ndarray:
+        """ Computes the 30 bit morton codes of the given points, relative to their bounding box.
+
+        :param points: The points with shape [N, 3].
+        :return: The morton codes with shape [N].
+        """
+        extent = np.ptp(points, axis=0)
+        extent[extent == 0] = 1
+        cells = ((points - points.min(axis=0)) / extent * 1023).astype(np.uint64)
+        # Spread the 10 bits of every coordinate, so they can be interleaved
+        for shift, mask in [(16, 0x030000FF), (8, 0x0300F00F), (4, 0x030C30C3), (2, 0x09249249)]:
+            cells = (cells | (cells << np.uint64(shift))) & np.uint64(mask)
+        return (cells[:, 0] << np.uint64(2)) | (cells[:, 1] << np.uint64(1)) | cells[:, 2]
+
+
+def cast_rays(ray_caster: Union["BVHTree", TriangleRayCaster], origins: np.ndarray, directions: np.ndarray,
+              max_distance: float = sys.float_info.max) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ Casts the given rays either with a batched ray caster or one by one with a bvh tree.
+
+    :param ray_caster: The TriangleRayCaster or BVHTree to use.
+    :param origins: The origins of the rays with shape [N, 3] or a single origin for all rays with shape [3].
+    :param directions: The directions of the rays with shape [N, 3].
+    :param max_distance: Only hits up to this distance from the origin are considered.
+    :return: The hits, locations, normals, face indices and distances, see TriangleRayCaster.ray_cast().
+    """
+    if isinstance(ray_caster, TriangleRayCaster):
+        return ray_caster.ray_cast(origins, directions, max_distance)
+
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    origins = np.broadcast_to(np.asarray(origins, dtype=np.float64), directions.shape)
+    hits = np.zeros(len(directions), dtype=bool)
+    locations = np.full((len(directions), 3), np.nan)
+    normals = np.full((len(directions), 3), np.nan)
+    face_indices = np.full(len(directions), -1, dtype=np.int64)
+    distances = np.full(len(directions), np.nan)
+    # The bvh tree works in single precision, bigger distances overflow and lead to hits at infinity
+    extra_args = [max_distance] if max_distance < float(np.finfo(np.float32).max) else []
+    for i, (origin, direction) in enumerate(zip(origins.tolist(), directions.tolist())):
+        location, normal, face_index, distance = ray_caster.ray_cast(origin, direction, *extra_args)
+        if face_index is not None:
+            hits[i] = True
+            locations[i], normals[i], face_indices[i], distances[i] = location, normal, face_index, distance
+    return hits, locations, normals, face_indices, distances
@@ -0,0 +1,142 @@
+"""Runs a BlenderProc script several times in concurrent blender processes."""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class RunScheduler:
+    """
+    Runs a BlenderProc script multiple times, while several blender processes run at the same time.
+
+    Every run gets its own deterministic random seed (base_seed + run index) via BLENDER_PROC_RANDOM_SEED, its own
+    temporary directory and the cpu cores are split evenly between the concurrent runs via BLENDER_PROC_CPU_THREADS,
+    which is used by bproc.init(). The placeholder "{run}" in the arguments of the script is replaced with the run
+    index, e.g. to give every run its own output directory. Otherwise, the hdf5, BOP and coco writers can also append
+    to the same output directory, as they lock it while determining their next free index.
+
+    Runs which fail are retried with the same seed. In the end, the aggregate throughput is reported.
+
+    This class runs outside of blender, it is used by `blenderproc run --run-workers N --num-runs M`.
+    """
+
+    def __init__(self, blender_run_path: str, script: str, script_args: List[str], env: Dict[str, str],
+                 temp_dir: str, num_runs: int, num_workers: int, base_seed: int = 0, max_retries: int = 2,
+                 cpu_threads: Optional[int] = None):
+        """
+        :param blender_run_path: The path to the blender binary.
+        :param script: The path to the python script which uses BlenderProc.
+        :param script_args: The arguments given to the script, "{run}" is replaced with the index of the run.
+        :param env: The environment variables used for the blender processes.
+        :param temp_dir: The temporary directory, every run uses its own subdirectory of it.
+        :param num_runs: The number of times the script is run.
+        :param num_workers: The number of blender processes, which run at the same time.
+        :param base_seed: The random seed of the first run, run i uses base_seed + i.
+        :param max_retries: The number of times a failed run is started again.
+        :param cpu_threads: The number of cpu threads used by every blender process for rendering. If None, the
+                            available cores are split evenly between the workers.
+        """
+        if num_runs < 1 or num_workers < 1:
+            raise ValueError(f"The number of runs ({num_runs}) and workers ({num_workers}) has to be at least one.")
+        self.blender_run_path = blender_run_path
+        self.script = script
+        self.script_args = script_args
+        self.env = env
+        self.temp_dir = temp_dir
+        self.num_runs = num_runs
+        self.num_workers = min(num_workers, num_runs)
+        self.base_seed = base_seed
+        self.max_retries = max_retries
+        if cpu_threads is None:
+            # A single worker keeps blenders default of using all cores
+            cpu_threads = 0 if self.num_workers == 1 else max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.cpu_threads = cpu_threads
+
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def run(self) -> bool:
+        """ Runs the script num_runs times and prints the throughput.
+
+        :return: True, if all runs succeeded.
+        """
+        print(f"Starting {self.num_runs} runs with {self.num_workers} concurrent worker(s) and "
+              f"{self.cpu_threads if self.cpu_threads > 0 else 'all'} cpu thread(s) per worker")
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            try:
+                results = list(executor.map(self._run_with_retries, range(self.num_runs)))
+            except KeyboardInterrupt:
+                self.stop()
+                raise
+        wall_time = time.time() - start_time
+
+        durations = [duration for success, duration, _ in results if success]
+        failed_runs = [run_index for run_index, (success, _, _) in enumerate(results) if not success]
+        num_retries = sum(attempts - 1 for _, _, attempts in results)
+        print(f"Finished {len(durations)}/{self.num_runs} runs in {wall_time:.1f}s with {num_retries} retries")
+        if durations:
+            print(f"Throughput: {len(durations) / wall_time * 3600:.1f} runs/h, mean duration per run "
+                  f"{sum(durations) / len(durations):.1f}s, speedup compared to sequential runs "
+                  f"{sum(durations) / wall_time:.2f}x")
+        if failed_runs:
+            print(f"Failed runs: {', '.join(str(run_index) for run_index in failed_runs)}")
+        return not failed_runs
+
+    def stop(self):
+        """ Terminates all running blender processes, no further runs are started. """
+        with self._lock:
+            self._stopped = True
+            for process in self._processes.values():
+                process.terminate()
+
+    def _run_with_retries(self, run_index: int) -> Tuple[bool, float, int]:
+        """ Runs the script once, failed attempts are repeated up to max_retries times.
+
+        :param run_index: The index of the run.
+        :return: Whether the run succeeded, the duration of the successful attempt and the number of attempts.
+        """
+        run_temp_dir = os.path.join(self.temp_dir, f"run_{run_index}")
+        env = dict(self.env, BLENDER_PROC_RANDOM_SEED=str(self.base_seed + run_index),
+                   BLENDER_PROC_RUN_INDEX=str(run_index), BLENDER_PROC_CPU_THREADS=str(self.cpu_threads))
+        args = [arg.replace("{run}", str(run_index)) for arg in self.script_args]
+        cmd = [self.blender_run_path, "--background", "--python-use-system-env", "--python-exit-code", "2",
+               "--python", self.script, "--", self.script, run_temp_dir] + args
+
+        for attempt in range(1, self.max_retries + 2):
+            start_time = time.time()
+            with self._lock:
+                if self._stopped:
+                    return False, 0.0, attempt
+                # With concurrent runs, the output would be interleaved, so every run writes its own log
+                log_path = os.path.join(self.temp_dir, f"run_{run_index}.log")
+                os.makedirs(self.temp_dir, exist_ok=True)
+                # pylint: disable=consider-using-with
+                log_file = open(log_path, "w", encoding="utf-8") if self.num_workers > 1 else None
+                process = subprocess.Popen(cmd, env=env, stdout=log_file,
+                                           stderr=subprocess.STDOUT if log_file else None)
+                # pylint: enable=consider-using-with
+                self._processes[run_index] = process
+            return_code = process.wait()
+            with self._lock:
+                del self._processes[run_index]
+            if log_file is not None:
+                log_file.close()
+            duration = time.time() - start_time
+            shutil.rmtree(run_temp_dir, ignore_errors=True)
+
+            if return_code == 0:
+                print(f"Run {run_index} finished after {duration:.1f}s")
+                return True, duration, attempt
+            if self._stopped:
+                return False, 0.0, attempt
+            print(f"Run {run_index} failed with exit code {return_code} (attempt {attempt}/{self.max_retries + 1})")
+            if log_file is not None:
+                with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                    print("".join(f.readlines()[-20:]))
+        return False, 0.0, self.max_retries + 1
@@ -0,0 +1,485 @@
+"""Keeps warm blender workers alive, which run BlenderProc scripts submitted over a local socket."""
+
+import os
+import queue
+import random
+import runpy
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing import AuthenticationError
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# The default port, which is used by `blenderproc serve` and `blenderproc submit`
+DEFAULT_SERVE_PORT = 16180
+
+
+def get_authkey_path(port: int) -> str:
+    """ Returns the path of the file, in which a server stores its random authentication key.
+
+    :param port: The port of the server.
+    :return: The path inside the config directory of the current user.
+    """
+    config_dir = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config_dir, "blenderproc", f"serve_{port}.key")
+
+
+def read_authkey(port: int) -> str:
+    """ Reads the authentication key, which a running server has written for the current user.
+
+    :param port: The port of the server.
+    :return: The key of the server.
+    """
+    authkey_path = get_authkey_path(port)
+    try:
+        with open(authkey_path, "r", encoding="utf-8") as file:
+            return file.read().strip()
+    except FileNotFoundError as e:
+        raise RuntimeError(f"The key file {authkey_path} does not exist, is `blenderproc serve` running on port "
+                           f"{port}? If the server was started with an explicit key, use the same key here.") from e
+
+
+def _write_authkey(authkey_path: str, authkey: str):
+    """ Writes the authentication key into a file, which only the current user can read.
+
+    :param authkey_path: The path of the key file.
+    :param authkey: The key to write.
+    """
+    os.makedirs(os.path.dirname(authkey_path), mode=0o700, exist_ok=True)
+    # mkstemp() creates the file with mode 0600, replacing the key file afterwards also replaces existing symlinks
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(authkey_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(authkey)
+        os.replace(temp_path, authkey_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class BlenderWorkerServer:
+    """
+    Keeps a number of blender processes running and executes submitted BlenderProc scripts in them.
+
+    Every worker starts blender, installs the pip packages and imports blenderproc only once. Afterwards it runs one
+    script after another. Between two scripts the scene is cleaned up via bproc.clean_up(), while the images loaded via
+    the ImageCache stay in memory, so the next script using the same textures does not have to load them again.
+
+    Jobs are sent by clients via submit_job() over a local socket, every job consists of the path of the script, its
+    arguments and an optional random seed. A job whose worker crashes is reported as failed and the worker is
+    restarted.
+
+    As the workers run every submitted script, clients have to authenticate with a key. If no key is given, a random
+    one is generated and written to get_authkey_path(), which only the current user can read.
+
+    This class runs outside of blender, it is used by `blenderproc serve`.
+    """
+
+    def __init__(self, blender_run_path: str, num_workers: int, temp_dir: str, port: int = DEFAULT_SERVE_PORT,
+                 authkey: Optional[str] = None):
+        """
+        :param blender_run_path: The path to the blender binary.
+        :param num_workers: The number of blender processes, which run scripts at the same time.
+        :param temp_dir: The temporary directory, every worker uses its own subdirectory of it.
+        :param port: The local port on which jobs are accepted.
+        :param authkey: The key clients have to use when submitting jobs. If None, a random key is generated and
+                        written to get_authkey_path(), where submit_job() reads it from.
+        """
+        if num_workers < 1:
+            raise ValueError(f"The number of workers has to be at least one, not {num_workers}.")
+        self.blender_run_path = blender_run_path
+        self.num_workers = num_workers
+        self.temp_dir = temp_dir
+        self._jobs: "queue.Queue[Optional[Tuple[Dict[str, Any], queue.Queue]]]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._error: Optional[Exception] = None
+
+        self._authkey_path: Optional[str] = None
+        if authkey is None:
+            authkey = secrets.token_hex(32)
+            self._authkey_path = get_authkey_path(port)
+        self._client_authkey = authkey.encode("utf-8")
+        # Many clients might connect at once, so the backlog has to be bigger than the default of one
+        self._client_listener = Listener(("localhost", port), backlog=128, authkey=self._client_authkey)
+        if self._authkey_path is not None:
+            # For port 0 the key file is named after the port chosen by the os
+            self._authkey_path = get_authkey_path(self.address[1])
+            try:
+                _write_authkey(self._authkey_path, authkey)
+            except OSError:
+                self._client_listener.close()
+                raise
+        # The workers use their own listener with a random key, so clients can not impersonate them
+        self._worker_authkey = secrets.token_bytes(32)
+        self._worker_listener = Listener(("localhost", 0), backlog=num_workers + 1, authkey=self._worker_authkey)
+        self._worker_connections: List["queue.Queue[Connection]"] = [queue.Queue() for _ in range(num_workers)]
+        self._worker_threads: List[threading.Thread] = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """ The address on which jobs are accepted. """
+        return self._client_listener.address
+
+    def serve_forever(self):
+        """ Starts the workers and handles the submitted jobs until shutdown() is called or a worker fails to start.
+        """
+        threading.Thread(target=self._accept_workers, daemon=True).start()
+        for worker_id in range(self.num_workers):
+            thread = threading.Thread(target=self._run_worker, args=(worker_id,), daemon=True)
+            thread.start()
+            self._worker_threads.append(thread)
+
+        print(f"Serving {self.num_workers} blender worker(s) on {self.address[0]}:{self.address[1]}")
+        if self._authkey_path is not None:
+            print(f"The key to submit jobs is stored in {self._authkey_path}")
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    conn = self._client_listener.accept()
+                except (AuthenticationError, EOFError, ConnectionError):
+                    continue
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+            for thread in self._worker_threads:
+                thread.join()
+            self._client_listener.close()
+            self._worker_listener.close()
+            if self._authkey_path is not None and os.path.exists(self._authkey_path):
+                os.remove(self._authkey_path)
+
+        if self._error is not None:
+            raise self._error
+
+    def shutdown(self):
+        """ Stops accepting jobs, the workers are stopped after finishing the jobs which are already queued. """
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        for _ in range(self.num_workers):
+            self._jobs.put(None)
+        # Wake up the blocking accept() calls, so the listeners notice the stop event
+        for listener, authkey in [(self._client_listener, self._client_authkey),
+                                  (self._worker_listener, self._worker_authkey)]:
+            try:
+                Client(listener.address, authkey=authkey).close()
+            except OSError:
+                pass
+
+    def _accept_workers(self):
+        """ Hands out the connections of starting workers to their threads. """
+        while not self._stop_event.is_set():
+            try:
+                conn = self._worker_listener.accept()
+                worker_id = conn.recv()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue
+            if isinstance(worker_id, int) and 0 <= worker_id < self.num_workers:
+                self._worker_connections[worker_id].put(conn)
+            else:
+                conn.close()
+
+    def _start_worker(self, worker_id: int) -> Tuple[subprocess.Popen, Connection]:
+        """ Starts a blender process and waits until it is ready to receive jobs.
+
+        :param worker_id: The index of the worker.
+        :return: The blender process and the connection to it.
+        """
+        repo_root_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        env = dict(os.environ, PYTHONPATH=repo_root_directory, PYTHONNOUSERSITE="1",
+                   INSIDE_OF_THE_INTERNAL_BLENDER_PYTHON_ENVIRONMENT="1",
+                   BLENDER_PROC_SERVE_WORKER_AUTHKEY=self._worker_authkey.hex())
+        worker_temp_dir = os.path.join(self.temp_dir, f"worker_{worker_id}")
+        # pylint: disable=consider-using-with
+        process = subprocess.Popen([self.blender_run_path, "--background", "--python-use-system-env",
+                                    "--python-exit-code", "2", "--python", os.path.abspath(__file__), "--",
+                                    os.path.abspath(__file__), worker_temp_dir,
+                                    str(self._worker_listener.address[1]), str(worker_id)], env=env)
+        # pylint: enable=consider-using-with
+
+        while True:
+            try:
+                return process, self._worker_connections[worker_id].get(timeout=1)
+            except queue.Empty as e:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Blender worker {worker_id} exited during startup with exit code "
+                                       f"{process.returncode}.") from e
+                if self._stop_event.is_set():
+                    process.terminate()
+                    process.wait()
+                    raise RuntimeError(f"The server was stopped while blender worker {worker_id} was starting.") from e
+
+    def _run_worker(self, worker_id: int):
+        """ Passes jobs to one worker and restarts it whenever it crashes.
+
+        :param worker_id: The index of the worker.
+        """
+        while True:
+            try:
+                process, conn = self._start_worker(worker_id)
+            except RuntimeError as e:
+                if not self._stop_event.is_set():
+                    self._error = e
+                    self.shutdown()
+                return
+
+            with conn:
+                while True:
+                    job = self._jobs.get()
+                    if job is None:
+                        conn.send(None)
+                        process.wait()
+                        return
+
+                    request, reply = job
+                    try:
+                        conn.send(request)
+                        result = conn.recv()
+                    except (EOFError, OSError):
+                        process.wait()
+                        reply.put({"success": False, "worker": worker_id, "duration": 0.0,
+                                   "error": f"The blender worker crashed with exit code {process.returncode}."})
+                        print(f"Blender worker {worker_id} crashed, restarting it")
+                        break
+                    result["worker"] = worker_id
+                    reply.put(result)
+
+    def _handle_client(self, conn: Connection):
+        """ Queues all jobs sent over the given connection and sends back their results in the same order.
+
+        :param conn: The connection to the client.
+        """
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                if request.get("command") == "shutdown":
+                    self.shutdown()
+                    conn.send({"success": True})
+                    return
+                if self._stop_event.is_set():
+                    conn.send({"success": False, "error": "The server is shutting down."})
+                    return
+
+                reply: queue.Queue = queue.Queue(maxsize=1)
+                self._jobs.put((request, reply))
+                try:
+                    conn.send(reply.get())
+                except OSError:
+                    return
+
+
+def submit_job(script: str, args: Optional[List[str]] = None, seed: Optional[int] = None,
+               port: int = DEFAULT_SERVE_PORT, authkey: Optional[str] = None) -> Dict[str, Any]:
+    """ Runs the given script in one of the workers of a running `blenderproc serve` and waits until it is done.
+
+    The script is run like `blenderproc run script args` with BLENDER_PROC_RANDOM_SEED set to the given seed. Relative
+    paths are resolved w.r.t. the current working directory of the caller.
+
+    :param script: The path to the python script which uses BlenderProc.
+    :param args: The arguments which are given to the script.
+    :param seed: The random seed used by bproc.init(). If None, no seed is set.
+    :param port: The port of the server.
+    :param authkey: The key of the server. If None, the key written by the server is read, see read_authkey().
+    :return: A dict with the keys "success", "error" (the traceback, if the script failed), "duration" (in seconds)
+             and "worker" (the index of the worker which ran the script).
+    """
+    request = {
+        "command": "run",
+        "script": os.path.abspath(script),
+        "args": [] if args is None else list(args),
+        "seed": seed,
+        "cwd": os.getcwd()
+    }
+    if authkey is None:
+        authkey = read_authkey(port)
+    with Client(("localhost", port), authkey=authkey.encode("utf-8")) as conn:
+        conn.send(request)
+        return conn.recv()
+
+
+def shutdown_server(port: int = DEFAULT_SERVE_PORT, authkey: Optional[str] = None):
+    """ Stops a running `blenderproc serve`, after the workers have finished all queued jobs.
+
+    :param port: The port of the server.
+    :param authkey: The key of the server. If None, the key written by the server is read, see read_authkey().
+    """
+    if authkey is None:
+        authkey = read_authkey(port)
+    with Client(("localhost", port), authkey=authkey.encode("utf-8")) as conn:
+        conn.send({"command": "shutdown"})
+        conn.recv()
+
+
+class _BlenderWorker:
+
+    @staticmethod
+    def run(port: int, worker_id: int):
+        """ Connects to the server and runs the received jobs until the server sends None.
+
+        This runs inside blender.
+
+        :param port: The port of the internal worker listener of the server.
+        :param worker_id: The index of this worker.
+        """
+        # pylint: disable=import-outside-toplevel
+        from blenderproc.python.utility.ImageCache import ImageCache
+        from blenderproc.python.utility.Utility import Utility
+        # pylint: enable=import-outside-toplevel
+
+        # Keep loaded textures across jobs, they are the most expensive assets to reload
+        ImageCache.set_keep_on_clean_up(True)
+        worker_temp_dir = Utility.get_temporary_directory()
+        # Every job gets its own temporary directory, which is removed afterwards, but the cached images are kept
+        ImageCache.set_scaled_image_dir(os.path.join(worker_temp_dir, "scaled_images"))
+
+        authkey = bytes.fromhex(os.environ.pop("BLENDER_PROC_SERVE_WORKER_AUTHKEY"))
+        with Client(("localhost", port), authkey=authkey) as conn:
+            conn.send(worker_id)
+            job_index = 0
+            while True:
+                job = conn.recv()
+                if job is None:
+                    break
+                conn.send(_BlenderWorker.run_job(job, os.path.join(worker_temp_dir, f"job_{job_index}")))
+                job_index += 1
+
+    @staticmethod
+    def run_job(job: Dict[str, Any], job_temp_dir: str) -> Dict[str, Any]:
+        """ Runs one script like `blenderproc run` would do it and resets the scene afterwards.
+
+        Modules imported by the script, changes of sys.path and the random state do not leak into the next job.
+
+        :param job: The job containing the script, its arguments, the seed and the working directory.
+        :param job_temp_dir: The temporary directory to use for this job, it is removed afterwards.
+        :return: The result of the job, see submit_job().
+        """
+        # pylint: disable=import-outside-toplevel
+        from numpy import random as np_random
+        from blenderproc.python.utility.SetupUtility import SetupUtility
+        from blenderproc.python.utility.Utility import Utility
+        from blenderproc.python.writer.WriterUtility import flush_hdf5_writes
+        # pylint: enable=import-outside-toplevel
+
+        original_argv, original_cwd, original_path = sys.argv, os.getcwd(), list(sys.path)
+        original_modules = set(sys.modules)
+        original_temp_dir = Utility.get_temporary_directory()
+        original_seed = os.environ.pop("BLENDER_PROC_RANDOM_SEED", None)
+        SetupUtility.setup_utility_paths(job_temp_dir)
+        if job.get("seed") is not None:
+            os.environ["BLENDER_PROC_RANDOM_SEED"] = str(job["seed"])
+            random.seed(job["seed"])
+            np_random.seed(job["seed"])
+        else:
+            # Do not continue the random sequence of the last job
+            random.seed()
+            np_random.seed()
+
+        start_time = time.time()
+        error = None
+        try:
+            os.chdir(job["cwd"])
+            sys.argv = [job["script"]] + job["args"]
+            try:
+                runpy.run_path(job["script"], run_name="__main__")
+            finally:
+                # Wait for the frames written in the background, so their errors are reported as errors of this job
+                flush_hdf5_writes()
+        except SystemExit as e:
+            if e.code not in [None, 0]:
+                error = f"The script exited with code {e.code}."
+        except Exception:  # pylint: disable=broad-except
+            error = traceback.format_exc()
+            print(error)
+        duration = time.time() - start_time
+
+        sys.argv = original_argv
+        sys.path[:] = original_path
+        os.chdir(original_cwd)
+        os.environ.pop("BLENDER_PROC_RANDOM_SEED", None)
+        if original_seed is not None:
+            os.environ["BLENDER_PROC_RANDOM_SEED"] = original_seed
+        _BlenderWorker.reset_scene()
+        _BlenderWorker.remove_imported_modules(original_modules)
+        Utility.temp_dir = original_temp_dir
+        shutil.rmtree(job_temp_dir, ignore_errors=True)
+
+        return {"success": error is None, "error": error, "duration": duration}
+
+    @staticmethod
+    def remove_imported_modules(original_modules: Set[str]):
+        """ Removes the modules imported by the last script, which do not belong to an installed package.
+
+        This way, the next script imports its own helper modules again, even if they have the same name. Installed
+        packages like numpy are kept, as many of them can not be imported twice into the same process.
+
+        :param original_modules: The names of the modules, which were imported before the script was run.
+        """
+        # pylint: disable=import-outside-toplevel
+        import bpy
+        import blenderproc
+        # pylint: enable=import-outside-toplevel
+
+        package_dirs = [sys.prefix, sys.base_prefix, os.path.dirname(blenderproc.__file__)]
+        package_dirs += bpy.utils.script_paths()
+        package_dirs += [path for path in sys.path if os.path.basename(path) in ["site-packages", "dist-packages"]]
+        package_dirs = tuple(os.path.join(os.path.realpath(path), "") for path in package_dirs)
+        for name in set(sys.modules) - original_modules:
+            module_file = getattr(sys.modules[name], "__file__", None)
+            if module_file is not None and not os.path.realpath(module_file).startswith(package_dirs):
+                del sys.modules[name]
+
+    @staticmethod
+    def reset_scene():
+        """ Brings blender back into the state it has after startup, only the cached images are kept. """
+        # pylint: disable=import-outside-toplevel
+        import bpy
+        from blenderproc.python.utility.GlobalStorage import GlobalStorage
+        from blenderproc.python.utility.ImageCache import ImageCache
+        from blenderproc.python.utility.Initializer import clean_up
+        # pylint: enable=import-outside-toplevel
+
+        clean_up(clean_up_camera=True)
+        # The compositor and the render passes belong to the scene, which is not removed by clean_up()
+        scene = bpy.context.scene
+        if scene.node_tree is not None:
+            nodes = scene.node_tree.nodes
+            for node in list(nodes):
+                nodes.remove(node)
+            # Recreate the nodes blender adds when the compositor is enabled for the first time, which the
+            # renderer utility expects to exist
+            render_layer_node = nodes.new("CompositorNodeRLayers")
+            composite_node = nodes.new("CompositorNodeComposite")
+            scene.node_tree.links.new(render_layer_node.outputs["Image"], composite_node.inputs["Image"])
+        scene.use_nodes = False
+        scene.render.use_compositing = False
+        view_layer = bpy.context.view_layer
+        for render_pass in ["use_pass_z", "use_pass_mist", "use_pass_normal", "use_pass_vector",
+                            "use_pass_object_index", "use_pass_diffuse_color"]:
+            setattr(view_layer, render_pass, False)
+        while view_layer.aovs:
+            view_layer.aovs.remove(view_layer.aovs[0])
+        # Forget everything registered by the last script, e.g. its outputs and that bproc.init() was called
+        GlobalStorage.clear()
+        # The images cached by the last script stay valid, but its settings for loading new ones do not
+        ImageCache.set_max_resolution(None)
+
+
+if __name__ == "__main__":
+    # This module is run as script by the workers, importing blenderproc sets up the environment once per worker
+    # pylint: disable=unused-import
+    import blenderproc
+    # pylint: enable=unused-import
+    _BlenderWorker.run(int(sys.argv[-2]), int(sys.argv[-1]))
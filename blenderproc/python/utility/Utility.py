@@ -289,7 +289,6 @@ def generate_equidistant_values(num: int, space_size_per_dimension: int) -> Tupl
         :param space_size_per_dimension: The side length of cube.
         """
         num_splits_per_dimension = 1
-        values = []
         # find cube_length bound of cubes to be made
         while num_splits_per_dimension ** 3 < num:
             num_splits_per_dimension += 1
@@ -298,18 +297,10 @@ def generate_equidistant_values(num: int, space_size_per_dimension: int) -> Tupl
         # even though we are then not using the full space of [0, 255] ** 3
         block_length = space_size_per_dimension // num_splits_per_dimension
 
-        # Calculate the center of each block and use them as equidistant values
-        r_mid_point = block_length // 2
-        for _ in range(num_splits_per_dimension):
-            g_mid_point = block_length // 2
-            for _ in range(num_splits_per_dimension):
-                b_mid_point = block_length // 2
-                for _ in range(num_splits_per_dimension):
-                    values.append([r_mid_point, g_mid_point, b_mid_point])
-                    b_mid_point += block_length
-                g_mid_point += block_length
-            r_mid_point += block_length
-        return values[:num], num_splits_per_dimension
+        # Calculate the center of each block and use them as equidistant values, the last dimension changes fastest
+        block_indices = np.indices([num_splits_per_dimension] * 3).reshape(3, -1).T[:num]
+        values = (block_indices * block_length + block_length // 2).tolist()
+        return values, num_splits_per_dimension
 
     @staticmethod
     def map_back_from_equally_spaced_equidistant_values(values: np.ndarray, num_splits_per_dimension: int,
@@ -606,3 +597,43 @@ def stdout_redirected(to: Union[int, IO, str] = os.devnull, enabled: bool = True
                 os.dup2(copied.fileno(), stdout_fd)  # $ exec >&copied
     else:
         yield sys.stdout
+
+
+@contextmanager
+def output_dir_lock(output_dir: str):
+    """ Locks the given output directory against writers in other processes.
+
+    Writers which append to existing output hold this lock while they determine the next free index and write their
+    data, so concurrent runs writing into the same directory, e.g. via `blenderproc run --run-workers N`, do not
+    overwrite each other. The lock is not reentrant.
+
+    :param output_dir: The directory to lock, it is created if it does not exist.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, ".blenderproc.lock"), "a+b") as lock_file:
+        if sys.platform == "win32":
+            # pylint: disable=import-outside-toplevel
+            import msvcrt
+            # pylint: enable=import-outside-toplevel
+            lock_file.seek(0)
+            while True:
+                try:
+                    # LK_LOCK only retries for 10 seconds, so try again until the lock is acquired
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            # pylint: disable=import-outside-toplevel
+            import fcntl
+            # pylint: enable=import-outside-toplevel
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -18,9 +18,11 @@
 import sys
 
 from blenderproc.python.types.MeshObjectUtility import MeshObject, get_all_mesh_objects
+from blenderproc.python.renderer.RasterizerUtility import rasterize_triangles
 from blenderproc.python.writer.WriterUtility import _WriterUtility
 from blenderproc.python.types.LinkUtility import Link
 from blenderproc.python.utility.SetupUtility import SetupUtility
+from blenderproc.python.utility.Utility import output_dir_lock
 from blenderproc.python.utility.MathUtility import change_target_coordinate_frame_of_transformation_matrix
 
 # EGL is not available under windows
@@ -34,7 +36,8 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
               depth_scale: float = 1.0, jpg_quality: int = 95, save_world2cam: bool = True,
               ignore_dist_thres: float = 100., m2mm: Optional[bool] = None, annotation_unit: str = 'mm',
               frames_per_chunk: int = 1000, calc_mask_info_coco: bool = True, delta: float = 0.015,
-              num_worker: Optional[int] = 0):
+              num_worker: Optional[int] = 0, instance_segmaps: Optional[List[np.ndarray]] = None,
+              calc_amodal_masks: bool = True, use_cpu_rasterizer: bool = False):
     """Write the BOP data
 
     :param output_dir: Path to the output directory.
@@ -61,6 +64,16 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
     :param delta: Tolerance used for estimation of the visibility masks (in [m]).
     :param num_worker: The number of processes to use to calculate gt_masks and gt_info. If None is given, number of cores is used.
                        If 0 is given, no multiprocessing at all is used (default).
+    :param instance_segmaps: List of instance segmentation images rendered together with the depth/color images via
+                             `bproc.renderer.enable_segmentation_output(map_by="instance")`. If given, the visible
+                             masks and their statistics are taken directly from these images instead of estimating
+                             them by rendering every object separately and comparing it with the written depth.
+    :param calc_amodal_masks: Only used if instance_segmaps are given. If False, the full object masks (`mask`) are not
+                              written and no pyrender is necessary. The size and bounding box of the full silhouettes
+                              (`px_count_all`, `visib_fract` and `bbox_obj`) are then computed via the CPU
+                              rasterizer.
+    :param use_cpu_rasterizer: If True, the objects are rendered for the masks via the numpy based CPU rasterizer
+                               instead of pyrender, so no OpenGL context (EGL/OSMesa) is necessary.
     """
 
     # Output paths.
@@ -68,13 +81,6 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
     chunks_dir = os.path.join(dataset_dir, 'train_pbr')
     camera_path = os.path.join(dataset_dir, 'camera.json')
 
-    # Create the output directory structure.
-    if not os.path.exists(dataset_dir):
-        os.makedirs(dataset_dir)
-        os.makedirs(chunks_dir)
-    elif not append_to_existing_output:
-        raise FileExistsError(f"The output folder already exists: {dataset_dir}")
-
     # Select target objects or objects from the specified dataset or all objects
     if target_objects is not None:
         dataset_objects = target_objects
@@ -100,54 +106,49 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
                            f"Either remove the dataset parameter or assign custom property 'bop_dataset_name'"
                            f" to selected objects")
 
-    if calc_mask_info_coco:
-        # It might be that a chunk dir already exists where the writer appends frames.
-        # If one (or multiple) more chunk dirs are created to save the rendered frames to,
-        # mask/info/coco annotations need to be calculated for all of them
-        chunk_dirs = sorted(glob.glob(os.path.join(chunks_dir, '*')))
-        chunk_dirs = [d for d in chunk_dirs if os.path.isdir(d)]
-        last_chunk_dir = sorted(chunk_dirs)[-1] if chunk_dirs else None
-
-        starting_chunk_id = 0
-        starting_frame_id = 0
-        if last_chunk_dir:
-            last_chunk_gt_fpath = os.path.join(last_chunk_dir, 'scene_gt.json')
-            chunk_gt = _BopWriterUtility.load_json(last_chunk_gt_fpath, keys_to_int=True)
-
-            # Current chunk and frame ID's.
-            starting_chunk_id = int(os.path.basename(last_chunk_dir))
-            starting_frame_id = int(sorted(chunk_gt.keys())[-1]) + 1
-
-            if starting_frame_id % frames_per_chunk == 0:
-                starting_chunk_id += 1
-                starting_frame_id = 0
-
-    # Save the data.
-    _BopWriterUtility.write_camera(camera_path, depth_scale=depth_scale)
     assert annotation_unit in ['m', 'dm', 'cm', 'mm'], (f"Invalid annotation unit: `{annotation_unit}`. Supported "
                                                         f"are 'm', 'dm', 'cm', 'mm'")
     annotation_scale = {'m': 1., 'dm': 10., 'cm': 100., 'mm': 1000.}[annotation_unit]
     if m2mm is not None:
         warnings.warn("WARNING: `m2mm` is deprecated, please use `annotation_scale='mm'` instead!")
         annotation_scale = 1000.
-    _BopWriterUtility.write_frames(chunks_dir, dataset_objects=dataset_objects, depths=depths, colors=colors,
-                                   color_file_format=color_file_format, frames_per_chunk=frames_per_chunk,
-                                   annotation_scale=annotation_scale, ignore_dist_thres=ignore_dist_thres,
-                                   save_world2cam=save_world2cam, depth_scale=depth_scale, jpg_quality=jpg_quality)
+    if instance_segmaps is not None and len(instance_segmaps) != len(depths):
+        raise Exception("The amount of instance segmaps does not correspond to the amount of depth images.")
+
+    # Other processes might append to the same folder at the same time, so the chunk and frame ids are determined and
+    # the frames are written at once
+    with output_dir_lock(output_dir):
+        # Create the output directory structure.
+        if not os.path.exists(dataset_dir):
+            os.makedirs(dataset_dir)
+            os.makedirs(chunks_dir)
+        elif not append_to_existing_output:
+            raise FileExistsError(f"The output folder already exists: {dataset_dir}")
+
+        # Save the data.
+        _BopWriterUtility.write_camera(camera_path, depth_scale=depth_scale)
+        frame_instance_ids, new_chunks = _BopWriterUtility.write_frames(
+            chunks_dir, dataset_objects=dataset_objects, depths=depths, colors=colors,
+            color_file_format=color_file_format, frames_per_chunk=frames_per_chunk, annotation_scale=annotation_scale,
+            ignore_dist_thres=ignore_dist_thres, save_world2cam=save_world2cam, depth_scale=depth_scale,
+            jpg_quality=jpg_quality)
 
     if calc_mask_info_coco:
+        # The masks, gt info and coco annotations of the new frames are calculated without holding the lock, only
+        # merging them into the json files of their chunks is done while holding it again
+
         # Set up the bop toolkit
         SetupUtility.setup_pip(["git+https://github.com/thodan/bop_toolkit", "PyOpenGL==3.1.0"])
 
         # determine which objects to add to the vsipy renderer
-        # for numpy>=1.20, np.float is deprecated: https://numpy.org/doc/stable/release/1.20.0-notes.html#deprecations
+        # for numpy>=1.20, np.float is deprecated:
+        # https://numpy.org/doc/stable/release/1.20.0-notes.html#deprecations
         np.float = float
 
-        # Determine for which directories mask_info_coco has to be calculated
-        chunk_dirs = sorted(glob.glob(os.path.join(chunks_dir, '*')))
-        chunk_dirs = [d for d in chunk_dirs if os.path.isdir(d)]
-        chunk_dir_ids = [os.path.split(d)[-1] for d in chunk_dirs]
-        chunk_dirs = chunk_dirs[chunk_dir_ids.index(f"{starting_chunk_id:06d}"):]
+        # If only the visible masks are written, the full silhouettes are just measured, which the CPU rasterizer
+        # does without any OpenGL context
+        if instance_segmaps is not None and not calc_amodal_masks:
+            use_cpu_rasterizer = True
 
         # convert all objects to trimesh objects
         trimesh_objects = {}
@@ -160,31 +161,39 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
                 if len(obj.visuals) > 1:
                     warnings.warn('BOP Writer only supports saving annotations of one visual mesh per Link')
             trimesh_obj = obj.mesh_as_trimesh()
-            # here we also add the scale factor of the objects. the position of the pyrender camera will change based
-            # on the initial scale factor of the objects and the saved annotation format
+            # here we also add the scale factor of the objects. the position of the pyrender camera will change
+            # based on the initial scale factor of the objects and the saved annotation format
             if not np.all(np.isclose(np.array(obj.blender_obj.scale), obj.blender_obj.scale[0])):
-                print("WARNING: the scale is not the same across all dimensions, writing bop_toolkit annotations with "
-                      "the bop writer will fail!")
+                print("WARNING: the scale is not the same across all dimensions, writing bop_toolkit annotations "
+                      "with the bop writer will fail!")
             trimesh_objects[obj.get_cp('category_id')] = trimesh_obj
 
         # Create pool and init each worker
         width = bpy.context.scene.render.resolution_x
         height = bpy.context.scene.render.resolution_y
+        renderer_init = _BopWriterUtility._cpu_rasterizer_init if use_cpu_rasterizer else \
+            _BopWriterUtility._pyrender_init
         if num_worker == 0:
             pool = None
-            _BopWriterUtility._pyrender_init(width, height, trimesh_objects)
+            renderer_init(width, height, trimesh_objects)
         else:
-            pool = Pool(num_worker, initializer=_BopWriterUtility._pyrender_init, initargs=[width, height, trimesh_objects])
+            pool = Pool(num_worker, initializer=renderer_init, initargs=[width, height, trimesh_objects])
 
-        _BopWriterUtility.calc_gt_masks(chunk_dirs=chunk_dirs, starting_frame_id=starting_frame_id,
-                                        annotation_scale=annotation_scale, delta=delta, pool=pool)
-         
-        _BopWriterUtility.calc_gt_info(chunk_dirs=chunk_dirs, starting_frame_id=starting_frame_id,
-                                       annotation_scale=annotation_scale, delta=delta, pool=pool)
+        if instance_segmaps is not None:
+            scene_gt_infos = _BopWriterUtility.calc_gt_masks_and_info_from_segmaps(
+                pool=pool, new_chunks=new_chunks, instance_segmaps=instance_segmaps, depths=depths,
+                frame_instance_ids=frame_instance_ids, annotation_scale=annotation_scale,
+                calc_amodal_masks=calc_amodal_masks)
+        else:
+            _BopWriterUtility.calc_gt_masks(new_chunks=new_chunks, annotation_scale=annotation_scale, delta=delta,
+                                            pool=pool)
+
+            scene_gt_infos = _BopWriterUtility.calc_gt_info(new_chunks=new_chunks, annotation_scale=annotation_scale,
+                                                            delta=delta, pool=pool)
+
+        coco_outputs = _BopWriterUtility.calc_gt_coco(new_chunks=new_chunks, scene_gt_infos=scene_gt_infos,
+                                                      amodal_masks=instance_segmaps is None or calc_amodal_masks)
 
-        _BopWriterUtility.calc_gt_coco(chunk_dirs=chunk_dirs, dataset_objects=dataset_objects,
-                                       starting_frame_id=starting_frame_id)
-        
         if pool is not None:
             pool.close()
             pool.join()
@@ -192,6 +201,9 @@ def write_bop(output_dir: str, target_objects: Optional[List[MeshObject]] = None
             # Make sure the renderer get destroyed
             _BopWriterUtility._pyrender_cleanup()
 
+        with output_dir_lock(output_dir):
+            _BopWriterUtility.merge_gt_info_and_coco(scene_gt_infos, coco_outputs, dataset_objects)
+
 
 def bop_pose_to_pyrender_coordinate_system(cam_R_m2c: np.ndarray, cam_t_m2c: np.ndarray) -> np.ndarray:
     """ Converts an object pose in bop format to pyrender camera coordinate system
@@ -311,7 +323,7 @@ def write_camera(camera_path: str, depth_scale: float = 1.0):
 
     @staticmethod
     def get_frame_gt(dataset_objects: List[bpy.types.Mesh], unit_scaling: float, ignore_dist_thres: float,
-                     destination_frame: Optional[List[str]] = None):
+                     destination_frame: Optional[List[str]] = None, instance_ids: Optional[List[int]] = None):
         """ Returns GT pose annotations between active camera and objects.
         
         :param dataset_objects: Save annotations for these objects.
@@ -319,6 +331,8 @@ def get_frame_gt(dataset_objects: List[bpy.types.Mesh], unit_scaling: float, ign
         :param ignore_dist_thres: Distance between camera and object after which object is ignored.
                                   Mostly due to failed physics.
         :param destination_frame: Transform poses from Blender internal coordinates to OpenCV coordinates
+        :param instance_ids: If given, the instance segmentation id (pass index) of each annotated object is appended
+                             to this list, in the same order as the returned annotations.
         :return: A list of GT camera-object pose annotations for scene_gt.json
         """
         if destination_frame is None:
@@ -335,9 +349,11 @@ def get_frame_gt(dataset_objects: List[bpy.types.Mesh], unit_scaling: float, ign
                 if len(obj.visuals) > 1:
                     warnings.warn('BOP Writer only supports saving poses of one visual mesh per Link')
                 H_m2w = Matrix(obj.get_visual_local2world_mats()[0])
+                pass_index = obj.visuals[0].blender_obj.pass_index
             else:
                 H_m2w = Matrix(obj.get_local2world_mat())
                 assert obj.has_cp("category_id"), f"{obj.get_name()} object has no custom property 'category_id'"
+                pass_index = obj.blender_obj.pass_index
 
             cam_H_m2c = H_c2w_opencv.inverted() @ H_m2w
             cam_R_m2c = cam_H_m2c.to_quaternion().to_matrix()
@@ -352,6 +368,8 @@ def get_frame_gt(dataset_objects: List[bpy.types.Mesh], unit_scaling: float, ign
                     'obj_id': obj.get_cp("category_id") if not isinstance(obj, Link) else obj.visuals[0].get_cp(
                         'category_id')
                 })
+                if instance_ids is not None:
+                    instance_ids.append(pass_index)
             else:
                 print('ignored obj, ', obj.get_cp("category_id"), 'because either ')
                 print('(1) it is further away than parameter "ignore_dist_thres: ",', ignore_dist_thres)
@@ -400,7 +418,8 @@ def get_frame_camera(save_world2cam: bool, depth_scale: float = 1.0, unit_scalin
     def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray],
                      colors: List[np.ndarray], color_file_format: str = "PNG",
                      depth_scale: float = 1.0, frames_per_chunk: int = 1000, annotation_scale: float = 1000.,
-                     ignore_dist_thres: float = 100., save_world2cam: bool = True, jpg_quality: int = 95):
+                     ignore_dist_thres: float = 100., save_world2cam: bool = True, jpg_quality: int = 95) \
+            -> Tuple[List[List[int]], Dict[str, Tuple[Dict[int, List[dict]], Dict[int, dict]]]]:
         """Write each frame's ground truth into chunk directory in BOP format
 
         :param chunks_dir: Path to the output directory of the current chunk.
@@ -417,6 +436,9 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
         :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
                                  specified format (see `annotation_format` in `write_bop` for further details).
         :param frames_per_chunk: Number of frames saved in each chunk (called scene in BOP)
+        :return: For each new frame, the instance segmentation ids of the annotated objects in scene_gt.json order.
+                 And for each chunk dir, which contains new frames, the scene_gt and scene_camera entries of only
+                 these frames.
         """
 
         # Format of the depth images.
@@ -468,9 +490,13 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
             raise Exception("The amount of images stored in the depths/colors does not correspond to the amount"
                             "of images specified by frame_start to frame_end.")
 
+        frame_instance_ids = []
+        new_chunks = {}
         for frame_id in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
             # Activate frame.
             bpy.context.scene.frame_set(frame_id)
+            # Index of the frame inside the given depths/colors
+            new_frame_id = frame_id - bpy.context.scene.frame_start
 
             # Reset data structures and prepare folders for a new chunk.
             if curr_frame_id == 0:
@@ -482,12 +508,18 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
                     depth_tpath.format(chunk_id=curr_chunk_id, im_id=0)))
 
             # Get GT annotations and camera info for the current frame.
+            frame_instance_ids.append([])
             chunk_gt[curr_frame_id] = _BopWriterUtility.get_frame_gt(dataset_objects, annotation_scale,
-                                                                     ignore_dist_thres)
+                                                                     ignore_dist_thres,
+                                                                     instance_ids=frame_instance_ids[-1])
             chunk_camera[curr_frame_id] = _BopWriterUtility.get_frame_camera(save_world2cam, depth_scale,
                                                                              annotation_scale)
+            new_chunk_gt, new_chunk_camera = new_chunks.setdefault(
+                os.path.join(chunks_dir, f"{curr_chunk_id:06d}"), ({}, {}))
+            new_chunk_gt[curr_frame_id] = chunk_gt[curr_frame_id]
+            new_chunk_camera[curr_frame_id] = chunk_camera[curr_frame_id]
 
-            color_rgb = colors[frame_id]
+            color_rgb = colors[new_frame_id]
             color_bgr = color_rgb.copy()
             color_bgr[..., :3] = color_bgr[..., :3][..., ::-1]
             if color_file_format == 'PNG':
@@ -497,7 +529,7 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
                 rgb_fpath = rgb_tpath.format(chunk_id=curr_chunk_id, im_id=curr_frame_id, im_type='.jpg')
                 cv2.imwrite(rgb_fpath, color_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), jpg_quality])
 
-            depth = depths[frame_id]
+            depth = depths[new_frame_id]
 
             # Scale the depth to retain a higher precision (the depth is saved
             # as a 16-bit PNG image with range 0-65535).
@@ -510,7 +542,7 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
 
             # Save the chunk info if we are at the end of a chunk or at the last new frame.
             if ((curr_frame_id + 1) % frames_per_chunk == 0) or \
-                    (frame_id == num_new_frames - 1):
+                    (new_frame_id == num_new_frames - 1):
 
                 # Save GT annotations.
                 _BopWriterUtility.save_json(chunk_gt_tpath.format(chunk_id=curr_chunk_id), chunk_gt)
@@ -523,7 +555,8 @@ def write_frames(chunks_dir: str, dataset_objects: list, depths: List[np.ndarray
                 curr_frame_id = 0
             else:
                 curr_frame_id += 1
-        
+
+        return frame_instance_ids, new_chunks
 
     @staticmethod
     def _pyrender_init(ren_width: int, ren_height: int, trimesh_objects: Dict[int, trimesh.Trimesh]):
@@ -539,8 +572,9 @@ def _pyrender_init(ren_width: int, ren_height: int, trimesh_objects: Dict[int, t
         import pyrender
         # pylint: enable=import-outside-toplevel
 
-        global renderer, renderer_large, dataset_objects
+        global renderer, renderer_large, dataset_objects, use_cpu_rasterizer
 
+        use_cpu_rasterizer = False
         dataset_objects = {}
         # Create renderer for calc_gt_masks
         renderer = pyrender.OffscreenRenderer(viewport_width=ren_width, viewport_height=ren_height)
@@ -555,6 +589,78 @@ def _pyrender_init(ren_width: int, ren_height: int, trimesh_objects: Dict[int, t
                                                           metallicFactor=0.2, roughnessFactor=0.8, doubleSided=True)
             dataset_objects[key] = pyrender.Mesh.from_trimesh(mesh=trimesh_objects[key], material=material)
 
+    @staticmethod
+    def _cpu_rasterizer_init(ren_width: int, ren_height: int, trimesh_objects: Dict[int, trimesh.Trimesh]):
+        """ Initializes a worker process for calc_gt_masks and calc_gt_info, which uses the CPU rasterizer.
+
+        :param ren_width: The width of the images to render.
+        :param ren_height: The height of the images to render.
+        :param trimesh_objects: A dict containing trimesh meshes for each object in the scene
+        """
+        global renderer, renderer_large, dataset_objects, use_cpu_rasterizer
+
+        use_cpu_rasterizer = True
+        # The rasterizer is stateless, only the image size and the triangles of the objects are kept
+        renderer, renderer_large = (ren_width, ren_height), (ren_width * 3, ren_height * 3)
+        dataset_objects = {key: np.asarray(mesh.vertices)[np.asarray(mesh.faces)]
+                           for key, mesh in trimesh_objects.items()}
+
+    @staticmethod
+    def _render_object_depth(annotation_scale: float, K: np.ndarray, gt: Dict[str, int], large: bool,
+                             ren_cx_offset: int = 0, ren_cy_offset: int = 0) -> np.ndarray:
+        """ Renders the depth image of a single object in its ground truth pose, executed inside a worker process.
+
+        :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
+                                 specified format (see `annotation_format` in `write_bop` for further details).
+        :param K: The camera instrinsics to use.
+        :param gt: The ground truth annotation of the object.
+        :param large: If True, the large renderer is used, whose image is three times as wide and high.
+        :param ren_cx_offset: The x offset of the principal point in the rendered image.
+        :param ren_cy_offset: The y offset of the principal point in the rendered image.
+        :return: The depth image in [m], 0 where the object is not visible.
+        """
+        global renderer, renderer_large, dataset_objects, use_cpu_rasterizer
+
+        t = np.array(gt['cam_t_m2c'])
+        # rescale translation depending on initial saving format
+        t /= annotation_scale
+        cam_R_m2c = np.array(gt['cam_R_m2c']).reshape(3, 3)
+        fx, fy, cx, cy = K[0, 0], K[1, 1], K[0, 2], K[1, 2]
+
+        if use_cpu_rasterizer:
+            width, height = renderer_large if large else renderer
+            ren_K = np.array([[fx, 0, cx + ren_cx_offset], [0, fy, cy + ren_cy_offset], [0, 0, 1]])
+            depth_gt, triangle_ids, _ = rasterize_triangles(dataset_objects[gt['obj_id']] @ cam_R_m2c.T + t, ren_K,
+                                                            width, height, clip_start=0.1, clip_end=100000)
+            return np.where(triangle_ids >= 0, depth_gt, 0)
+
+        # pylint: disable=import-outside-toplevel
+        # Import pyrender only inside the multiprocesses, otherwise this leads to an opengl error
+        # https://github.com/mmatl/pyrender/issues/200#issuecomment-1123713055
+        import pyrender
+        # pylint: enable=import-outside-toplevel
+
+        if large and renderer._renderer is not None:
+            # Delete the small renderer, otherwise we cannot make use of the same pyrender Meshes
+            renderer._renderer.delete()
+            renderer._renderer = None
+
+        # Init pyrender camera
+        camera = pyrender.IntrinsicsCamera(fx=fx, fy=fy, cx=cx + ren_cx_offset, cy=cy + ren_cy_offset, znear=0.1,
+                                           zfar=100000)
+
+        # create a new scene
+        scene = pyrender.Scene()
+
+        # add camera and current object
+        scene.add(camera)
+        pose = bop_pose_to_pyrender_coordinate_system(cam_R_m2c=cam_R_m2c, cam_t_m2c=t)
+        scene.add(dataset_objects[gt['obj_id']], pose=pose)
+
+        # Render the depth image.
+        _, depth_gt = (renderer_large if large else renderer).render(scene=scene)
+        return depth_gt
+
     @staticmethod
     def _pyrender_cleanup():
         """ Cleans up global renderer 
@@ -581,36 +687,14 @@ def _calc_gt_masks_iteration(annotation_scale: float, K: np.ndarray, delta: floa
         :param gt_data: Containing id of the object whose mask the worker should render
         """
         # pylint: disable=import-outside-toplevel
-        # Import pyrender only inside the multiprocesses, otherwise this leads to an opengl error
-        # https://github.com/mmatl/pyrender/issues/200#issuecomment-1123713055     
-        import pyrender
         # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
         from bop_toolkit_lib import inout, misc, visibility
         # pylint: enable=import-outside-toplevel
 
-        global renderer, dataset_objects
-
         gt_id, gt = gt_data
 
-        # Init pyrender camera
-        fx, fy, cx, cy = K[0, 0], K[1, 1], K[0, 2], K[1, 2]
-        camera = pyrender.IntrinsicsCamera(fx=fx, fy=fy, cx=cx, cy=cy, znear=0.1, zfar=100000)
-        
-        # create a new scene
-        scene = pyrender.Scene()
-
-        # add camera and current object
-        scene.add(camera)
-        t = np.array(gt['cam_t_m2c'])
-        # rescale translation depending on initial saving format
-        t /= annotation_scale
-
-        pose = bop_pose_to_pyrender_coordinate_system(cam_R_m2c=np.array(gt['cam_R_m2c']).reshape(3, 3),
-                                                        cam_t_m2c=t)
-        scene.add(dataset_objects[gt['obj_id']], pose=pose)
-
         # Render the depth image.
-        _, depth_gt = renderer.render(scene=scene)
+        depth_gt = _BopWriterUtility._render_object_depth(annotation_scale, K, gt, large=False)
 
         # Convert depth image to distance image.
         dist_gt = misc.depth_im_to_dist_im_fast(depth_gt, K)
@@ -634,15 +718,15 @@ def _calc_gt_masks_iteration(annotation_scale: float, K: np.ndarray, delta: floa
 
 
     @staticmethod
-    def calc_gt_masks(pool: Pool, chunk_dirs: List[str], starting_frame_id: int = 0,
+    def calc_gt_masks(pool: Pool, new_chunks: Dict[str, Tuple[Dict[int, List[dict]], Dict[int, dict]]],
                       annotation_scale: float = 1000., delta: float = 0.015):
         """ Calculates the ground truth masks.
         From the BOP toolkit (https://github.com/thodan/bop_toolkit), with the difference of using pyrender for depth
         rendering.
 
         :param pool: The pool of worker processes to use for the calculations.
-        :param chunk_dirs: List of directories to calculate the gt masks for.
-        :param starting_frame_id: The first frame id the writer has written during this run.
+        :param new_chunks: For each chunk dir, the scene_gt and scene_camera entries of the frames written during
+                           this run, see write_frames().
         :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
                                  specified format (see `annotation_format` in `write_bop` for further details).
         :param delta: Tolerance used for estimation of the visibility masks.
@@ -652,12 +736,7 @@ def calc_gt_masks(pool: Pool, chunk_dirs: List[str], starting_frame_id: int = 0,
         from bop_toolkit_lib import inout, misc
         # pylint: enable=import-outside-toplevel
 
-        for dir_counter, chunk_dir in enumerate(chunk_dirs):
-            last_chunk_gt_fpath = os.path.join(chunk_dir, 'scene_gt.json')
-            last_chunk_camera_fpath = os.path.join(chunk_dir, 'scene_camera.json')
-            scene_gt = _BopWriterUtility.load_json(last_chunk_gt_fpath, keys_to_int=True)
-            scene_camera = _BopWriterUtility.load_json(last_chunk_camera_fpath, keys_to_int=True)
-
+        for chunk_dir, (scene_gt, scene_camera) in new_chunks.items():
             # Create folders for the output masks (if they do not exist yet).
             mask_dir_path = os.path.dirname(os.path.join(chunk_dir, 'mask', '000000_000000.png'))
             misc.ensure_dir(mask_dir_path)
@@ -667,10 +746,6 @@ def calc_gt_masks(pool: Pool, chunk_dirs: List[str], starting_frame_id: int = 0,
 
             im_ids = sorted(scene_gt.keys())
 
-            # append to existing output
-            if dir_counter == 0:
-                im_ids = im_ids[starting_frame_id:]
-
             for im_counter, im_id in enumerate(im_ids):
                 if im_counter % 100 == 0:
                     misc.log(f'Calculating GT masks - {chunk_dir}, {im_counter}')
@@ -704,41 +779,16 @@ def _calc_gt_info_iteration(annotation_scale: float, ren_cy_offset: int, ren_cx_
         :param depth: The depth image of the frame.
         :param gt: Containing id of the object whose mask the worker should render
         """         
-        # Import pyrender only inside the multiprocesses, otherwise this leads to an opengl error
-        # https://github.com/mmatl/pyrender/issues/200#issuecomment-1123713055   
         # pylint: disable=import-outside-toplevel
-        import pyrender
         from bop_toolkit_lib import misc, visibility
         # pylint: enable=import-outside-toplevel
 
-        global renderer_large, dataset_objects, renderer
-
-        # Delete renderer of the previous calc_gt_masks() function, otherwise
-        # we cannot make use of the same pyrender Meshes
-        if renderer._renderer is not None:
-            renderer._renderer.delete()
-            renderer._renderer = None
-
-        # Init pyrender camera
-        fx, fy, cx, cy = K[0, 0], K[1, 1], K[0, 2], K[1, 2]
         im_size = (depth.shape[1], depth.shape[0])
-        camera = pyrender.IntrinsicsCamera(fx=fx, fy=fy, cx=cx+ren_cx_offset, cy=cy+ren_cy_offset, znear=0.1,
-                                            zfar=100000)
-        
-        # create a new scene
-        scene = pyrender.Scene()
-
-        # add camera and current object
-        scene.add(camera)
-        t = np.array(gt['cam_t_m2c'])
-        # rescale translation depending on initial saving format
-        t /= annotation_scale
-        pose = bop_pose_to_pyrender_coordinate_system(cam_R_m2c=np.array(gt['cam_R_m2c']).reshape(3, 3),
-                                                        cam_t_m2c=t)
-        scene.add(dataset_objects[gt['obj_id']], pose=pose)
 
         # render the depth image
-        _, depth_gt_large = renderer_large.render(scene=scene)
+        depth_gt_large = _BopWriterUtility._render_object_depth(annotation_scale, K, gt, large=True,
+                                                                ren_cx_offset=ren_cx_offset,
+                                                                ren_cy_offset=ren_cy_offset)
 
         depth_gt = depth_gt_large[
                     ren_cy_offset:(ren_cy_offset + im_height),
@@ -799,17 +849,18 @@ def _calc_gt_info_iteration(annotation_scale: float, ren_cy_offset: int, ren_cx_
         }
 
     @staticmethod
-    def calc_gt_info(pool, chunk_dirs: List[str], starting_frame_id: int = 0,
-                     annotation_scale: float = 1000., delta: float = 0.015):
-        """ Calculates the ground truth masks.
+    def calc_gt_info(pool, new_chunks: Dict[str, Tuple[Dict[int, List[dict]], Dict[int, dict]]],
+                     annotation_scale: float = 1000., delta: float = 0.015) -> Dict[str, Dict[int, List[dict]]]:
+        """ Calculates the ground truth info.
         From the BOP toolkit (https://github.com/thodan/bop_toolkit), with the difference of using pyrender for depth
         rendering.
 
-        :param chunk_dirs: List of directories to calculate the gt info for.
-        :param starting_frame_id: The first frame id the writer has written during this run.
+        :param new_chunks: For each chunk dir, the scene_gt and scene_camera entries of the frames written during
+                           this run, see write_frames().
         :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
                                  specified format (see `annotation_format` in `write_bop` for further details).
         :param delta: Tolerance used for estimation of the visibility masks.
+        :return: For each chunk dir, the scene_gt_info entries of the new frames.
         """
         # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
         # pylint: disable=import-outside-toplevel
@@ -819,26 +870,11 @@ def calc_gt_info(pool, chunk_dirs: List[str], starting_frame_id: int = 0,
         im_width, im_height = bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_y
         ren_cx_offset, ren_cy_offset = im_width, im_height
 
-        for dir_counter, chunk_dir in enumerate(chunk_dirs):
-            last_chunk_gt_fpath = os.path.join(chunk_dir, 'scene_gt.json')
-            last_chunk_camera_fpath = os.path.join(chunk_dir, 'scene_camera.json')
-            scene_gt = _BopWriterUtility.load_json(last_chunk_gt_fpath, keys_to_int=True)
-            scene_camera = _BopWriterUtility.load_json(last_chunk_camera_fpath, keys_to_int=True)
-
-            # load existing gt info
-            if dir_counter == 0 and starting_frame_id > 0:
-                misc.log(f"Loading gt info from existing chunk dir - {chunk_dir}")
-                scene_gt_info = _BopWriterUtility.load_json(os.path.join(chunk_dir, 'scene_gt_info.json'),
-                                                            keys_to_int=True)
-            else:
-                scene_gt_info = {}
-
+        scene_gt_infos = {}
+        for chunk_dir, (scene_gt, scene_camera) in new_chunks.items():
+            scene_gt_info = scene_gt_infos[chunk_dir] = {}
             im_ids = sorted(scene_gt.keys())
 
-            # append to existing output
-            if dir_counter == 0:
-                im_ids = im_ids[starting_frame_id:]
-
             for im_counter, im_id in enumerate(im_ids):
                 if im_counter % 100 == 0:
                     misc.log(f'Calculating GT info - {chunk_dir}, {im_counter}')
@@ -854,87 +890,184 @@ def calc_gt_info(pool, chunk_dirs: List[str], starting_frame_id: int = 0,
 
                 map_fun = map if pool is None else pool.map
                 scene_gt_info[im_id] = list(map_fun(partial(_BopWriterUtility._calc_gt_info_iteration, annotation_scale, ren_cy_offset, ren_cx_offset, im_height, im_width, K, delta, depth), scene_gt[im_id]))
-                    
 
-            # Save the info for the current scene.
-            scene_gt_info_path = os.path.join(chunk_dir, 'scene_gt_info.json')
-            misc.ensure_dir(os.path.dirname(scene_gt_info_path))
-            inout.save_json(scene_gt_info_path, scene_gt_info)
+        return scene_gt_infos
 
     @staticmethod
-    def calc_gt_coco(chunk_dirs: List[str], dataset_objects: List[MeshObject], starting_frame_id: int = 0):
-        """ Calculates the COCO annotations.
-        From the BOP toolkit (https://github.com/thodan/bop_toolkit).
+    def _calc_gt_masks_and_info_from_segmap_iteration(annotation_scale: float, ren_cy_offset: int,
+                                                      ren_cx_offset: int, K: np.ndarray, depth: np.ndarray,
+                                                      segmap: np.ndarray, calc_amodal_masks: bool, chunk_dir: str,
+                                                      im_id: int, gt_data: Tuple[int, Tuple[Dict[str, int], int]]):
+        """ One iteration of calc_gt_masks_and_info_from_segmaps(), executed inside a worker process.
 
-        :param chunk_dirs: List of directories to calculate the gt coco annotations for.
-        :param dataset_objects: List containing all objects to save the annotations for.
-        :param starting_frame_id: The first frame id the writer has written during this run.
+        :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
+                                 specified format (see `annotation_format` in `write_bop` for further details).
+        :param ren_cy_offset: The y offset for cropping the rendered image.
+        :param ren_cx_offset: The x offset for cropping the rendered image.
+        :param K: The camera instrinsics to use.
+        :param depth: The depth image of the frame in [m].
+        :param segmap: The instance segmentation image of the frame.
+        :param calc_amodal_masks: Whether to write the full object mask.
+        :param chunk_dir: The chunk dir where to store the resulting images.
+        :param im_id: The id of the current image/frame.
+        :param gt_data: Containing the id of the gt annotation, the annotation itself and the instance id of the object
+        :return: The gt info of the object.
+        """
+        # pylint: disable=import-outside-toplevel
+        # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
+        from bop_toolkit_lib import inout, misc
+        # pylint: enable=import-outside-toplevel
+
+        gt_id, (gt, instance_id) = gt_data
+        im_height, im_width = segmap.shape[:2]
+        im_size = (im_width, im_height)
+
+        # The visible part is directly given by the segmentation
+        mask_visib = segmap == instance_id
+        px_count_visib = int(np.count_nonzero(mask_visib))
+
+        # Render the whole object silhouette once, including the parts outside the image
+        depth_gt_large = _BopWriterUtility._render_object_depth(annotation_scale, K, gt, large=True,
+                                                                ren_cx_offset=ren_cx_offset,
+                                                                ren_cy_offset=ren_cy_offset)
+
+        obj_mask_gt_large = depth_gt_large > 0
+        mask = obj_mask_gt_large[ren_cy_offset:(ren_cy_offset + im_height),
+                                 ren_cx_offset:(ren_cx_offset + im_width)]
+        px_count_all = int(np.count_nonzero(obj_mask_gt_large))
+
+        if calc_amodal_masks:
+            mask_path = os.path.join(
+                chunk_dir, 'mask', '{im_id:06d}_{gt_id:06d}.png').format(im_id=im_id, gt_id=gt_id)
+            inout.save_im(mask_path, 255 * mask.astype(np.uint8))
+
+        mask_visib_path = os.path.join(
+            chunk_dir, 'mask_visib', '{im_id:06d}_{gt_id:06d}.png').format(im_id=im_id, gt_id=gt_id)
+        inout.save_im(mask_visib_path, 255 * mask_visib.astype(np.uint8))
+
+        # Number of pixels in the object silhouette with a valid depth measurement
+        px_count_valid = int(np.count_nonzero(depth[mask] > 0))
+
+        visib_fract = px_count_visib / float(px_count_all) if px_count_all > 0 else 0.0
+
+        bbox = [-1, -1, -1, -1]
+        bbox_visib = [-1, -1, -1, -1]
+        if px_count_visib > 0:
+            ys, xs = mask_visib.nonzero()
+            bbox_visib = misc.calc_2d_bbox(xs, ys, im_size)
+            ys, xs = obj_mask_gt_large.nonzero()
+            ys -= ren_cy_offset
+            xs -= ren_cx_offset
+            bbox = misc.calc_2d_bbox(xs, ys, im_size)
+
+        return {
+            'px_count_all': px_count_all,
+            'px_count_valid': px_count_valid,
+            'px_count_visib': px_count_visib,
+            'visib_fract': float(visib_fract),
+            'bbox_obj': [int(e) for e in bbox],
+            'bbox_visib': [int(e) for e in bbox_visib]
+        }
+
+    @staticmethod
+    def calc_gt_masks_and_info_from_segmaps(pool: Optional[Pool],
+                                            new_chunks: Dict[str, Tuple[Dict[int, List[dict]], Dict[int, dict]]],
+                                            instance_segmaps: List[np.ndarray], depths: List[np.ndarray],
+                                            frame_instance_ids: List[List[int]], annotation_scale: float = 1000.,
+                                            calc_amodal_masks: bool = True) -> Dict[str, Dict[int, List[dict]]]:
+        """ Calculates the ground truth masks and gt info based on the rendered instance segmentation images.
+
+        In contrast to calc_gt_masks() and calc_gt_info(), the visible masks are not estimated from separately
+        rendered object depths, but are taken directly from the segmentation. Every object is only rendered once per
+        frame to get its full silhouette, which is only written as mask if the full (amodal) masks are requested.
+
+        :param pool: The pool of worker processes to use for the calculations.
+        :param new_chunks: For each chunk dir, the scene_gt and scene_camera entries of the frames written during
+                           this run, see write_frames().
+        :param instance_segmaps: The instance segmentation images of all new frames.
+        :param depths: The depth images in [m] of all new frames.
+        :param frame_instance_ids: For each new frame, the instance ids of the objects in scene_gt.json.
+        :param annotation_scale: The scale factor applied to the calculated annotations (in [m]) to get them into the
+                                 specified format (see `annotation_format` in `write_bop` for further details).
+        :param calc_amodal_masks: Whether to write the full object masks.
+        :return: For each chunk dir, the scene_gt_info entries of the new frames.
         """
         # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
         # pylint: disable=import-outside-toplevel
-        from bop_toolkit_lib import inout, misc, pycoco_utils
+        from bop_toolkit_lib import misc
         # pylint: enable=import-outside-toplevel
 
-        for dir_counter, chunk_dir in enumerate(chunk_dirs):
-            dataset_name = chunk_dir.split('/')[-3]
+        im_width, im_height = bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_y
+        ren_cx_offset, ren_cy_offset = im_width, im_height
 
-            CATEGORIES = [{'id': obj.get_cp('category_id'), 'name': str(obj.get_cp('category_id')), 'supercategory':
-                          dataset_name} for obj in dataset_objects]
+        scene_gt_infos = {}
+        new_frame_id = 0
+        for chunk_dir, (scene_gt, scene_camera) in new_chunks.items():
+            # Create folders for the output masks (if they do not exist yet).
+            if calc_amodal_masks:
+                misc.ensure_dir(os.path.join(chunk_dir, 'mask'))
+            misc.ensure_dir(os.path.join(chunk_dir, 'mask_visib'))
 
-            # Remove all duplicate dicts from list.
-            # Ref: https://stackoverflow.com/questions/9427163/remove-duplicate-dict-in-list-in-python
-            CATEGORIES = list({frozenset(item.items()):item for item in CATEGORIES}.values())
+            scene_gt_info = scene_gt_infos[chunk_dir] = {}
+            im_ids = sorted(scene_gt.keys())
 
-            INFO = {
-                "description": dataset_name + '_train',
-                "url": "https://github.com/thodan/bop_toolkit",
-                "version": "0.1.0",
-                "year": datetime.date.today().year,
-                "contributor": "",
-                "date_created": datetime.datetime.utcnow().isoformat(' ')
-            }
+            for im_counter, im_id in enumerate(im_ids):
+                if im_counter % 100 == 0:
+                    misc.log(f'Calculating GT masks and info from segmaps - {chunk_dir}, {im_counter}')
 
-            # load existing coco annotations
-            if dir_counter == 0 and starting_frame_id > 0:
-                misc.log(f"Loading coco annotations from existing chunk dir - {chunk_dir}")
-                coco_scene_output = _BopWriterUtility.load_json(os.path.join(chunk_dir, 'scene_gt_coco.json'))
-                if coco_scene_output["annotations"]:
-                    segmentation_id = coco_scene_output["annotations"][-1]['id'] + 1
-                else:
-                    segmentation_id = 1
-            else:
-                coco_scene_output = {
-                    "info": INFO,
-                    "licenses": [],
-                    "categories": CATEGORIES,
-                    "images": [],
-                    "annotations": []
-                }
-                segmentation_id = 1
+                K = np.array(scene_camera[im_id]['cam_K']).reshape(3, 3)
+                segmap = np.asarray(instance_segmaps[new_frame_id])
+                # Remove the redundant channel dimension, if there is one
+                if segmap.ndim == 3:
+                    segmap = segmap[..., 0]
+                gt_data = list(enumerate(zip(scene_gt[im_id], frame_instance_ids[new_frame_id])))
+
+                map_fun = map if pool is None else pool.map
+                scene_gt_info[im_id] = list(map_fun(partial(
+                    _BopWriterUtility._calc_gt_masks_and_info_from_segmap_iteration, annotation_scale,
+                    ren_cy_offset, ren_cx_offset, K, depths[new_frame_id], segmap, calc_amodal_masks, chunk_dir,
+                    im_id), gt_data))
+                new_frame_id += 1
+
+        return scene_gt_infos
+
+    @staticmethod
+    def calc_gt_coco(new_chunks: Dict[str, Tuple[Dict[int, List[dict]], Dict[int, dict]]],
+                     scene_gt_infos: Dict[str, Dict[int, List[dict]]], amodal_masks: bool = True) \
+            -> Dict[str, Tuple[List[dict], List[dict]]]:
+        """ Calculates the COCO annotations.
+        From the BOP toolkit (https://github.com/thodan/bop_toolkit).
+
+        :param new_chunks: For each chunk dir, the scene_gt and scene_camera entries of the frames written during
+                           this run, see write_frames().
+        :param scene_gt_infos: For each chunk dir, the scene_gt_info entries of the new frames.
+        :param amodal_masks: Whether the full object masks have been written. If False, the bounding boxes are
+                             calculated from the visible masks.
+        :return: For each chunk dir, the coco images and annotations of the new frames. The annotation ids start at 1
+                 and are shifted when merging them into scene_gt_coco.json, see merge_gt_info_and_coco().
+        """
+        # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
+        # pylint: disable=import-outside-toplevel
+        from bop_toolkit_lib import inout, misc, pycoco_utils
+        # pylint: enable=import-outside-toplevel
 
-            # Load info about the GT poses (e.g. visibility) for the current scene.
-            last_chunk_gt_fpath = os.path.join(chunk_dir, 'scene_gt.json')
-            scene_gt = _BopWriterUtility.load_json(last_chunk_gt_fpath, keys_to_int=True)
-            last_chunk_gt_info_fpath = os.path.join(chunk_dir, 'scene_gt_info.json')
-            scene_gt_info = inout.load_json(last_chunk_gt_info_fpath, keys_to_int=True)
+        coco_outputs = {}
+        for chunk_dir, (scene_gt, _) in new_chunks.items():
+            images, annotations = coco_outputs[chunk_dir] = ([], [])
+            scene_gt_info = scene_gt_infos[chunk_dir]
             # Output coco path
             coco_gt_path = os.path.join(chunk_dir, 'scene_gt_coco.json')
             misc.log(f'Calculating COCO annotations - {chunk_dir}')
 
+            segmentation_id = 1
             # Go through each view in scene_gt
-            for scene_view, inst_list in scene_gt.items():
-                im_id = int(scene_view)
-
-                # skip already existing annotations
-                if dir_counter == 0 and im_id < starting_frame_id:
-                    continue
-
+            for im_id, inst_list in sorted(scene_gt.items()):
                 img_path = os.path.join(chunk_dir, 'rgb', '{im_id:06d}.jpg').format(im_id=im_id)
                 relative_img_path = os.path.relpath(img_path, os.path.dirname(coco_gt_path))
                 im_size = (bpy.context.scene.render.resolution_x, bpy.context.scene.render.resolution_y)
                 image_info = pycoco_utils.create_image_info(im_id, relative_img_path, im_size)
-                coco_scene_output["images"].append(image_info)
-                gt_info = scene_gt_info[scene_view]
+                images.append(image_info)
+                gt_info = scene_gt_info[im_id]
 
                 # Go through each instance in view
                 for idx, inst in enumerate(inst_list):
@@ -946,7 +1079,8 @@ def calc_gt_coco(chunk_dirs: List[str], dataset_objects: List[MeshObject], start
                         chunk_dir, 'mask_visib',
                         '{im_id:06d}_{gt_id:06d}.png').format(im_id=im_id, gt_id=idx)
                     mask_full_p = os.path.join(
-                        chunk_dir, 'mask', '{im_id:06d}_{gt_id:06d}.png').format(im_id=im_id, gt_id=idx)
+                        chunk_dir, 'mask' if amodal_masks else 'mask_visib',
+                        '{im_id:06d}_{gt_id:06d}.png').format(im_id=im_id, gt_id=idx)
 
                     binary_inst_mask_visib = inout.load_depth(mask_visib_p).astype(bool)
                     if binary_inst_mask_visib.sum() < 1:
@@ -963,9 +1097,77 @@ def calc_gt_coco(chunk_dirs: List[str], dataset_objects: List[MeshObject], start
                         ignore=ignore_gt)
 
                     if annotation_info is not None:
-                        coco_scene_output["annotations"].append(annotation_info)
+                        annotations.append(annotation_info)
 
                     segmentation_id += 1
 
+        return coco_outputs
+
+    @staticmethod
+    def merge_gt_info_and_coco(scene_gt_infos: Dict[str, Dict[int, List[dict]]],
+                               coco_outputs: Dict[str, Tuple[List[dict], List[dict]]],
+                               dataset_objects: List[MeshObject]):
+        """ Adds the gt info and coco annotations of the new frames to scene_gt_info.json and scene_gt_coco.json.
+
+        The json files of a chunk might have been extended by other processes in the meantime, so this should only be
+        called while holding the lock of the output dir.
+
+        :param scene_gt_infos: For each chunk dir, the scene_gt_info entries of the new frames.
+        :param coco_outputs: For each chunk dir, the coco images and annotations of the new frames.
+        :param dataset_objects: List containing all objects to save the annotations for.
+        """
+        # This import is done inside to avoid having the requirement that BlenderProc depends on the bop_toolkit
+        # pylint: disable=import-outside-toplevel
+        from bop_toolkit_lib import inout, misc
+        # pylint: enable=import-outside-toplevel
+
+        for chunk_dir, new_scene_gt_info in scene_gt_infos.items():
+            scene_gt_info_path = os.path.join(chunk_dir, 'scene_gt_info.json')
+            if os.path.exists(scene_gt_info_path):
+                misc.log(f"Loading gt info from existing chunk dir - {chunk_dir}")
+                scene_gt_info = _BopWriterUtility.load_json(scene_gt_info_path, keys_to_int=True)
+            else:
+                scene_gt_info = {}
+            scene_gt_info.update(new_scene_gt_info)
+            inout.save_json(scene_gt_info_path, scene_gt_info)
+
+        for chunk_dir, (images, annotations) in coco_outputs.items():
+            coco_gt_path = os.path.join(chunk_dir, 'scene_gt_coco.json')
+            if os.path.exists(coco_gt_path):
+                misc.log(f"Loading coco annotations from existing chunk dir - {chunk_dir}")
+                coco_scene_output = _BopWriterUtility.load_json(coco_gt_path)
+            else:
+                dataset_name = chunk_dir.split('/')[-3]
+
+                CATEGORIES = [{'id': obj.get_cp('category_id'), 'name': str(obj.get_cp('category_id')),
+                               'supercategory': dataset_name} for obj in dataset_objects]
+
+                # Remove all duplicate dicts from list.
+                # Ref: https://stackoverflow.com/questions/9427163/remove-duplicate-dict-in-list-in-python
+                CATEGORIES = list({frozenset(item.items()): item for item in CATEGORIES}.values())
+
+                INFO = {
+                    "description": dataset_name + '_train',
+                    "url": "https://github.com/thodan/bop_toolkit",
+                    "version": "0.1.0",
+                    "year": datetime.date.today().year,
+                    "contributor": "",
+                    "date_created": datetime.datetime.utcnow().isoformat(' ')
+                }
+                coco_scene_output = {
+                    "info": INFO,
+                    "licenses": [],
+                    "categories": CATEGORIES,
+                    "images": [],
+                    "annotations": []
+                }
+
+            # Continue the annotation ids after the ones written before
+            id_offset = coco_scene_output["annotations"][-1]['id'] if coco_scene_output["annotations"] else 0
+            for annotation in annotations:
+                annotation['id'] += id_offset
+            coco_scene_output["images"] += images
+            coco_scene_output["annotations"] += annotations
+
             with open(coco_gt_path, 'w', encoding='utf-8') as output_json_file:
                 json.dump(coco_scene_output, output_json_file)
@@ -0,0 +1,112 @@
+"""Encodes and decodes binary masks in COCOs run-length encoding (RLE).
+
+This module does not depend on blender, so it can also be used by the visualization scripts.
+"""
+
+from typing import Dict, Union, List
+
+import numpy as np
+
+
+def binary_mask_to_rle(binary_mask: np.ndarray) -> Dict[str, List[int]]:
+    """Converts a binary mask to COCOs run-length encoding (RLE) format. Instead of outputting
+    a mask image, you give a list of start pixels and how many pixels after each of those
+    starts are included in the mask.
+    :param binary_mask: a 2D binary numpy array where '1's represent the object
+    :return: Mask in RLE format
+    """
+    positions = np.flatnonzero(binary_mask.ravel(order='F'))
+    return {'counts': positions_to_rle_counts(positions, binary_mask.size),
+            'size': list(binary_mask.shape)}
+
+
+def rle_to_compressed_rle(rle: Dict[str, List[int]]) -> Dict[str, Union[str, List[int]]]:
+    """Converts an uncompressed RLE into the compressed string representation used by pycocotools.
+    :param rle: Mask in RLE format
+    :return: Mask in compressed RLE format, which can be given directly to pycocotools.mask.decode()
+    """
+    chars = []
+    counts = rle.get('counts')
+    for i, count in enumerate(counts):
+        # Counts are stored as difference to the count two steps before, as a variable-length 6 bit encoding
+        x = count - counts[i - 2] if i > 2 else count
+        more = True
+        while more:
+            c = x & 0x1f
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return {'counts': "".join(chars), 'size': list(rle.get('size'))}
+
+
+def compressed_rle_to_rle(compressed_rle: Dict[str, Union[str, List[int]]]) -> Dict[str, List[int]]:
+    """Converts a compressed RLE (as written by pycocotools) back into the uncompressed RLE format.
+    :param compressed_rle: Mask in compressed RLE format
+    :return: Mask in RLE format
+    """
+    counts: List[int] = []
+    encoded = compressed_rle.get('counts')
+    p = 0
+    while p < len(encoded):
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(encoded[p]) - 48
+            x |= (c & 0x1f) << (5 * k)
+            more = c & 0x20
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return {'counts': counts, 'size': list(compressed_rle.get('size'))}
+
+
+def rle_to_binary_mask(rle: Dict[str, Union[str, List[int]]]) -> np.ndarray:
+    """Converts a COCOs run-length encoding (RLE) to binary mask.
+    :param rle: Mask in RLE format, the counts can also be compressed (as written by pycocotools)
+    :return: a 2D binary numpy array where '1's represent the object
+    """
+    if isinstance(rle.get('counts'), str):
+        rle = compressed_rle_to_rle(rle)
+    binary_array = np.zeros(np.prod(rle.get('size')), dtype=bool)
+    counts: List[int] = rle.get('counts')
+
+    start = 0
+    for i in range(len(counts) - 1):
+        start += counts[i]
+        end = start + counts[i + 1]
+        binary_array[start:end] = (i + 1) % 2
+
+    binary_mask = binary_array.reshape(*rle.get('size'), order='F')
+
+    return binary_mask
+
+
+def positions_to_rle_counts(positions: np.ndarray, num_pixels: int) -> List[int]:
+    """ Computes the run-length counts of a binary mask given by the sorted positions of its '1's.
+
+    :param positions: The sorted indices of all '1's in the flattened (column-major) mask.
+    :param num_pixels: The total number of pixels in the mask.
+    :return: The counts of the RLE, always starting with a run of '0's.
+    """
+    if len(positions) == 0:
+        return [num_pixels] if num_pixels > 0 else []
+    # Find the positions where a run of '1's is interrupted
+    breaks = np.flatnonzero(np.diff(positions) != 1)
+    run_starts = positions[np.concatenate(([0], breaks + 1))]
+    run_ends = positions[np.concatenate((breaks, [len(positions) - 1]))] + 1
+    # Interleave the lengths of the runs of '0's and '1's
+    boundaries = np.empty(2 * len(run_starts) + 2, dtype=np.int64)
+    boundaries[0] = 0
+    boundaries[1:-1:2] = run_starts
+    boundaries[2:-1:2] = run_ends
+    boundaries[-1] = num_pixels
+    counts = np.diff(boundaries)
+    # A trailing run of '0's is only added, if the mask does not end with a '1'
+    if counts[-1] == 0:
+        counts = counts[:-1]
+    return counts.tolist()
@@ -1,17 +1,24 @@
 """Allows rendering the content of the scene in the coco file format."""
 
 import datetime
-from itertools import groupby
 import json
 import os
-from typing import Optional, Dict, Union, Tuple, List
+import shutil
+from typing import Optional, Dict, Union, Tuple, List, Any
 
 import numpy as np
+from scipy.ndimage import find_objects
 from skimage import measure
 import cv2
 import bpy
 
 from blenderproc.python.utility.LabelIdMapping import LabelIdMapping
+from blenderproc.python.utility.Utility import output_dir_lock
+# rle_to_binary_mask is imported to stay available from this module
+# pylint: disable=unused-import
+from blenderproc.python.writer.CocoRleUtility import binary_mask_to_rle, rle_to_binary_mask, rle_to_compressed_rle, \
+    positions_to_rle_counts
+# pylint: enable=unused-import
 
 
 def write_coco_annotations(output_dir: str, instance_segmaps: List[np.ndarray],
@@ -20,7 +27,8 @@ def write_coco_annotations(output_dir: str, instance_segmaps: List[np.ndarray],
                            mask_encoding_format: str = "rle", supercategory: str = "coco_annotations",
                            append_to_existing_output: bool = True,
                            jpg_quality: int = 95, label_mapping: Optional[LabelIdMapping] = None,
-                           file_prefix: str = "", indent: Optional[Union[int, str]] = None):
+                           file_prefix: str = "", indent: Optional[Union[int, str]] = None,
+                           use_shards: bool = False):
     """ Writes coco annotations in the following steps:
     1. Locate the seg images
     2. Locate the rgb maps
@@ -33,7 +41,8 @@ def write_coco_annotations(output_dir: str, instance_segmaps: List[np.ndarray],
     :param instance_attribute_maps: per-frame mappings with idx, class and optionally supercategory/bop_dataset_name
     :param colors: List of color images. Does not support stereo images, enter left and right inputs subsequently.
     :param color_file_format: Format to save color images in
-    :param mask_encoding_format: Encoding format of the binary masks. Default: 'rle'. Available: 'rle', 'polygon'.
+    :param mask_encoding_format: Encoding format of the binary masks. Default: 'rle'. Available: 'rle', 'polygon',
+                                 'compressed_rle'. 'compressed_rle' stores the counts as string like pycocotools.
     :param supercategory: name of the dataset/supercategory to filter for, e.g. a specific BOP dataset set
                           by 'bop_dataset_name' or any loaded object with specified 'cp_supercategory'
     :param append_to_existing_output: If true and if there is already a coco_annotations.json file in the output
@@ -49,6 +58,10 @@ def write_coco_annotations(output_dir: str, instance_segmaps: List[np.ndarray],
                    only insert newlines. None (the default) selects the most compact representation.
                    Using a positive integer indent indents that many spaces per level.
                    If indent is a string (such as "\t"), that string is used to indent each level.
+    :param use_shards: If True, the annotations are not merged into coco_annotations.json, instead each call appends
+                       a new shard file next to it. This way, appending does not require reading and rewriting all
+                       existing annotations. Call consolidate_coco_annotations() once at the end to merge all shards
+                       into coco_annotations.json.
     """
 
     if len(colors) > 0 and len(colors[0].shape) == 4:
@@ -58,90 +71,188 @@ def write_coco_annotations(output_dir: str, instance_segmaps: List[np.ndarray],
     # Create output directory
     os.makedirs(os.path.join(output_dir, 'images'), exist_ok=True)
 
-    coco_annotations_path = os.path.join(output_dir, "coco_annotations.json")
-    # Calculate image numbering offset, if append_to_existing_output is activated and coco data exists
-    if append_to_existing_output and os.path.exists(coco_annotations_path):
-        with open(coco_annotations_path, 'r', encoding="utf-8") as fp:
-            existing_coco_annotations = json.load(fp)
-        image_offset = max(image["id"] for image in existing_coco_annotations["images"]) + 1
-    else:
-        image_offset = 0
-        existing_coco_annotations = None
-
-    # collect all RGB paths
-    new_coco_image_paths = []
-
-    # for each rendered frame
-    for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
-        color_rgb = colors[frame - bpy.context.scene.frame_start]
-
-        # Reverse channel order for opencv
-        color_bgr = color_rgb.copy()
-        color_bgr[..., :3] = color_bgr[..., :3][..., ::-1]
-
-        if color_file_format == 'PNG':
-            target_base_path = f'images/{file_prefix}{frame + image_offset:06d}.png'
-            target_path = os.path.join(output_dir, target_base_path)
-            cv2.imwrite(target_path, color_bgr)
-        elif color_file_format == 'JPEG':
-            target_base_path = f'images/{file_prefix}{frame + image_offset:06d}.jpg'
-            target_path = os.path.join(output_dir, target_base_path)
-            cv2.imwrite(target_path, color_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), jpg_quality])
+    # Other processes might append to the same folder at the same time, so the numbering and writing is done at once
+    with output_dir_lock(output_dir):
+        coco_annotations_path = os.path.join(output_dir, "coco_annotations.json")
+        # Calculate image numbering offset, if append_to_existing_output is activated and coco data exists
+        if use_shards:
+            shard_manifest = _CocoWriterUtility.load_shard_manifest(output_dir, append_to_existing_output)
+            image_offset = shard_manifest["next_image_id"]
+            existing_coco_annotations = None
+        elif append_to_existing_output and os.path.exists(coco_annotations_path):
+            with open(coco_annotations_path, 'r', encoding="utf-8") as fp:
+                existing_coco_annotations = json.load(fp)
+            image_offset = max(image["id"] for image in existing_coco_annotations["images"]) + 1
         else:
-            raise RuntimeError(f'Unknown color_file_format={color_file_format}. Try "PNG" or "JPEG"')
+            image_offset = 0
+            existing_coco_annotations = None
+
+        # collect all RGB paths
+        new_coco_image_paths = []
+
+        # for each rendered frame
+        for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
+            color_rgb = colors[frame - bpy.context.scene.frame_start]
+
+            # Reverse channel order for opencv
+            color_bgr = color_rgb.copy()
+            color_bgr[..., :3] = color_bgr[..., :3][..., ::-1]
+
+            if color_file_format == 'PNG':
+                target_base_path = f'images/{file_prefix}{frame + image_offset:06d}.png'
+                target_path = os.path.join(output_dir, target_base_path)
+                cv2.imwrite(target_path, color_bgr)
+            elif color_file_format == 'JPEG':
+                target_base_path = f'images/{file_prefix}{frame + image_offset:06d}.jpg'
+                target_path = os.path.join(output_dir, target_base_path)
+                cv2.imwrite(target_path, color_bgr, [int(cv2.IMWRITE_JPEG_QUALITY), jpg_quality])
+            else:
+                raise RuntimeError(f'Unknown color_file_format={color_file_format}. Try "PNG" or "JPEG"')
+
+
+            new_coco_image_paths.append(target_base_path)
+
+        coco_output = _CocoWriterUtility.generate_coco_annotations(instance_segmaps,
+                                                                   instance_attribute_maps,
+                                                                   new_coco_image_paths,
+                                                                   supercategory,
+                                                                   mask_encoding_format,
+                                                                   existing_coco_annotations,
+                                                                   label_mapping)
+
+        if use_shards:
+            _CocoWriterUtility.append_shard(output_dir, shard_manifest, coco_output)
+        else:
+            print("Writing coco annotations to " + coco_annotations_path)
+            with open(coco_annotations_path, 'w', encoding="utf-8") as fp:
+                json.dump(coco_output, fp, indent=indent)
 
 
-        new_coco_image_paths.append(target_base_path)
+def consolidate_coco_annotations(output_dir: str, indent: Optional[Union[int, str]] = None):
+    """ Merges all shards written via write_coco_annotations(use_shards=True) into coco_annotations.json.
 
-    coco_output = _CocoWriterUtility.generate_coco_annotations(instance_segmaps,
-                                                               instance_attribute_maps,
-                                                               new_coco_image_paths,
-                                                               supercategory,
-                                                               mask_encoding_format,
-                                                               existing_coco_annotations,
-                                                               label_mapping)
+    If a coco_annotations.json existed before the first shard was written, the shards are appended to it.
+    Afterwards, the shards are removed.
 
-    print("Writing coco annotations to " + coco_annotations_path)
-    with open(coco_annotations_path, 'w', encoding="utf-8") as fp:
-        json.dump(coco_output, fp, indent=indent)
+    :param output_dir: The output directory given to write_coco_annotations().
+    :param indent: The indent used for writing coco_annotations.json, see write_coco_annotations().
+    """
+    with output_dir_lock(output_dir):
+        shard_dir = os.path.join(output_dir, _CocoWriterUtility.shard_dir_name)
+        if not os.path.exists(os.path.join(shard_dir, "manifest.json")):
+            raise FileNotFoundError(f"There are no coco annotation shards in {output_dir}")
+        manifest = _CocoWriterUtility.load_shard_manifest(output_dir, True)
+
+        coco_annotations_path = os.path.join(output_dir, "coco_annotations.json")
+        if manifest["append_to_base"]:
+            with open(coco_annotations_path, 'r', encoding="utf-8") as fp:
+                coco_output = json.load(fp)
+        else:
+            coco_output = {"info": manifest["info"], "licenses": manifest["licenses"], "categories": [],
+                           "images": [], "annotations": []}
+
+        for cat_dict in manifest["categories"]:
+            if cat_dict not in coco_output["categories"]:
+                coco_output["categories"].append(cat_dict)
+
+        for shard_name in manifest["shards"]:
+            with open(os.path.join(shard_dir, shard_name), 'r', encoding="utf-8") as fp:
+                for line in fp:
+                    entry = json.loads(line)
+                    coco_output["images"].append(entry["image"])
+                    coco_output["annotations"].extend(entry["annotations"])
+
+        print("Writing coco annotations to " + coco_annotations_path)
+        # Write to a temporary file first, so an interrupted write does not destroy the existing annotations
+        temp_path = coco_annotations_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding="utf-8") as fp:
+                json.dump(coco_output, fp, indent=indent)
+            os.replace(temp_path, coco_annotations_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        shutil.rmtree(shard_dir)
 
 
-def binary_mask_to_rle(binary_mask: np.ndarray) -> Dict[str, List[int]]:
-    """Converts a binary mask to COCOs run-length encoding (RLE) format. Instead of outputting
-    a mask image, you give a list of start pixels and how many pixels after each of those
-    starts are included in the mask.
-    :param binary_mask: a 2D binary numpy array where '1's represent the object
-    :return: Mask in RLE format
-    """
-    rle: Dict[str, List[int]] = {'counts': [], 'size': list(binary_mask.shape)}
-    counts = rle.get('counts')
-    for i, (value, elements) in enumerate(groupby(binary_mask.ravel(order='F'))):
-        if i == 0 and value == 1:
-            counts.append(0)
-        counts.append(len(list(elements)))
-    return rle
-
-
-def rle_to_binary_mask(rle: Dict[str, List[int]]) -> np.ndarray:
-    """Converts a COCOs run-length encoding (RLE) to binary mask.
-    :param rle: Mask in RLE format
-    :return: a 2D binary numpy array where '1's represent the object
-    """
-    binary_array = np.zeros(np.prod(rle.get('size')), dtype=bool)
-    counts: List[int] = rle.get('counts')
+class _CocoWriterUtility:
 
-    start = 0
-    for i in range(len(counts) - 1):
-        start += counts[i]
-        end = start + counts[i + 1]
-        binary_array[start:end] = (i + 1) % 2
+    shard_dir_name = "coco_annotations_shards"
 
-    binary_mask = binary_array.reshape(*rle.get('size'), order='F')
+    @staticmethod
+    def load_shard_manifest(output_dir: str, append_to_existing_output: bool) -> Dict[str, Any]:
+        """ Loads the manifest describing the existing coco annotation shards or creates a new one.
 
-    return binary_mask
+        :param output_dir: The output directory of the coco annotations.
+        :param append_to_existing_output: If False, all existing shards are removed and a new manifest is returned.
+        :return: The manifest containing the shard file names, the merged categories and the next free ids.
+        """
+        shard_dir = os.path.join(output_dir, _CocoWriterUtility.shard_dir_name)
+        manifest_path = os.path.join(shard_dir, "manifest.json")
+        if append_to_existing_output and os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding="utf-8") as fp:
+                return json.load(fp)
+
+        if os.path.exists(shard_dir):
+            shutil.rmtree(shard_dir)
+        manifest = {"shards": [], "categories": [], "info": None, "licenses": None, "next_image_id": 0,
+                    "last_annotation_id": 0, "append_to_base": False}
+        # The first shard continues the numbering of an already existing coco_annotations.json
+        coco_annotations_path = os.path.join(output_dir, "coco_annotations.json")
+        if append_to_existing_output and os.path.exists(coco_annotations_path):
+            with open(coco_annotations_path, 'r', encoding="utf-8") as fp:
+                existing_coco_annotations = json.load(fp)
+            manifest["next_image_id"] = max(image["id"] for image in existing_coco_annotations["images"]) + 1
+            if existing_coco_annotations["annotations"]:
+                manifest["last_annotation_id"] = max(annotation["id"] for annotation in
+                                                     existing_coco_annotations["annotations"])
+            manifest["append_to_base"] = True
+        return manifest
 
+    @staticmethod
+    def append_shard(output_dir: str, manifest: Dict[str, Any], coco_annotations: Dict[str, Any]):
+        """ Writes the given coco annotations as a new shard and updates the manifest.
 
-class _CocoWriterUtility:
+        Each line of a shard contains one image together with all its annotations.
+
+        :param output_dir: The output directory of the coco annotations.
+        :param manifest: The manifest as returned by load_shard_manifest().
+        :param coco_annotations: The coco annotations of the new images, whose ids start at 0 and 1 respectively.
+        """
+        shard_dir = os.path.join(output_dir, _CocoWriterUtility.shard_dir_name)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        annotations_per_image: Dict[int, List[Dict[str, Any]]] = {}
+        for annotation in coco_annotations["annotations"]:
+            annotation["id"] += manifest["last_annotation_id"]
+            annotation["image_id"] += manifest["next_image_id"]
+            annotations_per_image.setdefault(annotation["image_id"], []).append(annotation)
+        for image in coco_annotations["images"]:
+            image["id"] += manifest["next_image_id"]
+
+        shard_name = f"shard_{len(manifest['shards']):06d}.jsonl"
+        shard_path = os.path.join(shard_dir, shard_name)
+        print("Writing coco annotations to " + shard_path)
+        with open(shard_path, 'w', encoding="utf-8") as fp:
+            for image in coco_annotations["images"]:
+                fp.write(json.dumps({"image": image, "annotations": annotations_per_image.get(image["id"], [])}))
+                fp.write("\n")
+
+        # Update the manifest
+        manifest["shards"].append(shard_name)
+        for cat_dict in coco_annotations["categories"]:
+            if cat_dict not in manifest["categories"]:
+                manifest["categories"].append(cat_dict)
+        if manifest["info"] is None:
+            manifest["info"] = coco_annotations["info"]
+            manifest["licenses"] = coco_annotations["licenses"]
+        if coco_annotations["images"]:
+            manifest["next_image_id"] = max(image["id"] for image in coco_annotations["images"]) + 1
+        if coco_annotations["annotations"]:
+            manifest["last_annotation_id"] = max(annotation["id"] for annotation in coco_annotations["annotations"])
+        # Write the manifest last, so an interrupted write does not register an incomplete shard
+        with open(os.path.join(shard_dir, "manifest.json"), 'w', encoding="utf-8") as fp:
+            json.dump(manifest, fp)
 
     @staticmethod
     def generate_coco_annotations(inst_segmaps, inst_attribute_maps, image_paths, supercategory,
@@ -219,22 +330,10 @@ def generate_coco_annotations(inst_segmaps, inst_attribute_maps, image_paths, su
             image_id = len(images)
             images.append(_CocoWriterUtility.create_image_info(image_id, image_path, inst_segmap.shape))
 
-            # Go through all objects visible in this image
-            instances = np.unique(inst_segmap)
-            # Remove background
-            instances = np.delete(instances, np.where(instances == 0))
-            for inst in instances:
-                if inst in instance_2_category_map:
-                    # Calc object mask
-                    binary_inst_mask = np.where(inst_segmap == inst, 1, 0)
-                    # Add coco info for object in this image
-                    annotation = _CocoWriterUtility.create_annotation_info(len(annotations) + 1,
-                                                                           image_id,
-                                                                           instance_2_category_map[inst],
-                                                                           binary_inst_mask,
-                                                                           mask_encoding_format)
-                    if annotation is not None:
-                        annotations.append(annotation)
+            # Add coco info for all objects visible in this image
+            annotations.extend(_CocoWriterUtility.create_instance_annotations(len(annotations) + 1, image_id,
+                                                                              inst_segmap, instance_2_category_map,
+                                                                              mask_encoding_format))
 
         new_coco_annotations = {
             "info": info,
@@ -250,6 +349,70 @@ def generate_coco_annotations(inst_segmaps, inst_attribute_maps, image_paths, su
 
         return new_coco_annotations
 
+    @staticmethod
+    def create_instance_annotations(first_annotation_id: int, image_id: int, inst_segmap: np.ndarray,
+                                    instance_2_category_map: Dict[int, int], mask_encoding_format: str,
+                                    tolerance: int = 2) -> List[Dict[str, Union[str, int]]]:
+        """ Creates the annotation infos of all instances in the given segmentation image.
+
+        Areas and bounding boxes of all instances are computed in one pass over the image, all further
+        computations only look at the bounding box of the respective instance.
+
+        :param first_annotation_id: The id to use for the first annotation, the following ones are counted up.
+        :param image_id: integer to uniquly identify image
+        :param inst_segmap: The instance segmentation image with the shape [H, W].
+        :param instance_2_category_map: Maps the instance ids which should be annotated to their category id.
+        :param mask_encoding_format: Encoding format of the mask. Type: string.
+        :param tolerance: The tolerance for fitting polygons to the objects mask.
+        :return: The list of annotation infos.
+        """
+        inst_segmap = np.asarray(inst_segmap)
+        if not np.issubdtype(inst_segmap.dtype, np.integer):
+            inst_segmap = inst_segmap.astype(np.int64)
+        # Number of pixels and bounding box of every instance id
+        areas = np.bincount(inst_segmap.ravel())
+        object_slices = find_objects(inst_segmap)
+
+        annotations = []
+        # Go through all objects visible in this image, skipping the background
+        for inst in np.flatnonzero(areas[1:]) + 1:
+            inst = int(inst)
+            if inst not in instance_2_category_map:
+                continue
+            rows, cols = object_slices[inst - 1]
+            crop_mask = inst_segmap[rows, cols] == inst
+            bounding_box = [cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start]
+
+            if mask_encoding_format in ['rle', 'compressed_rle']:
+                # Pixel indices of the object in column-major order within the full image
+                crop_rows, crop_cols = np.nonzero(crop_mask.T)[::-1]
+                positions = (crop_cols + cols.start) * inst_segmap.shape[0] + crop_rows + rows.start
+                segmentation = {'counts': positions_to_rle_counts(positions, inst_segmap.size),
+                                'size': list(inst_segmap.shape)}
+                if mask_encoding_format == 'compressed_rle':
+                    segmentation = rle_to_compressed_rle(segmentation)
+            elif mask_encoding_format == 'polygon':
+                binary_mask = np.zeros(inst_segmap.shape, dtype=bool)
+                binary_mask[rows, cols] = crop_mask
+                segmentation = _CocoWriterUtility.binary_mask_to_polygon(binary_mask, tolerance)
+                if not segmentation:
+                    continue
+            else:
+                raise RuntimeError(f"Unknown encoding format: {mask_encoding_format}")
+
+            annotations.append({
+                "id": first_annotation_id + len(annotations),
+                "image_id": image_id,
+                "category_id": instance_2_category_map[inst],
+                "iscrowd": 0,
+                "area": int(areas[inst]),
+                "bbox": bounding_box,
+                "segmentation": segmentation,
+                "width": inst_segmap.shape[1],
+                "height": inst_segmap.shape[0],
+            })
+        return annotations
+
     @staticmethod
     def merge_coco_annotations(existing_coco_annotations, new_coco_annotations):
         """ Merges the two given coco annotation dicts into one.
@@ -327,6 +490,8 @@ def create_annotation_info(annotation_id: int, image_id: int, category_id: int,
 
         if mask_encoding_format == 'rle':
             segmentation = binary_mask_to_rle(binary_mask)
+        elif mask_encoding_format == 'compressed_rle':
+            segmentation = rle_to_compressed_rle(binary_mask_to_rle(binary_mask))
         elif mask_encoding_format == 'polygon':
             segmentation = _CocoWriterUtility.binary_mask_to_polygon(binary_mask, tolerance)
             if not segmentation:
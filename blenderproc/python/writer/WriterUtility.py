@@ -1,29 +1,32 @@
 """Provides functionality to write the generated data to disc."""
 
 
+import atexit
 import os
-from typing import List, Dict, Union, Any, Set, Tuple
+from typing import List, Dict, Union, Any, Set, Tuple, Optional
 import json
+from concurrent.futures import ThreadPoolExecutor, Future
 
 import csv
 import numpy as np
 import bpy
 import mathutils
-import h5py
 
 from blenderproc.python.postprocessing.PostProcessingUtility import trim_redundant_channels, \
     segmentation_mapping
 from blenderproc.python.postprocessing.PostProcessingUtility import dist2depth, depth2dist
 from blenderproc.python.types.EntityUtility import Entity
 from blenderproc.python.utility.BlenderUtility import load_image
-from blenderproc.python.utility.Utility import resolve_path, Utility, NumpyEncoder
+from blenderproc.python.utility.Utility import resolve_path, Utility, NumpyEncoder, output_dir_lock
 from blenderproc.python.utility.MathUtility import change_coordinate_frame_of_point, \
     change_source_coordinate_frame_of_transformation_matrix, change_target_coordinate_frame_of_transformation_matrix
 from blenderproc.python.camera import CameraUtility
 
 
 def write_hdf5(output_dir_path: str, output_data_dict: Dict[str, List[Union[np.ndarray, list, dict]]],
-               append_to_existing_output: bool = False, stereo_separate_keys: bool = False):
+               append_to_existing_output: bool = False, stereo_separate_keys: bool = False,
+               compression: Optional[str] = "gzip", compression_level: Optional[int] = None,
+               num_worker: Optional[int] = 0, max_pending_frames: Optional[int] = None):
     """
     Saves the information provided inside of the output_data_dict into a .hdf5 container
 
@@ -37,7 +40,21 @@ def write_hdf5(output_dir_path: str, output_data_dict: Dict[str, List[Union[np.n
                                  won't be saved in one tensor [2, img_x, img_y, channels], where the img[0] is the
                                  left image and img[1] the right. They will be saved in separate keys: for example
                                  for colors in colors_0 and colors_1.
+    :param compression: The compression used for all non-string datasets. Available: "gzip", "lzf" and None
+                        (no compression).
+    :param compression_level: The gzip compression level in [0, 9]. If None is given, the h5py default (4) is used.
+                              Only used if compression is "gzip".
+    :param num_worker: The number of background threads used to compress and write the .hdf5 containers.
+                       If 0 is given, the containers are written directly (default). Otherwise, this function
+                       returns as soon as the frames are queued and flush_hdf5_writes() has to be called to wait
+                       for them to be written. If None is given, the number of cores is used.
+                       h5py and zlib release the GIL while compressing, so the threads run in parallel to the
+                       main thread.
+    :param max_pending_frames: The maximum number of frames which are queued for the background threads. If the
+                               queue is full, this function blocks until a frame has been written. Bounds the
+                               memory used by queued frames. Default: 2 * num_worker.
     """
+    _WriterUtility.check_hdf5_compression(compression, compression_level)
 
     if not os.path.exists(output_dir_path):
         os.makedirs(output_dir_path)
@@ -47,30 +64,41 @@ def write_hdf5(output_dir_path: str, output_data_dict: Dict[str, List[Union[np.n
         if isinstance(data_block, list):
             amount_of_frames = max([amount_of_frames, len(data_block)])
 
+    if amount_of_frames != bpy.context.scene.frame_end - bpy.context.scene.frame_start:
+        raise Exception("The amount of images stored in the output_data_dict does not correspond with the amount"
+                        "of images specified by frame_start to frame_end.")
+
     # if append to existing output is turned on the existing folder is searched for the highest occurring
     # index, which is then used as starting point for this run
+    reservation_paths = []
     if append_to_existing_output:
-        frame_offset = 0
-        # Look for hdf5 file with highest index
-        for path in os.listdir(output_dir_path):
-            if path.endswith(".hdf5"):
-                index = path[:-len(".hdf5")]
-                if index.isdigit():
-                    frame_offset = max(frame_offset, int(index) + 1)
+        # Other processes might append to the same folder at the same time
+        with output_dir_lock(output_dir_path):
+            frame_offset = 0
+            # Look for the hdf5 file with highest index, frames which are still being written are only reserved
+            for path in os.listdir(output_dir_path):
+                for suffix in [".hdf5", ".hdf5.reserved"]:
+                    if path.endswith(suffix) and path[:-len(suffix)].isdigit():
+                        frame_offset = max(frame_offset, int(path[:-len(suffix)]) + 1)
+            # Reserve the indices of the new frames via marker files before the lock is released, so a crash does not
+            # leave empty .hdf5 files behind
+            for index in range(frame_offset, frame_offset + amount_of_frames):
+                reservation_paths.append(os.path.join(output_dir_path, f"{index}.hdf5.reserved"))
+                with open(reservation_paths[-1], "wb"):
+                    pass
+        # The numbering is relative to the first frame, so the new files directly follow the existing ones
+        frame_offset -= bpy.context.scene.frame_start
     else:
         frame_offset = 0
 
-    if amount_of_frames != bpy.context.scene.frame_end - bpy.context.scene.frame_start:
-        raise Exception("The amount of images stored in the output_data_dict does not correspond with the amount"
-                        "of images specified by frame_start to frame_end.")
-
-    for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
-        # for each frame a new .hdf5 file is generated
-        hdf5_path = os.path.join(output_dir_path, str(frame + frame_offset) + ".hdf5")
-        with h5py.File(hdf5_path, "w") as file:
+    try:
+        for frame in range(bpy.context.scene.frame_start, bpy.context.scene.frame_end):
+            # for each frame a new .hdf5 file is generated
+            hdf5_path = os.path.join(output_dir_path, str(frame + frame_offset) + ".hdf5")
             # Go through all the output types
             print(f"Merging data for frame {frame} into {hdf5_path}")
 
+            frame_data: Dict[str, Union[np.ndarray, list, dict]] = {}
             adjusted_frame = frame - bpy.context.scene.frame_start
             for key, data_block in output_data_dict.items():
                 if adjusted_frame < len(data_block):
@@ -79,16 +107,113 @@ def write_hdf5(output_dir_path: str, output_data_dict: Dict[str, List[Union[np.n
                     if stereo_separate_keys and (bpy.context.scene.render.use_multiview or
                                                  used_data_block.shape[0] == 2):
                         # stereo mode was activated
-                        _WriterUtility.write_to_hdf_file(file, key + "_0", data_block[adjusted_frame][0])
-                        _WriterUtility.write_to_hdf_file(file, key + "_1", data_block[adjusted_frame][1])
+                        frame_data[key + "_0"] = used_data_block[0]
+                        frame_data[key + "_1"] = used_data_block[1]
                     else:
-                        _WriterUtility.write_to_hdf_file(file, key, data_block[adjusted_frame])
+                        frame_data[key] = used_data_block
                 else:
                     raise Exception(f"There are more frames {adjusted_frame} then there are blocks of information "
                                     f" {len(data_block)} in the given list for key {key}.")
             blender_proc_version = Utility.get_current_version()
             if blender_proc_version is not None:
-                _WriterUtility.write_to_hdf_file(file, "blender_proc_version", np.bytes_(blender_proc_version))
+                frame_data["blender_proc_version"] = np.bytes_(blender_proc_version)
+
+            reservation_path = reservation_paths[0] if reservation_paths else None
+            if num_worker == 0:
+                _WriterUtility.write_hdf5_frame(hdf5_path, frame_data, compression, compression_level, reservation_path)
+            else:
+                _HDF5WriterPool.submit(hdf5_path, frame_data, compression, compression_level, num_worker,
+                                       max_pending_frames, reservation_path)
+            # The writer removes the reservation once the frame is written
+            if reservation_paths:
+                reservation_paths.pop(0)
+    finally:
+        # Release the reservations of all frames, which are not going to be written
+        for reservation_path in reservation_paths:
+            if os.path.exists(reservation_path):
+                os.remove(reservation_path)
+
+
+def flush_hdf5_writes():
+    """ Blocks until all frames queued by write_hdf5() with num_worker != 0 have been written to disc.
+
+    Errors which occurred while writing in the background are raised here.
+    """
+    _HDF5WriterPool.flush()
+
+
+class _HDF5WriterPool:
+    """ Keeps the background threads which compress and write .hdf5 containers for write_hdf5().
+
+    Threads are used instead of processes, as forking or spawning blender's embedded python is not safe, while
+    h5py and zlib release the GIL during compression and writing.
+    """
+
+    executor: Optional[ThreadPoolExecutor] = None
+    num_worker: Optional[int] = None
+    # The queued jobs as tuples of hdf5 path and future, in submission order
+    pending: List[Tuple[str, Future]] = []
+
+    @staticmethod
+    def submit(hdf5_path: str, frame_data: Dict[str, Union[np.ndarray, list, dict]], compression: Optional[str],
+               compression_level: Optional[int], num_worker: Optional[int], max_pending_frames: Optional[int],
+               reservation_path: Optional[str] = None):
+        """ Queues one frame to be written by the background threads.
+
+        :param hdf5_path: The path of the .hdf5 container to create.
+        :param frame_data: The data of the frame, maps the hdf5 key to its data.
+        :param compression: The compression used for all non-string datasets.
+        :param compression_level: The gzip compression level.
+        :param num_worker: The number of background threads, None means number of cores.
+        :param max_pending_frames: The maximum number of queued frames, None means 2 * num_worker.
+        :param reservation_path: The marker reserving the index of the frame, it is removed after writing.
+        """
+        if num_worker is None:
+            num_worker = os.cpu_count() or 1
+        if _HDF5WriterPool.executor is None or _HDF5WriterPool.num_worker != num_worker:
+            # Make sure everything queued in a differently sized pool is done first
+            _HDF5WriterPool.close()
+            _HDF5WriterPool.executor = ThreadPoolExecutor(max_workers=num_worker)
+            _HDF5WriterPool.num_worker = num_worker
+        if max_pending_frames is None:
+            max_pending_frames = 2 * num_worker
+
+        # Block on the oldest frames, until there is space in the queue
+        while len(_HDF5WriterPool.pending) >= max(max_pending_frames, 1):
+            _HDF5WriterPool.pending.pop(0)[1].result()
+
+        future = _HDF5WriterPool.executor.submit(_WriterUtility.write_hdf5_frame, hdf5_path, frame_data,
+                                                 compression, compression_level, reservation_path)
+        _HDF5WriterPool.pending.append((hdf5_path, future))
+
+    @staticmethod
+    def flush():
+        """ Waits for all queued frames and raises the first error which occurred while writing.
+
+        All queued frames are waited for, even if an earlier one failed.
+        """
+        first_error: Optional[BaseException] = None
+        while _HDF5WriterPool.pending:
+            error = _HDF5WriterPool.pending.pop(0)[1].exception()
+            if error is not None and first_error is None:
+                first_error = error
+        if first_error is not None:
+            raise first_error
+
+    @staticmethod
+    def close():
+        """ Waits for all queued frames and shuts down the background threads. """
+        try:
+            _HDF5WriterPool.flush()
+        finally:
+            if _HDF5WriterPool.executor is not None:
+                _HDF5WriterPool.executor.shutdown(wait=True)
+                _HDF5WriterPool.executor = None
+                _HDF5WriterPool.num_worker = None
+
+
+# Make sure no queued frame is lost, if the user does not call flush_hdf5_writes() before the script ends
+atexit.register(_HDF5WriterPool.close)
 
 
 class _WriterUtility:
@@ -341,12 +466,61 @@ def _get_shapenet_attribute(shapenet_obj: bpy.types.Object, attribute_name: str,
                                                    world_frame_change)
 
     @staticmethod
-    def write_to_hdf_file(file, key: str, data: Union[np.ndarray, list, dict], compression: str = "gzip"):
+    def check_hdf5_compression(compression: Optional[str], compression_level: Optional[int]):
+        """ Makes sure the given hdf5 compression settings are supported.
+
+        :param compression: The compression, either "gzip", "lzf" or None.
+        :param compression_level: The gzip compression level in [0, 9] or None.
+        """
+        if compression not in ["gzip", "lzf", None]:
+            raise ValueError(f"Unknown hdf5 compression: {compression}, available are \"gzip\", \"lzf\" and None.")
+        if compression_level is not None:
+            if compression != "gzip":
+                raise ValueError("A compression level can only be set for the \"gzip\" compression.")
+            if not 0 <= compression_level <= 9:
+                raise ValueError(f"The gzip compression level has to be in [0, 9], not {compression_level}.")
+
+    @staticmethod
+    def write_hdf5_frame(hdf5_path: str, frame_data: Dict[str, Union[np.ndarray, list, dict]],
+                         compression: Optional[str] = "gzip", compression_level: Optional[int] = None,
+                         reservation_path: Optional[str] = None):
+        """ Writes the data of one frame into a new .hdf5 container.
+
+        The container is written to a temporary file first, so it only appears under its name once it is complete.
+
+        :param hdf5_path: The path of the .hdf5 container to create.
+        :param frame_data: Maps each hdf5 key to the data which should be stored at it.
+        :param compression: The compression used for all non-string datasets.
+        :param compression_level: The gzip compression level.
+        :param reservation_path: The marker reserving the index of the frame, it is removed after writing, also if
+                                 writing failed.
+        """
+        # pylint: disable=import-outside-toplevel
+        import h5py
+        # pylint: enable=import-outside-toplevel
+
+        temp_path = hdf5_path + ".tmp"
+        try:
+            with h5py.File(temp_path, "w") as file:
+                for key, data in frame_data.items():
+                    _WriterUtility.write_to_hdf_file(file, key, data, compression, compression_level)
+            os.replace(temp_path, hdf5_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if reservation_path is not None and os.path.exists(reservation_path):
+                os.remove(reservation_path)
+
+    @staticmethod
+    def write_to_hdf_file(file, key: str, data: Union[np.ndarray, list, dict], compression: Optional[str] = "gzip",
+                          compression_level: Optional[int] = None):
         """ Adds the given data as a new entry to the given hdf5 file.
 
         :param file: The hdf5 file handle. Type: hdf5.File
         :param key: The key at which the data should be stored in the hdf5 file.
         :param data: The data to store.
+        :param compression: The compression to use, "gzip", "lzf" or None.
+        :param compression_level: The gzip compression level, None uses the h5py default.
         """
         if not isinstance(data, np.ndarray) and not isinstance(data, np.bytes_):
             if isinstance(data, (list, dict)):
@@ -362,4 +536,4 @@ def write_to_hdf_file(file, key: str, data: Union[np.ndarray, list, dict], compr
         if data.dtype.char == 'S':
             file.create_dataset(key, data=data, dtype=data.dtype)
         else:
-            file.create_dataset(key, data=data, compression=compression)
+            file.create_dataset(key, data=data, compression=compression, compression_opts=compression_level)
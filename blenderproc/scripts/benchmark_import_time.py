@@ -0,0 +1,44 @@
+# BlenderProc has to be imported first, so the clock is started within the same line
+import time; start_time = time.perf_counter(); import blenderproc as bproc  # pylint: disable=multiple-statements
+"""
+Measures how long it takes until a BlenderProc script can start working:
+
+1. `import blenderproc` itself
+2. the first access of the api namespaces used by a minimal script (init, object, camera, renderer, writer)
+
+For every step, the heavy third party modules which got imported are listed. Run it via:
+
+    blenderproc run blenderproc/scripts/benchmark_import_time.py
+"""
+
+import sys
+
+HEAVY_MODULES = ["h5py", "cv2", "scipy", "trimesh", "imageio", "rich", "skimage", "png", "sklearn", "PIL",
+                 "matplotlib"]
+
+
+def report_step(name: str, step_start_time: float, loaded_before: set):
+    """ Prints the duration of the step and the heavy modules it imported.
+
+    :param name: The name of the step.
+    :param step_start_time: The time when the step started.
+    :param loaded_before: The heavy modules which were already imported before the step.
+    """
+    duration = (time.perf_counter() - step_start_time) * 1000
+    newly_loaded = sorted(set(HEAVY_MODULES).intersection(sys.modules) - loaded_before)
+    print(f"{name:<30} {duration:8.1f} ms   imports: {', '.join(newly_loaded) if newly_loaded else '-'}")
+
+
+print("Step                           Duration   Heavy modules")
+report_step("import blenderproc", start_time, set())
+for namespace in ["init", "object", "camera", "renderer", "writer"]:
+    loaded = set(HEAVY_MODULES).intersection(sys.modules)
+    step_start = time.perf_counter()
+    getattr(bproc, namespace)
+    report_step(f"bproc.{namespace}", step_start, loaded)
+
+loaded = set(HEAVY_MODULES).intersection(sys.modules)
+step_start = time.perf_counter()
+_ = bproc.writer.write_hdf5
+report_step("bproc.writer.write_hdf5", step_start, loaded)
+report_step("total", start_time, set())
@@ -1,3 +1,5 @@
+# This script shows how BlenderProc can be run several times with different output folders.
+# The same can be done concurrently via: blenderproc run <script> <args> <output>/{run} --num-runs 5 --run-workers 2
 import subprocess
 import sys
 import os
@@ -47,3 +47,101 @@ def test_camera_rotation_from_forward_vec(self):
         for x, y in zip(np.reshape(correct_roation_matrix, -1).tolist(), np.reshape(calc_rotation_matrix, -1).tolist()):
             self.assertAlmostEqual(x, y, places=6)
 
+
+    def test_camera_validation_batch(self):
+        """ Tests the batched camera validation against hits, distances and scores computed by hand for a cube.
+        """
+        bproc.clean_up(True)
+        cube = bproc.object.create_primitive("CUBE")
+        cube.set_cp("category_id", 1)
+        bvh_tree = bproc.object.create_bvh_tree_multi_objects([cube])
+        # With a field of view of 60 degrees, the rays go through a 10x10 grid of offsets in [-tan(30), tan(30)]
+        bproc.camera.set_intrinsics_from_blender_params(np.pi / 3, 100, 100, lens_unit="FOV")
+        offsets_x, offsets_y = np.meshgrid(*[np.tan(np.pi / 6) * np.linspace(-1, 1, 10)] * 2)
+
+        def expected_hit_dists(dist_to_face):
+            # The cube has an edge length of 2, so a ray hits the face in front of the camera if its offset at the
+            # face is at most 1. All other rays also miss the side faces for the poses below.
+            hits = (np.abs(offsets_x) * dist_to_face <= 1) & (np.abs(offsets_y) * dist_to_face <= 1)
+            return dist_to_face * np.sqrt(1 + offsets_x[hits] ** 2 + offsets_y[hits] ** 2)
+
+        cam2world_matrices = np.array([
+            bproc.math.build_transformation_mat(location, bproc.camera.rotation_from_forward_vec(-location))
+            for location in [np.array([0, 0, 2.0]), np.array([0, 0, 5.0]), np.array([0, 4.0, 0]),
+                             np.array([10.0, 0, 0])]
+        ])
+        # the last pose looks past the cube
+        cam2world_matrices[3, :3, :3] = bproc.camera.rotation_from_forward_vec([0, 1, 0])
+        expected_dists = [expected_hit_dists(1), expected_hit_dists(4), expected_hit_dists(3), np.zeros(0)]
+        expected_num_hits = [100, 16, 36, 0]
+        for dists, num_hits in zip(expected_dists, expected_num_hits):
+            self.assertEqual(len(dists), num_hits)
+
+        proximity_checks = {"min": 1.5, "avg": {"min": 0.5, "max": 4.0}}
+        valid, stats = bproc.camera.perform_obstacle_in_view_check_batch(cam2world_matrices, proximity_checks,
+                                                                          bvh_tree)
+        np.testing.assert_array_equal(stats["num_hits"], expected_num_hits)
+        np.testing.assert_allclose(stats["min"][:3], [np.min(dists) for dists in expected_dists[:3]], rtol=1e-4)
+        np.testing.assert_allclose(stats["max"][:3], [np.max(dists) for dists in expected_dists[:3]], rtol=1e-4)
+        np.testing.assert_allclose(stats["avg"], [np.sum(dists) / 100 for dists in expected_dists], atol=1e-4)
+        self.assertEqual(stats["min"][3], np.inf)
+        # The first pose is too close to the cube, the last one sees nothing, so the average is too small
+        np.testing.assert_array_equal(valid, [False, True, True, False])
+        self.assertFalse(bproc.camera.perform_obstacle_in_view_check(cam2world_matrices[0], proximity_checks,
+                                                                     bvh_tree))
+        self.assertTrue(bproc.camera.perform_obstacle_in_view_check(cam2world_matrices[1], proximity_checks,
+                                                                    bvh_tree))
+
+        self.assertEqual(bproc.camera.visible_objects_batch(cam2world_matrices), [{cube}, {cube}, {cube}, set()])
+        self.assertEqual(bproc.camera.visible_objects(cam2world_matrices[2]), {cube})
+        self.assertEqual(bproc.camera.visible_objects(cam2world_matrices[3]), set())
+
+        # With one category hit by k of the 100 rays, the score is 1/3 * (1 - k / 100) * k / 100
+        expected_scores = [0, 1 / 3 * 0.84 * 0.16, 1 / 3 * 0.64 * 0.36, 0]
+        np.testing.assert_allclose(bproc.camera.scene_coverage_score_batch(cam2world_matrices), expected_scores,
+                                   atol=1e-9)
+        self.assertAlmostEqual(bproc.camera.scene_coverage_score(cam2world_matrices[1]), expected_scores[1])
+
+    def test_pose_novelty_tracker(self):
+        """ Tests the pose novelty checks against variances computed by hand.
+        """
+        def pose(rotation, translation):
+            return bproc.math.build_transformation_mat(translation, rotation)
+
+        tracker = bproc.camera.PoseNoveltyTracker(True, True, 77.7, 77.7)
+        # The first pose is always novel
+        self.assertTrue(tracker.add_pose_if_novel(pose([0, 0, 0], [0, 0, 0])))
+        tracker.add_pose(pose([0.5, 0, 0], [2, 0, 0]))
+        existing_poses = [pose([0, 0, 0], [0, 0, 0]), pose([0.5, 0, 0], [2, 0, 0])]
+
+        # The translations [0, 0, 0, 2, 0, 0] have a variance of 5/9. Adding [2, 2, 2] increases it to 80/81,
+        # so by 700/9 = 77.78 percent. The rotations are the translations scaled by 1/4, so their variance increases
+        # by the same percentage.
+        spread_pose = pose([0.5, 0.5, 0.5], [2, 2, 2])
+        # Adding [0, 0, 0] decreases the variances to 32/81 and 2/81 respectively
+        repeated_pose = pose([0, 0, 0], [0, 0, 0])
+
+        self.assertTrue(tracker.is_novel(spread_pose))
+        self.assertTrue(bproc.camera.check_novel_pose(spread_pose, existing_poses, True, True, 77.7, 77.7))
+        # Just above the increase of the rotation or the translation variance
+        self.assertFalse(bproc.camera.check_novel_pose(spread_pose, existing_poses, True, True, 77.8, 77.7))
+        self.assertFalse(bproc.camera.check_novel_pose(spread_pose, existing_poses, True, True, 77.7, 77.8))
+        # Thresholds of disabled checks are ignored
+        self.assertTrue(bproc.camera.check_novel_pose(spread_pose, existing_poses, False, True, 77.8, 77.7))
+        self.assertTrue(bproc.camera.check_novel_pose(spread_pose, existing_poses, True, False, 77.7, 77.8))
+
+        # A decreasing variance is never novel, not even without a threshold
+        self.assertFalse(bproc.camera.check_novel_pose(repeated_pose, existing_poses, True, True))
+        self.assertFalse(bproc.camera.check_novel_pose(repeated_pose, existing_poses, True, False))
+        self.assertFalse(bproc.camera.check_novel_pose(repeated_pose, existing_poses, False, True))
+        self.assertTrue(bproc.camera.check_novel_pose(repeated_pose, existing_poses, False, False))
+
+        # The candidates are checked independently of each other and are not added
+        np.testing.assert_array_equal(tracker.are_novel(np.array([spread_pose, repeated_pose, spread_pose])),
+                                      [True, False, True])
+        self.assertEqual(len(tracker), 2)
+        self.assertFalse(tracker.add_pose_if_novel(repeated_pose))
+        self.assertTrue(tracker.add_pose_if_novel(spread_pose))
+        self.assertEqual(len(tracker), 3)
+        # Adding the same pose again decreases the variance of the translations from 80/81 to 35/36
+        self.assertFalse(tracker.is_novel(spread_pose))
@@ -59,6 +59,47 @@ def test_depth_at_points_via_raytracing(self):
         np.testing.assert_almost_equal(pc.reshape(-1, 3), pc2, decimal=3)
 
 
+    def test_ray_caster(self):
+        """ Tests if the batched ray caster leads to the same results as casting every ray separately via a bvh tree.
+        """
+        bproc.clean_up(True)
+        resource_folder = os.path.join("examples", "resources")
+        objs = bproc.loader.load_obj(os.path.join(resource_folder, "scene.obj"))
+        bvh_tree = bproc.object.create_bvh_tree_multi_objects(objs)
+        ray_caster = bproc.object.create_ray_caster_multi_objects(objs)
+
+        np.random.seed(0)
+        origin = np.array([0, -13.741, 4.1242])
+        directions = np.random.uniform(-1, 1, (1000, 3))
+        # Use small tiles, so the rays are split over multiple tiles and threads
+        ray_caster.rays_per_tile = 300
+        hits, locations, normals, indices, dists = ray_caster.ray_cast(origin, directions)
+        ray_caster.num_threads = 4
+        np.testing.assert_equal(ray_caster.ray_cast(origin, directions)[3], indices)
+
+        for i, direction in enumerate(directions):
+            location, normal, index, dist = bvh_tree.ray_cast(origin, direction)
+            self.assertEqual(hits[i], dist is not None)
+            if dist is not None:
+                np.testing.assert_almost_equal(locations[i], np.array(location), decimal=4)
+                self.assertEqual(indices[i], index)
+                self.assertAlmostEqual(dists[i], dist, places=4)
+                # The normals of non-planar faces differ slightly between their triangles
+                self.assertGreater(np.dot(normals[i], np.array(normal)), 0.99)
+            else:
+                self.assertEqual(indices[i], -1)
+                self.assertTrue(np.isnan(dists[i]))
+
+        # The ray caster can be used in place of the bvh tree
+        cam2world_matrix = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 0.2674988806247711, -0.9635581970214844, -13.741], [-0.0, 0.9635581970214844, 0.2674988806247711, 4.1242], [0.0, 0.0, 0.0, 1.0]])
+        bproc.camera.add_camera_pose(cam2world_matrix)
+        bproc.camera.set_resolution(160, 120)
+        depth = bproc.camera.depth_via_raytracing(bvh_tree)
+        depth2 = bproc.camera.depth_via_raytracing(ray_caster)
+        # Only rays which exactly hit an edge might differ
+        self.assertGreater(np.mean(np.isclose(depth, depth2, atol=1e-4)), 0.999)
+
+
     def test_depth_via_raytracing(self):
         """ Tests if depth image via raytracing and rendered depth image are identical.
         """
@@ -116,3 +116,16 @@ def test_duplicate_hierarchy(self):
         self.assertTrue((duplicate_root.get_location() == [0, 0, 0]).all())
         self.assertTrue((duplicate_child.get_location() == [1, 1, 1]).all())
         self.assertTrue((duplicate_grandchild.get_location() == [1, 1, 1]).all())
+
+    def test_mesh_as_trimesh(self):
+        bproc.clean_up(True)
+
+        cube = bproc.object.create_primitive("CUBE")
+        cube.set_scale([2, 1, 1])
+        mesh = cube.mesh_as_trimesh()
+
+        # the six quads of the cube are triangulated, while the mesh itself stays unchanged
+        self.assertEqual(mesh.faces.shape, (12, 3))
+        self.assertEqual(len(cube.get_mesh().polygons), 6)
+        self.assertTrue(mesh.is_watertight)
+        self.assertAlmostEqual(mesh.volume, 16.0)
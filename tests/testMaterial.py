@@ -0,0 +1,130 @@
+import blenderproc as bproc
+
+import unittest
+import os
+import json
+import tempfile
+import time
+
+import bpy
+
+from blenderproc.python.material import MaterialLoaderUtility
+from blenderproc.python.utility.ImageCache import ImageCache
+
+
+class UnitTestCheckMaterial(unittest.TestCase):
+
+    def test_asset_index(self):
+        """ Tests if the asset index is reused and rebuilt when asset folders or their content change.
+        """
+        with tempfile.TemporaryDirectory() as folder_path:
+            for asset in ["wood", "stone"]:
+                os.makedirs(os.path.join(folder_path, asset))
+                open(os.path.join(folder_path, asset, f"{asset}_Color.jpg"), "w").close()
+
+            indexed_assets = []
+
+            def index_asset(asset_path):
+                indexed_assets.append(os.path.basename(asset_path))
+                return {"color": sorted(os.listdir(asset_path))[0]} if os.listdir(asset_path) else None
+
+            expected = {"stone": {"color": "stone_Color.jpg"}, "wood": {"color": "wood_Color.jpg"}}
+            self.assertEqual(MaterialLoaderUtility.get_asset_index(folder_path, "test", index_asset), expected)
+            self.assertEqual(sorted(indexed_assets), ["stone", "wood"])
+            index_path = os.path.join(folder_path, ".blenderproc_test_index.json")
+            with open(index_path, encoding="utf-8") as file:
+                self.assertEqual(json.load(file)["assets"], expected)
+            # Only the index itself is left behind
+            self.assertEqual(sorted(os.listdir(folder_path)), [".blenderproc_test_index.json", "stone", "wood"])
+
+            # Nothing changed, so the index file is used
+            indexed_assets.clear()
+            self.assertEqual(MaterialLoaderUtility.get_asset_index(folder_path, "test", index_asset), expected)
+            self.assertEqual(indexed_assets, [])
+
+            # Changing the content of an asset folder rebuilds the index
+            time.sleep(0.01)
+            os.remove(os.path.join(folder_path, "wood", "wood_Color.jpg"))
+            self.assertEqual(MaterialLoaderUtility.get_asset_index(folder_path, "test", index_asset)["wood"], None)
+
+            # Adding an asset rebuilds the index
+            os.makedirs(os.path.join(folder_path, "metal"))
+            open(os.path.join(folder_path, "metal", "metal_Color.jpg"), "w").close()
+            indexed_assets.clear()
+            index = MaterialLoaderUtility.get_asset_index(folder_path, "test", index_asset)
+            self.assertEqual(sorted(index), ["metal", "stone", "wood"])
+            self.assertEqual(sorted(indexed_assets), ["metal", "stone", "wood"])
+
+            # A broken index file is ignored
+            with open(index_path, "w", encoding="utf-8") as file:
+                file.write("{")
+            self.assertEqual(sorted(MaterialLoaderUtility.get_asset_index(folder_path, "test", index_asset)),
+                             ["metal", "stone", "wood"])
+
+    def test_find_cc_materials_by_name(self):
+        """ Tests if all loaded cc materials with the given custom properties are found at once.
+        """
+        bproc.clean_up(True)
+        wood = MaterialLoaderUtility.create_new_cc_material("wood", {"cp_test_set": 1})
+        stone = MaterialLoaderUtility.create_new_cc_material("stone", {"cp_test_set": 1})
+        other_wood = MaterialLoaderUtility.create_new_cc_material("wood", {"cp_test_set": 2})
+
+        self.assertEqual(MaterialLoaderUtility.find_cc_materials_by_name({"cp_test_set": 1}),
+                         {"wood": wood, "stone": stone})
+        self.assertEqual(MaterialLoaderUtility.find_cc_materials_by_name({"cp_test_set": 2}), {"wood": other_wood})
+        self.assertEqual(MaterialLoaderUtility.find_cc_materials_by_name({"cp_test_set": 3}), {})
+        # Both lookups agree
+        self.assertEqual(MaterialLoaderUtility.find_cc_material_by_name("stone", {"cp_test_set": 1}), stone)
+
+        MaterialLoaderUtility.create_new_cc_material("wood", {"cp_test_set": 2})
+        with self.assertRaises(RuntimeError):
+            MaterialLoaderUtility.find_cc_materials_by_name({"cp_test_set": 2})
+
+    def test_image_cache(self):
+        """ Tests if images are shared per colorspace, their memory usage and if a downscale survives a reload.
+        """
+        bproc.clean_up(True)
+        ImageCache.clear()
+        with tempfile.TemporaryDirectory() as folder_path:
+            image_path = os.path.join(folder_path, "texture.png")
+            image = bpy.data.images.new("texture", 32, 16)
+            image.filepath_raw = image_path
+            image.file_format = "PNG"
+            image.save()
+            bpy.data.images.remove(image)
+
+            image = ImageCache.load(image_path)
+            self.assertEqual(ImageCache.load(image_path), image)
+            # None means the colorspace blender detected, which is sRGB for png files
+            self.assertEqual(ImageCache.load(image_path, "sRGB"), image)
+            self.assertTrue(ImageCache.contains(image_path, "sRGB"))
+            non_color_image = ImageCache.load(image_path, "Non-Color")
+            self.assertNotEqual(non_color_image, image)
+            self.assertEqual(non_color_image.colorspace_settings.name, "Non-Color")
+            self.assertEqual(ImageCache.get_memory_usage(), {"num_images": 2, "bytes": 2 * 32 * 16 * 4})
+
+            # The explicitly set colorspace is found again, when loading with None afterwards
+            ImageCache.clear()
+            explicit_image = ImageCache.load(image_path, "sRGB")
+            self.assertEqual(ImageCache.load(image_path), explicit_image)
+
+            ImageCache.clear()
+            ImageCache.set_max_resolution(8)
+            try:
+                image = ImageCache.load(image_path)
+                self.assertEqual(tuple(image.size), (8, 4))
+                self.assertEqual(tuple(ImageCache.load(image_path, allow_downscale=False).size), (8, 4))
+                self.assertEqual(tuple(ImageCache.load(image_path, "Non-Color", allow_downscale=False).size), (32, 16))
+                self.assertEqual(ImageCache.get_memory_usage(), {"num_images": 2, "bytes": (8 * 4 + 32 * 16) * 4})
+                # The downscaled pixels are kept, when blender reloads the image
+                image.reload()
+                self.assertEqual(tuple(image.size), (8, 4))
+            finally:
+                ImageCache.set_max_resolution(None)
+                ImageCache.clear()
+
+            # Removed images are no longer counted
+            ImageCache.load(image_path)
+            self.assertEqual(ImageCache.get_memory_usage()["num_images"], 1)
+            bproc.clean_up(True)
+            self.assertEqual(ImageCache.get_memory_usage(), {"num_images": 0, "bytes": 0})
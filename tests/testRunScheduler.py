@@ -0,0 +1,94 @@
+import blenderproc as bproc
+
+import unittest
+import os
+import sys
+import json
+import stat
+import tempfile
+import threading
+import time
+
+from blenderproc.python.utility.RunScheduler import RunScheduler
+from blenderproc.python.utility.Utility import output_dir_lock
+
+
+class UnitTestCheckRunScheduler(unittest.TestCase):
+
+    def test_run_scheduler(self):
+        """ Tests the seeds, arguments and retries of scheduled runs, using a fake blender binary.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            record_dir = os.path.join(temp_dir, "records")
+            os.makedirs(record_dir)
+            # Records every attempt, the first attempt of run 1 and all attempts of run 2 fail
+            fake_blender_path = os.path.join(temp_dir, "fake_blender")
+            with open(fake_blender_path, "w", encoding="utf-8") as file:
+                file.write(f"#!{sys.executable}\n"
+                           "import json, os, sys\n"
+                           "script, run_temp_dir, output_dir, record_dir = sys.argv[sys.argv.index('--') + 1:]\n"
+                           "os.makedirs(run_temp_dir)\n"
+                           "run_index = int(os.environ['BLENDER_PROC_RUN_INDEX'])\n"
+                           "attempt = len([f for f in os.listdir(record_dir) if f.startswith(f'{run_index}_')]) + 1\n"
+                           "with open(os.path.join(record_dir, f'{run_index}_{attempt}.json'), 'w') as f:\n"
+                           "    json.dump({'seed': os.environ['BLENDER_PROC_RANDOM_SEED'], 'output_dir': output_dir,\n"
+                           "               'threads': os.environ['BLENDER_PROC_CPU_THREADS'], 'script': script}, f)\n"
+                           "sys.exit(1 if (run_index, attempt) == (1, 1) or run_index == 2 else 0)\n")
+            os.chmod(fake_blender_path, os.stat(fake_blender_path).st_mode | stat.S_IEXEC)
+
+            scheduler = RunScheduler(fake_blender_path, "script.py", ["output/{run}", record_dir], dict(os.environ),
+                                     os.path.join(temp_dir, "temp"), num_runs=3, num_workers=2, base_seed=10,
+                                     max_retries=1, cpu_threads=3)
+            self.assertFalse(scheduler.run())
+
+            records = {}
+            for file_name in os.listdir(record_dir):
+                with open(os.path.join(record_dir, file_name), "r", encoding="utf-8") as file:
+                    records[file_name[:-len(".json")]] = json.load(file)
+            # Run 0 succeeds at once, run 1 after one retry and run 2 fails in both attempts
+            self.assertEqual(sorted(records), ["0_1", "1_1", "1_2", "2_1", "2_2"])
+            for name, record in records.items():
+                run_index = int(name.split("_")[0])
+                # Retries use the same seed
+                self.assertEqual(record, {"seed": str(10 + run_index), "output_dir": f"output/{run_index}",
+                                          "threads": "3", "script": "script.py"})
+            # The temporary directories of the runs are removed
+            self.assertEqual(sorted(os.listdir(os.path.join(temp_dir, "temp"))),
+                             ["run_0.log", "run_1.log", "run_2.log"])
+
+        # The cores are split between the workers, but there are never more workers than runs
+        scheduler = RunScheduler("blender", "script.py", [], {}, "temp", num_runs=2, num_workers=4)
+        self.assertEqual(scheduler.num_workers, 2)
+        self.assertEqual(scheduler.cpu_threads, max(1, (os.cpu_count() or 1) // 2))
+        self.assertEqual(RunScheduler("blender", "script.py", [], {}, "temp", num_runs=2, num_workers=1).cpu_threads,
+                         0)
+        with self.assertRaises(ValueError):
+            RunScheduler("blender", "script.py", [], {}, "temp", num_runs=0, num_workers=1)
+
+    def test_output_dir_lock(self):
+        """ Tests if the output dir lock is only held by one writer at a time.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_dir = os.path.join(temp_dir, "output")
+            events = []
+            acquired = threading.Event()
+
+            def hold_lock():
+                with output_dir_lock(output_dir):
+                    events.append("first acquired")
+                    acquired.set()
+                    time.sleep(0.2)
+                    events.append("first released")
+
+            thread = threading.Thread(target=hold_lock)
+            thread.start()
+            acquired.wait()
+            with output_dir_lock(output_dir):
+                events.append("second acquired")
+            thread.join()
+
+            self.assertEqual(events, ["first acquired", "first released", "second acquired"])
+            # The lock is released again
+            with output_dir_lock(output_dir):
+                pass
+            self.assertEqual(os.listdir(output_dir), [".blenderproc.lock"])
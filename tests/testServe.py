@@ -0,0 +1,171 @@
+import blenderproc as bproc
+
+import unittest
+import os
+import sys
+import json
+import stat
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from unittest import mock
+
+from blenderproc.python.utility.GlobalStorage import GlobalStorage
+from blenderproc.python.utility.ServeUtility import BlenderWorkerServer, submit_job, shutdown_server, \
+    get_authkey_path, _BlenderWorker
+
+
+class _ThreadWorker:
+    """ Answers the jobs of the server in a thread instead of a blender process, the script itself is not run. """
+
+    def __init__(self, address, authkey, worker_id):
+        self.returncode = None
+        self._thread = threading.Thread(target=self._run, args=(address, authkey, worker_id), daemon=True)
+        self._thread.start()
+
+    def _run(self, address, authkey, worker_id):
+        with Client(address, authkey=authkey) as conn:
+            conn.send(worker_id)
+            while True:
+                job = conn.recv()
+                if job is None:
+                    self.returncode = 0
+                    return
+                if job["args"] == ["crash"]:
+                    # Closing the connection without an answer looks like a crashed blender process
+                    self.returncode = 1
+                    return
+                conn.send({"success": job["args"] != ["fail"], "error": None, "duration": 0.0,
+                           "echo": [job["script"], job["args"], job["seed"], job["cwd"]]})
+
+    def poll(self):
+        return None if self._thread.is_alive() else self.returncode
+
+    def wait(self):
+        self._thread.join()
+        return self.returncode
+
+
+class _ThreadWorkerServer(BlenderWorkerServer):
+
+    def _start_worker(self, worker_id):
+        process = _ThreadWorker(self._worker_listener.address, self._worker_authkey, worker_id)
+        return process, self._worker_connections[worker_id].get(timeout=10)
+
+
+class UnitTestCheckServe(unittest.TestCase):
+
+    def test_serve_protocol(self):
+        """ Tests the requests and responses between clients, the server and its workers, without starting blender.
+        """
+        with tempfile.TemporaryDirectory() as config_dir, mock.patch.dict(os.environ, {"XDG_CONFIG_HOME": config_dir}):
+            server = _ThreadWorkerServer("blender", 2, config_dir, port=0)
+            port = server.address[1]
+            server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+            server_thread.start()
+
+            # A random key is written to a file, which only the current user can access
+            authkey_path = get_authkey_path(port)
+            self.assertEqual(authkey_path, os.path.join(config_dir, "blenderproc", f"serve_{port}.key"))
+            self.assertEqual(stat.S_IMODE(os.stat(authkey_path).st_mode), 0o600)
+            with open(authkey_path, "r", encoding="utf-8") as file:
+                self.assertEqual(len(file.read()), 64)
+            with self.assertRaises(AuthenticationError):
+                Client(("localhost", port), authkey=b"blenderproc")
+
+            result = submit_job("script.py", ["--out", "a"], seed=3, port=port)
+            self.assertTrue(result["success"])
+            self.assertIn(result["worker"], [0, 1])
+            self.assertEqual(result["echo"], [os.path.abspath("script.py"), ["--out", "a"], 3, os.getcwd()])
+            self.assertFalse(submit_job("script.py", ["fail"], port=port)["success"])
+
+            # A crashed worker fails its job and is restarted
+            result = submit_job("script.py", ["crash"], port=port)
+            self.assertFalse(result["success"])
+            self.assertEqual(result["error"], "The blender worker crashed with exit code 1.")
+            results = [submit_job("script.py", port=port) for _ in range(4)]
+            self.assertTrue(all(result["success"] for result in results))
+
+            shutdown_server(port)
+            server_thread.join(timeout=10)
+            self.assertFalse(server_thread.is_alive())
+            self.assertFalse(os.path.exists(authkey_path))
+            with self.assertRaises(RuntimeError):
+                submit_job("script.py", port=port)
+
+    def test_serve_job_isolation(self):
+        """ Tests if modules, sys.path, the random state, the GlobalStorage and the image cache settings are reset
+        between two jobs and if failed background writes are reported by their job.
+        """
+        with tempfile.TemporaryDirectory() as job_dir:
+            script_path = os.path.join(job_dir, "script.py")
+            with open(script_path, "w", encoding="utf-8") as file:
+                file.write("import blenderproc as bproc\n"
+                           "import json\n"
+                           "import os\n"
+                           "import random\n"
+                           "import sys\n"
+                           "import numpy as np\n"
+                           "from blenderproc.python.utility.GlobalStorage import GlobalStorage\n"
+                           "from blenderproc.python.utility.ImageCache import ImageCache\n"
+                           "from blenderproc.python.writer.WriterUtility import _HDF5WriterPool\n"
+                           "sys.path.append(os.path.dirname(os.path.abspath(__file__)))\n"
+                           "import serve_test_helper\n"
+                           "bproc.init()\n"
+                           "output = {'value': serve_test_helper.VALUE, 'random': random.random(),\n"
+                           "          'np_random': float(np.random.rand()),\n"
+                           "          'had_key': GlobalStorage.is_in_storage('serve_test_key'),\n"
+                           "          'max_resolution': ImageCache._max_resolution}\n"
+                           "GlobalStorage.set('serve_test_key', True)\n"
+                           "ImageCache.set_max_resolution(64)\n"
+                           "with open(sys.argv[1], 'w', encoding='utf-8') as file:\n"
+                           "    json.dump(output, file)\n"
+                           "if len(sys.argv) > 2:\n"
+                           "    # Queue a frame, which can not be written, as its directory does not exist\n"
+                           "    _HDF5WriterPool.submit(sys.argv[2], {'a': np.zeros(1)}, None, None, 1, None)\n")
+
+            def run(value, seed, extra_args=None):
+                # The helper module has the same name in every job, but a different content
+                with open(os.path.join(job_dir, "serve_test_helper.py"), "w", encoding="utf-8") as file:
+                    file.write(f"VALUE = {value}\n")
+                output_path = os.path.join(job_dir, "output.json")
+                result = _BlenderWorker.run_job({"script": script_path, "args": [output_path] + (extra_args or []),
+                                                 "seed": seed, "cwd": job_dir}, os.path.join(job_dir, "temp"))
+                if extra_args is None:
+                    self.assertTrue(result["success"], result["error"])
+                with open(output_path, "r", encoding="utf-8") as file:
+                    return json.load(file), result
+
+            original_path = list(sys.path)
+            GlobalStorage.clear()
+            try:
+                first, _ = run(1, 42)
+                self.assertEqual(first["value"], 1)
+                self.assertIsNone(first["max_resolution"])
+                self.assertNotIn("serve_test_helper", sys.modules)
+                self.assertEqual(sys.path, original_path)
+                self.assertFalse(GlobalStorage.is_in_storage("serve_test_key"))
+
+                # bproc.init() works again and the same seed gives the same random numbers
+                second, _ = run(22, 42)
+                self.assertEqual(second["value"], 22)
+                self.assertFalse(second["had_key"])
+                # The image cache settings of the last job are reset
+                self.assertIsNone(second["max_resolution"])
+                self.assertEqual(second["random"], first["random"])
+                self.assertEqual(second["np_random"], first["np_random"])
+
+                # Without a seed, the sequence of the last job is not continued
+                third, _ = run(333, None)
+                self.assertNotEqual(third["random"], first["random"])
+
+                # Frames which fail to be written in the background fail the job which queued them
+                _, result = run(4, None, [os.path.join(job_dir, "missing", "0.hdf5")])
+                self.assertFalse(result["success"])
+                self.assertIsNotNone(result["error"])
+                # The error is not reported again by the next job
+                run(5, None)
+            finally:
+                GlobalStorage.clear()
+                bproc.init()
@@ -48,4 +48,117 @@ def test_math_util_transformation_mat(self):
         cam2world_matrix = bproc.math.build_transformation_mat(location, rotation_matrix)
 
         for x, y in zip(np.reshape(correct_cam2world_matrix, -1).tolist(), np.reshape(cam2world_matrix, -1).tolist()):
-            self.assertAlmostEqual(x, y)
\ No newline at end of file
+            self.assertAlmostEqual(x, y)
+
+    def test_coco_instance_annotations(self):
+        """ Tests if the annotations computed for all instances at once match the ones computed per binary mask.
+        """
+        from blenderproc.python.writer.CocoWriterUtility import _CocoWriterUtility
+        from blenderproc.python.writer.CocoRleUtility import binary_mask_to_rle, rle_to_binary_mask, \
+            rle_to_compressed_rle, compressed_rle_to_rle
+
+        np.random.seed(0)
+        inst_segmap = np.random.randint(0, 5, (48, 64))
+        instance_2_category_map = {1: 3, 2: 3, 4: 7}
+        annotations = _CocoWriterUtility.create_instance_annotations(1, 0, inst_segmap, instance_2_category_map,
+                                                                     "rle")
+
+        self.assertEqual(len(annotations), len(instance_2_category_map))
+        for annotation, inst in zip(annotations, sorted(instance_2_category_map.keys())):
+            binary_mask = inst_segmap == inst
+            expected = _CocoWriterUtility.create_annotation_info(annotation["id"], 0, instance_2_category_map[inst],
+                                                                 binary_mask, "rle")
+            self.assertEqual(annotation["segmentation"], expected["segmentation"])
+            self.assertEqual(annotation["bbox"], expected["bbox"])
+            self.assertEqual(annotation["area"], expected["area"])
+            np.testing.assert_array_equal(rle_to_binary_mask(annotation["segmentation"]), binary_mask)
+
+            rle = binary_mask_to_rle(binary_mask)
+            self.assertEqual(compressed_rle_to_rle(rle_to_compressed_rle(rle)), rle)
+            np.testing.assert_array_equal(rle_to_binary_mask(rle_to_compressed_rle(rle)), binary_mask)
+
+    def test_triangle_area_sampler(self):
+        """ Tests if points are sampled uniformly on the triangles and can be mapped back to their group.
+        """
+        from blenderproc.python.sampler.TriangleAreaSampler import TriangleAreaSampler
+
+        np.random.seed(0)
+        # Two floors, the second one is three times as large and lies above the first one
+        floors = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0]], [[0, 0, 0], [1, 1, 0], [0, 1, 0]],
+                           [[0, 0, 2], [3, 0, 2], [0, 1, 2]], [[3, 0, 2], [3, 1, 2], [0, 1, 2]]])
+        sampler = TriangleAreaSampler(floors, np.array([0, 0, 1, 1]), [0, 0, 1])
+        self.assertAlmostEqual(sampler.total_area(), 4)
+
+        points, group_ids = sampler.sample(10000)
+        self.assertAlmostEqual(np.mean(group_ids == 1), 0.75, delta=0.02)
+        np.testing.assert_array_equal(group_ids, sampler.find_groups_below(points))
+
+        clipped = sampler.clip_to_xy_rectangle([0.5, 0], [2, 0.5])
+        self.assertAlmostEqual(clipped.total_area(), 1)
+        np.testing.assert_array_equal(sampler.find_groups_below([[0.5, 0.5, 1], [2, 0.5, 1], [0.5, 0.5, 3]]),
+                                      [0, -1, 1])
+
+    def test_upper_region_sampler(self):
+        """ Tests if points are sampled uniformly over the upper surface of an object with overlapping faces.
+        """
+        import bpy
+
+        bproc.clean_up(True)
+        np.random.seed(0)
+        # A floor of 2x2 with a shelf at height 1 covering its right half, so both halves are equally large from above
+        mesh = bpy.data.meshes.new("shelf")
+        mesh.from_pydata([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0], [0, -1, 1], [1, -1, 1], [1, 1, 1],
+                          [0, 1, 1]], [], [[0, 1, 2, 3], [4, 5, 6, 7]])
+        shelf = bproc.object.create_from_blender_mesh(mesh)
+
+        sampler = bproc.sampler.UpperRegionSampler(shelf, min_height=0.5, max_height=0.5, use_ray_trace_check=True)
+        points = sampler.sample(4000)
+        # The points are placed above the top of the bounding box
+        np.testing.assert_allclose(points[:, 2], 1.5)
+        self.assertTrue(np.all(np.abs(points[:, :2]) <= 1 + 1e-6))
+        # Without rejecting the covered part of the floor, only a third of the points would lie above the left half
+        self.assertAlmostEqual(np.mean(points[:, 0] < 0), 0.5, delta=0.03)
+        self.assertAlmostEqual(np.mean(points[:, 0] < 0.5), 0.75, delta=0.03)
+
+    def test_remove_segmap_noise(self):
+        """ Tests if the batched segmap denoising matches replacing the noisy pixels one after another.
+        """
+        from blenderproc.python.postprocessing.PostProcessingUtility import _PostProcessingUtility
+
+        np.random.seed(0)
+        segmaps = []
+        for _ in range(3):
+            segmap = np.kron(np.random.randint(0, 6, (8, 8)) * 3000.0, np.ones((6, 6)))
+            noisy = np.random.rand(*segmap.shape) < 0.1
+            segmap[noisy] = np.random.uniform(1e5, 1e8, noisy.sum())
+            segmaps.append(np.repeat(segmap[:, :, np.newaxis], 3, axis=2).astype(np.float32))
+
+        denoised = bproc.postprocessing.remove_segmap_noise(np.stack(segmaps))
+        for segmap, denoised_segmap in zip(segmaps, denoised):
+            np.testing.assert_array_equal(denoised_segmap,
+                                          _PostProcessingUtility.remove_segmap_noise_per_pixel(segmap.copy()))
+
+    def test_rasterize_triangles(self):
+        """ Tests the CPU rasterizer with two overlapping squares, one of them crossing the near plane.
+        """
+        from blenderproc.python.renderer.RasterizerUtility import rasterize_triangles
+
+        def square(size, z_near, z_far):
+            corners = np.array([[-size, -size, z_near], [size, -size, z_near], [size, size, z_far],
+                                [-size, size, z_far]])
+            return np.stack([corners[[0, 1, 2]], corners[[0, 2, 3]]])
+
+        K = np.array([[10, 0, 15.5], [0, 10, 15.5], [0, 0, 1]])
+        # The front square covers the pixels within +-5 around the principal point, the back square is tilted, s.t. it
+        # covers the whole image, but is partly behind the camera
+        triangles = np.concatenate([square(1, 2, 2), square(100, -47, 53)])
+        depth, triangle_ids, barycentrics = rasterize_triangles(triangles, K, 32, 32, clip_start=0.5, clip_end=100)
+
+        front = triangle_ids < 2
+        expected_front = np.zeros((32, 32), dtype=bool)
+        expected_front[11:21, 11:21] = True
+        np.testing.assert_array_equal(front, expected_front)
+        np.testing.assert_allclose(depth[front], 2)
+        self.assertTrue(np.all(triangle_ids >= 0))
+        self.assertTrue(np.all(depth[~front] >= 0.5))
+        np.testing.assert_allclose(barycentrics.sum(axis=-1), 1)
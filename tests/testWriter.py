@@ -0,0 +1,146 @@
+import blenderproc as bproc
+
+import unittest
+import os
+import json
+import tempfile
+import numpy as np
+
+from blenderproc.python.writer.WriterUtility import _HDF5WriterPool
+
+
+class UnitTestCheckWriter(unittest.TestCase):
+
+    def test_hdf5_writer_pool(self):
+        """ Tests if frames queued in the background are written and errors are raised by flush.
+        """
+        import h5py
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, f"{i}.hdf5") for i in range(5)]
+            for i, path in enumerate(paths):
+                _HDF5WriterPool.submit(path, {"colors": np.full((16, 16, 3), i, dtype=np.uint8)}, "gzip", None,
+                                       num_worker=2, max_pending_frames=2)
+            self.assertLessEqual(len(_HDF5WriterPool.pending), 2)
+            bproc.writer.flush_hdf5_writes()
+            self.assertEqual(len(_HDF5WriterPool.pending), 0)
+            for i, path in enumerate(paths):
+                with h5py.File(path, "r") as file:
+                    np.testing.assert_array_equal(np.array(file["colors"]), i)
+
+            # The folder of the second frame does not exist, so writing it fails in the background
+            _HDF5WriterPool.submit(os.path.join(temp_dir, "5.hdf5"), {"colors": np.zeros(3)}, "gzip", None, 2, 4)
+            _HDF5WriterPool.submit(os.path.join(temp_dir, "missing", "6.hdf5"), {"colors": np.zeros(3)}, "gzip",
+                                   None, 2, 4)
+            _HDF5WriterPool.submit(os.path.join(temp_dir, "7.hdf5"), {"colors": np.zeros(3)}, "gzip", None, 2, 4)
+            with self.assertRaises(OSError):
+                bproc.writer.flush_hdf5_writes()
+            # All other frames are still written and nothing stays queued
+            self.assertEqual(len(_HDF5WriterPool.pending), 0)
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "7.hdf5")))
+            _HDF5WriterPool.close()
+
+    def test_hdf5_append_reservations(self):
+        """ Tests if appended frames reserve their indices without leaving files behind, also if writing fails.
+        """
+        import bpy
+        import h5py
+
+        bpy.context.scene.frame_start = 0
+        bpy.context.scene.frame_end = 2
+        colors = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(2)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # The index reserved by another process is skipped
+            open(os.path.join(temp_dir, "0.hdf5.reserved"), "wb").close()
+            bproc.writer.write_hdf5(temp_dir, {"colors": colors}, append_to_existing_output=True)
+            bproc.writer.write_hdf5(temp_dir, {"colors": colors}, append_to_existing_output=True, num_worker=2)
+            bproc.writer.flush_hdf5_writes()
+            expected_files = [".blenderproc.lock", "0.hdf5.reserved", "1.hdf5", "2.hdf5", "3.hdf5", "4.hdf5"]
+            self.assertEqual(sorted(os.listdir(temp_dir)), expected_files)
+            for index, color in zip(range(1, 5), [0, 1, 0, 1]):
+                with h5py.File(os.path.join(temp_dir, f"{index}.hdf5"), "r") as file:
+                    np.testing.assert_array_equal(np.array(file["colors"]), color)
+
+            # A failed write leaves neither incomplete files nor reservations behind
+            with self.assertRaises(Exception):
+                bproc.writer.write_hdf5(temp_dir, {"colors": colors, "invalid": [None, None]},
+                                        append_to_existing_output=True)
+            self.assertEqual(sorted(os.listdir(temp_dir)), expected_files)
+            with self.assertRaises(Exception):
+                bproc.writer.write_hdf5(temp_dir, {"colors": colors, "invalid": [None, None]},
+                                        append_to_existing_output=True, num_worker=2)
+                bproc.writer.flush_hdf5_writes()
+            self.assertEqual(sorted(os.listdir(temp_dir)), expected_files)
+
+            # The next frames directly follow the existing ones again
+            bproc.writer.write_hdf5(temp_dir, {"colors": colors}, append_to_existing_output=True)
+            self.assertEqual(sorted(os.listdir(temp_dir)), expected_files + ["5.hdf5", "6.hdf5"])
+        _HDF5WriterPool.close()
+
+    def test_coco_shards(self):
+        """ Tests if sharded coco annotations continue the numbering of existing outputs and can be consolidated.
+        """
+        import bpy
+
+        np.random.seed(0)
+        bpy.context.scene.frame_start = 0
+        bpy.context.scene.frame_end = 2
+
+        def write(output_dir, append_to_existing_output=True, use_shards=True):
+            # Two frames, each with two instances of different categories on a background
+            segmaps = [np.kron(np.random.randint(0, 3, (4, 4)), np.ones((8, 8), dtype=np.int64)) for _ in range(2)]
+            attribute_maps = [[{"idx": 0, "category_id": 0}, {"idx": 1, "category_id": 3},
+                               {"idx": 2, "category_id": 5}]] * 2
+            colors = [np.zeros((32, 32, 3), dtype=np.uint8)] * 2
+            bproc.writer.write_coco_annotations(output_dir, segmaps, attribute_maps, colors,
+                                                append_to_existing_output=append_to_existing_output,
+                                                use_shards=use_shards)
+            return sum(len(np.unique(segmap[segmap > 0])) for segmap in segmaps)
+
+        def load_manifest(output_dir):
+            with open(os.path.join(output_dir, "coco_annotations_shards", "manifest.json"), encoding="utf-8") as f:
+                return json.load(f)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            # An already existing coco_annotations.json is continued by the shards
+            num_annotations = write(output_dir, use_shards=False)
+            num_annotations += write(output_dir)
+            manifest = load_manifest(output_dir)
+            self.assertEqual(manifest["shards"], ["shard_000000.jsonl"])
+            self.assertTrue(manifest["append_to_base"])
+            self.assertEqual(manifest["next_image_id"], 4)
+            self.assertEqual(manifest["last_annotation_id"], num_annotations)
+            self.assertEqual(sorted(category["id"] for category in manifest["categories"]), [3, 5])
+
+            # Every further call resumes from the manifest and rolls over to a new shard
+            num_annotations += write(output_dir)
+            num_annotations += write(output_dir)
+            manifest = load_manifest(output_dir)
+            self.assertEqual(manifest["shards"], ["shard_000000.jsonl", "shard_000001.jsonl", "shard_000002.jsonl"])
+            self.assertEqual(manifest["next_image_id"], 8)
+            self.assertEqual(manifest["last_annotation_id"], num_annotations)
+            with open(os.path.join(output_dir, "coco_annotations_shards", "shard_000002.jsonl"),
+                      encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f]
+            self.assertEqual([entry["image"]["id"] for entry in entries], [6, 7])
+            self.assertEqual(entries[1]["image"]["file_name"], "images/000007.png")
+            for entry in entries:
+                self.assertTrue(all(annotation["image_id"] == entry["image"]["id"]
+                                    for annotation in entry["annotations"]))
+
+            bproc.writer.consolidate_coco_annotations(output_dir)
+            self.assertFalse(os.path.exists(os.path.join(output_dir, "coco_annotations_shards")))
+            with open(os.path.join(output_dir, "coco_annotations.json"), encoding="utf-8") as f:
+                coco_annotations = json.load(f)
+            self.assertEqual([image["id"] for image in coco_annotations["images"]], list(range(8)))
+            self.assertEqual(sorted(annotation["id"] for annotation in coco_annotations["annotations"]),
+                             list(range(1, num_annotations + 1)))
+            self.assertEqual(len(coco_annotations["categories"]), 2)
+
+            # Without appending, the old shards are removed
+            write(output_dir)
+            write(output_dir, append_to_existing_output=False)
+            manifest = load_manifest(output_dir)
+            self.assertEqual(manifest["shards"], ["shard_000000.jsonl"])
+            self.assertFalse(manifest["append_to_base"])
+            self.assertEqual(manifest["next_image_id"], 2)